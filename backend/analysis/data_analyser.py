@@ -10,6 +10,7 @@ This class provides methods to:
 5. Create network visualizations
 6. Analyze exchange pair performance
 7. Analyze currency relationships
+8. Summarize opportunity lifecycles (durations and peaks per strategy)
 
 Usage:
     from data_analyser import DataAnalyser
@@ -17,6 +18,9 @@ Usage:
     analyser = DataAnalyser("path/to/your/input_file.csv")
     analyser.classify_strategies()
     analyser.analyze_all()
+
+    # Or a Parquet dataset written by ParquetArbitrageStore (needs pyarrow), reading only some partitions
+    analyser = DataAnalyser("backend/app/external/utilities/crypto_arbitrage_3", cryptos=["BTC"], start_date="2025-05-08")
 """
 
 import pandas as pd
@@ -47,26 +51,56 @@ try:
 except ImportError:
     HOLOVIEWS_AVAILABLE = False
 
+try:
+    import pyarrow
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
 
 class DataAnalyser:
     """A class to perform comprehensive analysis of arbitrage data."""
     
-    def __init__(self, input_file):
+    # Columns classify_strategies needs from a Parquet dataset; the per-venue price columns are never read
+    CLASSIFY_COLUMNS = ['timestamp', 'crypto', 'strategy', 'buy_exchange', 'buy_currency',
+                        'sell_exchange', 'sell_currency', 'arbitrage_percentage', 'total_fees', 'arbitrage_after_fees']
+
+    def __init__(self, input_file, cryptos=None, start_date=None, end_date=None):
         """
         Initialize the DataAnalyser with the input CSV file.
         
         Args:
-            input_file (str): Path to the CSV file with arbitrage data.
+            input_file (str): Path to the CSV file with arbitrage data, or to a Parquet dataset
+                directory (date=YYYY-MM-DD/crypto=XXX partitions) written by ParquetArbitrageStore.
+            cryptos (list): Parquet only, cryptos to read (all when None).
+            start_date, end_date (str): Parquet only, inclusive 'YYYY-MM-DD' date partitions to read.
         """
         if not os.path.exists(input_file):
             raise FileNotFoundError(f"Input file '{input_file}' does not exist.")
         
         self.input_file = input_file
+        self.is_columnar = os.path.isdir(input_file)
+        if self.is_columnar and not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow is required to read Parquet datasets (pip install pyarrow)")
+        self.cryptos = cryptos
+        self.start_date = start_date
+        self.end_date = end_date
         self.classified_file = None
         self.df = None
-        self.base_output_name = os.path.splitext(self.input_file)[0]
-
-    def _load_data(self, file_path=None, required_columns=None):
+        self.base_output_name = os.path.splitext(self.input_file.rstrip(os.sep))[0]
+
+    def _partition_filters(self):
+        """pyarrow filters selecting the requested crypto and date partitions"""
+        filters = []
+        if self.cryptos:
+            filters.append(('crypto', 'in', list(self.cryptos)))
+        if self.start_date:
+            filters.append(('date', '>=', self.start_date))
+        if self.end_date:
+            filters.append(('date', '<=', self.end_date))
+        return filters or None
+
+    def _load_data(self, file_path=None, required_columns=None, columns=None):
         """Helper function to load data and check for required columns."""
         file_to_load = file_path if file_path else self.input_file
         
@@ -75,7 +109,11 @@ class DataAnalyser:
             return False
             
         try:
-            self.df = pd.read_csv(file_to_load)
+            if os.path.isdir(file_to_load):
+                # Typed Parquet dataset: only the requested columns and partitions are read
+                self.df = pd.read_parquet(file_to_load, columns=columns, filters=self._partition_filters())
+            else:
+                self.df = pd.read_csv(file_to_load)
             if required_columns:
                 missing = [col for col in required_columns if col not in self.df.columns]
                 if missing:
@@ -91,18 +129,19 @@ class DataAnalyser:
         Classify strategies and save the enriched dataset.
         This is a prerequisite for most other analysis methods.
         """
-        if not self._load_data(self.input_file, ['strategy']):
+        if not self._load_data(self.input_file, ['strategy'], columns=self.CLASSIFY_COLUMNS if self.is_columnar else None):
             return False
 
         try:
-            # Extract exchange patterns
-            exchange_pattern = r"Buy at (\w+) in (\w+) -> Sell at (\w+) in (\w+)"
-            
-            extracted_data = self.df['strategy'].str.extract(exchange_pattern)
-            self.df['buy_exchange'] = extracted_data[0]
-            self.df['buy_currency'] = extracted_data[1]
-            self.df['sell_exchange'] = extracted_data[2]
-            self.df['sell_currency'] = extracted_data[3]
+            if not self.is_columnar:
+                # Extract exchange patterns (the Parquet dataset already stores them as columns)
+                exchange_pattern = r"Buy at (\w+) in (\w+) -> Sell at (\w+) in (\w+)"
+                
+                extracted_data = self.df['strategy'].str.extract(exchange_pattern)
+                self.df['buy_exchange'] = extracted_data[0]
+                self.df['buy_currency'] = extracted_data[1]
+                self.df['sell_exchange'] = extracted_data[2]
+                self.df['sell_currency'] = extracted_data[3]
             
             # Create strategy_class and strategy_id
             self.df['strategy_class'] = self.df['buy_exchange'] + "_" + self.df['buy_currency'] + \
@@ -119,7 +158,9 @@ class DataAnalyser:
             self.df['arbitrage_type'] = np.select(conditions, choices, default='UNKNOWN')
             
             # Clean arbitrage_after_fees column
-            if 'arbitrage_after_fees' in self.df.columns:
+            if self.is_columnar:
+                self.df['arbitrage_after_fees_value'] = self.df['arbitrage_after_fees']
+            elif 'arbitrage_after_fees' in self.df.columns:
                  self.df['arbitrage_after_fees_value'] = self.df['arbitrage_after_fees'].astype(str).str.replace('$', '', regex=False).astype(float)
             else:
                 print("Warning: 'arbitrage_after_fees' column not found. Profit analysis might be affected.")
@@ -527,6 +568,56 @@ class DataAnalyser:
         self.analyze_currency_relationships()
         print("\nAll analyses complete.")
 
+    def analyze_lifecycle(self, lifecycle_file):
+        """
+        Summarize an opportunity lifecycle CSV (crypto_arbitrage_lifecycle_<date>.csv, one open/update/close
+        row per event): occurrences, durations and peak net profit per strategy, from the close events only,
+        with no re-counting of per-tick rows.
+
+        Args:
+            lifecycle_file (str): Path to the lifecycle CSV written by CSVTracker.write_lifecycle_events.
+        """
+        required_columns = ['event', 'crypto', 'buy_exchange', 'buy_currency', 'sell_exchange', 'sell_currency',
+                            'duration_seconds', 'peak_net_profit']
+        if not self._load_data(lifecycle_file, required_columns):
+            print("Error: Could not load lifecycle data or missing required columns.")
+            return False
+
+        try:
+            closed = self.df[self.df['event'] == 'close'].copy()
+            if closed.empty:
+                print("No closed opportunities in the lifecycle data.")
+                return False
+            closed['strategy_id'] = closed['buy_exchange'] + "_" + closed['buy_currency'] + \
+                                    "_TO_" + closed['sell_exchange'] + "_" + closed['sell_currency']
+
+            summary = closed.groupby(['crypto', 'strategy_id']).agg(
+                occurrences=('strategy_id', 'size'),
+                total_duration_seconds=('duration_seconds', 'sum'),
+                mean_duration_seconds=('duration_seconds', 'mean'),
+                max_duration_seconds=('duration_seconds', 'max'),
+                mean_peak_net_profit=('peak_net_profit', 'mean'),
+                max_peak_net_profit=('peak_net_profit', 'max')
+            ).reset_index().sort_values('total_duration_seconds', ascending=False)
+
+            summary_output = os.path.splitext(lifecycle_file)[0] + "_summary.csv"
+            summary.to_csv(summary_output, index=False)
+            print(f"Lifecycle summary saved to {summary_output}")
+
+            print("\n=== Opportunity Lifecycle Summary ===")
+            print(f"Closed opportunities: {len(closed)}")
+            print(f"Mean duration: {closed['duration_seconds'].mean():.1f}s")
+            print("\nTop 5 Longest-Lived Strategies:")
+            for i, row in enumerate(summary.head(5).itertuples()):
+                print(f"{i+1}. {row.crypto} {row.strategy_id}: {row.occurrences} occurrences, "
+                      f"{row.total_duration_seconds:.1f}s open, peak ${row.max_peak_net_profit:.2f}")
+            return True
+        except Exception as e:
+            print(f"Error in analyze_lifecycle: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+
     def print_top_rows(self, column_name, num_rows=10):
         """
         Print the top rows sorted by the given column name.
@@ -9,4 +9,76 @@ class Config:
     COINAPI_KEY = os.environ.get('COINAPI_KEY')
     XCHANGEAPI_KEY = os.environ.get('XCHANGEAPI_KEY')
     WEBSOCKET_PING_INTERVAL = 25
-    WEBSOCKET_PING_TIMEOUT = 120
\ No newline at end of file
+    WEBSOCKET_PING_TIMEOUT = 120
+    # 'extremes' (lowest/highest venue per crypto), 'matrix' (top-K net-of-fee venue pairs) or 'executable'
+    # (top-K venue pairs by net profit of their executable size on the order books, needs COINAPI_BOOK_DATA_TYPE)
+    ARBITRAGE_MODE = os.environ.get('ARBITRAGE_MODE', 'extremes')
+    ARBITRAGE_TOP_K = int(os.environ.get('ARBITRAGE_TOP_K', 10))
+    # Background CSV writer: rows are queued and flushed in batches off the ingest path
+    CSV_ASYNC_WRITES = os.environ.get('CSV_ASYNC_WRITES', 'true').lower() == 'true'
+    CSV_QUEUE_SIZE = int(os.environ.get('CSV_QUEUE_SIZE', 10000))
+    CSV_BATCH_SIZE = int(os.environ.get('CSV_BATCH_SIZE', 500))
+    CSV_FLUSH_INTERVAL = float(os.environ.get('CSV_FLUSH_INTERVAL', 1.0))
+    # Typed Parquet copy of the cross-exchange arbitrage history, partitioned by date and crypto (needs pyarrow)
+    ARBITRAGE_PARQUET = os.environ.get('ARBITRAGE_PARQUET', 'false').lower() == 'true'
+    PARQUET_ROW_GROUP_SIZE = int(os.environ.get('PARQUET_ROW_GROUP_SIZE', 10000))
+    # Conflate bursts of ticks to the latest per (crypto, exchange, fiat) and apply them as one batch
+    TICK_CONFLATION = os.environ.get('TICK_CONFLATION', 'true').lower() == 'true'
+    TICK_CONFLATION_MAX_BATCH = int(os.environ.get('TICK_CONFLATION_MAX_BATCH', 1000))
+    # Bounded queue between each socket reader and its processing task: 'block', 'drop_oldest' or 'conflate'
+    INGEST_QUEUE_SIZE = int(os.environ.get('INGEST_QUEUE_SIZE', 10000))
+    INGEST_OVERFLOW_POLICY = os.environ.get('INGEST_OVERFLOW_POLICY', 'block')
+    # Append every raw exchange frame to this log for offline replay (scripts/replay_frames.py), off when unset
+    RECORD_FRAMES_PATH = os.environ.get('RECORD_FRAMES_PATH')
+    # 'live' connects to CoinAPI/xChangeAPI, 'mock' to the local synthetic feed (scripts/mock_feed_server.py)
+    FEED_MODE = os.environ.get('FEED_MODE', 'live')
+    MOCK_FEED_URI = os.environ.get('MOCK_FEED_URI', 'ws://localhost:8765')
+    # Per-stage latency histograms, message counters and exchange lag served on /api/metrics
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    # Terminal price output: 'per_tick' prints the book on every update, 'dashboard' redraws it in place
+    # every DISPLAY_REFRESH_INTERVAL seconds off the ingest thread, 'quiet' prints nothing
+    DISPLAY_MODE = os.environ.get('DISPLAY_MODE', 'dashboard')
+    DISPLAY_REFRESH_INTERVAL = float(os.environ.get('DISPLAY_REFRESH_INTERVAL', 1.0))
+    # Send client_data as sequenced added/changed/removed deltas with snapshots on connect and resync
+    CLIENT_DATA_DELTAS = os.environ.get('CLIENT_DATA_DELTAS', 'true').lower() == 'true'
+    CLIENT_DATA_HEARTBEAT = float(os.environ.get('CLIENT_DATA_HEARTBEAT', 1.0))
+    # Max frontend pushes per second per Socket.IO channel ('channel=rate,...'), bursts coalesce to the latest;
+    # channels not listed use EMIT_DEFAULT_RATE (0 = unlimited)
+    EMIT_RATES = os.environ.get('EMIT_RATES', 'client_data=5,cycle_arbitrage=2,hello=0.2')
+    EMIT_DEFAULT_RATE = float(os.environ.get('EMIT_DEFAULT_RATE', 0))
+    # Slow Socket.IO clients: past the soft send-queue depth (packets) or latency (seconds) they only get a
+    # snapshot every SLOW_CLIENT_SNAPSHOT_INTERVAL seconds until they catch up, past the hard limits they are disconnected
+    SLOW_CLIENT_MONITOR = os.environ.get('SLOW_CLIENT_MONITOR', 'true').lower() == 'true'
+    SLOW_CLIENT_CHECK_INTERVAL = float(os.environ.get('SLOW_CLIENT_CHECK_INTERVAL', 2.0))
+    SLOW_CLIENT_QUEUE_SOFT = int(os.environ.get('SLOW_CLIENT_QUEUE_SOFT', 100))
+    SLOW_CLIENT_QUEUE_HARD = int(os.environ.get('SLOW_CLIENT_QUEUE_HARD', 2000))
+    SLOW_CLIENT_LATENCY_SOFT = float(os.environ.get('SLOW_CLIENT_LATENCY_SOFT', 2.0))
+    SLOW_CLIENT_LATENCY_HARD = float(os.environ.get('SLOW_CLIENT_LATENCY_HARD', 30.0))
+    SLOW_CLIENT_SNAPSHOT_INTERVAL = float(os.environ.get('SLOW_CLIENT_SNAPSHOT_INTERVAL', 5.0))
+    # Skip the arbitrage/CSV/emit recomputation for ticks that cannot move the result: duplicates, moves below
+    # the relative epsilon (UPDATE_GATE_EPSILONS per symbol, e.g. 'BTC=0.00005,ETH/EUR=0.0001') and prices strictly
+    # inside the current per-crypto extremes. The book is always updated
+    UPDATE_GATE = os.environ.get('UPDATE_GATE', 'true').lower() == 'true'
+    UPDATE_GATE_EPSILON = float(os.environ.get('UPDATE_GATE_EPSILON', 0.0))
+    UPDATE_GATE_EPSILONS = os.environ.get('UPDATE_GATE_EPSILONS', '')
+    # Opportunity lifecycle: open/update/close events per trade instead of per-tick snapshots. An opportunity is open
+    # while its net profit exceeds LIFECYCLE_MIN_PROFIT (USD); an update is reported when the net profit moves by more
+    # than LIFECYCLE_UPDATE_THRESHOLD (relative) since the last event. The lifecycle CSV is then the only per-update
+    # write; CSV_TICK_ROWS=true also writes the table 3 row of every triggered update
+    OPPORTUNITY_LIFECYCLE = os.environ.get('OPPORTUNITY_LIFECYCLE', 'true').lower() == 'true'
+    LIFECYCLE_MIN_PROFIT = float(os.environ.get('LIFECYCLE_MIN_PROFIT', 0.0))
+    LIFECYCLE_UPDATE_THRESHOLD = float(os.environ.get('LIFECYCLE_UPDATE_THRESHOLD', 0.1))
+    CSV_TICK_ROWS = os.environ.get('CSV_TICK_ROWS', 'false').lower() == 'true'
+    # Multi-leg (triangular and longer) arbitrage: negative cycles of the (asset, exchange) log-price graph, searched
+    # incrementally for feed:cycles subscribers on the batches the update gate passes. Fixed withdrawal fees are charged against CYCLE_NOTIONAL_USD; at most
+    # CYCLE_MAX_CYCLES cycles returning more than CYCLE_MIN_PROFIT (fraction) are reported
+    CYCLE_ARBITRAGE = os.environ.get('CYCLE_ARBITRAGE', 'true').lower() == 'true'
+    CYCLE_NOTIONAL_USD = float(os.environ.get('CYCLE_NOTIONAL_USD', 10000.0))
+    CYCLE_MAX_CYCLES = int(os.environ.get('CYCLE_MAX_CYCLES', 10))
+    CYCLE_MIN_PROFIT = float(os.environ.get('CYCLE_MIN_PROFIT', 0.0))
+    # L2 depth subscribed next to the trades: '' (trades only), 'book' (full book, a snapshot then incremental updates),
+    # 'book5'/'book20'/'book50' (top-N snapshots) or 'quote' (best bid/ask). Books keep ORDER_BOOK_MAX_LEVELS levels
+    # per side; executable arbitrage caps the cost of one trade at EXECUTABLE_MAX_NOTIONAL_USD (0 = no cap)
+    COINAPI_BOOK_DATA_TYPE = os.environ.get('COINAPI_BOOK_DATA_TYPE', '')
+    ORDER_BOOK_MAX_LEVELS = int(os.environ.get('ORDER_BOOK_MAX_LEVELS', 50))
+    EXECUTABLE_MAX_NOTIONAL_USD = float(os.environ.get('EXECUTABLE_MAX_NOTIONAL_USD', 0.0))
\ No newline at end of file
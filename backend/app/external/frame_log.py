@@ -0,0 +1,196 @@
+'''
+This module records raw exchange WebSocket frames to a compact append-only log and replays them.
+Every frame is stored exactly as received, with the monotonic receive time in nanoseconds and the strategy
+it came from, so a log can later be fed through the same WebSocketStrategy.process_message implementations,
+or the conflating batch path of WebSocketClient, at 1x, Nx or maximum speed - a deterministic offline
+workload with no API keys or network.
+
+Log layout: the MAGIC header, then records of RECORD_HEADER (receive_ns, strategy index, payload length)
+followed by the payload. Strategy names are declared in-line with a DEFINE_STRATEGY record the first time
+each appears in a recording session, and every session (process start) begins with a SESSION record holding
+the wall-clock start time, so appending several sessions to one file stays self-describing.
+'''
+import asyncio
+import atexit
+import logging
+import os
+import struct
+import threading
+import time
+from typing import Dict, Iterator, NamedTuple, Optional
+
+MAGIC = b'WSFRAMES1\n'
+RECORD_HEADER = struct.Struct('<qBI')  # receive_ns, strategy index, payload length
+DEFINE_STRATEGY = 255
+SESSION = 254
+BINARY_FLAG = 0x80  # set on the strategy index when the frame was bytes rather than text
+# Indices 0..125: with BINARY_FLAG set they stay below the SESSION and DEFINE_STRATEGY markers (0xFE, 0xFF)
+MAX_STRATEGIES = 126
+
+
+class Frame(NamedTuple):
+    receive_ns: int
+    strategy: str
+    message: object  # str or bytes, as returned by websocket.recv()
+    session: int
+
+
+class FrameRecorder:
+    """Appends raw frames from all strategies to one log file"""
+
+    def __init__(self, path: str, buffer_size: int = 1 << 20):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, 'ab', buffering=buffer_size)
+        if is_new:
+            self._file.write(MAGIC)
+        self._strategies: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.frames_recorded = 0
+        self.bytes_recorded = 0
+        self._write(SESSION, repr(time.time()).encode())
+        atexit.register(self.close)
+
+    def _write(self, index: int, payload: bytes):
+        self._file.write(RECORD_HEADER.pack(time.monotonic_ns(), index, len(payload)))
+        self._file.write(payload)
+
+    def record(self, strategy: str, message):
+        """Append one frame (str or bytes) received by strategy"""
+        if self._file.closed:
+            return
+        with self._lock:
+            index = self._strategies.get(strategy)
+            if index is None:
+                if len(self._strategies) >= MAX_STRATEGIES:
+                    self.logger.error(f"Too many strategies to record, skipping {strategy}")
+                    return
+                index = self._strategies[strategy] = len(self._strategies)
+                self._write(DEFINE_STRATEGY, bytes([index]) + strategy.encode())
+            if isinstance(message, str):
+                payload = message.encode()
+            else:
+                payload = bytes(message)
+                index |= BINARY_FLAG
+            self._write(index, payload)
+            self.frames_recorded += 1
+            self.bytes_recorded += len(payload)
+
+    def flush(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def read_frames(path: str) -> Iterator[Frame]:
+    """Yield the frames of a log in recording order (a truncated last record is ignored)"""
+    with open(path, 'rb') as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a frame log")
+        strategies: Dict[int, str] = {}
+        session = -1
+        while True:
+            header = file.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            receive_ns, index, length = RECORD_HEADER.unpack(header)
+            payload = file.read(length)
+            if len(payload) < length:
+                return
+            if index == SESSION:
+                session += 1
+                strategies = {}
+            elif index == DEFINE_STRATEGY:
+                strategies[payload[0]] = payload[1:].decode()
+            else:
+                message = payload if index & BINARY_FLAG else payload.decode()
+                yield Frame(receive_ns, strategies[index & ~BINARY_FLAG], message, session)
+
+
+async def replay_frames(path: str, strategies: Dict, speed: Optional[float] = 1.0,
+                        on_result=None, client=None, max_batch: int = 1000) -> Dict[str, int]:
+    """
+    Feed a frame log through the strategies, keeping the recorded gaps between frames.
+    Without a client every frame goes through strategy.process_message on its own. With a WebSocketClient
+    the frames take the live path instead: consecutive frames of a strategy that are due at the same time
+    (all of them at maximum speed) are handed to client.process_messages as one batch, so they are
+    conflated and applied with apply_ticks like the messages buffered on a live connection.
+    Args:
+        strategies: strategy name -> WebSocketStrategy (client.strategies with a client);
+            frames of other strategies are skipped
+        speed: 1.0 replays in real time, N replays N times faster, 0 or None replays as fast as possible
+        on_result: optional callback(strategy_name, processed_data) for non-empty per-frame results;
+            with a client results go to client.broadcast_callback
+        client: WebSocketClient whose batch path processes the frames
+        max_batch: largest batch handed to the client, like TICK_CONFLATION_MAX_BATCH
+    Returns:
+        counters of replayed and skipped frames
+    """
+    stats = {'frames': 0, 'skipped': 0, 'errors': 0, 'batches': 0}
+    start_wall = time.monotonic()
+    offset_ns = 0  # recorded time already replayed in previous sessions
+    session_start_ns = None
+    last_ns = 0
+    session = None
+    batch_strategy = None
+    batch = []
+
+    for frame in read_frames(path):
+        strategy = strategies.get(frame.strategy)
+        if strategy is None:
+            stats['skipped'] += 1
+            continue
+
+        if speed:
+            if frame.session != session:
+                # Monotonic clocks restart with every process, so sessions are laid end to end
+                session = frame.session
+                offset_ns = last_ns
+                session_start_ns = frame.receive_ns
+            last_ns = offset_ns + frame.receive_ns - session_start_ns
+            delay = last_ns / 1e9 / speed - (time.monotonic() - start_wall)
+            if delay > 0:
+                # Everything due so far was buffered before this frame arrives
+                await _replay_batch(client, batch_strategy, batch, stats)
+                batch = []
+                await asyncio.sleep(delay)
+
+        if client is not None:
+            if frame.strategy != batch_strategy or len(batch) >= max_batch:
+                await _replay_batch(client, batch_strategy, batch, stats)
+                batch_strategy, batch = frame.strategy, []
+            batch.append(frame.message)
+            continue
+
+        try:
+            processed_data = await strategy.process_message(frame.message)
+            if processed_data and on_result:
+                on_result(frame.strategy, processed_data)
+            stats['frames'] += 1
+        except Exception as e:
+            stats['errors'] += 1
+            logging.getLogger(__name__).error(f"Error replaying frame for {frame.strategy}: {e}")
+
+    await _replay_batch(client, batch_strategy, batch, stats)
+    return stats
+
+
+async def _replay_batch(client, strategy_name: str, messages: list, stats: Dict[str, int]):
+    if not messages:
+        return
+    try:
+        await client.process_messages(strategy_name, messages)
+        stats['frames'] += len(messages)
+        stats['batches'] += 1
+    except Exception as e:
+        stats['errors'] += len(messages)
+        logging.getLogger(__name__).error(f"Error replaying {len(messages)} frames for {strategy_name}: {e}")
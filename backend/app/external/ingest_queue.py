@@ -0,0 +1,99 @@
+'''
+This module holds the bounded queue between a strategy's socket reader and its processing task.
+The reader only calls websocket.recv() and puts the message on the queue, so a slow processing stage
+(display, CSV, Socket.IO emits) no longer stalls the socket read. What happens when the queue is full
+depends on the overflow policy:
+    block        the reader waits for room, which pushes back on the socket (TCP flow control)
+    drop_oldest  the oldest queued message is dropped to make room for the new one
+    conflate     a queued tick with the same key is replaced in place by the newer one
+'''
+import asyncio
+from collections import deque
+from typing import Any, Dict, Hashable, List, Optional
+
+
+class IngestQueue:
+    """Single-producer / single-consumer bounded asyncio queue with an overflow policy"""
+
+    POLICIES = ('block', 'drop_oldest', 'conflate')
+
+    def __init__(self, maxsize: int = 10000, policy: str = 'block'):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self._items = deque()  # [key, item] entries, mutable so conflation can replace the item in place
+        self._by_key: Dict[Hashable, list] = {}
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.conflated = 0
+        self.blocked = 0
+        self.max_depth = 0
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def full(self) -> bool:
+        return len(self._items) >= self.maxsize
+
+    async def put(self, item: Any, key: Optional[Hashable] = None):
+        """
+        Queue item. key is only used by the conflate policy: a queued item with the same key is replaced.
+        Items without a key (control messages) are never conflated.
+        """
+        self.enqueued += 1
+        if self.policy == 'conflate' and key is not None:
+            entry = self._by_key.get(key)
+            if entry is not None:
+                entry[1] = item
+                self.conflated += 1
+                return
+
+        if self.full():
+            if self.policy == 'drop_oldest':
+                self._pop()
+                self.dropped += 1
+            else:
+                # block, or conflate with a new key: wait for the consumer to make room
+                self.blocked += 1
+                while self.full():
+                    self._not_full.clear()
+                    await self._not_full.wait()
+
+        entry = [key, item]
+        self._items.append(entry)
+        if self.policy == 'conflate' and key is not None:
+            self._by_key[key] = entry
+        self.max_depth = max(self.max_depth, len(self._items))
+        self._not_empty.set()
+
+    def _pop(self) -> Any:
+        entry = self._items.popleft()
+        if entry[0] is not None and self._by_key.get(entry[0]) is entry:
+            del self._by_key[entry[0]]
+        return entry[1]
+
+    async def get_batch(self, limit: int) -> List[Any]:
+        """Wait for at least one item, then return up to limit queued items in order"""
+        while not self._items:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        batch = [self._pop() for _ in range(min(limit, len(self._items)))]
+        self._not_full.set()
+        return batch
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'policy': self.policy,
+            'depth': len(self._items),
+            'max_depth': self.max_depth,
+            'capacity': self.maxsize,
+            'enqueued': self.enqueued,
+            'dropped': self.dropped,
+            'conflated': self.conflated,
+            'blocked': self.blocked
+        }
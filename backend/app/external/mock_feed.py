@@ -0,0 +1,224 @@
+'''
+This module is a local synthetic exchange feed for load testing the backend without API keys or network.
+One websockets server speaks both upstream protocols:
+    /coinapi      CoinAPI: waits for the hello message, then streams trade JSON messages, and half of the time
+                  the book data type it subscribed to as well (book: a snapshot per symbol then updates that
+                  move BOOK_LEVELS levels per side with the price, book5/20/50: top-N snapshots, quote: best bid/ask)
+    /xchangeapi   xChangeAPI: waits for the {"pairs": [...]} subscription, sends the '0' init frame with the
+                  mapping/order/time_mult metadata, then '1' pipe-delimited rate frames and '2' heartbeats
+Prices follow a geometric random walk per symbol, with a small per-exchange premium so there is always
+some arbitrage to find. The CoinAPI message rate, the number of exchanges and the crypto and fiat sets are
+configurable. Set FEED_MODE=mock (and MOCK_FEED_URI if needed) to point the strategies at it.
+'''
+import asyncio
+import json
+import logging
+import math
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import websockets
+
+from app.external.utilities.order_book import BOOK_DATA_TYPES
+
+logger = logging.getLogger(__name__)
+
+KNOWN_EXCHANGES = ['COINBASE', 'BINANCE', 'KRAKEN', 'BITSTAMP']
+BASE_PRICES_USD = {'BTC': 60000.0, 'ETH': 3000.0}
+FX_RATES = {'EUR': 1.08, 'GBP': 1.27}  # USD per unit
+BOOK_LEVELS = 10  # levels per side of the 'book' stream, one basis point apart around the walk price
+
+
+class MockFeedServer:
+    """Random-walk CoinAPI trade feed and xChangeAPI rate feed on one local websocket port"""
+
+    def __init__(self, host: str = 'localhost', port: int = 8765, rate: float = 1000.0,
+                 cryptos: List[str] = None, exchanges: int = 4, fiats: List[str] = None,
+                 fx_rate: float = 2.0, volatility: float = 0.0005, seed: int = None):
+        """
+        Args:
+            rate: CoinAPI trade messages per second per connection
+            cryptos: crypto symbols to trade (default BTC, ETH)
+            exchanges: number of exchanges, the known ones first then synthetic EXCH5, EXCH6...
+            fiats: quote currencies (default USD, EUR, GBP)
+            fx_rate: xChangeAPI rate messages per second per connection
+            volatility: standard deviation of the per-tick log return
+        """
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.fx_rate = fx_rate
+        self.volatility = volatility
+        self.random = random.Random(seed)
+
+        cryptos = cryptos or ['BTC', 'ETH']
+        fiats = fiats or ['USD', 'EUR', 'GBP']
+        exchange_names = KNOWN_EXCHANGES[:exchanges] + [f"EXCH{i + 1}" for i in range(len(KNOWN_EXCHANGES), exchanges)]
+
+        # symbol_id -> current price, quoted in the symbol's fiat
+        self.prices: Dict[str, float] = {}
+        for exchange_index, exchange in enumerate(exchange_names):
+            premium = 1.0 + 0.001 * exchange_index
+            for crypto in cryptos:
+                for fiat in fiats:
+                    quote = 'USDT' if exchange == 'BINANCE' and fiat == 'USD' else fiat
+                    usd_price = BASE_PRICES_USD.get(crypto, 100.0) * premium
+                    self.prices[f"{exchange}_SPOT_{crypto}_{quote}"] = usd_price / FX_RATES.get(fiat, 1.0)
+        self.symbols = list(self.prices)
+        self.fx = {f"{fiat}USD": rate for fiat, rate in FX_RATES.items()}
+
+        self.messages_sent = 0
+        self.connections = 0
+        self._server = None
+
+    def _step(self, value: float) -> float:
+        return value * math.exp(self.random.gauss(0.0, self.volatility))
+
+    def trade_message(self) -> str:
+        symbol = self.random.choice(self.symbols)
+        price = self.prices[symbol] = self._step(self.prices[symbol])
+        now = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f0Z')
+        return json.dumps({
+            'type': 'trade',
+            'symbol_id': symbol,
+            'sequence': self.messages_sent,
+            'time_exchange': now,
+            'time_coinapi': now,
+            'uuid': str(uuid.uuid4()),
+            'price': round(price, 2),
+            'size': round(self.random.uniform(0.0001, 0.5), 6),
+            'taker_side': self.random.choice(['BUY', 'SELL'])
+        })
+
+    def _book_levels(self, symbol: str, count: int):
+        price = self.prices[symbol]
+        step = price * 0.0001
+        bids = [(round(price - step * (i + 1), 2), round(self.random.uniform(0.01, 2.0), 6)) for i in range(count)]
+        asks = [(round(price + step * (i + 1), 2), round(self.random.uniform(0.01, 2.0), 6)) for i in range(count)]
+        return bids, asks
+
+    def book_message(self, data_type: str, sent: Dict[str, tuple], symbol: str = None) -> str:
+        """
+        A data_type message for symbol (a random one by default). sent holds the 'book' levels a connection has
+        been sent per symbol: the first message of a symbol is its snapshot, later ones remove what moved away.
+        """
+        symbol = symbol or self.random.choice(self.symbols)
+        now = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f0Z')
+        message = {'type': data_type, 'symbol_id': symbol, 'sequence': self.messages_sent,
+                   'time_exchange': now, 'time_coinapi': now}
+        if data_type == 'quote':
+            [(bid, bid_size)], [(ask, ask_size)] = self._book_levels(symbol, 1)
+            message.update({'bid_price': bid, 'bid_size': bid_size, 'ask_price': ask, 'ask_size': ask_size})
+            return json.dumps(message)
+
+        bids, asks = self._book_levels(symbol, BOOK_LEVELS if data_type == 'book' else int(data_type[4:]))
+        if data_type == 'book':
+            previous = sent.get(symbol)
+            sent[symbol] = ({price for price, _ in bids}, {price for price, _ in asks})
+            message['is_snapshot'] = previous is None
+            if previous is not None:
+                bids += [(price, 0) for price in previous[0] - sent[symbol][0]]
+                asks += [(price, 0) for price in previous[1] - sent[symbol][1]]
+        message['bids'] = [{'price': price, 'size': size} for price, size in bids]
+        message['asks'] = [{'price': price, 'size': size} for price, size in asks]
+        return json.dumps(message)
+
+    async def _paced(self, websocket, rate: float, make_message):
+        """Send make_message() rate times per second, in small bursts so high rates stay cheap"""
+        interval = 0.01 if rate >= 100 else 1.0 / rate
+        start = time.monotonic()
+        sent = 0
+        while True:
+            due = int((time.monotonic() - start) * rate) - sent
+            for _ in range(max(due, 0)):
+                await websocket.send(make_message())
+            sent += max(due, 0)
+            self.messages_sent += max(due, 0)
+            await asyncio.sleep(interval)
+
+    async def _serve_coinapi(self, websocket):
+        hello = json.loads(await websocket.recv())
+        logger.info(f"Mock CoinAPI client subscribed: {hello.get('subscribe_data_type')}")
+        book_types = [data_type for data_type in hello.get('subscribe_data_type') or () if data_type in BOOK_DATA_TYPES]
+        if not book_types:
+            await self._paced(websocket, self.rate, self.trade_message)
+            return
+
+        data_type, sent = book_types[0], {}
+        if data_type == 'book':
+            for symbol in self.symbols:
+                await websocket.send(self.book_message(data_type, sent, symbol))
+
+        def message():
+            return self.trade_message() if self.random.random() < 0.5 else self.book_message(data_type, sent)
+
+        await self._paced(websocket, self.rate, message)
+
+    async def _serve_xchangeapi(self, websocket):
+        subscription = json.loads(await websocket.recv())
+        pairs = [pair for pair in subscription.get('pairs', self.fx) if pair in self.fx] or list(self.fx)
+        start_time = time.time()
+        time_mult = 1000
+        mapping = {str(index): pair for index, pair in enumerate(pairs)}
+        await websocket.send('0' + json.dumps({
+            'start_time': start_time,
+            'mapping': mapping,
+            'order': ['name', 'ask', 'bid', 'time'],
+            'time_mult': time_mult
+        }))
+
+        def rate_message():
+            index = self.random.choice(list(mapping))
+            pair = mapping[index]
+            ask = self.fx[pair] = self._step(self.fx[pair])
+            offset = int((time.time() - start_time) * time_mult)
+            return f"1{index}|{ask:.5f}|{ask * 0.9999:.5f}|{offset}"
+
+        async def heartbeat():
+            while True:
+                await asyncio.sleep(5)
+                await websocket.send('2')
+
+        heartbeat_task = asyncio.ensure_future(heartbeat())
+        try:
+            await self._paced(websocket, self.fx_rate, rate_message)
+        finally:
+            heartbeat_task.cancel()
+
+    async def handler(self, websocket):
+        path = websocket.path.split('?')[0].rstrip('/')
+        self.connections += 1
+        try:
+            if path.endswith('/coinapi'):
+                await self._serve_coinapi(websocket)
+            elif path.endswith('/xchangeapi'):
+                await self._serve_xchangeapi(websocket)
+            else:
+                await websocket.close(code=1008, reason=f"Unknown feed {path}")
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            self.connections -= 1
+
+    async def start(self):
+        self._server = await websockets.serve(self.handler, self.host, self.port, max_queue=None)
+        logger.info(f"Mock feed serving {len(self.symbols)} symbols at {self.rate:.0f} msgs/s "
+                    f"on ws://{self.host}:{self.port}/coinapi and /xchangeapi")
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def serve_forever(self, report_interval: float = 5.0):
+        await self.start()
+        last_sent, last_time = 0, time.monotonic()
+        while True:
+            await asyncio.sleep(report_interval)
+            now = time.monotonic()
+            logger.info(f"Mock feed: {(self.messages_sent - last_sent) / (now - last_time):.0f} msgs/s "
+                        f"to {self.connections} connections")
+            last_sent, last_time = self.messages_sent, now
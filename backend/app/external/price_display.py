@@ -1,9 +1,121 @@
 import logging
+import sys
+import threading
+import time
 from datetime import datetime
+from app.config.settings import Config
+
 class PriceDisplay:
-    def __init__(self):
+    # 'per_tick': print the whole book on every update, 'dashboard': redraw in place every refresh_interval
+    # seconds from a snapshot on a background thread, 'quiet': only count updates
+    MODES = ('per_tick', 'dashboard', 'quiet')
+
+    def __init__(self, mode: str = 'per_tick', refresh_interval: float = 1.0, stream=None):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown display mode: {mode}")
         self.logger = logging.getLogger(__name__)
         self.message_count = 0
+        self.mode = mode
+        self.refresh_interval = refresh_interval
+        self.stream = stream or sys.stdout
+
+        # Latest references handed over by update(), rendered by the dashboard thread
+        self._prices = None
+        self._exchange_rates = None
+        self._last_update = None
+        self._dirty = False
+        self._rendered_count = 0
+        self._rendered_at = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def update(self, prices, exchange_rates):
+        """Hot-path entry point of the PriceTracker: cost depends on the mode, O(1) unless per_tick"""
+        if self.mode == 'per_tick':
+            self.display_prices({
+                'prices': prices,
+                'exchange_rates': exchange_rates,
+                'last_update': datetime.now().isoformat()
+            })
+            return
+        self.message_count += 1
+        if self.mode == 'quiet':
+            return
+        self._prices = prices
+        self._exchange_rates = exchange_rates
+        self._last_update = time.time()
+        self._dirty = True
+        if self._thread is None:
+            self.start()
+
+    def start(self):
+        """Start the dashboard refresh thread (done on the first update in dashboard mode)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._refresh_loop, name='price-dashboard', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.refresh_interval + 1)
+            self._thread = None
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh_interval):
+            if not self._dirty:
+                continue
+            self._dirty = False
+            try:
+                self.render_dashboard()
+            except Exception as e:
+                self.logger.error(f"Dashboard render error: {e}")
+
+    def _snapshot(self):
+        """Copy the live book and rates so formatting never races the ingest thread"""
+        prices = self._prices
+        prices = prices.to_dict() if hasattr(prices, 'to_dict') else {
+            crypto: {exchange: dict(fiats) for exchange, fiats in exchanges.items()}
+            for crypto, exchanges in (prices or {}).items()
+        }
+        exchange_rates = {pair: dict(data) if isinstance(data, dict) else data
+                          for pair, data in (self._exchange_rates or {}).items()}
+        return prices, exchange_rates
+
+    def render_dashboard(self):
+        """Redraw the dashboard in place (plain appended blocks when not writing to a terminal)"""
+        prices, exchange_rates = self._snapshot()
+        now = time.monotonic()
+        count = self.message_count
+        rate = None
+        if self._rendered_at is not None and now > self._rendered_at:
+            rate = (count - self._rendered_count) / (now - self._rendered_at)
+        self._rendered_count, self._rendered_at = count, now
+
+        last_update = datetime.fromtimestamp(self._last_update).strftime('%H:%M:%S') if self._last_update else '-'
+        output = [
+            "=== LATEST CRYPTOCURRENCY PRICES ===",
+            f"Last Update: {last_update}   Updates: {count}" + (f"   ({rate:.0f}/s)" if rate is not None else "")
+        ]
+        for crypto in sorted(prices):
+            fiats = sorted({fiat for exchange in prices[crypto].values() for fiat in exchange})
+            output.append("")
+            output.append(f"{crypto:<12}" + "".join(f"{fiat:>14}" for fiat in fiats))
+            for exchange in sorted(prices[crypto]):
+                quotes = prices[crypto][exchange]
+                output.append(f"  {exchange:<10}" + "".join(
+                    f"{quotes[fiat]['price']:>14.2f}" if fiat in quotes else f"{'-':>14}" for fiat in fiats))
+        output.extend(self._format_exchange_rates(exchange_rates))
+
+        text = '\n'.join(output)
+        if self.stream.isatty():
+            # Cursor home and clear screen, so the dashboard redraws in place
+            text = "\x1b[H\x1b[J" + text
+        else:
+            text += "\n" + "="*40
+        self.stream.write(text + "\n")
+        self.stream.flush()
 
     def _format_timestamp(self, timestamp) -> str:
         """Format timestamp with error handling"""
@@ -38,6 +150,10 @@ class PriceDisplay:
                 for pair, rate_data in sorted(exchange_rates.items()):
                     if rate_data and isinstance(rate_data, dict):
                         rate = rate_data.get('rate')
+                        if rate is None:
+                            # Not received yet
+                            output.append(f"{pair}: N/A")
+                            continue
                         try:
                             timestamp = rate_data.get('timestamp')
                             if timestamp:
@@ -109,4 +225,4 @@ class PriceDisplay:
         print("\n" + "="*40)
 
 # Global instance
-price_display = PriceDisplay()
\ No newline at end of file
+price_display = PriceDisplay(Config.DISPLAY_MODE, Config.DISPLAY_REFRESH_INTERVAL)
\ No newline at end of file
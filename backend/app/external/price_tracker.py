@@ -1,12 +1,27 @@
 # backend/app/utils/price_tracker.py
 
+import json
 import logging
 import random
+import time
 from datetime import datetime
 from .price_display import price_display  # Import the price display module
+from app.config.settings import Config
 from app.external.utilities.exchange_spread import ExchangeSpread  # Import the ExchangeSpread class
 from app.external.utilities.csv_tracker import CSVTracker  # Import the CSVTracker class
 from app.external.utilities.client_data_collector import DataCollector  # Import the DataCollector class
+from app.external.utilities.incremental_arbitrage import IncrementalArbitrageEngine
+from app.external.utilities.cycle_arbitrage import CycleArbitrageEngine
+from app.external.utilities.price_book import PriceBook
+from app.external.utilities.snapshot_cache import SnapshotCache
+from app.external.utilities.update_gate import UpdateGate
+from app.external.utilities.opportunity_lifecycle import OpportunityLifecycle, message as lifecycle_message
+from app.external.utilities.order_book import OrderBooks
+from app.processors.symbol_table import SymbolTable
+from app.types.tick import Tick, BookTick
+from app.metrics import metrics
+from app.websocket.rooms import RoomBroadcaster, LIFECYCLE_FEED, CYCLES_FEED, feed_room
+from app.websocket.emission_scheduler import EmissionScheduler
 
 
 
@@ -14,7 +29,10 @@ class PriceTracker:
     def __init__(self, socketio):
         if socketio is None:
             raise ValueError("A valid SocketIO instance is required!")
-        self.crypto_prices = {}
+        self.price_book = PriceBook()
+        # L2 depth per venue, fed when COINAPI_BOOK_DATA_TYPE is set
+        self.order_books = OrderBooks(max_levels=Config.ORDER_BOOK_MAX_LEVELS)
+        self.symbol_table = SymbolTable(price_book=self.price_book)
         # Initialize exchange rates for all websocket connections
         current_time = datetime.now().isoformat()
         self.exchange_rates = {
@@ -22,22 +40,87 @@ class PriceTracker:
             'GBP': {'rate': None, 'timestamp': current_time},
             'EUR': {'rate': None, 'timestamp': current_time}
         }
+        self.rates_version = 0  # bumped on every exchange rate update, see book_version
         self.message_count = 0
         self.logger = logging.getLogger(__name__)
         self.socketio = socketio
+        # client_data goes to the feed:arbitrage and crypto:<CRYPTO> rooms only
+        self.rooms = RoomBroadcaster(socketio)
+        # At most EMIT_RATES pushes per second per channel, latest wins
+        self.emission_scheduler = EmissionScheduler.from_config()
+        self._best_opportunity = None
 
         # May need to make adjustments with live websocket like behavior with client
-        self.csv_tracker = CSVTracker()
-        self.data_collector = DataCollector(self.crypto_prices, self.exchange_rates)
+        self.csv_tracker = CSVTracker.from_config()
+        self.arbitrage_engine = IncrementalArbitrageEngine(self.exchange_rates)
+        self.cycle_engine = None
+        if Config.CYCLE_ARBITRAGE:
+            self.cycle_engine = CycleArbitrageEngine(
+                self.price_book,
+                self.exchange_rates,
+                notional_usd=Config.CYCLE_NOTIONAL_USD,
+                max_cycles=Config.CYCLE_MAX_CYCLES,
+                min_profit=Config.CYCLE_MIN_PROFIT
+            )
+        self.data_collector = DataCollector(
+            self.price_book,
+            self.exchange_rates,
+            self.arbitrage_engine,
+            mode=Config.ARBITRAGE_MODE,
+            top_k=Config.ARBITRAGE_TOP_K,
+            cycle_engine=self.cycle_engine,
+            order_books=self.order_books,
+            max_notional_usd=Config.EXECUTABLE_MAX_NOTIONAL_USD
+        )
         self.client_data = None
-        
+        # Opportunities, client_data and latest prices are computed once per book_version for every consumer
+        self.snapshots = SnapshotCache(lambda: self.book_version)
+        # Ticks that cannot move the opportunities update the book and display only
+        self.update_gate = UpdateGate.from_config(self.exchange_rates)
+        metrics.register_collector(self.update_gate.metric_families)
+        metrics.register_collector(self.order_books.metric_families)
+        # Open/update/close events per opportunity, persisted and emitted to feed:lifecycle
+        self.lifecycle = OpportunityLifecycle.from_config() if Config.OPPORTUNITY_LIFECYCLE else None
+        if self.lifecycle is not None:
+            metrics.register_collector(self.lifecycle.metric_families)
+        self.csv_tick_rows = Config.CSV_TICK_ROWS
+
+    @property
+    def crypto_prices(self) -> PriceBook:
+        """Read-only nested-dict view (PriceDataType) of the price book"""
+        return self.price_book
+
+    @property
+    def book_version(self) -> tuple:
+        """Changes whenever a price or an exchange rate does, and with the order books in executable mode"""
+        depth_version = self.order_books.version if self.data_collector.mode == 'executable' else 0
+        return self.price_book.version, self.rates_version, depth_version
+
+    def get_opportunities(self):
+        """The arbitrage engine's opportunities at the current book version (shared, do not modify)"""
+        return self.snapshots.get('opportunities', self.arbitrage_engine.find_lowest_and_highest_price)
+
+    def get_arbitrage_data(self):
+        """The DataCollector payload at the current book version, built from the shared opportunities"""
+        return self.snapshots.get('client_data', self._collect_client_data)
+
+    def _collect_client_data(self):
+        # Only the extremes mode reads the arbitrage engine, the others rank their own pairs
+        opportunities = self.get_opportunities() if self.data_collector.mode == 'extremes' else None
+        return self.data_collector.get_arbitrage_data(opportunities=opportunities)
+
+    def get_cycles(self):
+        """Ranked multi-leg arbitrage cycles (DataCollector.get_cycle_data) at the current book version"""
+        return self.snapshots.get('cycles', self.data_collector.get_cycle_data)
+
     
     def initialize_crypto_pairs(self, pairs: list[str]):
         """Initialize cryptocurrency pairs from strategy"""
         for pair in pairs:
             # Convert "BTC/USD" format to "BTC"
             crypto = pair.split('/')[0]
-            self.crypto_prices[crypto] = {}
+            self.price_book.register_crypto(crypto)
+        self.rates_version += 1  # new (empty) cryptos show up in the latest prices
 
     def update_price(self, crypto: str, exchange: str, price: float, timestamp: str, fiat: str):
         """
@@ -61,43 +144,22 @@ class PriceTracker:
             if not all([crypto, exchange, price, timestamp, fiat]):
                 raise ValueError("All inputs must be provided")
                 
-            # Clear existing incorrect structure if needed
-            if crypto in self.crypto_prices:
-                if not isinstance(self.crypto_prices[crypto].get(exchange), (float, dict)):
-                    self.crypto_prices[crypto][exchange] = {}
-            
-            # Build structure step by step
-            if crypto not in self.crypto_prices:
-                self.crypto_prices[crypto] = {}
-            
-            if exchange not in self.crypto_prices[crypto]:
-                self.crypto_prices[crypto][exchange] = {}
-                
-            # Atomic update of price data
-            self.crypto_prices[crypto][exchange][fiat] = {
-                'price': price,
-                'timestamp': timestamp
-            }
+            # In-place write into the preallocated price arrays
+            start = time.perf_counter()
+            previous = self.price_book.get_price(crypto, exchange, fiat)
+            self.price_book.update(crypto, exchange, fiat, price, timestamp)
+            triggered = self.update_gate.check(crypto, exchange, fiat, price, previous)
+            if price != previous:
+                self.arbitrage_engine.update_price(crypto, exchange, fiat, price)
+            metrics.observe('update', time.perf_counter() - start)
             
             self.message_count += 1
-            self._update_display()
-            # self.csv_tracker.write_spread_strategy(self.crypto_prices)
-            # self.csv_tracker.write_fiat_arbitrage(self.crypto_prices, self.exchange_rates)
-            
-            # For write_cross_exchange_fiat_arbitrage, ensure exchange_rates are in the right format
-            formatted_rates = {}
-            for currency, rate_data in self.exchange_rates.items():
-                if isinstance(rate_data, dict) and 'rate' in rate_data:
-                    # Already in the right format
-                    formatted_rates[currency] = rate_data
-                else:
-                    # Convert simple value to dict with 'rate' key
-                    formatted_rates[currency] = {'rate': rate_data, 'timestamp': datetime.now().isoformat()}
-            
-            self.csv_tracker.write_cross_exchange_fiat_arbitrage(self.crypto_prices, formatted_rates)
-
-            # Only emit client data for price updates (more frequent than hello messages)
-            self._emit_client_data()
+            if triggered:
+                self._on_prices_updated()
+                self.update_gate.commit(crypto, self.arbitrage_engine.get_opportunity(crypto))
+                self._publish_cycles()
+            else:
+                self._update_display()
 
         except TypeError as e:
             self.logger.error("\n" + "="*40)
@@ -112,6 +174,136 @@ class PriceTracker:
             self.logger.error(f"Inputs - crypto: {crypto}, exchange: {exchange}, fiat: {fiat}, price: {price}, timestamp: {timestamp}")
             self.logger.error("="*40 + "\n")
     
+    def update_prices(self, ticks: list[Tick]):
+        """
+        Apply a batch of conflated price ticks, then run the display, CSV and emit cycle once
+        (the display only, when the update gate passed none of them).
+        Args:
+            ticks: latest Tick per (crypto, exchange, fiat)
+        """
+        applied = 0
+        triggered = set()
+        start = time.perf_counter()
+        for tick in ticks:
+            if not all([tick.crypto, tick.exchange, tick.price, tick.timestamp, tick.fiat]):
+                self.logger.error(f"Skipping incomplete tick: {tick}")
+                continue
+            try:
+                if tick.ids is not None:
+                    # Ids precomputed by the symbol table, no name lookups
+                    previous = self.price_book.get_price_ids(*tick.ids)
+                    self.price_book.update_ids(*tick.ids, tick.price, tick.timestamp)
+                else:
+                    previous = self.price_book.get_price(tick.crypto, tick.exchange, tick.fiat)
+                    self.price_book.update(tick.crypto, tick.exchange, tick.fiat, tick.price, tick.timestamp)
+                if self.update_gate.check(tick.crypto, tick.exchange, tick.fiat, tick.price, previous):
+                    triggered.add(tick.crypto)
+                if tick.price != previous:
+                    self.arbitrage_engine.update_price(tick.crypto, tick.exchange, tick.fiat, tick.price)
+                applied += 1
+            except Exception as e:
+                self.logger.error(f"Error applying tick {tick}: {e}")
+
+        metrics.observe('update', time.perf_counter() - start)
+
+        if not applied:
+            return
+        try:
+            self.message_count += applied
+            if not triggered:
+                self._update_display()
+                return
+            self._on_prices_updated()
+            for crypto in triggered:
+                self.update_gate.commit(crypto, self.arbitrage_engine.get_opportunity(crypto))
+            self._publish_cycles()
+        except Exception as e:
+            self.logger.error(f"Unexpected error in update_prices: {e}")
+
+    def update_books(self, ticks: list[BookTick]):
+        """
+        Apply a batch of L2 book messages to the order books. In executable mode the opportunities come from
+        the books, so the client data is published again (rate limited) once for the batch.
+        Args:
+            ticks: book snapshots (latest per venue) and updates, in arrival order
+        """
+        applied = 0
+        start = time.perf_counter()
+        for tick in ticks:
+            try:
+                applied += self.order_books.apply(tick.crypto, tick.exchange, tick.fiat, tick.bids, tick.asks,
+                                                  tick.timestamp, snapshot=tick.snapshot)
+            except Exception as e:
+                self.logger.error(f"Error applying book message {tick}: {e}")
+        metrics.observe('update', time.perf_counter() - start)
+
+        if applied and self.data_collector.mode == 'executable':
+            try:
+                self._track_lifecycle()
+                self._publish_client_data()
+            except Exception as e:
+                self.logger.error(f"Unexpected error in update_books: {e}")
+
+    def get_order_book(self, crypto: str, exchange: str, fiat: str, depth: int = None):
+        """Bids and asks (best first) of one venue, None when it has no book"""
+        return self.order_books.get(crypto.upper(), exchange.upper(), fiat.upper(), depth)
+
+    def _on_prices_updated(self):
+        """Display, CSV and client emit after one or more price writes"""
+        self._update_display()
+        # self.csv_tracker.write_spread_strategy(self.crypto_prices)
+        # self.csv_tracker.write_fiat_arbitrage(self.crypto_prices, self.exchange_rates)
+        
+        # For write_cross_exchange_fiat_arbitrage, ensure exchange_rates are in the right format
+        formatted_rates = {}
+        for currency, rate_data in self.exchange_rates.items():
+            if isinstance(rate_data, dict) and 'rate' in rate_data:
+                # Already in the right format
+                formatted_rates[currency] = rate_data
+            else:
+                # Convert simple value to dict with 'rate' key
+                formatted_rates[currency] = {'rate': rate_data, 'timestamp': datetime.now().isoformat()}
+        
+        if self.csv_tick_rows:
+            with metrics.time('csv'):
+                self.csv_tracker.write_cross_exchange_fiat_arbitrage(self.crypto_prices, formatted_rates,
+                                                                     opportunities=self.get_opportunities())
+
+        self._track_lifecycle()
+
+        # Only emit client data for price updates (more frequent than hello messages)
+        self._publish_client_data()
+
+    def update_exchange_rates(self, rates: list[tuple]):
+        """
+        Apply a batch of conflated forex rates, then update the display and emit once.
+        Args:
+            rates: (pair, rate, timestamp) tuples
+        """
+        updated = False
+        for pair, rate, timestamp in rates:
+            currency = pair.split('/')[0]
+            if currency not in self.exchange_rates:
+                self.logger.error(f"Unknown currency pair: {pair}")
+                continue
+            self.exchange_rates[currency] = {
+                'rate': rate,
+                'timestamp': timestamp if timestamp is not None else datetime.now().isoformat()
+            }
+            self.arbitrage_engine.update_exchange_rate(currency, rate)
+            self.rates_version += 1
+            updated = True
+
+        if updated:
+            # USD extremes moved with the rate
+            self.update_gate.reset_extremes()
+            try:
+                self._update_display()
+                self._publish_client_data()
+                self._publish_cycles()
+            except Exception as e:
+                self.logger.error(f"Error updating exchange rates: {str(e)}")
+
     def update_exchange_rate(self, pair: str, rate: float, timestamp=None):
         """Update forex exchange rate."""
         if timestamp is None:
@@ -126,10 +318,14 @@ class PriceTracker:
                     'rate': rate,
                     'timestamp': timestamp
                 }
+                self.arbitrage_engine.update_exchange_rate(currency, rate)
+                self.rates_version += 1
+                self.update_gate.reset_extremes()
                 self._update_display()
                 
                 # Only emit client data for exchange rate updates
-                self._emit_client_data()
+                self._publish_client_data()
+                self._publish_cycles()
             else:
                 self.logger.error(f"Unknown currency pair: {pair}")
         except Exception as e:
@@ -138,11 +334,8 @@ class PriceTracker:
     def _update_display(self):
         """Private method to handle display updates."""
         try:
-            price_display.display_prices({
-                'prices': self.crypto_prices,
-                'exchange_rates': self.exchange_rates,
-                'last_update': datetime.now().isoformat()
-            })
+            # Prints the book per tick, hands it to the dashboard thread or only counts, per DISPLAY_MODE
+            price_display.update(self.crypto_prices, self.exchange_rates)
         except Exception as e:
             self.logger.error("Display update error: %s", str(e))
 
@@ -166,52 +359,15 @@ class PriceTracker:
 
     def process_trade_message(self, data):
         try:
-            symbol = data['symbol_id']
             price = data['price']
-            exchange = symbol.split('_')[0]
-            
-            # Process only USD, USDT, EUR, GBP pairs
-            if not (symbol.endswith('_USD') or symbol.endswith('_USDT') or symbol.endswith('_EUR') or symbol.endswith('_GBP')):
+            # Crypto/exchange/fiat and book ids come from the symbol table (BTC/ETH, USD/USDT/EUR/GBP only)
+            entry = self.symbol_table.lookup(data['symbol_id'])
+            if entry is None:
                 return None
 
-            # Normalize exchange names
-            if 'BINANCE' in exchange:
-                exchange = 'BINANCE'
-
-            # Get fiat currency
-            fiat = 'USD'
-            if symbol.endswith('_EUR'):
-                fiat = 'EUR'
-            elif symbol.endswith('_USDT'):
-                fiat = 'USD'
-            elif symbol.endswith('_GBP'):
-                fiat = 'GBP'
-
             # Update price data with proper fiat currency
-            if 'BTC' in symbol:
-                if 'BTC' not in self.crypto_prices:
-                    self.crypto_prices['BTC'] = {}
-                if exchange not in self.crypto_prices['BTC']:
-                    self.crypto_prices['BTC'][exchange] = {}
-                
-                self.crypto_prices['BTC'][exchange][fiat] = {
-                    'price': price,
-                    'timestamp': data.get('time_exchange', datetime.now().isoformat())
-                }
-                crypto_type = 'BTC'
-            elif 'ETH' in symbol:
-                if 'ETH' not in self.crypto_prices:
-                    self.crypto_prices['ETH'] = {}
-                if exchange not in self.crypto_prices['ETH']:
-                    self.crypto_prices['ETH'][exchange] = {}
-                
-                self.crypto_prices['ETH'][exchange][fiat] = {
-                    'price': price,
-                    'timestamp': data.get('time_exchange', datetime.now().isoformat())
-                }
-                crypto_type = 'ETH'
-            else:
-                return None
+            self.price_book.update_ids(*entry.ids, price, data.get('time_exchange', datetime.now().isoformat()))
+            self.arbitrage_engine.update_price(entry.crypto, entry.exchange, entry.fiat, price)
 
             self.message_count += 1
             self._update_display()
@@ -219,17 +375,33 @@ class PriceTracker:
             return {
                 'timestamp': datetime.now().isoformat(),
                 'price': price,
-                'exchange_rates': exchange
+                'exchange_rates': entry.exchange
             }
         except Exception as e:
             self.logger.error(f"Error processing trade message: {e}")
             return None
 
     def get_latest_prices(self):
-        return {
-            'crypto': self.crypto_prices,
-            'exchange_rates': self.exchange_rates
-        }
+        """Nested prices and exchange rates, built once per book version (shared, do not modify)"""
+        return self.snapshots.get('latest_prices', lambda: {
+            'crypto': self.price_book.to_dict(),
+            'exchange_rates': {currency: dict(rate) for currency, rate in self.exchange_rates.items()}
+        })
+
+    def get_latest_prices_json(self) -> tuple:
+        """(ETag, JSON body) of the /api/latest-prices response at the current book version"""
+        return self.snapshots.get('latest_prices_json', self._latest_prices_json)
+
+    def _latest_prices_json(self):
+        etag = self.snapshots.etag()
+        latest_data = self.get_latest_prices()
+        body = json.dumps({
+            'status': 'success',
+            'crypto_prices': latest_data['crypto'],
+            'exchange_rates': latest_data['exchange_rates'],
+            'timestamp': datetime.now().isoformat()
+        })
+        return etag, body
     
     def get_client_data(self):
         return self.client_data
@@ -245,6 +417,68 @@ class PriceTracker:
                 return False
         return True
 
+    def _publish_client_data(self):
+        """
+        Rate limited client_data push: bursts coalesce into one emit of the latest data, except that a new
+        best opportunity (top spread crypto / buy venue / sell venue of the arbitrage engine) goes out at once
+        """
+        best = None
+        try:
+            opportunities = self.get_opportunities()
+            if opportunities:
+                top = opportunities[0]
+                best = (top['crypto'], top['lowest_price_exchange'], top['highest_price_exchange'])
+        except Exception as e:
+            self.logger.error(f"Error checking best opportunity: {e}")
+        priority = best is not None and best != self._best_opportunity
+        self._best_opportunity = best
+        self.emission_scheduler.publish('client_data', self._emit_client_data, priority=priority)
+
+    def _track_lifecycle(self):
+        """
+        Feed the current client_data to the lifecycle tracker, persisting and emitting the events it causes.
+        Runs on every recompute the update gate lets through, so opens, closes and peaks are not sampled at the
+        emit rate; the payload is built once per book version and reused by the rate limited emit.
+        """
+        if self.lifecycle is None or not self.has_valid_exchange_rates():
+            return
+        try:
+            events = self.lifecycle.update(self.get_arbitrage_data())
+            if not events:
+                return
+            with metrics.time('csv'):
+                self.csv_tracker.write_lifecycle_events(events)
+            self.rooms.emit('opportunity_lifecycle', lifecycle_message(events), [feed_room(LIFECYCLE_FEED)])
+        except Exception as e:
+            self.logger.error(f"Error tracking opportunity lifecycle: {e}")
+
+    def _publish_cycles(self):
+        """
+        Push the cycles to feed:cycles, rate limited like client_data. The search runs in the emit, once per
+        published batch, and not at all while nobody is subscribed (GET /api/cycle-arbitrage searches on demand).
+        """
+        if self.cycle_engine is None or not self.has_valid_exchange_rates():
+            return
+        if not self.rooms.listening_rooms([feed_room(CYCLES_FEED)]):
+            return
+        self.emission_scheduler.publish('cycle_arbitrage', self._emit_cycles)
+
+    def _emit_cycles(self):
+        try:
+            # Deferred emits can run after the last subscriber left
+            rooms = self.rooms.listening_rooms([feed_room(CYCLES_FEED)])
+            if not rooms:
+                return
+            cycles = self.get_cycles()
+            with metrics.time('emit'):
+                self.rooms.emit('cycle_arbitrage', {
+                    'type': 'cycle_update',
+                    'data': cycles,
+                    'timestamp': datetime.now().isoformat()
+                }, rooms)
+        except Exception as e:
+            self.logger.error(f"Failed to emit arbitrage cycles: {str(e)}")
+
     def _emit_client_data(self):
         """Private method to prepare and emit client data to frontend"""
         try:
@@ -256,8 +490,8 @@ class PriceTracker:
                     'message': 'Waiting for valid exchange rates...'
                 }
             else:
-                # Get arbitrage data from collector
-                self.client_data = self.data_collector.get_arbitrage_data()
+                # Get arbitrage data from collector, once per book version (hello and deferred emits reuse it)
+                self.client_data = self.get_arbitrage_data()
 
                 # Generate a random number between 10000 and 10500
                 # random_price = random.randint(10000, 10500)  # {{ edit_1 }}
@@ -287,7 +521,8 @@ class PriceTracker:
             if self.socketio:
                 try:
                     self.logger.info("Attempting to emit client data to frontend...")
-                    self.socketio.emit('client_data', frontend_data)
+                    with metrics.time('emit'):
+                        self.rooms.emit_client_data(frontend_data)
                     if self.client_data.get('status') == 'success':
                         self.logger.info(f"Emitted arbitrage data: Buy {self.client_data.get('crypto')} at {self.client_data.get('lowest_price_exchange')} " +
                                        f"(${self.client_data.get('lowest_price'):.2f}), Sell at {self.client_data.get('highest_price_exchange')} " +
@@ -308,18 +543,12 @@ class PriceTracker:
             self.logger.error(f"Error preparing/emitting client data: {str(e)}")
 
     def emit_hello_message(self):
-        """Public method to emit hello message to frontend"""
+        """Public method to emit hello message to frontend, rate limited by the 'hello' EMIT_RATES channel"""
+        self.emission_scheduler.publish('hello', self._emit_hello)
+
+    def _emit_hello(self):
         try:
-            # Add rate limiting - only emit once every 5 seconds
             current_time = datetime.now()
-            if hasattr(self, '_last_hello_time'):
-                time_diff = (current_time - self._last_hello_time).total_seconds()
-                if time_diff < 5:  # Less than 5 seconds since last message
-                    self.logger.debug("Skipping hello message due to rate limiting")
-                    return
-            
-            self._last_hello_time = current_time
-            
             if self.socketio:
                 self.logger.info("Sending hello message and client data...")
                 
@@ -328,11 +557,11 @@ class PriceTracker:
                     'message': 'You are connected to the server!',
                     'timestamp': current_time.isoformat()
                 }
-                self.socketio.emit('hello', message_data)
+                self.rooms.send('hello', message_data)
                 self.logger.info(f"Emitted hello message: {message_data}")
                 
                 # Then send client data
-                self._emit_client_data()
+                self._publish_client_data()
             else:
                 self.logger.error("Cannot emit messages: socketio instance is None")
         except Exception as e:
@@ -344,10 +573,8 @@ class PriceTracker:
                         'message': 'You are connected to the server!(retry)',
                         'timestamp': datetime.now().isoformat()
                     }
-                    self.socketio.emit('hello', retry_data)
+                    self.rooms.send('hello', retry_data)
                     self.logger.info("Successfully sent retry hello message")
-                    self._emit_client_data()  # Also retry sending client data
+                    self._publish_client_data()  # Also retry sending client data
             except Exception as retry_error:
                 self.logger.error(f"Error in retry attempt: {str(retry_error)}")
-
-
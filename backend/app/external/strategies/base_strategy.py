@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 class WebSocketStrategy(ABC):
     """Base class for implementing WebSocket connection strategies.
@@ -38,6 +38,17 @@ class WebSocketStrategy(ABC):
         """
         pass
 
+    def parse_tick(self, message: str) -> Optional[Dict[str, Any]]:
+        """Parse a message into a tick for conflation, without applying it.
+        
+        Strategies that support tick conflation inherit from ConflatingStrategy
+        instead; by default every message goes through process_message.
+        
+        Returns:
+            None, the message is not a tick
+        """
+        return None
+
     @abstractmethod
     def get_supported_pairs(self) -> list[str]:
         """Return list of supported cryptocurrency pairs.
@@ -54,4 +65,38 @@ class WebSocketStrategy(ABC):
         Returns:
             Strategy name as string
         """
+        pass
+
+
+class ConflatingStrategy(WebSocketStrategy):
+    """Base class for strategies whose messages can be conflated.
+    
+    parse_tick turns a message into a tick and apply_ticks applies the latest
+    tick per key as one batch (see TickConflator).
+    """
+
+    @abstractmethod
+    def parse_tick(self, message: str) -> Any:
+        """Parse a message into a tick for conflation, without applying it.
+        
+        Args:
+            message: Raw message string from WebSocket
+
+        Returns:
+            Tick or RateTick (the latest tick per tick.key wins), False if the
+            message should be skipped, or None if it is not a tick and must go
+            through process_message instead
+        """
+        pass
+
+    @abstractmethod
+    def apply_ticks(self, ticks: List[Any]) -> Optional[Dict[str, Any]]:
+        """Apply a batch of conflated ticks returned by parse_tick.
+        
+        Args:
+            ticks: Latest tick per key, in arrival order
+
+        Returns:
+            Processed batch dict to broadcast or None
+        """
         pass
\ No newline at end of file
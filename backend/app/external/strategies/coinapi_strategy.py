@@ -1,20 +1,56 @@
 # backend/app/external/strategies/coinapi_strategy.py
-import json
 import logging
-from .base_strategy import WebSocketStrategy
+import time
+from .base_strategy import ConflatingStrategy
 from app.config.settings import Config
 from app.processors.coinapi_processor import CoinAPIProcessor
+from app.processors.symbol_table import SymbolTable
+from app.processors import fast_json
+from app.external.utilities.price_book import to_epoch
+from app.external.utilities.order_book import BOOK_DATA_TYPES
+from app.types.tick import BookTick
+from app.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
-class CoinAPIStrategy(WebSocketStrategy):
+# Symbols subscribed to in format_auth_message, also used to precompute the symbol table
+SUBSCRIBED_SYMBOLS = [
+    # USD pairs
+    "COINBASE_SPOT_BTC_USD", "COINBASE_SPOT_ETH_USD",
+    "BINANCE_SPOT_BTC_USDT", "BINANCE_SPOT_ETH_USDT",
+    "KRAKEN_SPOT_BTC_USD", "KRAKEN_SPOT_ETH_USD",
+    "BITSTAMP_SPOT_BTC_USD", "BITSTAMP_SPOT_ETH_USD",
+
+    # EUR pairs
+    "COINBASE_SPOT_BTC_EUR", "COINBASE_SPOT_ETH_EUR",
+    "BINANCE_SPOT_BTC_EUR", "BINANCE_SPOT_ETH_EUR",
+    "KRAKEN_SPOT_BTC_EUR", "KRAKEN_SPOT_ETH_EUR",
+    "BITSTAMP_SPOT_BTC_EUR", "BITSTAMP_SPOT_ETH_EUR",
+
+    # GBP pairs
+    "COINBASE_SPOT_BTC_GBP", "COINBASE_SPOT_ETH_GBP",
+    "BINANCE_SPOT_BTC_GBP", "BINANCE_SPOT_ETH_GBP",
+    "KRAKEN_SPOT_BTC_GBP", "KRAKEN_SPOT_ETH_GBP",
+    "BITSTAMP_SPOT_BTC_GBP", "BITSTAMP_SPOT_ETH_GBP",
+]
+
+class CoinAPIStrategy(ConflatingStrategy):
     def __init__(self, price_tracker):
         self.api_key = Config.COINAPI_KEY
-        self.processor = CoinAPIProcessor(price_tracker)  # Instantiate the processor
         self.price_tracker = price_tracker  # Reference to the price tracker
         self.price_tracker.initialize_crypto_pairs(self.get_supported_pairs())
+        self.symbol_table = SymbolTable(SUBSCRIBED_SYMBOLS, price_tracker.price_book)
+        self.processor = CoinAPIProcessor(price_tracker, self.symbol_table)  # Instantiate the processor
+        # L2 depth subscribed next to the trades, if any
+        self.book_data_type = Config.COINAPI_BOOK_DATA_TYPE or None
+        if self.book_data_type is not None and self.book_data_type not in BOOK_DATA_TYPES:
+            raise ValueError(f"Unknown CoinAPI book data type: {self.book_data_type}")
 
     def get_connection_params(self):
+        if Config.FEED_MODE == 'mock':
+            return {
+                "uri": f"{Config.MOCK_FEED_URI}/coinapi"
+            }
         return {
             "uri": "wss://ws.coinapi.io/v1/"
         }
@@ -24,33 +60,44 @@ class CoinAPIStrategy(WebSocketStrategy):
             "type": "hello",
             "apikey": self.api_key,
             "heartbeat": False,
-            "subscribe_data_type": ["trade"],
-            "subscribe_filter_symbol_id": [
-                # USD pairs
-                "COINBASE_SPOT_BTC_USD", "COINBASE_SPOT_ETH_USD",
-                "BINANCE_SPOT_BTC_USDT", "BINANCE_SPOT_ETH_USDT",
-                "KRAKEN_SPOT_BTC_USD", "KRAKEN_SPOT_ETH_USD",
-                "BITSTAMP_SPOT_BTC_USD", "BITSTAMP_SPOT_ETH_USD",
-                
-                # EUR pairs
-                "COINBASE_SPOT_BTC_EUR", "COINBASE_SPOT_ETH_EUR",
-                "BINANCE_SPOT_BTC_EUR", "BINANCE_SPOT_ETH_EUR",
-                "KRAKEN_SPOT_BTC_EUR", "KRAKEN_SPOT_ETH_EUR",
-                "BITSTAMP_SPOT_BTC_EUR", "BITSTAMP_SPOT_ETH_EUR",
-                
-                # GBP pairs
-                "COINBASE_SPOT_BTC_GBP", "COINBASE_SPOT_ETH_GBP",
-                "BINANCE_SPOT_BTC_GBP", "BINANCE_SPOT_ETH_GBP",
-                "KRAKEN_SPOT_BTC_GBP", "KRAKEN_SPOT_ETH_GBP",
-                "BITSTAMP_SPOT_BTC_GBP", "BITSTAMP_SPOT_ETH_GBP",
-            ]
+            "subscribe_data_type": ["trade"] + ([self.book_data_type] if self.book_data_type else []),
+            "subscribe_filter_symbol_id": SUBSCRIBED_SYMBOLS
         }
 
     async def process_message(self, message):
-        data = json.loads(message)
+        start = time.perf_counter()
+        data = fast_json.loads(message)
+        metrics.observe('decode', time.perf_counter() - start)
         # Use only processor path for updates
         self.processor.process_message(data)
 
+    def parse_tick(self, message):
+        start = time.perf_counter()
+        data = fast_json.loads(message)
+        decoded = time.perf_counter()
+        metrics.observe('decode', decoded - start)
+        if data.get('type') in BOOK_DATA_TYPES:
+            book = self.processor.parse_book(data)
+            metrics.observe('parse', time.perf_counter() - decoded)
+            return book or False
+        if data.get('type') == 'error' or 'price' not in data:
+            return None
+        tick = self.processor.parse_message(data)
+        metrics.observe('parse', time.perf_counter() - decoded)
+        if tick and metrics.enabled:
+            metrics.observe_lag('coinapi', to_epoch(tick.timestamp))
+        return tick or False
+
+    def apply_ticks(self, ticks):
+        # Book messages go to the order books first, then one price update, display, CSV and emit cycle
+        # for the whole batch
+        books = [tick for tick in ticks if isinstance(tick, BookTick)]
+        if books:
+            self.price_tracker.update_books(books)
+            ticks = [tick for tick in ticks if not isinstance(tick, BookTick)]
+        if ticks:
+            self.price_tracker.update_prices(ticks)
+
     def get_supported_pairs(self) -> list[str]:
         return [
             "BTC/USD", "ETH/USD",
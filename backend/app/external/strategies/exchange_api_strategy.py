@@ -1,12 +1,15 @@
-from .base_strategy import WebSocketStrategy
+from .base_strategy import ConflatingStrategy
 from app.config.settings import Config
 from app.processors.xchange_processor import XChangeProcessor
+from app.types.tick import RateTick
+from app.metrics import metrics
 import json
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
-class ExchangeAPIStrategy(WebSocketStrategy):
+class ExchangeAPIStrategy(ConflatingStrategy):
     def __init__(self, price_tracker):
         self.api_key = Config.XCHANGEAPI_KEY
         self.price_tracker = price_tracker
@@ -16,6 +19,10 @@ class ExchangeAPIStrategy(WebSocketStrategy):
 
     def get_connection_params(self):
         self.logger.info("Initializing xChangeAPI connection...")
+        if Config.FEED_MODE == 'mock':
+            return {
+                "uri": f"{Config.MOCK_FEED_URI}/xchangeapi?api-key={self.api_key}"
+            }
         return {
             "uri": f"wss://api.xchangeapi.com/websocket/live?api-key={self.api_key}"
         }
@@ -58,6 +65,24 @@ class ExchangeAPIStrategy(WebSocketStrategy):
             self.logger.error(f"Message processing error: {e}")
             return None
 
+    def parse_tick(self, message):
+        # Only live rate messages are conflated, init and heartbeat messages go through process_message
+        if not self.connected or not message.startswith('1'):
+            return None
+        start = time.perf_counter()
+        result = self.processor.process_message(message)
+        metrics.observe('parse', time.perf_counter() - start)
+        if not (isinstance(result, dict) and 'name' in result and 'ask' in result):
+            return False
+        if metrics.enabled and isinstance(result.get('timestamp'), (int, float)):
+            # The processor returns the exchange time (epoch seconds) as 'timestamp'
+            metrics.observe_lag('xchangeapi', result['timestamp'])
+        return RateTick(result['name'], float(result['ask']), result.get('timestamp'))
+
+    def apply_ticks(self, ticks):
+        self.price_tracker.update_exchange_rates([(tick.pair, tick.rate, tick.timestamp) for tick in ticks])
+        return {'rates': [{'name': tick.pair, 'ask': tick.rate, 'timestamp': tick.timestamp} for tick in ticks]}
+
     def get_supported_pairs(self) -> list[str]:
         return ["EURUSD", "GBPUSD"]
 
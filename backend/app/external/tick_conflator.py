@@ -0,0 +1,56 @@
+'''
+This module holds the conflation stage between websocket.recv() and processing.
+WebSocketClient drains every message that is already buffered on the connection, the strategy parses each one
+into a tick and the TickConflator keeps only the latest tick per key, (crypto, exchange, fiat) for trades or
+('FX', currency) for exchange rates. The surviving ticks are applied as one batch, so a burst of trades on the same
+symbol costs one update, display, CSV and emit cycle instead of one per trade.
+'''
+from typing import Dict, Hashable, List, Optional
+
+from app.types.tick import Tick
+
+
+class TickConflator:
+    """Latest-wins merge of ticks by key, with counters for how much was merged"""
+
+    def __init__(self):
+        self._pending: Dict[Hashable, Tick] = {}
+        self.ticks_received = 0
+        self.ticks_merged = 0
+        self.ticks_applied = 0
+        self.batches = 0
+        self.max_batch_size = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, tick: Tick):
+        """Keep tick as the latest for tick.key, replacing (merging) any pending tick with the same key"""
+        self.ticks_received += 1
+        key = tick.key
+        if key in self._pending:
+            self.ticks_merged += 1
+            # Re-insert so the batch stays ordered by each key's latest arrival
+            del self._pending[key]
+        self._pending[key] = tick
+
+    def drain(self) -> List[Tick]:
+        """Return the pending ticks as one batch and start a new one"""
+        batch = list(self._pending.values())
+        self._pending = {}
+        if batch:
+            self.batches += 1
+            self.ticks_applied += len(batch)
+            self.max_batch_size = max(self.max_batch_size, len(batch))
+        return batch
+
+    def get_stats(self) -> Dict[str, Optional[float]]:
+        return {
+            'ticks_received': self.ticks_received,
+            'ticks_merged': self.ticks_merged,
+            'ticks_applied': self.ticks_applied,
+            'batches': self.batches,
+            'max_batch_size': self.max_batch_size,
+            'avg_batch_size': self.ticks_applied / self.batches if self.batches else None,
+            'merge_ratio': self.ticks_merged / self.ticks_received if self.ticks_received else None
+        }
@@ -0,0 +1,146 @@
+'''
+This module prices every buy venue x sell venue combination of a cryptocurrency net of fees in one
+vectorized pass. A venue is an (exchange, fiat) pair, so the matrix covers same-exchange cross-fiat,
+cross-exchange same-fiat and cross-exchange cross-fiat trades at once.
+CrossExchangeFiatArbitrage only reports the single lowest/highest pair and prices fees for that pair,
+but since trading and withdrawal fees vary by venue the best trade after fees is often a different pair.
+Fees follow FeeCalculator.calculate_fees for a 1 unit trade: taker fee on the buy and sell legs plus the
+fiat withdrawal fee at the sell venue, normalized to USD.
+'''
+import sys
+import os
+import heapq
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Add the root directory of your project to the sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
+
+from app.external.utilities.fee_calc import FeeSchedule, FEE_SCHEDULE
+from app.external.utilities.price_book import PriceBook
+
+
+class ArbitrageMatrix:
+    """All-pairs net-of-fee arbitrage over a PriceBook with top-K output"""
+
+    def __init__(self, price_data, exchange_rates: Dict, fee_schedule: FeeSchedule = FEE_SCHEDULE):
+        self.price_book = price_data if isinstance(price_data, PriceBook) else PriceBook.from_dict(price_data)
+        self.exchange_rates = exchange_rates
+        self.fee_schedule = fee_schedule
+
+    def _fee_vectors(self, rates: np.ndarray):
+        """
+        Per-exchange taker fees and per-(exchange, fiat) USD withdrawal fee for the interned names,
+        gathered from the compiled FeeSchedule. Unknown exchanges or fiats get NaN so they never rank.
+        """
+        book = self.price_book
+        exchange_ids = self.fee_schedule.exchange_index(book.exchanges)
+        fiat_ids = self.fee_schedule.fiat_index(book.fiats)
+        fee_buy = self.fee_schedule.trading_fees[exchange_ids, 0]
+        fee_sell = self.fee_schedule.trading_fees[exchange_ids, 1]
+        withdrawal = self.fee_schedule.fiat_withdrawal[np.ix_(exchange_ids, fiat_ids)]
+        return fee_buy, fee_sell, withdrawal * rates
+
+    def net_profit_matrices(self):
+        """
+        Yields (crypto_id, venue_ids, venue_usd, net) per crypto, where net[i, j] is the profit after
+        fees of buying at venue_ids[i] and selling at venue_ids[j] (same-venue pairs are -inf).
+        Venue ids index the flattened (exchange, fiat) axis of the book.
+        """
+        book = self.price_book
+        n_crypto, n_exchange, n_fiat = book.shape()
+        if not n_crypto or not n_exchange or not n_fiat:
+            return
+
+        rates = book.fiat_rates(self.exchange_rates)
+        usd = (book.price_array() * rates).reshape(n_crypto, n_exchange * n_fiat)
+        fee_buy, fee_sell, withdrawal_usd = self._fee_vectors(rates)
+
+        # Flattened venue v = exchange_id * n_fiat + fiat_id
+        venue_fee_buy = np.repeat(fee_buy, n_fiat)
+        venue_fee_sell = np.repeat(fee_sell, n_fiat)
+        venue_withdrawal = withdrawal_usd.reshape(-1)
+
+        for crypto_id in range(n_crypto):
+            prices = usd[crypto_id]
+            venue_ids = np.nonzero(~np.isnan(prices))[0]
+            if len(venue_ids) < 2:
+                continue
+            venue_usd = prices[venue_ids]
+            buy_cost = venue_usd * (1.0 + venue_fee_buy[venue_ids])
+            sell_proceeds = venue_usd * (1.0 - venue_fee_sell[venue_ids]) - venue_withdrawal[venue_ids]
+
+            net = sell_proceeds[np.newaxis, :] - buy_cost[:, np.newaxis]
+            net[np.isnan(net)] = -np.inf
+            np.fill_diagonal(net, -np.inf)
+            yield crypto_id, venue_ids, venue_usd, net
+
+    def find_top_opportunities(self, top_k: int = 10, min_net_profit: Optional[float] = None) -> List[Dict]:
+        """
+        Best buy/sell venue pairs across all cryptos ranked by profit after fees.
+        Returns:
+            list of dicts with the ArbitrageOpportunity keys plus total_fees and arbitrage_after_fees
+        """
+        book = self.price_book
+        n_fiat = len(book.fiats)
+        candidates = []
+
+        for crypto_id, venue_ids, venue_usd, net in self.net_profit_matrices():
+            flat = net.reshape(-1)
+            k = min(top_k, flat.size)
+            best = np.argpartition(flat, -k)[-k:]
+            for index in best.tolist():
+                profit = flat[index]
+                if not np.isfinite(profit) or (min_net_profit is not None and profit < min_net_profit):
+                    continue
+                buy, sell = divmod(index, len(venue_ids))
+                candidates.append((float(profit), crypto_id, int(venue_ids[buy]), int(venue_ids[sell]),
+                                   float(venue_usd[buy]), float(venue_usd[sell])))
+
+        opportunities = []
+        for profit, crypto_id, buy_venue, sell_venue, buy_price, sell_price in heapq.nlargest(top_k, candidates):
+            crypto = book.cryptos[crypto_id]
+            buy_exchange, buy_fiat = divmod(buy_venue, n_fiat)
+            sell_exchange, sell_fiat = divmod(sell_venue, n_fiat)
+            opportunities.append({
+                'crypto': crypto,
+                'lowest_price': buy_price,
+                'lowest_price_exchange': (crypto, book.exchanges[buy_exchange], book.fiats[buy_fiat]),
+                'highest_price': sell_price,
+                'highest_price_exchange': (crypto, book.exchanges[sell_exchange], book.fiats[sell_fiat]),
+                'spread': (sell_price - buy_price) / buy_price,
+                'total_fees': sell_price - buy_price - profit,
+                'arbitrage_after_fees': profit
+            })
+        return opportunities
+
+
+# Example usage
+if __name__ == "__main__":
+    EXAMPLE_TIMESTAMP = '2023-10-01T00:00:00Z'
+    exchange_rates = {
+        'USD': {'rate': 1.0, 'timestamp': EXAMPLE_TIMESTAMP},
+        'EUR': {'rate': 1.1, 'timestamp': EXAMPLE_TIMESTAMP},  # 1 EUR = 1.1 USD
+        'GBP': {'rate': 1.3, 'timestamp': EXAMPLE_TIMESTAMP}   # 1 GBP = 1.3 USD
+    }
+    price_data = {
+        'BTC': {
+            'COINBASE': {
+                'USD': {'price': 50000.0, 'timestamp': EXAMPLE_TIMESTAMP},
+                'EUR': {'price': 45000.0, 'timestamp': EXAMPLE_TIMESTAMP},
+            },
+            'BINANCE': {
+                'USD': {'price': 50500.0, 'timestamp': EXAMPLE_TIMESTAMP},
+                'GBP': {'price': 38900.0, 'timestamp': EXAMPLE_TIMESTAMP},
+            },
+            'KRAKEN': {
+                'EUR': {'price': 46100.0, 'timestamp': EXAMPLE_TIMESTAMP},
+            },
+        }
+    }
+
+    matrix = ArbitrageMatrix(price_data, exchange_rates)
+    for opp in matrix.find_top_opportunities(top_k=5):
+        print(f"{opp['crypto']}: buy {opp['lowest_price_exchange'][1:]} sell {opp['highest_price_exchange'][1:]} "
+              f"-> ${opp['arbitrage_after_fees']:.2f} after ${opp['total_fees']:.2f} fees")
@@ -0,0 +1,200 @@
+'''
+This module moves CSV persistence off the ingest path. CSVTracker hands finished rows to an AsyncCSVWriter,
+which puts them on a bounded queue and returns immediately. A background thread drains the queue, keeps one
+open file handle and DictWriter per CSV file and flushes to disk in batches, by row count or by time.
+If the queue is full the rows are dropped and counted rather than blocking price ingestion or Socket.IO emits.
+Under gevent's monkey.patch_all() threading.Thread is a greenlet on the hub thread, so the writer runs on a
+gevent thread pool worker instead to keep the file I/O on a real OS thread.
+'''
+import _queue
+import atexit
+import csv
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+try:
+    from gevent import monkey
+    from gevent.threadpool import ThreadPool
+    GEVENT_AVAILABLE = True
+except ImportError:
+    GEVENT_AVAILABLE = False
+
+
+class _PooledThread:
+    """The is_alive/join part of threading.Thread for a function running on a one-worker gevent ThreadPool"""
+
+    def __init__(self, target):
+        self._pool = ThreadPool(1)
+        self._result = self._pool.spawn(target)
+
+    def is_alive(self) -> bool:
+        return not self._result.ready()
+
+    def join(self, timeout: float = None):
+        self._result.wait(timeout)
+        if not self.is_alive():
+            self._pool.kill()
+
+
+def start_native_thread(target, name: str):
+    """Run target on an OS thread, also when gevent has monkey patched threading"""
+    if GEVENT_AVAILABLE and monkey.is_module_patched('threading'):
+        return _PooledThread(target)
+    thread = threading.Thread(target=target, name=name, daemon=True)
+    thread.start()
+    return thread
+
+
+class AsyncCSVWriter:
+    """Bounded-queue background CSV writer with batched flushes"""
+
+    _FLUSH = 'flush'
+    _STOP = 'stop'
+
+    def __init__(self, max_queue_size: int = 10000, batch_size: int = 500, flush_interval: float = 1.0,
+                 idle_close_after: float = 300.0):
+        self.logger = logging.getLogger(__name__)
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.idle_close_after = idle_close_after
+
+        # The C SimpleQueue blocks on native locks, which gevent leaves alone, so it works between a
+        # greenlet and the writer's OS thread. It is unbounded, submit enforces max_queue_size.
+        self._queue = _queue.SimpleQueue()
+        self._files: Dict[str, dict] = {}  # path -> {'fieldnames', 'max_size', 'file', 'writer', 'last_write'}
+        self._pending: Dict[str, List[dict]] = {}
+        self._pending_count = 0
+        self._last_flush = time.monotonic()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.batches_flushed = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = start_native_thread(self._run, 'async-csv-writer')
+        atexit.register(self.close)
+
+    def submit(self, file_path: str, fieldnames: List[str], rows: List[dict], max_size: Optional[int] = None) -> bool:
+        """
+        Queue rows for file_path without blocking. Returns False if the rows were dropped.
+        Args:
+            max_size: size in bytes after which further rows for file_path are dropped, None for no cap
+        """
+        if not rows:
+            return True
+        if self._thread is None:
+            self.start()
+        if self._queue.qsize() >= self.max_queue_size:
+            self.rows_dropped += len(rows)
+            return False
+        self._queue.put((file_path, fieldnames, rows, max_size))
+        return True
+
+    def flush(self, timeout: float = None) -> bool:
+        """Block until every row queued before this call has been written and flushed to disk"""
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        self._queue.put((self._FLUSH, done, None, None))
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        """Flush everything still queued, close the file handles and stop the background thread"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put((self._STOP, None, None, None))
+        self._thread.join(timeout)
+
+    def get_stats(self) -> dict:
+        return {
+            'queue_depth': self._queue.qsize(),
+            'pending_rows': self._pending_count,
+            'rows_written': self.rows_written,
+            'rows_dropped': self.rows_dropped,
+            'batches_flushed': self.batches_flushed,
+            'open_files': sum(1 for handle in self._files.values() if 'file' in handle)
+        }
+
+    def _run(self):
+        while True:
+            timeout = max(0.0, self._last_flush + self.flush_interval - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout if self._pending_count else None)
+            except queue.Empty:
+                self._flush_pending()
+                continue
+
+            target, payload, rows, max_size = item
+            if target == self._FLUSH:
+                self._flush_pending()
+                payload.set()
+            elif target == self._STOP:
+                self._flush_pending()
+                self._close_files()
+                return
+            else:
+                self._pending.setdefault(target, []).extend(rows)
+                self._files.setdefault(target, {'fieldnames': payload, 'max_size': max_size})
+                self._pending_count += len(rows)
+                if (self._pending_count >= self.batch_size
+                        or time.monotonic() - self._last_flush >= self.flush_interval):
+                    self._flush_pending()
+
+    def _open(self, file_path: str) -> dict:
+        handle = self._files[file_path]
+        if 'file' in handle:
+            return handle
+        fieldnames = handle['fieldnames']
+        file_exists = os.path.exists(file_path) and os.path.getsize(file_path) > 0
+        file = open(file_path, mode='a', newline='')
+        writer = csv.DictWriter(file, fieldnames=fieldnames)
+        if not file_exists:
+            writer.writeheader()
+        handle.update(file=file, writer=writer)
+        return handle
+
+    def _flush_pending(self):
+        now = time.monotonic()
+        if self._pending_count:
+            self.batches_flushed += 1
+        for file_path, rows in self._pending.items():
+            if not rows:
+                continue
+            try:
+                handle = self._open(file_path)
+                if handle['max_size'] is not None and handle['file'].tell() >= handle['max_size']:
+                    self.logger.warning(f"CSV file {file_path} has reached the maximum size limit. Skipping write.")
+                    self.rows_dropped += len(rows)
+                    continue
+                handle['writer'].writerows(rows)
+                handle['file'].flush()
+                handle['last_write'] = now
+                self.rows_written += len(rows)
+            except Exception as e:
+                self.logger.error(f"Error writing {len(rows)} rows to {file_path}: {str(e)}")
+                self.rows_dropped += len(rows)
+        self._pending = {}
+        self._pending_count = 0
+        self._last_flush = now
+
+        # Close handles nobody wrote to for a while (e.g. yesterday's dated files)
+        for file_path, handle in list(self._files.items()):
+            if 'file' in handle and now - handle.get('last_write', now) > self.idle_close_after:
+                handle['file'].close()
+                del self._files[file_path]
+
+    def _close_files(self):
+        for handle in self._files.values():
+            if 'file' in handle:
+                handle['file'].close()
+        self._files = {}
@@ -8,6 +8,8 @@ on different exchanges.
 
 import sys
 import os
+import math
+import logging
 from typing import List, Dict, Any
 
 # Add the root directory of your project to the sys.path
@@ -16,16 +18,46 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../.
 
 from app.external.utilities.cross_exchange_fiat_arbitrage import CrossExchangeFiatArbitrage
 from app.external.utilities.fee_calc import FeeCalculator
+from app.external.utilities.arbitrage_matrix import ArbitrageMatrix
+from app.external.utilities.executable_arbitrage import ExecutableArbitrage
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
 
 class DataCollector:
     """Collects data from the backend and sends it to the frontend"""
-    def __init__(self, price_data, exchange_rates):
+    # 'extremes': one lowest/highest pair per crypto, 'matrix': top-K pairs from the all-pairs net-of-fee matrix,
+    # 'executable': top-K pairs by net profit of the size their order books can fill
+    MODES = ('extremes', 'matrix', 'executable')
+
+    def __init__(self, price_data, exchange_rates, arbitrage_engine=None, mode='extremes', top_k=10, cycle_engine=None,
+                 order_books=None, max_notional_usd=0.0):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown arbitrage mode: {mode}")
+        if mode == 'executable' and order_books is None:
+            raise ValueError("The executable arbitrage mode needs order books")
         self.price_data = price_data
         self.exchange_rates = exchange_rates
-        self.cross_exchange_arbitrage = CrossExchangeFiatArbitrage(price_data, exchange_rates)
+        self.mode = mode
+        self.top_k = top_k
+        # An IncrementalArbitrageEngine kept up to date by the PriceTracker avoids a full rescan per call
+        self.cross_exchange_arbitrage = arbitrage_engine or CrossExchangeFiatArbitrage(price_data, exchange_rates)
+        self.arbitrage_matrix = ArbitrageMatrix(price_data, exchange_rates)
+        # Multi-leg cycles of the log-price graph (CycleArbitrageEngine), None when disabled
+        self.cycle_engine = cycle_engine
+        # VWAP arbitrage over the L2 books (OrderBooks), None without depth
+        self.executable_arbitrage = None
+        if order_books is not None:
+            self.executable_arbitrage = ExecutableArbitrage(order_books, exchange_rates, max_notional_usd=max_notional_usd)
     
-    def get_arbitrage_data(self) -> Dict[str, Any]:
-        """Get the arbitrage data from the cross exchange arbitrage class"""
+    def get_arbitrage_data(self, mode=None, top_k=None, opportunities=None) -> Dict[str, Any]:
+        """
+        Get the arbitrage data from the cross exchange arbitrage class, from the
+        all-pairs arbitrage matrix when mode is 'matrix', or from the order books when mode is 'executable'.
+        In 'extremes' mode the caller can pass the cross exchange opportunities it already has
+        (e.g. PriceTracker.get_opportunities()), only their fees are priced then
+        """
+        mode = mode or self.mode
         try:
             # Validate that we have sufficient data
             if not self.price_data or not self.exchange_rates:
@@ -35,7 +67,18 @@ class DataCollector:
                     'opportunities': []
                 }
 
-            arbitrage_opportunities = self.cross_exchange_arbitrage.find_lowest_and_highest_price()
+            with metrics.time('arbitrage'):
+                if mode == 'matrix':
+                    # The matrix already prices fees for every pair; pairs losing money after fees are not
+                    # opportunities, even when fewer than top_k pairs make money
+                    arbitrage_opportunities = self.arbitrage_matrix.find_top_opportunities(top_k or self.top_k,
+                                                                                           min_net_profit=0.0)
+                elif mode == 'executable':
+                    arbitrage_opportunities = self.executable_arbitrage.find_top_opportunities(top_k or self.top_k)
+                elif opportunities is not None:
+                    arbitrage_opportunities = opportunities
+                else:
+                    arbitrage_opportunities = self.cross_exchange_arbitrage.find_lowest_and_highest_price()
             if not arbitrage_opportunities:
                 return {
                     'status': 'no_arbitrage',
@@ -43,45 +86,68 @@ class DataCollector:
                     'opportunities': []
                 }
 
+            if mode in ('matrix', 'executable'):
+                # The matrix and the book walk already priced fees for every pair
+                total_fees = [opp['total_fees'] for opp in arbitrage_opportunities]
+                arbitrage_after_fees = [opp['arbitrage_after_fees'] for opp in arbitrage_opportunities]
+            else:
+                # Price the fees of every opportunity in one vectorized call
+                with metrics.time('fees'):
+                    fees = FeeCalculator.calculate_fees_batch(
+                        exchange_buy=[opp['lowest_price_exchange'][1] for opp in arbitrage_opportunities],
+                        exchange_sell=[opp['highest_price_exchange'][1] for opp in arbitrage_opportunities],
+                        crypto=[opp['crypto'] for opp in arbitrage_opportunities],
+                        crypto_amount=1,
+                        crypto_price_buy=[opp['lowest_price'] for opp in arbitrage_opportunities],
+                        crypto_price_sell=[opp['highest_price'] for opp in arbitrage_opportunities],
+                        currency_withdrawal=[opp['highest_price_exchange'][2] for opp in arbitrage_opportunities],
+                        exchange_rates=self.exchange_rates
+                    )
+                total_fees = fees['total_fees'].tolist()
+                arbitrage_after_fees = fees['arbitrage_after_fees'].tolist()
+
             # Process each opportunity with fees
             processed_opportunities = []
-            for opp in arbitrage_opportunities:
+            for opp, opp_fees, opp_after_fees in zip(arbitrage_opportunities, total_fees, arbitrage_after_fees):
+                if math.isnan(opp_after_fees):
+                    # No fee schedule for this exchange/currency
+                    logger.debug(f"Skipping {opp['crypto']} opportunity without fee data: "
+                                 f"{opp['lowest_price_exchange']} -> {opp['highest_price_exchange']}")
+                    continue
                 lowest_price = opp['lowest_price']
-                lowest_price_exchange = opp['lowest_price_exchange'][1].lower()
                 highest_price = opp['highest_price']
-                highest_price_exchange = opp['highest_price_exchange'][1].lower()
-                crypto = opp['crypto']
-                buy_currency = opp['lowest_price_exchange'][2]
-                sell_currency = opp['highest_price_exchange'][2]
-
-                # Initialize fee calculator with correct parameters
-                fee_calculator = FeeCalculator(
-                    exchange_buy=lowest_price_exchange,
-                    exchange_sell=highest_price_exchange,
-                    crypto=crypto,
-                    crypto_amount=1,
-                    crypto_price_buy=lowest_price,
-                    crypto_price_sell=highest_price,
-                    currency_withdrawal=sell_currency,
-                    exchange_rates=self.exchange_rates
-                )
-
-                # Calculate fees
-                fees = fee_calculator.calculate_fees()
-                
-                processed_opportunities.append({
-                    'crypto': crypto,
+                # Executable opportunities are priced for their size (VWAPs, total fees and profit), the rest for 1 unit
+                size = opp.get('size', 1)
+
+                processed = {
+                    'crypto': opp['crypto'],
                     'lowest_price': round(lowest_price, 2),
-                    'lowest_price_exchange': lowest_price_exchange,
+                    'lowest_price_exchange': opp['lowest_price_exchange'][1].lower(),
                     'highest_price': round(highest_price, 2),
-                    'highest_price_exchange': highest_price_exchange,
-                    'buy_currency': buy_currency,
-                    'sell_currency': sell_currency,
+                    'highest_price_exchange': opp['highest_price_exchange'][1].lower(),
+                    'buy_currency': opp['lowest_price_exchange'][2],
+                    'sell_currency': opp['highest_price_exchange'][2],
                     'spread_percentage': round(opp['spread'] * 100, 2),
-                    'total_fees': round(fees['total_fees'], 2),
-                    'arbitrage_after_fees': round(fees['arbitrage_after_fees'], 2),
-                    'profit_percentage': round((fees['arbitrage_after_fees'] / lowest_price) * 100, 2)
-                })
+                    'total_fees': round(opp_fees, 2),
+                    'arbitrage_after_fees': round(opp_after_fees, 2),
+                    'profit_percentage': round((opp_after_fees / (lowest_price * size)) * 100, 2)
+                }
+                if 'size' in opp:
+                    processed.update({
+                        'size': round(size, 8),
+                        'buy_vwap': round(opp['buy_vwap'], 2),
+                        'sell_vwap': round(opp['sell_vwap'], 2),
+                        'buy_levels': opp['buy_levels'],
+                        'sell_levels': opp['sell_levels']
+                    })
+                processed_opportunities.append(processed)
+
+            if not processed_opportunities:
+                return {
+                    'status': 'no_arbitrage',
+                    'message': 'No arbitrage opportunities found',
+                    'opportunities': []
+                }
 
             return {    
                 'status': 'success',
@@ -94,7 +160,57 @@ class DataCollector:
                 'message': f'Error calculating arbitrage: {str(e)}',
                 'opportunities': []
             }
-    
+
+    def get_cycle_data(self, top_k=None) -> Dict[str, Any]:
+        """
+        Get the profitable multi-leg conversion cycles (triangular and longer) from the cycle engine,
+        ranked by return after fees
+        """
+        try:
+            if self.cycle_engine is None or not self.price_data or not self.exchange_rates:
+                return {
+                    'status': 'waiting',
+                    'message': 'Waiting for price data and exchange rates...',
+                    'cycles': []
+                }
+
+            with metrics.time('cycles'):
+                cycles = self.cycle_engine.find_cycles(top_k or self.top_k)
+            if not cycles:
+                return {
+                    'status': 'no_arbitrage',
+                    'message': 'No arbitrage cycles found',
+                    'cycles': []
+                }
+
+            notional = self.cycle_engine.notional_usd
+            return {
+                'status': 'success',
+                'cycles': [{
+                    'id': cycle['id'],
+                    'start': cycle['start'],
+                    'start_exchange': cycle['start_exchange'].lower(),
+                    'legs': [{
+                        **leg,
+                        'from_exchange': leg['from_exchange'].lower(),
+                        'to_exchange': leg['to_exchange'].lower(),
+                        **({'price': round(leg['price'], 2)} if leg.get('price') is not None else {})
+                    } for leg in cycle['legs']],
+                    'hops': len(cycle['legs']),
+                    'cryptos': cycle['cryptos'],
+                    'exchanges': [exchange.lower() for exchange in cycle['exchanges']],
+                    'profit_percentage': round(cycle['profit'] * 100, 4),
+                    'profit_on_notional': round(cycle['profit'] * notional, 2)
+                } for cycle in cycles]
+            }
+        except Exception as e:
+            print(f"Error in get_cycle_data: {str(e)}")
+            return {
+                'status': 'error',
+                'message': f'Error calculating arbitrage cycles: {str(e)}',
+                'cycles': []
+            }
+
 # Example usage
 if __name__ == "__main__":
     # Example price data
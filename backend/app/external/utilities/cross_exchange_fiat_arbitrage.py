@@ -15,6 +15,7 @@ from typing import Dict, TypedDict, List
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
 
 from app.types.price_data_types import PriceDataType
+from app.external.utilities.price_book import PriceBook
 
 class ExchangeRateData(TypedDict):
     rate: float
@@ -34,6 +35,9 @@ class CrossExchangeFiatArbitrage:
         self.exchange_rates = exchange_rates
 
     def find_lowest_and_highest_price(self) -> List[ArbitrageOpportunity]:
+        if isinstance(self.price_data, PriceBook):
+            return self._find_from_book(self.price_data)
+
         opportunities: List[ArbitrageOpportunity] = []
 
         # Process each cryptocurrency
@@ -104,6 +108,31 @@ class CrossExchangeFiatArbitrage:
         opportunities.sort(key=lambda x: x['spread'], reverse=True)
         return opportunities
 
+    def _find_from_book(self, book: PriceBook) -> List[ArbitrageOpportunity]:
+        """Vectorized version of find_lowest_and_highest_price over the PriceBook buffer"""
+        opportunities: List[ArbitrageOpportunity] = []
+        crypto_ids, lowest, highest = book.usd_extremes(self.exchange_rates)
+
+        for i, crypto_id in enumerate(crypto_ids.tolist()):
+            lowest_price = float(lowest[0][i])
+            highest_price = float(highest[0][i])
+            if lowest_price <= 0:
+                continue
+            spread = (highest_price - lowest_price) / lowest_price
+            if spread > 0:
+                crypto = book.cryptos[crypto_id]
+                opportunities.append({
+                    'crypto': crypto,
+                    'lowest_price': lowest_price,
+                    'lowest_price_exchange': (crypto, book.exchanges[lowest[1][i]], book.fiats[lowest[2][i]]),
+                    'highest_price': highest_price,
+                    'highest_price_exchange': (crypto, book.exchanges[highest[1][i]], book.fiats[highest[2][i]]),
+                    'spread': spread
+                })
+
+        opportunities.sort(key=lambda x: x['spread'], reverse=True)
+        return opportunities
+
     def display_arbitrage_opportunities(self):
         opportunities = self.find_lowest_and_highest_price()
         if opportunities:
@@ -3,34 +3,108 @@ import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
 from app.external.utilities.fee_calc import FeeCalculator
-from app.external.utilities.exchange_spread import ExchangeSpread
-from app.external.utilities.exchange_arbitrage import ExchangeArbitrage
 from app.external.utilities.cross_exchange_fiat_arbitrage import CrossExchangeFiatArbitrage
+from app.external.utilities.multi_strategy import MultiStrategyEvaluator, StrategyResults
+from app.external.utilities.price_book import PriceBook
 
 
 import csv
+import numpy as np
+from contextlib import contextmanager
 from datetime import datetime
+from app.config.settings import Config
+from app.external.utilities.async_csv_writer import AsyncCSVWriter
+from app.external.utilities.parquet_store import ParquetArbitrageStore, PYARROW_AVAILABLE
+from app.external.utilities.opportunity_lifecycle import FIELDNAMES as LIFECYCLE_FIELDNAMES
 from app.types.price_data_types import PriceData
 from app.external.utilities.cross_exchange_fiat_arbitrage import CrossExchangeFiatArbitrage
 import os
 
 
+class _RowBuffer(list):
+    """Stand-in for csv.DictWriter that only collects rows"""
+    writerow = list.append
+
+
 class CSVTracker:
-    
+    MAX_FILE_SIZE = 2 * 1024 * 1024 * 1024  # 2GB in bytes
 
-    def write_spread_strategy(self, price_data):
+    def __init__(self, writer: AsyncCSVWriter = None, columnar_store: ParquetArbitrageStore = None):
+        """
+        Args:
+            writer: background writer for the rows; when None, rows are written synchronously
+            columnar_store: optional typed Parquet store that also receives the cross-exchange arbitrage rows
+        """
+        self.writer = writer
+        self.columnar_store = columnar_store
+
+    @classmethod
+    def from_config(cls):
+        """CSVTracker with an AsyncCSVWriter configured from settings, unless async writes are disabled"""
+        columnar_store = None
+        if Config.ARBITRAGE_PARQUET:
+            if PYARROW_AVAILABLE:
+                columnar_store = ParquetArbitrageStore(row_group_size=Config.PARQUET_ROW_GROUP_SIZE)
+            else:
+                print("ARBITRAGE_PARQUET is enabled but pyarrow is not installed. Writing CSV only.")
+        if not Config.CSV_ASYNC_WRITES:
+            return cls(columnar_store=columnar_store)
+        return cls(AsyncCSVWriter(
+            max_queue_size=Config.CSV_QUEUE_SIZE,
+            batch_size=Config.CSV_BATCH_SIZE,
+            flush_interval=Config.CSV_FLUSH_INTERVAL
+        ), columnar_store)
+
+    @contextmanager
+    def _csv_rows(self, fieldnames, name, max_size=None):
+        """Yield a row buffer; on exit the rows go to the async writer, or are appended synchronously"""
+        rows = _RowBuffer()
+        yield rows
+        if not rows:
+            return
+        if self.writer is not None:
+            self.writer.submit(self._csv_path(name), fieldnames, rows, max_size)
+            return
+
+        file_path = self.create_csv(fieldnames=fieldnames, name=name)
+        if max_size is not None and self.get_csv_file_size(file_path) >= max_size:
+            print(f"CSV file {file_path} has reached the maximum size limit of {max_size} bytes. Skipping write.")
+            return
+        with open(file_path, mode='a', newline='') as file:
+            csv.DictWriter(file, fieldnames=fieldnames).writerows(rows)
+
+    def flush(self, timeout=None):
+        """Wait until every queued row is on disk (no-op for synchronous writes)"""
+        if self.columnar_store is not None:
+            self.columnar_store.flush()
+        if self.writer is not None:
+            return self.writer.flush(timeout)
+        return True
+
+    def close(self):
+        """Flush and stop the background writer"""
+        if self.columnar_store is not None:
+            self.columnar_store.close()
+        if self.writer is not None:
+            self.writer.close()
+
+
+    def write_spread_strategy(self, price_data, results: StrategyResults = None):
         """
         Write spread strategy data to CSV file. The first table to represent the arbitrage with the same crypto
         and same fiat but across all exchanges.
         Args:
             price_data: Dictionary containing price data across exchanges
+            results: MultiStrategyEvaluator output for this book, when the caller already evaluated it
         """
-        spread_tracker = ExchangeSpread()
-        # Update the spread tracker with current prices
-        spread_tracker.update_spreads(price_data)
-        highest_prices = spread_tracker.get_highest_prices()
-        lowest_prices = spread_tracker.get_lowest_prices()
-        
+        if results is None:
+            results = MultiStrategyEvaluator(price_data, {}).evaluate(families=('spread',))
+        highest_prices = results['spread_highest']
+        lowest_prices = results['spread_lowest']
+        # Nested view materialized once, a PriceBook builds it on every lookup
+        if isinstance(price_data, PriceBook):
+            price_data = price_data.to_dict()
+
         timestamp = datetime.now().isoformat()
 
         exchange_columns = [
@@ -42,19 +116,8 @@ class CSVTracker:
                          [f"{exchange}_price" for exchange in exchange_columns] + \
                          ['strategy', 'arbitrage_percentage']
         
-        file_path = self.create_csv(fieldnames=fieldnames, name="crypto_fiat_arbitrage_1")
-
-        # Check if file exists and is empty
-        file_exists = os.path.exists(file_path) and os.path.getsize(file_path) > 0
-        
-        # Open file in append mode
-        with open(file_path, mode='a', newline='') as file:
-            writer = csv.DictWriter(file, fieldnames=fieldnames)
-            
-            # Write header only if file is new or empty
-            if not file_exists:
-                writer.writeheader()
-            
+        # Collect rows and hand them to the writer in one go
+        with self._csv_rows(fieldnames=fieldnames, name="crypto_fiat_arbitrage_1") as writer:
             # For each cryptocurrency and fiat pair
             for crypto in highest_prices:
                 for fiat in highest_prices[crypto]:
@@ -91,32 +154,26 @@ class CSVTracker:
                         
                         writer.writerow(row)
 
-    def write_fiat_arbitrage(self, price_data, exchange_rates):
+    def write_fiat_arbitrage(self, price_data, exchange_rates, results: StrategyResults = None):
         """
         Write arbitrage opportunities between different fiat currencies for the same crypto on the same exchange.
         
         Args:
             price_data: Dictionary containing price data across exchanges and fiat pairs
+            results: MultiStrategyEvaluator output for this book, when the caller already evaluated it
         """
+        if results is None:
+            results = MultiStrategyEvaluator(price_data, exchange_rates).evaluate(families=('same_exchange',))
+        if isinstance(price_data, PriceBook):
+            price_data = price_data.to_dict()
         timestamp = datetime.now().isoformat()
         supported_fiats = ['EUR', 'USD', 'GBP']
         fieldnames = ['crypto_exchange_pair', 'timestamp'] + \
                         supported_fiats + \
                         ['strategy', 'arbitrage_percentage']
 
-        file_path = self.create_csv(fieldnames=fieldnames, name="crypto_exchange_arbitrage_2")
-
-        # Check if file exists and is empty 
-        file_exists = os.path.exists(file_path) and os.path.getsize(file_path) > 0
-
-        # Open file in append mode
-        with open(file_path, mode='a', newline='') as file:
-            writer = csv.DictWriter(file, fieldnames=fieldnames)
-
-            # Write header if file is new/empty
-            if not file_exists:
-                writer.writeheader()
-
+        # Collect rows and hand them to the writer in one go
+        with self._csv_rows(fieldnames=fieldnames, name="crypto_exchange_arbitrage_2") as writer:
             # For each crypto and exchange pair
             for crypto, exchanges in price_data.items():
                 for exchange, fiats in exchanges.items():
@@ -135,31 +192,32 @@ class CSVTracker:
                             else:
                                 row[fiat] = "N/A"
 
-                        # Use ExchangeArbitrage to calculate strategy and arbitrage
-                        single_exchange_data = {crypto: {exchange: fiats}}
-                        
-                        arbitrage_calc = ExchangeArbitrage(single_exchange_data, exchange_rates)
-                        arb_result = arbitrage_calc.find_lowest_and_highest_price()
-                        
+                        # Same result as ExchangeArbitrage on this one exchange, None without a positive spread
+                        arb_result = results['same_exchange'].get((crypto, exchange))
+                        if arb_result is None:
+                            continue
+
                         # Calculate arbitrage percentage
                         arbitrage_percentage = ((arb_result['highest_price'] - arb_result['lowest_price']) / 
                                              arb_result['lowest_price']) * 100
                         
                         # Create strategy description
-                        strategy = (f"Buy in {arb_result['lowest_price_exchange'][2]} "
-                                  f"({row[arb_result['lowest_price_exchange'][2]]}) -> "
-                                  f"Sell in {arb_result['highest_price_exchange'][2]} "
-                                  f"({row[arb_result['highest_price_exchange'][2]]})")
+                        buy_fiat = arb_result['lowest_price_exchange'][2]
+                        sell_fiat = arb_result['highest_price_exchange'][2]
+                        strategy = (f"Buy in {buy_fiat} ({fiats[buy_fiat]['price']:.2f}) -> "
+                                  f"Sell in {sell_fiat} ({fiats[sell_fiat]['price']:.2f})")
                         
                         row['strategy'] = strategy
                         row['arbitrage_percentage'] = f"{arbitrage_percentage:.2f}%"
 
                         writer.writerow(row)
 
-    def write_cross_exchange_fiat_arbitrage(self, price_data, exchange_rates):
+    def write_cross_exchange_fiat_arbitrage(self, price_data, exchange_rates, opportunities=None):
         """
         Write cross-exchange fiat arbitrage data to CSV, tracking arbitrage opportunities
         across different exchanges and fiat currencies for each crypto
+        Args:
+            opportunities: find_lowest_and_highest_price output for this book, when the caller already has it
         """
         # Define fieldnames based on README structure
         fieldnames = ['crypto', 'timestamp']
@@ -177,30 +235,30 @@ class CSVTracker:
             
         fieldnames.extend(['strategy', 'arbitrage', 'total_fees', 'arbitrage_after_fees'])
 
-        # Generate filename with today's date
-        file_path = self.create_csv(fieldnames=fieldnames, name="crypto_arbitrage_3")
-
-        # Check if file exists and is empty
-        file_exists = os.path.exists(file_path) and os.path.getsize(file_path) > 0
-        
-        # Check file size - only proceed if under 2GB (2 * 1024 * 1024 * 1024 bytes)
-        max_size = 2 * 1024 * 1024 * 1024  # 2GB in bytes
-        try:
-            current_size = self.get_csv_file_size(file_path)
-            if current_size >= max_size:
-                print(f"CSV file {file_path} has reached the maximum size limit of 2GB. Skipping write.")
+        # Prepare exchange rates in the format expected by CrossExchangeFiatArbitrage
+        formatted_exchange_rates = {}
+        for fiat, rate in exchange_rates.items():
+            if isinstance(rate, dict) and 'rate' in rate:
+                # Already in correct format
+                formatted_exchange_rates[fiat] = rate
+            else:
+                # Convert to dictionary format
+                formatted_exchange_rates[fiat] = {'rate': rate, 'timestamp': datetime.now().isoformat()}
+
+        # One scan of all cryptos, then the best (widest spread, listed first) opportunity of each
+        if opportunities is None:
+            try:
+                opportunities = CrossExchangeFiatArbitrage(price_data, formatted_exchange_rates).find_lowest_and_highest_price()
+            except Exception as e:
+                print(f"Error looking for arbitrage opportunities: {str(e)}")
                 return
-        except FileNotFoundError:
-            # File doesn't exist yet, size is 0
-            pass
+        best_opportunities = {}
+        for opp in opportunities:
+            best_opportunities.setdefault(opp['crypto'], opp)
 
-        # Open file in append mode
-        with open(file_path, mode='a', newline='') as file:
-            writer = csv.DictWriter(file, fieldnames=fieldnames)
-
-            # Write header if file is new/empty
-            if not file_exists:
-                writer.writeheader()
+        # Collect rows and hand them to the writer in one go (files stop growing at 2GB)
+        with self._csv_rows(fieldnames=fieldnames, name="crypto_arbitrage_3", max_size=self.MAX_FILE_SIZE) as writer:
+            pending_rows = []
 
             # For each cryptocurrency
             for crypto, exchanges in price_data.items():
@@ -217,10 +275,13 @@ class CSVTracker:
                 # Only proceed if we have at least 2 exchanges with data and at least 2 price points
                 if len(exchanges_with_data) >= 2 and total_price_points >= 2:
                     # Initialize row with base data
+                    now = datetime.now()
                     row = {
                         'crypto': crypto,
-                        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                        'timestamp': now.strftime('%Y-%m-%d %H:%M:%S')
                     }
+                    # Same values as the row, typed, for the columnar store
+                    record = {'crypto': crypto, 'timestamp': now}
 
                     # Fill in prices for each exchange/fiat pair
                     for exchange in supported_exchanges:
@@ -228,6 +289,7 @@ class CSVTracker:
                             column_name = f"{exchange}_{fiat}"
                             if exchange in exchanges and fiat in exchanges[exchange]:
                                 row[column_name] = f"{exchanges[exchange][fiat]['price']:.2f}"
+                                record[column_name] = float(exchanges[exchange][fiat]['price'])
                             else:
                                 row[column_name] = "N/A"
                     
@@ -240,34 +302,15 @@ class CSVTracker:
                             if isinstance(rate_value, dict) and 'rate' in rate_value:
                                 rate_value = rate_value['rate']
                             row[rate_column] = f"{rate_value:.4f}"
+                            record[f"{fiat}_RATE_USD"] = float(rate_value)
                         else:
                             row[rate_column] = "N/A"
 
-                    # Prepare exchange rates in the format expected by CrossExchangeFiatArbitrage
-                    formatted_exchange_rates = {}
-                    for fiat, rate in exchange_rates.items():
-                        if isinstance(rate, dict) and 'rate' in rate:
-                            # Already in correct format
-                            formatted_exchange_rates[fiat] = rate
-                        else:
-                            # Convert to dictionary format
-                            formatted_exchange_rates[fiat] = {'rate': rate, 'timestamp': datetime.now().isoformat()}
-
-                    # Calculate arbitrage using CrossExchangeFiatArbitrage
                     try:
-                        print(f"Looking for arbitrage opportunities for {crypto}...")
-                        arbitrage_calc = CrossExchangeFiatArbitrage(price_data, formatted_exchange_rates)
-                        opportunities = arbitrage_calc.find_lowest_and_highest_price()
-                        
-                        # Filter opportunities for current crypto
-                        crypto_opportunities = [opp for opp in opportunities if opp['crypto'] == crypto]
-                        print(f"Found {len(crypto_opportunities)} opportunities for {crypto}")
-                        
+                        arb_result = best_opportunities.get(crypto)
+
                         # Process if we found opportunities for this crypto
-                        if crypto_opportunities:
-                            # Use the best opportunity (first in list since they're sorted by spread)
-                            arb_result = crypto_opportunities[0]
-                            
+                        if arb_result:
                             # Extract lowest and highest price info
                             lowest_price = arb_result['lowest_price']
                             highest_price = arb_result['highest_price']
@@ -285,36 +328,61 @@ class CSVTracker:
 
                             row['strategy'] = strategy
                             row['arbitrage'] = f"{arbitrage_percentage:.2f}%"
-
-                            # Calculate fees using FeeCalculator
-                            print(f"Calculating fees for {crypto}...")
-                            fee_calc = FeeCalculator(
-                                exchange_buy=lowest_exchange[1],
-                                exchange_sell=highest_exchange[1],
-                                crypto=crypto,
-                                crypto_amount=1,
-                                crypto_price_buy=lowest_price,
-                                crypto_price_sell=highest_price,
-                                currency_withdrawal=highest_exchange[2],
-                                exchange_rates=formatted_exchange_rates
-                            )
-                            
-                            try:
-                                fees = fee_calc.calculate_fees()
-                                row['total_fees'] = f"${fees['total_fees']:.2f}"
-                                row['arbitrage_after_fees'] = f"${fees['arbitrage_after_fees']:.2f}"
-                                print(f"Writing row for {crypto} with arbitrage {arbitrage_percentage:.2f}%")
-                                writer.writerow(row)
-                            except Exception as e:
-                                print(f"Error calculating fees for {crypto}: {str(e)}")
-                                continue
+                            record.update({
+                                'buy_exchange': lowest_exchange[1],
+                                'buy_currency': lowest_exchange[2],
+                                'sell_exchange': highest_exchange[1],
+                                'sell_currency': highest_exchange[2],
+                                'lowest_price': lowest_price,
+                                'highest_price': highest_price,
+                                'arbitrage_percentage': arbitrage_percentage,
+                                'strategy': strategy
+                            })
+
+                            # Fees for all cryptos are priced in one batch below
+                            pending_rows.append((row, record, arb_result))
                         else:
                             print(f"No arbitrage opportunities found for {crypto}")
                     except Exception as e:
                         print(f"Error processing arbitrage for {crypto}: {str(e)}")
                         continue
 
-    
+            if not pending_rows:
+                return
+
+            # Calculate fees for every pending row in one vectorized FeeCalculator call
+            fees = FeeCalculator.calculate_fees_batch(
+                exchange_buy=[arb['lowest_price_exchange'][1] for _, _, arb in pending_rows],
+                exchange_sell=[arb['highest_price_exchange'][1] for _, _, arb in pending_rows],
+                crypto=[arb['crypto'] for _, _, arb in pending_rows],
+                crypto_amount=1,
+                crypto_price_buy=[arb['lowest_price'] for _, _, arb in pending_rows],
+                crypto_price_sell=[arb['highest_price'] for _, _, arb in pending_rows],
+                currency_withdrawal=[arb['highest_price_exchange'][2] for _, _, arb in pending_rows],
+                exchange_rates=formatted_exchange_rates
+            )
+            for (row, record, arb), total_fees, after_fees in zip(pending_rows, fees['total_fees'], fees['arbitrage_after_fees']):
+                if np.isnan(after_fees):
+                    print(f"Error calculating fees for {arb['crypto']}: no fee data for this exchange/currency")
+                    continue
+                row['total_fees'] = f"${total_fees:.2f}"
+                row['arbitrage_after_fees'] = f"${after_fees:.2f}"
+                writer.writerow(row)
+                if self.columnar_store is not None:
+                    record['total_fees'] = float(total_fees)
+                    record['arbitrage_after_fees'] = float(after_fees)
+                    self.columnar_store.append(record)
+
+    def write_lifecycle_events(self, events):
+        """
+        Append opportunity lifecycle events (open/update/close, see OpportunityLifecycle) to CSV, one row
+        per event instead of one row per tick of a persistent opportunity
+        """
+        with self._csv_rows(fieldnames=LIFECYCLE_FIELDNAMES, name="crypto_arbitrage_lifecycle",
+                            max_size=self.MAX_FILE_SIZE) as writer:
+            for event in events:
+                writer.writerow(event)
+
     def get_csv_file_size(self, file_path: str) -> int:
         """
         Return the size of the given CSV file in bytes.
@@ -361,15 +429,18 @@ class CSVTracker:
                         writer.writerow(row)
 
     
+    def _csv_path(self, name):
+        """Path of today's CSV file for the given table name"""
+        today_date = datetime.now().strftime('%Y-%m-%d')
+        return os.path.join(os.path.dirname(__file__), f'{name}_{today_date}.csv')
+
     def create_csv(self, fieldnames, name):
         '''
         Create a CSV file with today's date and given name within this directory and returns the path to that csv file.
         Only creates the file if it doesn't already exist.
         '''
 
-        # Generate the filename with today's date
-        today_date = datetime.now().strftime('%Y-%m-%d')
-        new_file_path = os.path.join(os.path.dirname(__file__), f'{name}_{today_date}.csv')
+        new_file_path = self._csv_path(name)
 
         # Only create file and write header if it doesn't exist
         if not os.path.exists(new_file_path):
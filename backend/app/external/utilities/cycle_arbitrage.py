@@ -0,0 +1,350 @@
+'''
+This module looks for multi-leg (triangular and longer) arbitrage as negative cycles of a log-price graph.
+A node is an (asset, exchange) balance, the asset being a crypto or a fiat of the price book, and an edge is
+one conversion of that balance:
+    buy        (fiat, exchange) -> (crypto, exchange)       (1 - taker fee) / price
+    sell       (crypto, exchange) -> (fiat, exchange)       price x (1 - taker fee)
+    fx         (fiat, exchange) -> (other fiat, exchange)   USD rate of fiat / USD rate of other fiat
+    transfer   (asset, exchange) -> (asset, other exchange) 1 - withdrawal fee / notional
+Fees come from the compiled fee_structures (FeeSchedule), like ArbitrageMatrix and FeeCalculator; the fixed
+withdrawal fees are charged against a notional of notional_usd. With edge weights -log(rate) a cycle whose
+weights sum below zero returns more than it started with, so cycles are found by Bellman-Ford/SPFA.
+Cycles show up as cycles of predecessor edges, checked for every <nodes> relaxations (amortized O(1)).
+The search is incremental: between updates only the edges whose weight changed are looked at. The shortest
+distances of the last search are kept, and when no edge of the shortest-path tree got more expensive the
+search restarts from the tails of the cheaper edges only. Otherwise it starts cold. Further cycles are
+found by disabling the costliest leg of every cycle already found and searching again, up to max_cycles.
+'''
+import sys
+import os
+import math
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Add the root directory of your project to the sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
+
+from app.external.utilities.fee_calc import FeeSchedule, FEE_SCHEDULE
+from app.external.utilities.price_book import PriceBook
+
+INF = float('inf')
+# Relaxations smaller than this are float noise (e.g. around a loop of FX edges that should sum to zero)
+EPSILON = 1e-12
+
+BUY, SELL, FX, TRANSFER = 'buy', 'sell', 'fx', 'transfer'
+
+
+class CycleArbitrageEngine:
+    """Profitable conversion cycles of a PriceBook, ranked by return, kept up to date incrementally"""
+
+    def __init__(self, price_data, exchange_rates: Dict, fee_schedule: FeeSchedule = FEE_SCHEDULE,
+                 notional_usd: float = 10000.0, max_cycles: int = 10, min_profit: float = 0.0):
+        self.price_book = price_data if isinstance(price_data, PriceBook) else PriceBook.from_dict(price_data)
+        self.exchange_rates = exchange_rates
+        self.fee_schedule = fee_schedule
+        self.notional_usd = notional_usd
+        self.max_cycles = max_cycles
+        # Cycles must return more than 1 + min_profit
+        self.min_log_profit = math.log1p(min_profit)
+        self._shape = None
+        self._n_nodes = 0
+        self._src: List[int] = []
+        self._weights: Optional[np.ndarray] = None  # the weights the search state below reflects
+        self._dist: List[float] = []
+        self._pred: List[int] = []
+        self._converged = False
+        self._cycles: List[Dict] = []
+        self._lock = threading.Lock()
+        self.stats = {'updates': 0, 'unchanged': 0, 'warm': 0, 'cold': 0, 'relaxations': 0, 'cycles': 0}
+
+    # Graph
+
+    def _build(self, shape):
+        """Nodes and edges for the interned (cryptos, exchanges, fiats); node = asset_id * n_exchange + exchange_id"""
+        n_crypto, n_exchange, n_fiat = shape
+        self._shape = shape
+        self._n_nodes = (n_crypto + n_fiat) * n_exchange
+
+        def fiat_node(fiat, exchange):
+            return (n_crypto + fiat) * n_exchange + exchange
+
+        crypto, exchange, fiat = (ids.reshape(-1) for ids in np.indices((n_crypto, n_exchange, n_fiat)))
+        fx_exchange, fx_from, fx_to = (ids.reshape(-1) for ids in np.indices((n_exchange, n_fiat, n_fiat)))
+        fx = fx_from != fx_to
+        asset, from_exchange, to_exchange = (ids.reshape(-1) for ids in
+                                             np.indices((n_crypto + n_fiat, n_exchange, n_exchange)))
+        transfer = from_exchange != to_exchange
+
+        # Per kind: the index arrays the weights are computed from
+        self._trade = (crypto, exchange, fiat)
+        self._fx = (fx_exchange[fx], fx_from[fx], fx_to[fx])
+        self._transfer = (asset[transfer], from_exchange[transfer], to_exchange[transfer])
+
+        src = np.concatenate([
+            fiat_node(fiat, exchange),                                   # buy
+            crypto * n_exchange + exchange,                              # sell
+            fiat_node(self._fx[1], self._fx[0]),                         # fx
+            self._transfer[0] * n_exchange + self._transfer[1],          # transfer
+        ])
+        dst = np.concatenate([
+            crypto * n_exchange + exchange,
+            fiat_node(fiat, exchange),
+            fiat_node(self._fx[2], self._fx[0]),
+            self._transfer[0] * n_exchange + self._transfer[2],
+        ])
+        n_trade, n_fx = len(crypto), int(fx.sum())
+        self._kinds = [BUY] * n_trade + [SELL] * n_trade + [FX] * n_fx + [TRANSFER] * int(transfer.sum())
+        self._src = src.tolist()
+        self._dst = dst.tolist()
+        self._out = [[] for _ in range(self._n_nodes)]
+        for edge, node in enumerate(self._src):
+            self._out[node].append(edge)
+        self._weights = None
+        self._converged = False
+
+    def _node_name(self, node: int):
+        book = self.price_book
+        n_crypto, n_exchange, _ = self._shape
+        asset, exchange = divmod(node, n_exchange)
+        name = book.cryptos[asset] if asset < n_crypto else book.fiats[asset - n_crypto]
+        return name, book.exchanges[exchange]
+
+    def _edge_weights(self) -> np.ndarray:
+        """-log(rate) of every edge, +inf for the edges without a price, rate or fee schedule"""
+        book = self.price_book
+        schedule = self.fee_schedule
+        n_crypto, n_exchange, n_fiat = self._shape
+        prices = book.price_array()[:n_crypto, :n_exchange, :n_fiat]
+        rates = book.fiat_rates(self.exchange_rates)
+
+        exchange_ids = schedule.exchange_index(book.exchanges)
+        fee_buy = schedule.trading_fees[exchange_ids, 0]
+        fee_sell = schedule.trading_fees[exchange_ids, 1]
+        # Withdrawal fees as a fraction of the notional: fiat fees in fiat units, crypto fees in crypto units
+        fiat_withdrawal = schedule.fiat_withdrawal[np.ix_(exchange_ids, schedule.fiat_index(book.fiats))]
+        crypto_withdrawal = schedule.crypto_withdrawal[np.ix_(exchange_ids, schedule.crypto_index(book.cryptos))]
+        usd = prices * rates
+        valid = ~np.isnan(usd)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            crypto_usd = np.where(valid, usd, 0.0).reshape(n_crypto, -1).sum(axis=1) / valid.reshape(n_crypto, -1).sum(axis=1)
+            withdrawal = np.concatenate([crypto_withdrawal * crypto_usd, fiat_withdrawal * rates], axis=1) / self.notional_usd
+
+            crypto, exchange, fiat = self._trade
+            log_price = np.log(prices[crypto, exchange, fiat])
+            log_rate = np.log(rates)
+            fx_exchange, fx_from, fx_to = self._fx
+            asset, from_exchange, _ = self._transfer
+            weights = np.concatenate([
+                log_price - np.log1p(-fee_buy[exchange]),
+                -log_price - np.log1p(-fee_sell[exchange]),
+                log_rate[fx_to] - log_rate[fx_from],
+                -np.log1p(-withdrawal[from_exchange, asset]),
+            ])
+        weights[~np.isfinite(weights)] = INF
+        return weights
+
+    # Search
+
+    def _search(self, weights: List[float], queue: Optional[List[int]]) -> Optional[List[int]]:
+        """
+        SPFA from the current distances, or from a virtual source at distance 0 to every node when queue is
+        None. Returns the edges of a negative cycle, or None once the distances converged.
+        """
+        n = self._n_nodes
+        if queue is None:
+            self._dist = [0.0] * n
+            self._pred = [-1] * n
+            queue = range(n)
+            self.stats['cold'] += 1
+        else:
+            self.stats['warm'] += 1
+        dist, pred = self._dist, self._pred
+        src, dst, out = self._src, self._dst, self._out
+        pending = deque(queue)
+        queued = bytearray(n)
+        for node in pending:
+            queued[node] = 1
+        relaxations = 0
+        next_check = n
+        try:
+            while pending:
+                u = pending.popleft()
+                queued[u] = 0
+                du = dist[u]
+                for edge in out[u]:
+                    weight = weights[edge]
+                    if weight == INF:
+                        continue
+                    v = dst[edge]
+                    candidate = du + weight
+                    if candidate < dist[v] - EPSILON:
+                        relaxations += 1
+                        dist[v] = candidate
+                        pred[v] = edge
+                        if relaxations >= next_check:
+                            # Amortized check: a cycle of predecessor edges is a negative cycle
+                            next_check += n
+                            cycle = self._pred_cycle()
+                            if cycle is not None:
+                                return cycle
+                        if not queued[v]:
+                            queued[v] = 1
+                            pending.append(v)
+            return None
+        finally:
+            self.stats['relaxations'] += relaxations
+
+    def _pred_cycle(self) -> Optional[List[int]]:
+        """Edges of a cycle of the predecessor graph, walking each node's predecessor chain once (O(nodes))"""
+        src, pred = self._src, self._pred
+        seen = [0] * self._n_nodes  # the walk that first reached each node, 0 = none
+        for start in range(self._n_nodes):
+            node = start
+            while node >= 0 and not seen[node]:
+                seen[node] = start + 1
+                node = src[pred[node]] if pred[node] >= 0 else -1
+            if node < 0 or seen[node] != start + 1:
+                continue
+            # This walk ran into itself: node is on the cycle
+            edges = []
+            current = node
+            while True:
+                edge = pred[current]
+                edges.append(edge)
+                current = src[edge]
+                if current == node:
+                    break
+            edges.reverse()
+            return edges
+        return None
+
+    def _describe(self, edges: List[int], weights: List[float]) -> Dict:
+        """A cycle as legs starting from a fiat balance (USD when the cycle has one)"""
+        src, dst = self._src, self._dst
+        names = [self._node_name(src[edge]) for edge in edges]
+        fiats = set(self.price_book.fiats)
+        starts = [i for i, (asset, _) in enumerate(names) if asset == 'USD'] or \
+                 [i for i, (asset, _) in enumerate(names) if asset in fiats] or [0]
+        edges = edges[starts[0]:] + edges[:starts[0]]
+
+        legs = []
+        for edge in edges:
+            asset_from, exchange_from = self._node_name(src[edge])
+            asset_to, exchange_to = self._node_name(dst[edge])
+            leg = {
+                'type': self._kinds[edge],
+                'from': asset_from,
+                'from_exchange': exchange_from,
+                'to': asset_to,
+                'to_exchange': exchange_to,
+                'rate': math.exp(-weights[edge])
+            }
+            if leg['type'] in (BUY, SELL):
+                crypto, fiat = (asset_to, asset_from) if leg['type'] == BUY else (asset_from, asset_to)
+                leg['price'] = self.price_book.get_price(crypto, exchange_from, fiat)
+            legs.append(leg)
+
+        total = sum(weights[edge] for edge in edges)
+        nodes = [f"{leg['from']}@{leg['from_exchange']}" for leg in legs]
+        return {
+            'id': '>'.join(nodes),
+            'start': legs[0]['from'],
+            'start_exchange': legs[0]['from_exchange'],
+            'legs': legs,
+            'return': math.exp(-total),
+            'profit': math.expm1(-total),
+            'cryptos': sorted({leg['to'] for leg in legs if leg['type'] == BUY}),
+            'exchanges': sorted({leg['from_exchange'] for leg in legs} | {leg['to_exchange'] for leg in legs})
+        }
+
+    def update(self) -> List[Dict]:
+        """Bring the search up to date with the book and exchange rates, returning the ranked cycles"""
+        with self._lock:
+            self.stats['updates'] += 1
+            shape = self.price_book.shape()
+            if shape != self._shape:
+                self._build(shape)
+            if not self._n_nodes:
+                self._cycles = []
+                return []
+            weights = self._edge_weights()
+
+            queue = None
+            if self._weights is not None and self._converged:
+                changed = np.nonzero(weights != self._weights)[0]
+                if not len(changed):
+                    self.stats['unchanged'] += 1
+                    return list(self._cycles)
+                increased = changed[weights[changed] > self._weights[changed]]
+                pred, dst = self._pred, self._dst
+                if not any(pred[dst[edge]] == edge for edge in increased.tolist()):
+                    # Only edges that got cheaper can shorten a path: restart from their tails
+                    decreased = changed[weights[changed] < self._weights[changed]]
+                    queue = sorted({self._src[edge] for edge in decreased.tolist()})
+
+            weight_list = weights.tolist()
+            cycles = {}
+            found = self._search(weight_list, queue)
+            while found is not None:
+                total = sum(weight_list[edge] for edge in found)
+                if -total > self.min_log_profit:
+                    cycle = self._describe(found, weight_list)
+                    cycles.setdefault(cycle['id'], cycle)
+                if len(cycles) >= self.max_cycles:
+                    break
+                # Disable the costliest leg and look again from scratch
+                weight_list[max(found, key=lambda edge: weight_list[edge])] = INF
+                found = self._search(weight_list, None)
+
+            self._converged = found is None
+            self._weights = np.array(weight_list)
+            self._cycles = sorted(cycles.values(), key=lambda cycle: cycle['profit'], reverse=True)
+            self.stats['cycles'] = len(self._cycles)
+            return list(self._cycles)
+
+    def find_cycles(self, top_k: Optional[int] = None) -> List[Dict]:
+        """Profitable cycles, best return first"""
+        cycles = self.update()
+        return cycles[:top_k] if top_k else cycles
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {**self.stats, 'nodes': self._n_nodes, 'edges': len(self._src)}
+
+
+# Example usage
+if __name__ == "__main__":
+    EXAMPLE_TIMESTAMP = '2023-10-01T00:00:00Z'
+    exchange_rates = {
+        'USD': {'rate': 1.0, 'timestamp': EXAMPLE_TIMESTAMP},
+        'EUR': {'rate': 1.1, 'timestamp': EXAMPLE_TIMESTAMP},  # 1 EUR = 1.1 USD
+        'GBP': {'rate': 1.3, 'timestamp': EXAMPLE_TIMESTAMP}   # 1 GBP = 1.3 USD
+    }
+    price_data = {
+        'BTC': {
+            'COINBASE': {
+                'USD': {'price': 50000.0, 'timestamp': EXAMPLE_TIMESTAMP},
+                'EUR': {'price': 47000.0, 'timestamp': EXAMPLE_TIMESTAMP},
+            },
+            'KRAKEN': {
+                'USD': {'price': 50100.0, 'timestamp': EXAMPLE_TIMESTAMP},
+                'GBP': {'price': 38000.0, 'timestamp': EXAMPLE_TIMESTAMP},
+            },
+        },
+        'ETH': {
+            'COINBASE': {
+                'EUR': {'price': 2700.0, 'timestamp': EXAMPLE_TIMESTAMP},
+            },
+            'KRAKEN': {
+                'USD': {'price': 3000.0, 'timestamp': EXAMPLE_TIMESTAMP},
+            },
+        }
+    }
+
+    engine = CycleArbitrageEngine(price_data, exchange_rates)
+    for cycle in engine.find_cycles(top_k=5):
+        path = ' -> '.join(f"{leg['to']}@{leg['to_exchange']}" for leg in cycle['legs'])
+        print(f"{cycle['start']}@{cycle['start_exchange']} -> {path}: {cycle['profit'] * 100:.3f}%")
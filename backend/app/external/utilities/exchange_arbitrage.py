@@ -7,11 +7,14 @@ import sys
 import os
 from typing import Dict, TypedDict, Union
 
+import numpy as np
+
 
 # Add the root directory of your project to the sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
 
 from app.types.price_data_types import PriceDataType
+from app.external.utilities.price_book import PriceBook
 
 class ExchangeRateData(TypedDict):
     rate: float
@@ -23,6 +26,9 @@ class ExchangeArbitrage:
         self.exchange_rates = exchange_rates
     
     def find_lowest_and_highest_price(self):
+        if isinstance(self.price_data, PriceBook):
+            return self._find_from_book(self.price_data)
+
         lowest_price = float('inf')
         lowest_price_exchange = None
         highest_price = float('-inf')
@@ -102,6 +108,26 @@ class ExchangeArbitrage:
             }
         return None  # Return None if no valid arbitrage opportunity found
 
+    def _find_from_book(self, book: PriceBook):
+        """Vectorized version of find_lowest_and_highest_price over the PriceBook buffer"""
+        crypto_ids, lowest, highest = book.usd_extremes(self.exchange_rates)
+        if not len(crypto_ids):
+            return None
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            spreads = (highest[0] - lowest[0]) / lowest[0]
+        best = int(np.argmax(spreads))
+        if not spreads[best] > 0:
+            return None
+
+        crypto = book.cryptos[crypto_ids[best]]
+        return {
+            'lowest_price': float(lowest[0][best]),
+            'lowest_price_exchange': (crypto, book.exchanges[lowest[1][best]], book.fiats[lowest[2][best]]),
+            'highest_price': float(highest[0][best]),
+            'highest_price_exchange': (crypto, book.exchanges[highest[1][best]], book.fiats[highest[2][best]])
+        }
+
     def display_arbitrage_opportunity(self):
         result = self.find_lowest_and_highest_price()
         if result:
@@ -6,10 +6,13 @@ the spread between the highest and lowest prices.
 import sys
 import os
 
+import numpy as np
+
 # Add the root directory of your project to the sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
 
 from app.types.price_data_types import PriceDataType
+from app.external.utilities.price_book import PriceBook
 
 class ExchangeSpread:
     def __init__(self):
@@ -20,8 +23,12 @@ class ExchangeSpread:
         """
         Update the highest and lowest prices for each currency across all exchanges.
         Args:
-            price_data: Dictionary containing price data.
+            price_data: Dictionary containing price data, or a PriceBook.
         """
+        if isinstance(price_data, PriceBook):
+            self._update_spreads_from_book(price_data)
+            return
+
         for crypto, exchanges in price_data.items():
             if crypto not in self.highest_prices:
                 self.highest_prices[crypto] = {}
@@ -48,6 +55,39 @@ class ExchangeSpread:
                             'timestamp': data['timestamp']
                         }
 
+    def _update_spreads_from_book(self, book: PriceBook):
+        """Vectorized update: one argmin/argmax over the exchange axis for every (crypto, fiat)"""
+        prices = book.price_array()
+        if not prices.size:
+            return
+        valid = ~np.isnan(prices)
+        low_exchange = np.where(valid, prices, np.inf).argmin(axis=1)
+        high_exchange = np.where(valid, prices, -np.inf).argmax(axis=1)
+
+        for crypto_id, fiat_id in zip(*np.nonzero(valid.any(axis=1))):
+            crypto = book.cryptos[crypto_id]
+            fiat = book.fiats[fiat_id]
+            highest = self.highest_prices.setdefault(crypto, {})
+            lowest = self.lowest_prices.setdefault(crypto, {})
+
+            exchange_id = high_exchange[crypto_id, fiat_id]
+            price = float(prices[crypto_id, exchange_id, fiat_id])
+            if fiat not in highest or price > highest[fiat]['price']:
+                highest[fiat] = {
+                    'price': price,
+                    'exchange': book.exchanges[exchange_id],
+                    'timestamp': book.raw_timestamp(crypto_id, exchange_id, fiat_id)
+                }
+
+            exchange_id = low_exchange[crypto_id, fiat_id]
+            price = float(prices[crypto_id, exchange_id, fiat_id])
+            if fiat not in lowest or price < lowest[fiat]['price']:
+                lowest[fiat] = {
+                    'price': price,
+                    'exchange': book.exchanges[exchange_id],
+                    'timestamp': book.raw_timestamp(crypto_id, exchange_id, fiat_id)
+                }
+
     def get_highest_prices(self):
         return self.highest_prices
 
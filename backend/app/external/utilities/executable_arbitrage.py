@@ -0,0 +1,206 @@
+'''
+This module prices cross-venue arbitrage on the executable depth of the order books instead of last trades.
+Trade prints say nothing about how much can be bought or sold at that price, so the 1 unit trade at the
+last prices of ArbitrageMatrix overstates what can be captured. Here, for every buy venue x sell venue pair
+of a crypto, the buy venue's asks are walked against the sell venue's bids, best levels first, for as long
+as the next unit still makes money after taker fees:
+    cost per unit      ask * USD rate of the buy fiat * (1 + taker fee buy)
+    proceeds per unit  bid * USD rate of the sell fiat * (1 - taker fee sell)
+The marginal profit only falls as the walk goes deeper, so stopping at the first level where it is no
+longer positive gives the profit-maximizing size. The fixed fiat withdrawal fee at the sell venue (as in
+ArbitrageMatrix) is charged once on top and does not move that size. The result is the size, the VWAP of
+both legs and the net profit of trading it, optionally capped at max_notional_usd of cost.
+Pairs are pre-filtered with one vectorized comparison of the tops of the books, so only crossed pairs are walked.
+'''
+import sys
+import os
+import heapq
+import math
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Add the root directory of your project to the sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
+
+from app.external.utilities.fee_calc import FeeSchedule, FEE_SCHEDULE
+from app.external.utilities.order_book import OrderBooks
+
+
+def walk(ask_prices: List[float], ask_sizes: List[float], bid_prices: List[float], bid_sizes: List[float],
+         buy_factor: float, sell_factor: float, max_cost: float = 0.0) -> Tuple[float, float, float, int, int]:
+    """
+    Walk asks against bids while a unit bought at ask * buy_factor sells for more at bid * sell_factor.
+    Returns:
+        (size, buy_notional, sell_notional, ask_levels, bid_levels): the notionals are in the quote fiat of
+        each book (size * VWAP), the levels count how many levels of each side were touched
+    """
+    n_ask, n_bid = len(ask_prices), len(bid_prices)
+    i = j = 0
+    ask_left, bid_left = ask_sizes[0], bid_sizes[0]
+    size = buy_notional = sell_notional = 0.0
+    while i < n_ask and j < n_bid:
+        unit_cost = ask_prices[i] * buy_factor
+        if bid_prices[j] * sell_factor <= unit_cost:
+            break
+        quantity = ask_left if ask_left < bid_left else bid_left
+        capped = False
+        if max_cost:
+            room = (max_cost - buy_notional * buy_factor) / unit_cost
+            if room <= quantity:
+                quantity, capped = max(room, 0.0), True
+        size += quantity
+        buy_notional += quantity * ask_prices[i]
+        sell_notional += quantity * bid_prices[j]
+        ask_left -= quantity
+        bid_left -= quantity
+        if capped:
+            break
+        if ask_left <= 0.0:
+            i += 1
+            ask_left = ask_sizes[i] if i < n_ask else 0.0
+        if bid_left <= 0.0:
+            j += 1
+            bid_left = bid_sizes[j] if j < n_bid else 0.0
+    # A level counts once any of it was taken
+    ask_levels = i + (1 if i < n_ask and ask_left < ask_sizes[i] else 0)
+    bid_levels = j + (1 if j < n_bid and bid_left < bid_sizes[j] else 0)
+    return size, buy_notional, sell_notional, ask_levels, bid_levels
+
+
+class ExecutableArbitrage:
+    """Profit-maximizing executable size and VWAP net profit of every venue pair over OrderBooks"""
+
+    def __init__(self, order_books: OrderBooks, exchange_rates: Dict, fee_schedule: FeeSchedule = FEE_SCHEDULE,
+                 max_notional_usd: float = 0.0):
+        self.order_books = order_books
+        self.exchange_rates = exchange_rates
+        self.fee_schedule = fee_schedule
+        self.max_notional_usd = max_notional_usd  # cap on the cost of one trade, 0 = the books are the only limit
+
+    def _rate(self, fiat: str) -> float:
+        rate_data = self.exchange_rates.get(fiat)
+        rate = rate_data.get('rate') if isinstance(rate_data, dict) else rate_data
+        return float(rate) if isinstance(rate, (int, float)) and rate > 0 else math.nan
+
+    def find_top_opportunities(self, top_k: int = 10) -> List[Dict]:
+        """
+        Venue pairs whose books cross after taker fees, ranked by net profit of their executable size.
+        Pairs are walked in decreasing order of an upper bound on their profit, (top of book margin) x (depth of
+        the thinner side) - withdrawal fee, which holds because the margin only falls deeper in the books; the
+        walks stop once no remaining pair can beat the top_k-th profit found.
+        Returns:
+            list of dicts with the ArbitrageOpportunity keys (lowest/highest_price are the USD VWAPs of the
+            buy and sell legs) plus total_fees and arbitrage_after_fees for the whole size, and size,
+            buy_vwap/sell_vwap (in the venue's fiat) and buy_levels/sell_levels
+        """
+        depth = self.order_books.depth()
+        by_crypto: Dict[str, List] = {}
+        for key, book in depth.items():
+            by_crypto.setdefault(key[0], []).append((key, book))
+
+        schedule = self.fee_schedule
+        fiat_rates = {fiat: self._rate(fiat) for fiat in {key[2] for key in depth}}
+        groups, bounds, pairs = [], [], []
+        for crypto, venues in by_crypto.items():
+            if len(venues) < 2:
+                continue
+            keys = [key for key, _ in venues]
+            exchange_ids = schedule.exchange_index([key[1] for key in keys])
+            fiat_ids = schedule.fiat_index([key[2] for key in keys])
+            rates = np.array([fiat_rates[key[2]] for key in keys])
+            fee_buy = schedule.trading_fees[exchange_ids, 0]
+            fee_sell = schedule.trading_fees[exchange_ids, 1]
+            buy_factor = rates * (1.0 + fee_buy)
+            sell_factor = rates * (1.0 - fee_sell)
+            withdrawal = schedule.fiat_withdrawal[exchange_ids, fiat_ids] * rates
+
+            best_ask = np.array([book[2][0] for _, book in venues]) * buy_factor
+            best_bid = np.array([book[0][0] for _, book in venues]) * sell_factor
+            margin = best_bid[np.newaxis, :] - best_ask[:, np.newaxis]
+            # NaN rates or fees compare False, so venues without them never pair up
+            crossed = margin > 0
+            np.fill_diagonal(crossed, False)
+            buy_ids, sell_ids = np.nonzero(crossed)
+            if not len(buy_ids):
+                continue
+
+            max_size = np.minimum(np.array([book[5] for _, book in venues])[buy_ids],
+                                  np.array([book[4] for _, book in venues])[sell_ids])
+            if self.max_notional_usd:
+                max_size = np.minimum(max_size, self.max_notional_usd / best_ask[buy_ids])
+            bounds.append(margin[buy_ids, sell_ids] * max_size - withdrawal[sell_ids])
+            pairs.extend((len(groups), buy, sell) for buy, sell in zip(buy_ids.tolist(), sell_ids.tolist()))
+            groups.append((crypto, keys, [book for _, book in venues], rates.tolist(), fee_buy.tolist(),
+                           fee_sell.tolist(), buy_factor.tolist(), sell_factor.tolist(), withdrawal.tolist()))
+        if not pairs or top_k <= 0:
+            return []
+
+        bounds = np.concatenate(bounds)
+        candidates = []  # min-heap of the top_k best (profit, ...) so far
+        for index in np.argsort(-bounds, kind='stable').tolist():
+            if len(candidates) >= top_k and not bounds[index] > candidates[0][0]:
+                break
+            group, buy, sell = pairs[index]
+            crypto, keys, books, rates, fee_buy, fee_sell, buy_factor, sell_factor, withdrawal = groups[group]
+            bid_prices, bid_sizes = books[sell][:2]
+            ask_prices, ask_sizes = books[buy][2:4]
+            size, buy_notional, sell_notional, ask_levels, bid_levels = walk(
+                ask_prices, ask_sizes, bid_prices, bid_sizes, buy_factor[buy], sell_factor[sell], self.max_notional_usd)
+            if size <= 0.0:
+                continue
+            buy_usd = buy_notional * rates[buy]
+            sell_usd = sell_notional * rates[sell]
+            total_fees = buy_usd * fee_buy[buy] + sell_usd * fee_sell[sell] + withdrawal[sell]
+            profit = sell_usd - buy_usd - total_fees
+            if math.isnan(profit):
+                continue
+            candidate = (profit, index, crypto, keys[buy], keys[sell], size, buy_notional, sell_notional,
+                         buy_usd, sell_usd, total_fees, ask_levels, bid_levels)
+            if len(candidates) < top_k:
+                heapq.heappush(candidates, candidate)
+            elif profit > candidates[0][0]:
+                heapq.heapreplace(candidates, candidate)
+
+        opportunities = []
+        for (profit, _, crypto, buy_key, sell_key, size, buy_notional, sell_notional, buy_usd, sell_usd, total_fees,
+             ask_levels, bid_levels) in sorted(candidates, reverse=True):
+            buy_price = buy_usd / size
+            sell_price = sell_usd / size
+            opportunities.append({
+                'crypto': crypto,
+                'lowest_price': buy_price,
+                'lowest_price_exchange': buy_key,
+                'highest_price': sell_price,
+                'highest_price_exchange': sell_key,
+                'spread': (sell_price - buy_price) / buy_price,
+                'total_fees': total_fees,
+                'arbitrage_after_fees': profit,
+                'size': size,
+                'buy_vwap': buy_notional / size,
+                'sell_vwap': sell_notional / size,
+                'buy_levels': ask_levels,
+                'sell_levels': bid_levels
+            })
+        return opportunities
+
+
+# Example usage
+if __name__ == "__main__":
+    EXAMPLE_TIMESTAMP = '2023-10-01T00:00:00Z'
+    exchange_rates = {
+        'USD': {'rate': 1.0, 'timestamp': EXAMPLE_TIMESTAMP},
+        'EUR': {'rate': 1.1, 'timestamp': EXAMPLE_TIMESTAMP},  # 1 EUR = 1.1 USD
+        'GBP': {'rate': 1.3, 'timestamp': EXAMPLE_TIMESTAMP}   # 1 GBP = 1.3 USD
+    }
+    books = OrderBooks()
+    books.apply('BTC', 'COINBASE', 'USD', bids=[(49990.0, 1.0)],
+                asks=[(50000.0, 0.5), (50050.0, 1.0), (50200.0, 3.0)], snapshot=True)
+    books.apply('BTC', 'KRAKEN', 'EUR', bids=[(46000.0, 0.3), (45950.0, 0.8), (45700.0, 2.0)],
+                asks=[(46010.0, 1.0)], snapshot=True)
+
+    for opp in ExecutableArbitrage(books, exchange_rates).find_top_opportunities(top_k=5):
+        print(f"{opp['crypto']}: buy {opp['size']:.4f} at {opp['lowest_price_exchange'][1:]} "
+              f"(VWAP {opp['buy_vwap']:.2f}, {opp['buy_levels']} levels), sell at {opp['highest_price_exchange'][1:]} "
+              f"(VWAP {opp['sell_vwap']:.2f}, {opp['sell_levels']} levels) -> ${opp['arbitrage_after_fees']:.2f} "
+              f"after ${opp['total_fees']:.2f} fees")
@@ -5,13 +5,77 @@ It allows us to calculate the total fees for a given transaction along with the
 '''
 import sys
 import os
+import logging
+from typing import Dict, List
+
+import numpy as np
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
 from app.external.utilities.exchange_fee_structure_data import fee_structures
 
+logger = logging.getLogger(__name__)
+
+
+class FeeSchedule:
+    """
+    The nested fee_structures compiled once into flat arrays indexed by exchange, operation and currency.
+    Every array has one extra trailing row/column used for unknown names, so looking up an id of -1
+    yields NaN (or 0.0 for crypto withdrawals, matching FeeCalculator's .get default) instead of raising.
+    """
+    OPERATIONS = ('buy', 'sell')
+
+    def __init__(self, fee_data: Dict = fee_structures):
+        self.exchanges: List[str] = list(fee_data)
+        self.exchange_ids = {name.lower(): index for index, name in enumerate(self.exchanges)}
+        self.cryptos = sorted({c for data in fee_data.values() for c in data['withdrawal_fee']['crypto']})
+        self.crypto_ids = {name: index for index, name in enumerate(self.cryptos)}
+        self.fiats = sorted({f for data in fee_data.values() for f in data['withdrawal_fee']['fiat']})
+        self.fiat_ids = {name: index for index, name in enumerate(self.fiats)}
+
+        n_exchange = len(self.exchanges) + 1
+        self.trading_fees = np.full((n_exchange, len(self.OPERATIONS)), np.nan)
+        self.spread_fees = np.full((n_exchange, len(self.OPERATIONS)), np.nan)
+        self.payment_fees = np.full(n_exchange, np.nan)
+        self.crypto_withdrawal = np.zeros((n_exchange, len(self.cryptos) + 1))
+        self.fiat_withdrawal = np.full((n_exchange, len(self.fiats) + 1), np.nan)
+
+        for exchange_id, name in enumerate(self.exchanges):
+            data = fee_data[name]
+            for operation_id, operation in enumerate(self.OPERATIONS):
+                self.trading_fees[exchange_id, operation_id] = data[f"trading_fee_{operation}"]
+                self.spread_fees[exchange_id, operation_id] = data[f"spread_fee_{operation}"]
+            self.payment_fees[exchange_id] = data["payment_fee"]
+            for crypto, fee in data['withdrawal_fee']['crypto'].items():
+                self.crypto_withdrawal[exchange_id, self.crypto_ids[crypto]] = fee
+            for fiat, methods in data['withdrawal_fee']['fiat'].items():
+                # The first listed withdrawal method, as in FeeCalculator.get_withdrawal_fee
+                self.fiat_withdrawal[exchange_id, self.fiat_ids[fiat]] = next(iter(methods.values()))
+        self.crypto_withdrawal[-1, :] = np.nan
+
+    @staticmethod
+    def _lookup(names, ids: Dict[str, int], normalize) -> np.ndarray:
+        """Map an array of names to ids (-1 for unknown) touching each distinct name only once"""
+        unique, inverse = np.unique(np.asarray(names, dtype=object).astype(str), return_inverse=True)
+        mapped = np.array([ids.get(normalize(name), -1) for name in unique], dtype=np.int64)
+        return mapped[inverse].reshape(np.shape(names))
+
+    def exchange_index(self, names) -> np.ndarray:
+        return self._lookup(names, self.exchange_ids, str.lower)
+
+    def crypto_index(self, names) -> np.ndarray:
+        return self._lookup(names, self.crypto_ids, str.upper)
+
+    def fiat_index(self, names) -> np.ndarray:
+        return self._lookup(names, self.fiat_ids, str.upper)
+
+
+FEE_SCHEDULE = FeeSchedule()
+
+
 class FeeCalculator:
     """Calculator for cryptocurrency_withdrawal exchange fees"""
     FEE_STRUCTURES = fee_structures
+    FEE_SCHEDULE = FEE_SCHEDULE
 
     def __init__(self, exchange_buy, exchange_sell, crypto, crypto_amount, crypto_price_buy, crypto_price_sell, currency_withdrawal, exchange_rates):
         self.exchange_buy = exchange_buy.lower()  # Convert to lowercase
@@ -87,7 +151,7 @@ class FeeCalculator:
             # spread_fee_sell +
             withdrawal_fee
         )
-        print(f"Total Fees: {total_fees}")
+        logger.debug(f"Total Fees: {total_fees}")
 
         return {
             "trading_fee_buy": trading_fee_buy,
@@ -101,6 +165,60 @@ class FeeCalculator:
             "arbitrage_after_fees": self.crypto_price_sell - self.crypto_price_buy - total_fees
         }
     
+    @classmethod
+    def calculate_fees_batch(cls, exchange_buy, exchange_sell, crypto, crypto_amount, crypto_price_buy,
+                             crypto_price_sell, currency_withdrawal, exchange_rates) -> Dict[str, np.ndarray]:
+        """
+        Vectorized calculate_fees for many buy/sell/amount combinations at once.
+        Every argument except exchange_rates may be a scalar or an array; they are broadcast together.
+        Returns:
+            dict with the same keys as calculate_fees, each an array. Rows whose exchange, currency or
+            exchange rate is unknown come back as NaN instead of raising.
+        """
+        schedule = cls.FEE_SCHEDULE
+        exchange_buy, exchange_sell, crypto, currency_withdrawal = np.broadcast_arrays(
+            np.asarray(exchange_buy, dtype=object), np.asarray(exchange_sell, dtype=object),
+            np.asarray(crypto, dtype=object), np.asarray(currency_withdrawal, dtype=object))
+        crypto_amount = np.asarray(crypto_amount, dtype=np.float64)
+        price_buy = np.asarray(crypto_price_buy, dtype=np.float64)
+        price_sell = np.asarray(crypto_price_sell, dtype=np.float64)
+
+        buy_ids = schedule.exchange_index(exchange_buy)
+        sell_ids = schedule.exchange_index(exchange_sell)
+
+        trading_fee_buy = crypto_amount * price_buy * schedule.trading_fees[buy_ids, 0]
+        payment_fee = crypto_amount * price_buy * schedule.payment_fees[buy_ids]
+        trading_fee_sell = crypto_amount * price_sell * schedule.trading_fees[sell_ids, 1]
+
+        # Withdrawal: crypto units when withdrawing the crypto itself, otherwise the fiat fee in USD
+        is_crypto = np.char.upper(currency_withdrawal.astype(str)) == np.char.upper(crypto.astype(str))
+        crypto_fee = schedule.crypto_withdrawal[sell_ids, schedule.crypto_index(currency_withdrawal)]
+
+        unique, inverse = np.unique(currency_withdrawal.astype(str), return_inverse=True)
+        unique_rates = np.full(len(unique), np.nan)
+        for index, currency in enumerate(unique):
+            rate = exchange_rates.get(currency)
+            if isinstance(rate, dict):
+                rate = rate.get('rate')
+            if isinstance(rate, (int, float)):
+                unique_rates[index] = rate
+        rates = unique_rates[inverse].reshape(currency_withdrawal.shape)
+        fiat_fee = schedule.fiat_withdrawal[sell_ids, schedule.fiat_index(currency_withdrawal)] * rates
+
+        withdrawal_fee = np.where(is_crypto, crypto_fee, fiat_fee)
+        total_fees = trading_fee_buy + trading_fee_sell + withdrawal_fee
+        price_arbitrage = price_sell - price_buy
+
+        return {
+            "trading_fee_buy": trading_fee_buy,
+            "payment_fee": payment_fee,
+            "trading_fee_sell": trading_fee_sell,
+            "withdrawal_fee": withdrawal_fee,
+            "total_fees": total_fees,
+            "price_arbitrage": price_arbitrage,
+            "arbitrage_after_fees": price_arbitrage - total_fees
+        }
+
     def display_fees(self):
         """Calculate and display the total accumulated fees"""
         fees = self.calculate_fees()
@@ -130,4 +248,4 @@ if __name__ == "__main__":
 
     fee_calculator.display_fees()
 
-__all__ = ['FeeCalculator']
+__all__ = ['FeeCalculator', 'FeeSchedule', 'FEE_SCHEDULE']
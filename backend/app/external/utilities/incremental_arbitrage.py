@@ -0,0 +1,218 @@
+'''
+This module keeps the cross exchange / cross fiat arbitrage (table 3) up to date incrementally.
+Instead of rescanning every crypto, exchange and fiat on every tick like CrossExchangeFiatArbitrage does,
+the engine keeps min/max heaps of the local-currency prices for each (crypto, fiat) pair. Because an exchange
+rate scales every price in a fiat by the same positive factor, the ordering inside a fiat never changes on an
+FX update, so the USD extremes of a crypto are simply the best of its per-fiat extremes after conversion.
+A price tick costs O(log n) heap work plus O(fiats) to recombine, and an FX update costs O(cryptos x fiats)
+with no per-exchange work at all.
+Ticks are applied on the apply thread while the emission scheduler may read the opportunities on its own
+thread, so every public method holds the engine's lock (reads pop stale heap entries and clear the dirty set).
+'''
+import sys
+import os
+import heapq
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# Add the root directory of your project to the sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
+
+from app.types.price_data_types import PriceDataType
+from app.external.utilities.cross_exchange_fiat_arbitrage import ArbitrageOpportunity
+
+
+class _FiatVenueHeap:
+    """Lowest/highest local-currency price across exchanges for one (crypto, fiat) pair.
+
+    Stale heap entries are skipped lazily when peeking and the heaps are rebuilt once
+    they grow well past the number of live exchanges.
+    """
+
+    def __init__(self):
+        self.prices: Dict[str, Tuple[float, int]] = {}  # exchange -> (price, sequence)
+        self._min_heap = []
+        self._max_heap = []
+        self._sequence = 0
+
+    def update(self, exchange: str, price: float):
+        self._sequence += 1
+        self.prices[exchange] = (price, self._sequence)
+        heapq.heappush(self._min_heap, (price, self._sequence, exchange))
+        heapq.heappush(self._max_heap, (-price, self._sequence, exchange))
+        if len(self._min_heap) > 2 * len(self.prices) + 16:
+            self._compact()
+
+    def remove(self, exchange: str):
+        self.prices.pop(exchange, None)
+
+    def _compact(self):
+        self._min_heap = [(price, seq, exchange) for exchange, (price, seq) in self.prices.items()]
+        self._max_heap = [(-price, seq, exchange) for exchange, (price, seq) in self.prices.items()]
+        heapq.heapify(self._min_heap)
+        heapq.heapify(self._max_heap)
+
+    def _peek(self, heap):
+        while heap:
+            _, seq, exchange = heap[0]
+            live = self.prices.get(exchange)
+            if live is not None and live[1] == seq:
+                return heap[0]
+            heapq.heappop(heap)
+        return None
+
+    def lowest(self) -> Optional[Tuple[float, str]]:
+        entry = self._peek(self._min_heap)
+        return (entry[0], entry[2]) if entry else None
+
+    def highest(self) -> Optional[Tuple[float, str]]:
+        entry = self._peek(self._max_heap)
+        return (-entry[0], entry[2]) if entry else None
+
+
+class IncrementalArbitrageEngine:
+    """Incrementally maintained drop-in for CrossExchangeFiatArbitrage.find_lowest_and_highest_price"""
+
+    def __init__(self, exchange_rates: Optional[Dict] = None):
+        self._books: Dict[str, Dict[str, _FiatVenueHeap]] = {}
+        self._rates: Dict[str, float] = {'USD': 1.0}
+        self._extremes: Dict[str, Optional[ArbitrageOpportunity]] = {}
+        self._dirty = set()
+        self._opportunities: Optional[List[ArbitrageOpportunity]] = None
+        self._lock = threading.RLock()
+        if exchange_rates:
+            for currency, rate_data in exchange_rates.items():
+                self.update_exchange_rate(currency, rate_data)
+
+    @staticmethod
+    def _normalize_rate(rate_data) -> Optional[float]:
+        """Accept both {'rate': x, 'timestamp': ...} and bare float formats"""
+        rate = rate_data.get('rate') if isinstance(rate_data, dict) else rate_data
+        if not isinstance(rate, (int, float)) or rate <= 0:
+            return None
+        return float(rate)
+
+    def load(self, price_data: PriceDataType, exchange_rates: Optional[Dict] = None):
+        """Seed the engine from a nested crypto_prices dict and exchange rates"""
+        if exchange_rates:
+            for currency, rate_data in exchange_rates.items():
+                self.update_exchange_rate(currency, rate_data)
+        for crypto, exchanges in price_data.items():
+            for exchange, currencies in exchanges.items():
+                for currency, data in currencies.items():
+                    self.update_price(crypto, exchange, currency, data['price'])
+
+    def update_price(self, crypto: str, exchange: str, fiat: str, price: float):
+        """Apply a single price tick - O(log n)"""
+        try:
+            price = float(price)
+        except (ValueError, TypeError):
+            return
+        with self._lock:
+            fiats = self._books.setdefault(crypto, {})
+            venue_heap = fiats.get(fiat)
+            if venue_heap is None:
+                venue_heap = fiats[fiat] = _FiatVenueHeap()
+            venue_heap.update(exchange, price)
+            self._dirty.add(crypto)
+
+    def remove_price(self, crypto: str, exchange: str, fiat: str):
+        with self._lock:
+            venue_heap = self._books.get(crypto, {}).get(fiat)
+            if venue_heap is not None:
+                venue_heap.remove(exchange)
+                self._dirty.add(crypto)
+
+    def update_exchange_rate(self, currency: str, rate_data):
+        """Apply an FX update; only the per-fiat extremes are re-converted, never the exchanges"""
+        if currency == 'USD':
+            return
+        rate = self._normalize_rate(rate_data)
+        with self._lock:
+            if rate is None:
+                self._rates.pop(currency, None)
+            else:
+                self._rates[currency] = rate
+            self._dirty.update(crypto for crypto, fiats in self._books.items() if currency in fiats)
+
+    def _recompute(self, crypto: str) -> Optional[ArbitrageOpportunity]:
+        lowest_price = float('inf')
+        lowest_exchange = None
+        highest_price = float('-inf')
+        highest_exchange = None
+
+        for fiat, venue_heap in self._books.get(crypto, {}).items():
+            rate = self._rates.get(fiat)
+            if rate is None:
+                continue
+            low = venue_heap.lowest()
+            high = venue_heap.highest()
+            if low is None or high is None:
+                continue
+            if low[0] * rate < lowest_price:
+                lowest_price = low[0] * rate
+                lowest_exchange = (crypto, low[1], fiat)
+            if high[0] * rate > highest_price:
+                highest_price = high[0] * rate
+                highest_exchange = (crypto, high[1], fiat)
+
+        if lowest_exchange is None or highest_exchange is None or lowest_price <= 0:
+            return None
+        spread = (highest_price - lowest_price) / lowest_price
+        if spread <= 0:
+            return None
+        return {
+            'crypto': crypto,
+            'lowest_price': lowest_price,
+            'lowest_price_exchange': lowest_exchange,
+            'highest_price': highest_price,
+            'highest_price_exchange': highest_exchange,
+            'spread': spread
+        }
+
+    def _refresh(self):
+        # Caller holds the lock
+        if not self._dirty:
+            return
+        for crypto in self._dirty:
+            self._extremes[crypto] = self._recompute(crypto)
+        self._dirty.clear()
+        self._opportunities = None
+
+    def get_opportunity(self, crypto: str) -> Optional[ArbitrageOpportunity]:
+        """Current USD-normalized lowest/highest venue for one crypto (None if no positive spread)"""
+        with self._lock:
+            self._refresh()
+            return self._extremes.get(crypto)
+
+    def find_lowest_and_highest_price(self) -> List[ArbitrageOpportunity]:
+        """Same output as CrossExchangeFiatArbitrage.find_lowest_and_highest_price"""
+        with self._lock:
+            self._refresh()
+            if self._opportunities is None:
+                self._opportunities = sorted(
+                    (opp for opp in self._extremes.values() if opp is not None),
+                    key=lambda x: x['spread'],
+                    reverse=True
+                )
+            return list(self._opportunities)
+
+
+# Example usage
+if __name__ == "__main__":
+    EXAMPLE_TIMESTAMP = '2023-10-01T00:00:00Z'
+    exchange_rates = {
+        'USD': {'rate': 1.0, 'timestamp': EXAMPLE_TIMESTAMP},
+        'EUR': {'rate': 1.1, 'timestamp': EXAMPLE_TIMESTAMP},  # 1 EUR = 1.1 USD
+        'GBP': {'rate': 1.3, 'timestamp': EXAMPLE_TIMESTAMP}   # 1 GBP = 1.3 USD
+    }
+
+    engine = IncrementalArbitrageEngine(exchange_rates)
+    engine.update_price('BTC', 'COINBASE', 'USD', 50000.0)
+    engine.update_price('BTC', 'BINANCE', 'EUR', 45500.0)
+    engine.update_price('BTC', 'KRAKEN', 'GBP', 38000.0)
+    print(engine.find_lowest_and_highest_price())
+
+    # An FX move re-ranks venues without touching any exchange entries
+    engine.update_exchange_rate('GBP', 1.4)
+    print(engine.find_lowest_and_highest_price())
@@ -0,0 +1,131 @@
+'''
+This module evaluates the three arbitrage strategy families in one pass over the PriceBook buffer, instead
+of ExchangeSpread, ExchangeArbitrage and CrossExchangeFiatArbitrage each walking the book and converting
+FX on their own:
+    spread          same crypto and fiat across exchanges (table 1, ExchangeSpread on a fresh tracker)
+    same_exchange   same crypto and exchange across fiats (table 2, ExchangeArbitrage on one exchange)
+    cross_exchange  same crypto across every exchange and fiat (table 3, CrossExchangeFiatArbitrage)
+The prices are read and converted to USD once; each family is then an argmin/argmax over a different
+axis of the same (crypto x exchange x fiat) array, and the outputs have the shapes of the classes above.
+'''
+import sys
+import os
+from typing import Dict, List, Tuple, TypedDict
+
+import numpy as np
+
+# Add the root directory of your project to the sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
+
+from app.types.price_data_types import PriceDataType
+from app.external.utilities.price_book import PriceBook
+from app.external.utilities.cross_exchange_fiat_arbitrage import ArbitrageOpportunity
+
+
+class StrategyResults(TypedDict):
+    # crypto -> fiat -> {'price', 'exchange', 'timestamp'}, as ExchangeSpread.get_highest_prices/get_lowest_prices
+    spread_highest: Dict[str, Dict[str, Dict]]
+    spread_lowest: Dict[str, Dict[str, Dict]]
+    # (crypto, exchange) -> ExchangeArbitrage({crypto: {exchange: ...}}).find_lowest_and_highest_price()
+    same_exchange: Dict[Tuple[str, str], Dict]
+    # CrossExchangeFiatArbitrage.find_lowest_and_highest_price()
+    cross_exchange: List[ArbitrageOpportunity]
+
+
+class MultiStrategyEvaluator:
+    """Spread, same-exchange and cross-exchange arbitrage from one read of the book"""
+
+    def __init__(self, price_data: PriceDataType, exchange_rates: Dict):
+        # Plain dicts are loaded into a PriceBook once so every family shares the dense layout
+        self.book = price_data if isinstance(price_data, PriceBook) else PriceBook.from_dict(price_data)
+        self.exchange_rates = exchange_rates
+
+    FAMILIES = ('spread', 'same_exchange', 'cross_exchange')
+
+    def evaluate(self, families=FAMILIES) -> StrategyResults:
+        """Results of the requested families (the others are left empty)"""
+        book = self.book
+        results: StrategyResults = {'spread_highest': {}, 'spread_lowest': {}, 'same_exchange': {}, 'cross_exchange': []}
+        prices = book.price_array()
+        if not prices.size:
+            return results
+
+        if 'spread' in families:
+            self._spread(book, prices, ~np.isnan(prices), results)
+        if 'same_exchange' not in families and 'cross_exchange' not in families:
+            return results
+
+        # The one FX conversion of the book, shared by both USD families
+        usd = prices * book.fiat_rates(self.exchange_rates)
+        usd_valid = ~np.isnan(usd)
+        usd_low = np.where(usd_valid, usd, np.inf)
+        usd_high = np.where(usd_valid, usd, -np.inf)
+        if 'same_exchange' in families:
+            self._same_exchange(book, usd, usd_valid, usd_low, usd_high, results)
+        if 'cross_exchange' in families:
+            self._cross_exchange(book, usd, usd_valid, usd_low, usd_high, results)
+        return results
+
+    @staticmethod
+    def _spread(book: PriceBook, prices, valid, results: StrategyResults):
+        # Nominal prices, lowest/highest exchange per (crypto, fiat)
+        low_exchange = np.where(valid, prices, np.inf).argmin(axis=1)
+        high_exchange = np.where(valid, prices, -np.inf).argmax(axis=1)
+        for crypto_id, fiat_id in zip(*np.nonzero(valid.any(axis=1))):
+            crypto = book.cryptos[crypto_id]
+            fiat = book.fiats[fiat_id]
+            for extremes, exchange_id in ((results['spread_highest'], high_exchange[crypto_id, fiat_id]),
+                                          (results['spread_lowest'], low_exchange[crypto_id, fiat_id])):
+                extremes.setdefault(crypto, {})[fiat] = {
+                    'price': float(prices[crypto_id, exchange_id, fiat_id]),
+                    'exchange': book.exchanges[exchange_id],
+                    'timestamp': book.raw_timestamp(crypto_id, exchange_id, fiat_id)
+                }
+
+    @staticmethod
+    def _same_exchange(book: PriceBook, usd, usd_valid, usd_low, usd_high, results: StrategyResults):
+        # USD prices, lowest/highest fiat per (crypto, exchange); only positive spreads, like ExchangeArbitrage
+        low_fiat = usd_low.argmin(axis=2)
+        high_fiat = usd_high.argmax(axis=2)
+        lowest = np.take_along_axis(usd_low, low_fiat[..., None], axis=2)[..., 0]
+        highest = np.take_along_axis(usd_high, high_fiat[..., None], axis=2)[..., 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            profitable = (lowest > 0) & ((highest - lowest) / lowest > 0)
+        same_exchange = results['same_exchange']
+        for crypto_id, exchange_id in zip(*(ids.tolist() for ids in np.nonzero(profitable))):
+            crypto = book.cryptos[crypto_id]
+            exchange = book.exchanges[exchange_id]
+            same_exchange[(crypto, exchange)] = {
+                'lowest_price': float(lowest[crypto_id, exchange_id]),
+                'lowest_price_exchange': (crypto, exchange, book.fiats[low_fiat[crypto_id, exchange_id]]),
+                'highest_price': float(highest[crypto_id, exchange_id]),
+                'highest_price_exchange': (crypto, exchange, book.fiats[high_fiat[crypto_id, exchange_id]])
+            }
+
+    @staticmethod
+    def _cross_exchange(book: PriceBook, usd, usd_valid, usd_low, usd_high, results: StrategyResults):
+        # USD prices, lowest/highest (exchange, fiat) per crypto, sorted by spread like CrossExchangeFiatArbitrage
+        n_crypto, n_exchange, n_fiat = usd.shape
+        low_index = usd_low.reshape(n_crypto, -1).argmin(axis=1)
+        high_index = usd_high.reshape(n_crypto, -1).argmax(axis=1)
+        flat = usd.reshape(n_crypto, -1)
+        opportunities = results['cross_exchange']
+        for crypto_id in np.nonzero(usd_valid.reshape(n_crypto, -1).any(axis=1))[0].tolist():
+            lowest = float(flat[crypto_id, low_index[crypto_id]])
+            highest = float(flat[crypto_id, high_index[crypto_id]])
+            if lowest <= 0:
+                continue
+            spread = (highest - lowest) / lowest
+            if spread > 0:
+                crypto = book.cryptos[crypto_id]
+                low_exchange, low_fiat = divmod(int(low_index[crypto_id]), n_fiat)
+                high_exchange, high_fiat = divmod(int(high_index[crypto_id]), n_fiat)
+                opportunities.append({
+                    'crypto': crypto,
+                    'lowest_price': lowest,
+                    'lowest_price_exchange': (crypto, book.exchanges[low_exchange], book.fiats[low_fiat]),
+                    'highest_price': highest,
+                    'highest_price_exchange': (crypto, book.exchanges[high_exchange], book.fiats[high_fiat]),
+                    'spread': spread
+                })
+        opportunities.sort(key=lambda x: x['spread'], reverse=True)
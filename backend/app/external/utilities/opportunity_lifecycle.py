@@ -0,0 +1,161 @@
+'''
+This module follows arbitrage opportunities over time instead of re-reporting them on every tick.
+It is fed the DataCollector payloads (client_data) and keeps every open opportunity under the id of
+its trade, crypto:buy_exchange:buy_currency>sell_exchange:sell_currency (the delta stream ids). It reports
+only three kinds of event:
+    open     the trade's net profit (arbitrage_after_fees) rose above min_profit
+    update   its net profit moved by more than update_threshold (relative) since the last event of the trade
+    close    it left the payload or its net profit fell back to min_profit or below; carries the duration
+             and the peak net profit
+A persistent opportunity is one open and one close (plus a few updates) instead of one CSV row and one emit
+per tick, and its duration no longer has to be re-counted from snapshots afterwards.
+PriceTracker feeds it the payload of every recompute the update gate lets through (built once per book
+version from the shared opportunities and one batched fee call), so durations and peaks do not depend on the
+'client_data' EMIT_RATES rate.
+'''
+import sys
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Add the root directory of your project to the sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
+
+from app.config.settings import Config
+from app.websocket.delta_stream import opportunity_id
+
+EVENTS = ('open', 'update', 'close')
+
+# Columns of the lifecycle CSV (one row per event)
+FIELDNAMES = ['event', 'id', 'timestamp', 'crypto', 'strategy', 'buy_exchange', 'buy_currency', 'sell_exchange',
+              'sell_currency', 'opened_at', 'closed_at', 'duration_seconds', 'net_profit', 'peak_net_profit',
+              'peak_at', 'profit_percentage', 'spread_percentage', 'observations']
+
+
+def message(events: List[Dict], snapshot: bool = False) -> Dict:
+    """opportunity_lifecycle event payload: new events, or every open opportunity for a new subscriber"""
+    return {
+        'type': 'lifecycle_snapshot' if snapshot else 'lifecycle_events',
+        'events': events,
+        'timestamp': datetime.now().isoformat()
+    }
+
+
+class _OpenOpportunity:
+    """State of one open opportunity"""
+
+    __slots__ = ('opportunity', 'opened_at', 'peak_net_profit', 'peak_at', 'reported_net_profit', 'observations')
+
+    def __init__(self, opportunity: Dict, now: datetime):
+        self.opportunity = opportunity
+        self.opened_at = now
+        self.peak_net_profit = opportunity['arbitrage_after_fees']
+        self.peak_at = now
+        self.reported_net_profit = opportunity['arbitrage_after_fees']
+        self.observations = 1
+
+    def observe(self, opportunity: Dict, now: datetime):
+        self.opportunity = opportunity
+        self.observations += 1
+        if opportunity['arbitrage_after_fees'] > self.peak_net_profit:
+            self.peak_net_profit = opportunity['arbitrage_after_fees']
+            self.peak_at = now
+
+
+class OpportunityLifecycle:
+    """Open opportunities of the client_data payloads and the open/update/close events between them"""
+
+    def __init__(self, min_profit: float = 0.0, update_threshold: float = 0.1):
+        self.min_profit = min_profit
+        self.update_threshold = update_threshold
+        self.open: Dict[str, _OpenOpportunity] = {}
+        self.counts = {event: 0 for event in EVENTS}
+        self.closed_duration = 0.0  # seconds, summed over closed opportunities
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls):
+        return cls(min_profit=Config.LIFECYCLE_MIN_PROFIT, update_threshold=Config.LIFECYCLE_UPDATE_THRESHOLD)
+
+    def update(self, client_data: Dict, now: Optional[datetime] = None) -> List[Dict]:
+        """Apply one client_data payload, returning the events it caused (usually none)"""
+        if client_data.get('status') == 'error':
+            # Nothing is known about the book, keep everything open
+            return []
+        now = now or datetime.now()
+        current = {}
+        for opportunity in client_data.get('opportunities') or []:
+            if opportunity['arbitrage_after_fees'] > self.min_profit:
+                current[opportunity_id(opportunity)] = opportunity
+
+        events = []
+        with self._lock:
+            for key, opportunity in current.items():
+                state = self.open.get(key)
+                if state is None:
+                    state = self.open[key] = _OpenOpportunity(opportunity, now)
+                    events.append(self._event('open', key, state, now))
+                    continue
+                state.observe(opportunity, now)
+                net_profit = opportunity['arbitrage_after_fees']
+                if abs(net_profit - state.reported_net_profit) > self.update_threshold * abs(state.reported_net_profit):
+                    state.reported_net_profit = net_profit
+                    events.append(self._event('update', key, state, now))
+            for key in [key for key in self.open if key not in current]:
+                state = self.open.pop(key)
+                self.closed_duration += (now - state.opened_at).total_seconds()
+                events.append(self._event('close', key, state, now))
+            for event in events:
+                self.counts[event['event']] += 1
+        return events
+
+    @staticmethod
+    def _event(event: str, key: str, state: _OpenOpportunity, now: datetime) -> Dict:
+        opportunity = state.opportunity
+        return {
+            'event': event,
+            'id': key,
+            'timestamp': now.isoformat(),
+            'crypto': opportunity['crypto'],
+            'strategy': (f"Buy at {opportunity['lowest_price_exchange']} in {opportunity['buy_currency']} -> "
+                         f"Sell at {opportunity['highest_price_exchange']} in {opportunity['sell_currency']}"),
+            'buy_exchange': opportunity['lowest_price_exchange'],
+            'buy_currency': opportunity['buy_currency'],
+            'sell_exchange': opportunity['highest_price_exchange'],
+            'sell_currency': opportunity['sell_currency'],
+            'opened_at': state.opened_at.isoformat(),
+            'closed_at': now.isoformat() if event == 'close' else None,
+            'duration_seconds': round((now - state.opened_at).total_seconds(), 3),
+            'net_profit': opportunity['arbitrage_after_fees'],
+            'peak_net_profit': state.peak_net_profit,
+            'peak_at': state.peak_at.isoformat(),
+            'profit_percentage': opportunity['profit_percentage'],
+            'spread_percentage': opportunity['spread_percentage'],
+            'observations': state.observations
+        }
+
+    def get_open(self) -> List[Dict]:
+        """Open opportunities as 'open' events with their current values, e.g. for a client that just subscribed"""
+        now = datetime.now()
+        with self._lock:
+            return [self._event('open', key, state, now) for key, state in self.open.items()]
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            closed = self.counts['close']
+            return {
+                'open': len(self.open),
+                'events': dict(self.counts),
+                'mean_duration_seconds': self.closed_duration / closed if closed else 0.0
+            }
+
+    def metric_families(self):
+        """Lifecycle event counters for the /api/metrics endpoint"""
+        stats = self.get_stats()
+        return [
+            ('arbitrage_lifecycle_events_total', 'counter', 'Opportunity lifecycle events, by event.',
+             [({'event': event}, count) for event, count in stats['events'].items()]),
+            ('arbitrage_open_opportunities', 'gauge', 'Opportunities currently open.',
+             [({}, stats['open'])]),
+        ]
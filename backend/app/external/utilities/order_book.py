@@ -0,0 +1,195 @@
+'''
+This module keeps the L2 depth of every venue, (crypto, exchange, fiat), from the CoinAPI book and quote feeds.
+Each side of a book is a pair of parallel array('d') ladders (8 bytes per price and per size, no per-level
+objects) sorted in walk order, best level first: asks by ascending price, bids by descending price (stored
+negated so both sides share one ascending bisect). Messages apply incrementally:
+    snapshot    replaces both sides of the venue (book snapshots, book5/book20/book50 and quote messages)
+    update      sets the listed levels, size 0 removes a level; ignored until the venue had a snapshot
+Ladders are capped at max_levels per side, dropping the worst levels. A book whose best bid reaches its best
+ask after an update has missed a message (dropped by the ingest queue, or a sequence gap upstream); it is
+reported as crossed, and never walked by executable arbitrage, until an update or snapshot uncrosses it.
+'''
+import sys
+import os
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Add the root directory of your project to the sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
+
+# CoinAPI data types carrying depth: full book (snapshot then updates), top-N snapshots, best bid/ask
+BOOK_DATA_TYPES = ('book', 'book5', 'book20', 'book50', 'quote')
+
+Level = Tuple[float, float]  # (price, size)
+
+
+class BookSide:
+    """One side of a venue's book as sorted price/size ladders, best level first"""
+
+    __slots__ = ('sign', 'max_levels', 'keys', 'sizes')
+
+    def __init__(self, sign: int, max_levels: int = 50):
+        self.sign = sign  # 1 for asks, -1 for bids
+        self.max_levels = max_levels
+        self.keys = array('d')  # sign * price, ascending
+        self.sizes = array('d')
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def replace(self, levels: Iterable[Level]):
+        """Replace the whole side with levels (in any order, the last of repeated prices wins, size 0 is dropped)"""
+        sizes = {self.sign * price: size for price, size in levels}
+        ordered = sorted((key, size) for key, size in sizes.items() if size > 0)[:self.max_levels]
+        self.keys = array('d', [key for key, _ in ordered])
+        self.sizes = array('d', [size for _, size in ordered])
+
+    def set(self, price: float, size: float):
+        """Set the size at price, removing the level when size is 0"""
+        key = self.sign * price
+        index = bisect_left(self.keys, key)
+        found = index < len(self.keys) and self.keys[index] == key
+        if size <= 0:
+            if found:
+                del self.keys[index]
+                del self.sizes[index]
+        elif found:
+            self.sizes[index] = size
+        elif index < self.max_levels:
+            self.keys.insert(index, key)
+            self.sizes.insert(index, size)
+            if len(self.keys) > self.max_levels:
+                del self.keys[-1]
+                del self.sizes[-1]
+
+    def best(self) -> Optional[float]:
+        return self.sign * self.keys[0] if self.keys else None
+
+    def ladder(self) -> Tuple[List[float], List[float]]:
+        """(prices, sizes) copies as lists, best level first, ready for a walk"""
+        if self.sign == 1:
+            return self.keys.tolist(), self.sizes.tolist()
+        return [-key for key in self.keys], self.sizes.tolist()
+
+    def levels(self) -> List[Level]:
+        return [(self.sign * key, size) for key, size in zip(self.keys, self.sizes)]
+
+
+class OrderBook:
+    """Bid and ask ladders of one venue"""
+
+    __slots__ = ('bids', 'asks', 'timestamp', 'has_snapshot', 'crossed', '_depth')
+
+    def __init__(self, max_levels: int = 50):
+        self.bids = BookSide(-1, max_levels)
+        self.asks = BookSide(1, max_levels)
+        self.timestamp = None
+        self.has_snapshot = False
+        self.crossed = False
+        self._depth = None
+
+    def apply_snapshot(self, bids: Iterable[Level], asks: Iterable[Level], timestamp=None):
+        self.bids.replace(bids)
+        self.asks.replace(asks)
+        self.timestamp = timestamp
+        self.has_snapshot = True
+        self._check_crossed()
+
+    def apply_update(self, bids: Iterable[Level], asks: Iterable[Level], timestamp=None) -> bool:
+        """Apply changed levels, False (nothing applied) before the first snapshot"""
+        if not self.has_snapshot:
+            return False
+        for price, size in bids:
+            self.bids.set(price, size)
+        for price, size in asks:
+            self.asks.set(price, size)
+        self.timestamp = timestamp
+        self._check_crossed()
+        return True
+
+    def _check_crossed(self):
+        self._depth = None  # every change goes through here
+        best_bid, best_ask = self.bids.best(), self.asks.best()
+        self.crossed = best_bid is not None and best_ask is not None and best_bid >= best_ask
+
+    @property
+    def is_ready(self) -> bool:
+        """Whether the book can be walked: snapshotted, not crossed and with both sides"""
+        return self.has_snapshot and not self.crossed and len(self.bids) > 0 and len(self.asks) > 0
+
+    def depth(self) -> Tuple[List[float], List[float], List[float], List[float], float, float]:
+        """(bid prices, bid sizes, ask prices, ask sizes, bid total size, ask total size), copied once per change"""
+        if self._depth is None:
+            bid_prices, bid_sizes = self.bids.ladder()
+            ask_prices, ask_sizes = self.asks.ladder()
+            self._depth = (bid_prices, bid_sizes, ask_prices, ask_sizes, sum(bid_sizes), sum(ask_sizes))
+        return self._depth
+
+    def to_dict(self, depth: Optional[int] = None) -> Dict:
+        return {
+            'bids': self.bids.levels()[:depth],
+            'asks': self.asks.levels()[:depth],
+            'last_update': self.timestamp,
+            'crossed': self.crossed
+        }
+
+
+class OrderBooks:
+    """Per-venue OrderBooks with a version bumped on every applied message, shared by the ingest and apply threads"""
+
+    def __init__(self, max_levels: int = 50):
+        self.max_levels = max_levels
+        self.books: Dict[Tuple[str, str, str], OrderBook] = {}
+        self.version = 0
+        self.counts = {'snapshot': 0, 'update': 0, 'ignored': 0}
+        self._lock = threading.Lock()
+
+    def apply(self, crypto: str, exchange: str, fiat: str, bids: Iterable[Level], asks: Iterable[Level],
+              timestamp=None, snapshot: bool = False) -> bool:
+        """Apply one book message to the venue's book, False when an update arrived before any snapshot"""
+        key = (crypto, exchange, fiat)
+        with self._lock:
+            book = self.books.get(key)
+            if book is None:
+                book = self.books[key] = OrderBook(self.max_levels)
+            if snapshot:
+                book.apply_snapshot(bids, asks, timestamp)
+            elif not book.apply_update(bids, asks, timestamp):
+                self.counts['ignored'] += 1
+                return False
+            self.counts['snapshot' if snapshot else 'update'] += 1
+            self.version += 1
+            return True
+
+    def depth(self) -> Dict[Tuple[str, str, str], Tuple]:
+        """OrderBook.depth() of every walkable venue, taken under the lock; only books changed since the last
+        call are copied again, the tuples of the others are shared (do not modify)"""
+        with self._lock:
+            return {key: book.depth() for key, book in self.books.items() if book.is_ready}
+
+    def get(self, crypto: str, exchange: str, fiat: str, depth: Optional[int] = None) -> Optional[Dict]:
+        with self._lock:
+            book = self.books.get((crypto, exchange, fiat))
+            return book.to_dict(depth) if book is not None else None
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'venues': len(self.books),
+                'ready': sum(book.is_ready for book in self.books.values()),
+                'crossed': sum(book.crossed for book in self.books.values()),
+                'messages': dict(self.counts),
+                'version': self.version
+            }
+
+    def metric_families(self):
+        """Book message counters and venue gauges for the /api/metrics endpoint"""
+        stats = self.get_stats()
+        return [
+            ('arbitrage_book_messages_total', 'counter', 'L2 book messages, by kind (ignored: update before snapshot).',
+             [({'kind': kind}, count) for kind, count in stats['messages'].items()]),
+            ('arbitrage_book_venues', 'gauge', 'Venues with an order book, by state.',
+             [({'state': 'ready'}, stats['ready']), ({'state': 'crossed'}, stats['crossed'])]),
+        ]
@@ -0,0 +1,272 @@
+'''
+This module stores the cross exchange / cross fiat arbitrage history (table 3) as typed Parquet files
+next to the CSV output of CSVTracker. Prices, rates, spreads and fees are kept as float64 columns instead of
+"$12.34" / "0.12%" strings, and the data is partitioned hive-style by date and crypto:
+
+    <base_dir>/crypto_arbitrage_3/date=2025-05-08/crypto=BTC/part-00000.parquet
+
+so pandas.read_parquet / pyarrow.dataset can prune partitions and read only the columns they need.
+Rows are buffered per partition and, once row_group_size rows are collected (or flush_interval seconds
+passed), handed over a bounded queue to a background thread that appends them as one row group, so Arrow
+encoding and file I/O stay off the ingest path (like AsyncCSVWriter, rows are dropped and counted if the
+writer falls behind, and the thread is a real OS thread under gevent). Every flush_interval roll and every
+flush() closes the open files, and a file is also closed after max_rows_per_file rows, so at most one
+interval of rows is ever in a file without a Parquet footer and there is no hard size cap like the 2GB CSV
+limit. Files being written carry a leading '.' so readers skip them until the footer is in place.
+pyarrow is optional: without it the store is disabled and CSVTracker keeps writing CSV only.
+'''
+import sys
+import os
+import _queue
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Add the root directory of your project to the sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
+
+from app.external.utilities.async_csv_writer import start_native_thread
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+SUPPORTED_EXCHANGES = ['COINBASE', 'BINANCE', 'KRAKEN', 'BITSTAMP']
+SUPPORTED_FIATS = ['USD', 'EUR', 'GBP']
+
+# Typed columns of one arbitrage record; price and rate columns mirror the CSV layout of table 3.
+# date and crypto are not stored in the files, readers get them back from the partition path.
+ARBITRAGE_COLUMNS = (
+    [('timestamp', 'timestamp'),
+     ('buy_exchange', 'string'), ('buy_currency', 'string'),
+     ('sell_exchange', 'string'), ('sell_currency', 'string')]
+    + [(f"{exchange}_{fiat}", 'float64') for exchange in SUPPORTED_EXCHANGES for fiat in SUPPORTED_FIATS]
+    + [(f"{fiat}_RATE_USD", 'float64') for fiat in SUPPORTED_FIATS]
+    + [('lowest_price', 'float64'), ('highest_price', 'float64'), ('arbitrage_percentage', 'float64'),
+       ('total_fees', 'float64'), ('arbitrage_after_fees', 'float64'), ('strategy', 'string')]
+)
+
+
+def arbitrage_schema():
+    """Arrow schema of the Parquet files"""
+    types = {'timestamp': pa.timestamp('us'), 'string': pa.string(), 'float64': pa.float64()}
+    return pa.schema([(name, types[kind]) for name, kind in ARBITRAGE_COLUMNS])
+
+
+class ParquetArbitrageStore:
+    """Buffers typed arbitrage records and appends them as Parquet row groups per (date, crypto) partition"""
+
+    TABLE_NAME = 'crypto_arbitrage_3'
+
+    _FLUSH = 'flush'
+    _ROLL = 'roll'
+    _STOP = 'stop'
+
+    def __init__(self, base_dir: str = None, row_group_size: int = 10000, flush_interval: float = 60.0,
+                 max_rows_per_file: int = 1000000, max_queue_size: int = 64):
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow is required for ParquetArbitrageStore (pip install pyarrow)")
+        self.logger = logging.getLogger(__name__)
+        self.base_dir = os.path.join(base_dir or os.path.dirname(__file__), self.TABLE_NAME)
+        self.row_group_size = row_group_size
+        self.flush_interval = flush_interval
+        self.max_rows_per_file = max_rows_per_file
+        self.schema = arbitrage_schema()
+
+        self._buffers: Dict[tuple, Dict[str, list]] = {}  # (date, crypto) -> column name -> values
+        self._writers: Dict[tuple, dict] = {}  # (date, crypto) -> {'writer', 'path', 'final_path', 'rows'}, writer thread only
+        # Full row groups and control items for the writer thread; the C SimpleQueue also works between a greenlet
+        # and the OS thread, _submit enforces max_queue_size
+        self._queue = _queue.SimpleQueue()
+        self.max_queue_size = max_queue_size
+        self._thread = None
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.row_groups_written = 0
+        self.files_closed = 0
+        # Unclosed files have no footer and stay hidden from readers
+        atexit.register(self.close)
+
+    def start(self):
+        with self._lock:
+            self._start()
+
+    def _start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = start_native_thread(self._run, 'parquet-writer')
+
+    def append(self, record: Dict):
+        """
+        Buffer one arbitrage record (crypto plus keys from ARBITRAGE_COLUMNS, missing keys become null).
+        Once its partition holds row_group_size rows, or flush_interval has passed, the buffered rows are handed
+        to the writer thread as row groups; encoding and writing them never happens on the caller's thread.
+        """
+        timestamp = record.get('timestamp') or datetime.now()
+        partition = (timestamp.strftime('%Y-%m-%d'), record['crypto'])
+        with self._lock:
+            buffer = self._buffers.get(partition)
+            if buffer is None:
+                buffer = self._buffers[partition] = {name: [] for name, _ in ARBITRAGE_COLUMNS}
+            for name, values in buffer.items():
+                values.append(record.get(name))
+            buffer['timestamp'][-1] = timestamp
+
+            if len(buffer['timestamp']) >= self.row_group_size:
+                self._submit(partition, self._buffers.pop(partition))
+            elif time.monotonic() - self._last_flush >= self.flush_interval:
+                self._submit_buffers()
+                self._submit(self._ROLL, None)
+
+    def flush(self, timeout: float = None) -> bool:
+        """Block until every buffered row is written and its file closed, so read_arbitrage_history sees it"""
+        with self._lock:
+            self._submit_buffers()
+            if self._thread is None or not self._thread.is_alive():
+                return True
+        done = threading.Event()
+        self._queue.put((self._FLUSH, done))
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        """Write the buffers, close every open file so readers can see it and stop the writer thread"""
+        with self._lock:
+            self._submit_buffers()
+            if self._thread is None or not self._thread.is_alive():
+                return
+        self._queue.put((self._STOP, None))
+        self._thread.join(timeout)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'buffered_rows': sum(len(buffer['timestamp']) for buffer in self._buffers.values()),
+                'queue_depth': self._queue.qsize(),
+                'rows_written': self.rows_written,
+                'rows_dropped': self.rows_dropped,
+                'row_groups_written': self.row_groups_written,
+                'files_closed': self.files_closed,
+                'open_files': len(self._writers)
+            }
+
+    def _submit(self, target, buffer: Optional[Dict[str, list]]):
+        """Queue a row group (or control item) without blocking, dropping the rows if the writer is behind"""
+        self._start()
+        if self._queue.qsize() < self.max_queue_size:
+            self._queue.put((target, buffer))
+        elif buffer is not None:
+            self.rows_dropped += len(buffer['timestamp'])
+            self.logger.warning(f"Parquet writer queue is full, dropped {len(buffer['timestamp'])} rows of {target}")
+
+    def _submit_buffers(self):
+        for partition in list(self._buffers):
+            self._submit(partition, self._buffers.pop(partition))
+        self._last_flush = time.monotonic()
+
+    def _run(self):
+        while True:
+            target, payload = self._queue.get()
+            if target == self._FLUSH:
+                self._close_writers()
+                payload.set()
+            elif target == self._ROLL:
+                self._close_writers()
+            elif target == self._STOP:
+                self._close_writers()
+                return
+            else:
+                self._write_row_group(target, payload)
+
+    def _partition_dir(self, partition: tuple) -> str:
+        date, crypto = partition
+        return os.path.join(self.base_dir, f"date={date}", f"crypto={crypto}")
+
+    def _open_writer(self, partition: tuple) -> dict:
+        directory = self._partition_dir(partition)
+        os.makedirs(directory, exist_ok=True)
+        index = sum(1 for name in os.listdir(directory) if name.endswith('.parquet'))
+        final_path = os.path.join(directory, f"part-{index:05d}.parquet")
+        path = os.path.join(directory, f".part-{index:05d}.parquet")
+        handle = self._writers[partition] = {
+            'writer': pq.ParquetWriter(path, self.schema, compression='snappy'),
+            'path': path,
+            'final_path': final_path,
+            'rows': 0
+        }
+        return handle
+
+    def _close_writer(self, partition: tuple):
+        handle = self._writers.pop(partition)
+        try:
+            handle['writer'].close()
+            os.replace(handle['path'], handle['final_path'])
+            self.files_closed += 1
+        except Exception as e:
+            self.logger.error(f"Error closing arbitrage file {handle['path']}: {str(e)}")
+
+    def _write_row_group(self, partition: tuple, buffer: Dict[str, list]):
+        if not buffer['timestamp']:
+            return
+        try:
+            batch = pa.RecordBatch.from_pydict(buffer, schema=self.schema)
+            handle = self._writers.get(partition) or self._open_writer(partition)
+            handle['writer'].write_batch(batch)
+            handle['rows'] += batch.num_rows
+            self.rows_written += batch.num_rows
+            self.row_groups_written += 1
+            if handle['rows'] >= self.max_rows_per_file:
+                self._close_writer(partition)
+        except Exception as e:
+            self.logger.error(f"Error writing arbitrage row group for {partition}: {str(e)}")
+
+    def _close_writers(self):
+        # The next row group of a partition starts a new part file
+        for partition in list(self._writers):
+            self._close_writer(partition)
+
+
+def read_arbitrage_history(base_dir: str = None, columns: Optional[List[str]] = None,
+                           cryptos: Optional[List[str]] = None, start_date: str = None, end_date: str = None):
+    """
+    Load the Parquet arbitrage history as a pandas DataFrame, reading only the requested columns and
+    the date/crypto partitions that match the filters (dates as 'YYYY-MM-DD', inclusive).
+    """
+    import pyarrow.dataset as ds
+
+    path = base_dir or os.path.join(os.path.dirname(__file__), ParquetArbitrageStore.TABLE_NAME)
+    dataset = ds.dataset(path, format='parquet', partitioning='hive')
+    condition = None
+    for expression in (
+        ds.field('crypto').isin(cryptos) if cryptos else None,
+        ds.field('date') >= start_date if start_date else None,
+        ds.field('date') <= end_date if end_date else None,
+    ):
+        if expression is not None:
+            condition = expression if condition is None else condition & expression
+    return dataset.to_table(columns=columns, filter=condition).to_pandas()
+
+
+# Example usage
+if __name__ == "__main__":
+    store = ParquetArbitrageStore(base_dir='/tmp', row_group_size=2)
+    for price in (50000.0, 50010.0, 50020.0):
+        store.append({
+            'crypto': 'BTC', 'buy_exchange': 'COINBASE', 'buy_currency': 'USD',
+            'sell_exchange': 'KRAKEN', 'sell_currency': 'EUR',
+            'COINBASE_USD': price, 'KRAKEN_EUR': 46000.0, 'EUR_RATE_USD': 1.1,
+            'lowest_price': price, 'highest_price': 50600.0,
+            'arbitrage_percentage': (50600.0 - price) / price * 100,
+            'total_fees': 82.06, 'arbitrage_after_fees': 50600.0 - price - 82.06
+        })
+    store.close()
+    print(store.get_stats())
+    print(read_arbitrage_history('/tmp/crypto_arbitrage_3', columns=['timestamp', 'crypto', 'arbitrage_after_fees']))
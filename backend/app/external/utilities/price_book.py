@@ -0,0 +1,229 @@
+'''
+This module contains the PriceBook, the array-backed store behind PriceTracker.crypto_prices.
+Prices and epoch timestamps live in preallocated NumPy arrays indexed by interned
+(crypto, exchange, fiat) ids, so a tick is a couple of scalar writes instead of a new dict,
+and the arbitrage utilities can reduce over one contiguous buffer instead of walking nested dicts.
+The book is also a read-only Mapping with the same shape as PriceDataType, so existing consumers
+and get_latest_prices keep working unchanged.
+'''
+import sys
+import os
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Add the root directory of your project to the sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
+
+from app.types.price_data_types import PriceDataType
+
+
+def to_epoch(timestamp) -> float:
+    """Convert an ISO-8601 string or unix timestamp to epoch seconds (NaN if unparseable)"""
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    try:
+        return datetime.fromisoformat(str(timestamp)).timestamp()
+    except (ValueError, TypeError):
+        try:
+            return float(timestamp)
+        except (ValueError, TypeError):
+            return np.nan
+
+
+class PriceBook(Mapping):
+    """Dense (crypto x exchange x fiat) price and timestamp arrays with interned ids"""
+
+    def __init__(self, crypto_capacity: int = 8, exchange_capacity: int = 8, fiat_capacity: int = 4):
+        self.cryptos: List[str] = []
+        self.exchanges: List[str] = []
+        self.fiats: List[str] = []
+        self.crypto_ids: Dict[str, int] = {}
+        self.exchange_ids: Dict[str, int] = {}
+        self.fiat_ids: Dict[str, int] = {}
+
+        shape = (crypto_capacity, exchange_capacity, fiat_capacity)
+        self.prices = np.full(shape, np.nan, dtype=np.float64)
+        self.timestamps = np.full(shape, np.nan, dtype=np.float64)
+        # Original timestamp strings, kept only for the dict compatibility view
+        self._raw_timestamps = np.empty(shape, dtype=object)
+        self.version = 0
+
+    @classmethod
+    def from_dict(cls, price_data: PriceDataType) -> 'PriceBook':
+        """Build a book from a nested crypto_prices dict"""
+        book = cls()
+        for crypto, exchanges in price_data.items():
+            book.register_crypto(crypto)
+            for exchange, currencies in exchanges.items():
+                for fiat, data in currencies.items():
+                    book.update(crypto, exchange, fiat, data['price'], data['timestamp'])
+        return book
+
+    # Interning
+
+    @staticmethod
+    def _intern(name: str, ids: Dict[str, int], names: List[str]) -> int:
+        index = ids.get(name)
+        if index is None:
+            index = ids[name] = len(names)
+            names.append(name)
+        return index
+
+    def _ensure_capacity(self):
+        needed = (len(self.cryptos), len(self.exchanges), len(self.fiats))
+        current = self.prices.shape
+        if all(n <= c for n, c in zip(needed, current)):
+            return
+        # Double any axis that overflowed so growth stays amortized O(1) per new name
+        shape = tuple(c if n <= c else max(n, c * 2) for n, c in zip(needed, current))
+        region = tuple(slice(0, c) for c in current)
+        for name, fill in (('prices', np.nan), ('timestamps', np.nan), ('_raw_timestamps', None)):
+            old = getattr(self, name)
+            grown = np.full(shape, fill, dtype=old.dtype)
+            grown[region] = old
+            setattr(self, name, grown)
+
+    def register_crypto(self, crypto: str) -> int:
+        """Reserve an id for a crypto before any price arrives (shows up as {} in the dict view)"""
+        index = self._intern(crypto, self.crypto_ids, self.cryptos)
+        self._ensure_capacity()
+        return index
+
+    def intern(self, crypto: str, exchange: str, fiat: str) -> Tuple[int, int, int]:
+        """Return (crypto_id, exchange_id, fiat_id), growing the arrays when a new name shows up"""
+        ids = (
+            self._intern(crypto, self.crypto_ids, self.cryptos),
+            self._intern(exchange, self.exchange_ids, self.exchanges),
+            self._intern(fiat, self.fiat_ids, self.fiats),
+        )
+        self._ensure_capacity()
+        return ids
+
+    # Updates
+
+    def update_ids(self, crypto_id: int, exchange_id: int, fiat_id: int, price: float, timestamp):
+        """Write a price for already interned ids"""
+        self.prices[crypto_id, exchange_id, fiat_id] = price
+        self.timestamps[crypto_id, exchange_id, fiat_id] = to_epoch(timestamp)
+        self._raw_timestamps[crypto_id, exchange_id, fiat_id] = timestamp
+        self.version += 1
+
+    def update(self, crypto: str, exchange: str, fiat: str, price: float, timestamp):
+        """Write a price by name"""
+        crypto_id, exchange_id, fiat_id = self.intern(crypto, exchange, fiat)
+        self.update_ids(crypto_id, exchange_id, fiat_id, price, timestamp)
+
+    def get_price(self, crypto: str, exchange: str, fiat: str) -> Optional[float]:
+        try:
+            price = self.prices[self.crypto_ids[crypto], self.exchange_ids[exchange], self.fiat_ids[fiat]]
+        except KeyError:
+            return None
+        return None if np.isnan(price) else float(price)
+
+    def get_price_ids(self, crypto_id: int, exchange_id: int, fiat_id: int) -> Optional[float]:
+        price = self.prices[crypto_id, exchange_id, fiat_id]
+        return None if np.isnan(price) else float(price)
+
+    def raw_timestamp(self, crypto_id: int, exchange_id: int, fiat_id: int):
+        """Timestamp exactly as it was passed to update (ISO string for live feeds)"""
+        return self._raw_timestamps[crypto_id, exchange_id, fiat_id]
+
+    # Vectorized views
+
+    def shape(self) -> Tuple[int, int, int]:
+        """Number of interned (cryptos, exchanges, fiats)"""
+        return len(self.cryptos), len(self.exchanges), len(self.fiats)
+
+    def price_array(self) -> np.ndarray:
+        """View of the populated region of the price buffer, NaN where no price was seen"""
+        n_crypto, n_exchange, n_fiat = self.shape()
+        return self.prices[:n_crypto, :n_exchange, :n_fiat]
+
+    def timestamp_array(self) -> np.ndarray:
+        n_crypto, n_exchange, n_fiat = self.shape()
+        return self.timestamps[:n_crypto, :n_exchange, :n_fiat]
+
+    def fiat_rates(self, exchange_rates: Dict) -> np.ndarray:
+        """USD rate per interned fiat (USD is 1.0, missing or invalid rates are NaN)"""
+        rates = np.full(len(self.fiats), np.nan, dtype=np.float64)
+        for index, fiat in enumerate(self.fiats):
+            if fiat == 'USD':
+                rates[index] = 1.0
+                continue
+            rate = exchange_rates.get(fiat)
+            if isinstance(rate, dict):
+                rate = rate.get('rate')
+            if isinstance(rate, (int, float)) and rate > 0:
+                rates[index] = rate
+        return rates
+
+    def usd_prices(self, exchange_rates: Dict) -> np.ndarray:
+        """All prices converted to USD in one broadcast multiply"""
+        return self.price_array() * self.fiat_rates(exchange_rates)
+
+    def usd_extremes(self, exchange_rates: Dict):
+        """
+        Lowest and highest USD price of every crypto across all (exchange, fiat) venues.
+        Returns:
+            crypto_ids, lowest (price, exchange_id, fiat_id) arrays and highest (price, exchange_id, fiat_id)
+            arrays, restricted to cryptos that have at least one convertible price
+        """
+        n_crypto, n_exchange, n_fiat = self.shape()
+        if not n_crypto or not n_exchange or not n_fiat:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, (np.empty(0), empty, empty), (np.empty(0), empty, empty)
+
+        flat = self.usd_prices(exchange_rates).reshape(n_crypto, n_exchange * n_fiat)
+        valid = ~np.isnan(flat)
+        low_index = np.where(valid, flat, np.inf).argmin(axis=1)
+        high_index = np.where(valid, flat, -np.inf).argmax(axis=1)
+
+        crypto_ids = np.nonzero(valid.any(axis=1))[0]
+        low_index = low_index[crypto_ids]
+        high_index = high_index[crypto_ids]
+        lowest = (flat[crypto_ids, low_index], low_index // n_fiat, low_index % n_fiat)
+        highest = (flat[crypto_ids, high_index], high_index // n_fiat, high_index % n_fiat)
+        return crypto_ids, lowest, highest
+
+    # Mapping compatibility view (PriceDataType)
+
+    def _crypto_view(self, crypto_id: int) -> Dict[str, Dict[str, Dict]]:
+        view = {}
+        prices = self.prices[crypto_id]
+        exchange_ids, fiat_ids = np.nonzero(~np.isnan(prices[:len(self.exchanges), :len(self.fiats)]))
+        for exchange_id, fiat_id in zip(exchange_ids.tolist(), fiat_ids.tolist()):
+            view.setdefault(self.exchanges[exchange_id], {})[self.fiats[fiat_id]] = {
+                'price': float(prices[exchange_id, fiat_id]),
+                'timestamp': self.raw_timestamp(crypto_id, exchange_id, fiat_id)
+            }
+        return view
+
+    def __getitem__(self, crypto: str) -> Dict[str, Dict[str, Dict]]:
+        return self._crypto_view(self.crypto_ids[crypto])
+
+    def __iter__(self):
+        return iter(list(self.cryptos))
+
+    def __len__(self) -> int:
+        return len(self.cryptos)
+
+    def to_dict(self) -> PriceDataType:
+        """Materialize the nested dict used by get_latest_prices and JSON responses"""
+        return {crypto: self._crypto_view(crypto_id) for crypto, crypto_id in self.crypto_ids.items()}
+
+    def __repr__(self) -> str:
+        return f"PriceBook(version={self.version}, shape={self.shape()}, prices={self.to_dict()})"
+
+
+# Example usage
+if __name__ == "__main__":
+    book = PriceBook()
+    book.update('BTC', 'COINBASE', 'USD', 50000.0, '2023-10-01T00:00:00Z')
+    book.update('BTC', 'BINANCE', 'EUR', 45500.0, '2023-10-01T00:00:00Z')
+    book.update('ETH', 'KRAKEN', 'GBP', 2300.0, '2023-10-01T00:00:00Z')
+
+    print(book.to_dict())
+    print(book.usd_prices({'EUR': {'rate': 1.1}, 'GBP': 1.3}))
@@ -0,0 +1,52 @@
+'''
+This module memoizes values derived from the price book per book version.
+The PriceTracker's version is (price_book.version, rates_version): it changes with every price write and
+every exchange rate update, and every value computed from the book - the arbitrage opportunities, the
+client_data payload, the latest prices dict and its JSON - is computed at most once per version however
+many consumers (emit, CSV, display, REST, socket events) ask for it. The version doubles as an ETag, prefixed
+with a random per-cache epoch since the counters restart at 0 with the process.
+'''
+import threading
+import uuid
+from typing import Any, Callable, Dict, Hashable
+
+
+class SnapshotCache:
+    """Values keyed by name, all dropped when the version reported by version_fn changes"""
+
+    def __init__(self, version_fn: Callable[[], Hashable]):
+        self.version_fn = version_fn
+        self._version = None
+        self._values: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+        # Tells the versions of this process from those of an earlier one in client-held ETags
+        self.epoch = uuid.uuid4().hex[:12]
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """The value of key at the current version, computing it on the first request"""
+        version = self.version_fn()
+        with self._lock:
+            if version != self._version:
+                self._values.clear()
+                self._version = version
+            elif key in self._values:
+                self.hits += 1
+                return self._values[key]
+            self.misses += 1
+        # Computed outside the lock; two threads racing on a miss both compute, the result is the same
+        value = compute()
+        with self._lock:
+            if self._version == version:
+                self._values[key] = value
+        return value
+
+    def etag(self) -> str:
+        """Strong ETag (unquoted) of the current version in this process"""
+        version = self.version_fn()
+        parts = version if isinstance(version, tuple) else (version,)
+        return '-'.join([self.epoch] + [str(part) for part in parts])
+
+    def get_stats(self) -> Dict:
+        return {'version': self._version, 'cached': len(self._values), 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,149 @@
+'''
+This module decides, per price tick, whether the downstream pipeline (arbitrage, CSV, client emit) has to
+run again. The book is always written; the gate only answers "could this tick move the result?":
+    new venue        first price of a (crypto, exchange, fiat): always triggers
+    duplicate        same price as the venue already has: skipped
+    insignificant    relative move since the venue last passed the gate below the symbol's epsilon: skipped
+    inside extremes  the venue is neither the USD lowest nor highest of its crypto and its new USD price stays
+                     strictly between them, so the per-crypto min and max cannot change: skipped
+Anything else triggers. The extremes are those of the arbitrage engine when the crypto last triggered (or
+the exchange rates last changed); until a crypto has a positive spread every significant tick triggers.
+Epsilons are relative (0.0001 = 1 bp) and default to 0, which keeps the gate lossless: only ticks that
+provably leave the opportunities unchanged are skipped. The extremes check only holds for the per-crypto
+extremes mode; in matrix mode every venue pair counts and the gate is created with extremes_check=False.
+'''
+import sys
+import os
+import threading
+from typing import Dict, Optional
+
+# Add the root directory of your project to the sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
+
+from app.config.settings import Config
+from app.external.utilities.cross_exchange_fiat_arbitrage import ArbitrageOpportunity
+
+TRIGGER = 'trigger'
+SKIP = 'skip'
+REASONS = {
+    TRIGGER: ('new_venue', 'extremes'),
+    SKIP: ('duplicate', 'insignificant', 'inside_extremes'),
+}
+
+
+def parse_epsilons(text: str) -> Dict[str, float]:
+    """'BTC=0.00005,ETH/EUR=0.0001' -> {'BTC': 5e-05, 'ETH/EUR': 0.0001}"""
+    epsilons = {}
+    for item in (text or '').split(','):
+        if not item.strip():
+            continue
+        symbol, _, epsilon = item.partition('=')
+        epsilons[symbol.strip().upper()] = float(epsilon)
+    return epsilons
+
+
+class UpdateGate:
+    """Per-tick change-threshold and extremes checks in front of the recomputation pipeline"""
+
+    def __init__(self, exchange_rates: Dict, epsilon: float = 0.0, epsilons: Optional[Dict[str, float]] = None,
+                 extremes_check: bool = True, enabled: bool = True):
+        # The PriceTracker's exchange_rates dict, shared so FX updates are seen without a copy
+        self.exchange_rates = exchange_rates
+        self.epsilon = epsilon
+        self.epsilons = epsilons or {}
+        self.extremes_check = extremes_check
+        self.enabled = enabled
+        self._passed: Dict[tuple, float] = {}  # (crypto, exchange, fiat) -> price when it last passed the gate
+        self._extremes: Dict[str, Optional[ArbitrageOpportunity]] = {}  # crypto -> opportunity at its last trigger
+        self._counts = {(decision, reason): 0 for decision, reasons in REASONS.items() for reason in reasons}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, exchange_rates: Dict):
+        return cls(
+            exchange_rates,
+            epsilon=Config.UPDATE_GATE_EPSILON,
+            epsilons=parse_epsilons(Config.UPDATE_GATE_EPSILONS),
+            extremes_check=Config.ARBITRAGE_MODE == 'extremes',
+            enabled=Config.UPDATE_GATE
+        )
+
+    def epsilon_for(self, crypto: str, fiat: str) -> float:
+        """Epsilon of 'CRYPTO/FIAT', else of 'CRYPTO', else the default"""
+        epsilon = self.epsilons.get(f"{crypto}/{fiat}")
+        if epsilon is None:
+            epsilon = self.epsilons.get(crypto, self.epsilon)
+        return epsilon
+
+    def _rate(self, fiat: str) -> Optional[float]:
+        rate_data = self.exchange_rates.get(fiat)
+        rate = rate_data.get('rate') if isinstance(rate_data, dict) else rate_data
+        return rate if isinstance(rate, (int, float)) and rate > 0 else None
+
+    def _decide(self, crypto: str, exchange: str, fiat: str, price: float, previous: Optional[float]):
+        if previous is None:
+            return TRIGGER, 'new_venue'
+        if price == previous:
+            return SKIP, 'duplicate'
+        passed = self._passed.get((crypto, exchange, fiat), previous)
+        epsilon = self.epsilon_for(crypto, fiat)
+        if epsilon and passed and abs(price - passed) < epsilon * abs(passed):
+            return SKIP, 'insignificant'
+        if self.extremes_check:
+            extremes = self._extremes.get(crypto)
+            rate = self._rate(fiat)
+            if extremes is not None and rate is not None:
+                venue = (crypto, exchange, fiat)
+                usd = price * rate
+                if (venue != extremes['lowest_price_exchange'] and venue != extremes['highest_price_exchange']
+                        and extremes['lowest_price'] < usd < extremes['highest_price']):
+                    return SKIP, 'inside_extremes'
+        return TRIGGER, 'extremes'
+
+    def check(self, crypto: str, exchange: str, fiat: str, price: float, previous: Optional[float]) -> bool:
+        """
+        Whether a tick can change the downstream result. Call it with the venue's price before the write
+        (None for a new venue); a True answer should be followed by commit() once the pipeline has run.
+        """
+        if not self.enabled:
+            return True
+        decision, reason = self._decide(crypto, exchange, fiat, price, previous)
+        with self._lock:
+            self._counts[(decision, reason)] += 1
+        if decision == TRIGGER:
+            self._passed[(crypto, exchange, fiat)] = price
+            return True
+        return False
+
+    def commit(self, crypto: str, opportunity: Optional[ArbitrageOpportunity]):
+        """Record the arbitrage engine's opportunity for a crypto after a triggered recomputation"""
+        self._extremes[crypto] = opportunity
+
+    def reset_extremes(self):
+        """Forget the recorded extremes (exchange rates changed): the next significant tick of each crypto triggers"""
+        self._extremes.clear()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            counts = dict(self._counts)
+        triggered = sum(count for (decision, _), count in counts.items() if decision == TRIGGER)
+        skipped = sum(count for (decision, _), count in counts.items() if decision == SKIP)
+        total = triggered + skipped
+        return {
+            'enabled': self.enabled,
+            'ticks': total,
+            'triggered': triggered,
+            'skipped': skipped,
+            'skip_ratio': skipped / total if total else 0.0,
+            'reasons': {f"{decision}:{reason}": count for (decision, reason), count in counts.items()}
+        }
+
+    def metric_families(self):
+        """Trigger and skip counters for the /api/metrics endpoint"""
+        with self._lock:
+            counts = dict(self._counts)
+        return [
+            ('arbitrage_update_gate_ticks_total', 'counter',
+             'Price ticks seen by the update gate, by decision and reason.',
+             [({'decision': decision, 'reason': reason}, count) for (decision, reason), count in counts.items()]),
+        ]
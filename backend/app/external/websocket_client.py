@@ -3,14 +3,24 @@ import asyncio
 import logging
 import json
 import threading
+import time
+from app.config.settings import Config
 from app.socketio_instance import socketio
 from app.external.strategies.coinapi_strategy import CoinAPIStrategy
 from app.price_tracker_instance import price_tracker
 from app.external.strategies.exchange_api_strategy import ExchangeAPIStrategy
+from app.external.tick_conflator import TickConflator
+from app.external.ingest_queue import IngestQueue
+from app.external.frame_log import FrameRecorder
+from app.metrics import metrics
+from concurrent.futures import ThreadPoolExecutor
 # Add more strategy imports as needed
 
 logger = logging.getLogger(__name__)
 
+# Queued message whose tick has not been parsed yet
+_UNPARSED = object()
+
 class WebSocketClient:
     def __init__(self):
         self.strategies = {
@@ -18,43 +28,139 @@ class WebSocketClient:
             'xchangeapi': ExchangeAPIStrategy(price_tracker)
             # Add more strategies here
         }
+        self.conflators = {name: TickConflator() for name in self.strategies}
+        self.queues = {}
+        # One worker so price and rate batches from all strategies are applied in order, never concurrently
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='tick-apply')
         self.running = False
         self.broadcast_callback = None
         self.thread = None
         self.loop = None
+        self.recorder = None  # FrameRecorder when RECORD_FRAMES_PATH is set
 
     async def connect_with_strategy(self, strategy_name):
+        """Socket reader: receive messages and queue them for _consume, never processing inline"""
         strategy = self.strategies.get(strategy_name)
         if not strategy:
             logger.error(f"Unknown strategy: {strategy_name}")
             return
 
+        queue = self.queues[strategy_name] = IngestQueue(Config.INGEST_QUEUE_SIZE, Config.INGEST_OVERFLOW_POLICY)
+        consumer = asyncio.ensure_future(self._consume(strategy_name, strategy, queue))
+
         params = strategy.get_connection_params()
-        while self.running:  # Keep trying to reconnect while running
+        try:
+            while self.running:  # Keep trying to reconnect while running
+                try:
+                    async with websockets.connect(params['uri']) as websocket:
+                        auth_message = strategy.format_auth_message()
+                        await websocket.send(json.dumps(auth_message))
+                        logger.info(f"Successfully connected to {strategy_name}")
+
+                        while self.running:
+                            try:
+                                message = await websocket.recv()
+                                received_at = time.perf_counter()
+                                metrics.count_message(strategy_name)
+                                if self.recorder:
+                                    self.recorder.record(strategy_name, message)
+                                if queue.policy == 'conflate':
+                                    # The conflate policy needs the tick key up front
+                                    tick = self._parse_tick(strategy_name, strategy, message)
+                                    await queue.put((message, tick, received_at), tick.key if tick else None)
+                                else:
+                                    await queue.put((message, _UNPARSED, received_at))
+                            except websockets.exceptions.ConnectionClosed:
+                                logger.warning(f"Connection closed for {strategy_name}, attempting to reconnect...")
+                                break
+                            except Exception as e:
+                                logger.error(f"Error receiving message for {strategy_name}: {e}")
+                                continue
+
+                except Exception as e:
+                    logger.error(f"WebSocket connection error for {strategy_name}: {e}")
+                    if self.running:
+                        logger.info(f"Retrying connection for {strategy_name} in 5 seconds...")
+                        await asyncio.sleep(5)  # Wait before retrying
+        finally:
+            consumer.cancel()
+
+    @staticmethod
+    def _parse_tick(strategy_name, strategy, message):
+        try:
+            return strategy.parse_tick(message)
+        except Exception as e:
+            logger.error(f"Error parsing message for {strategy_name}: {e}")
+            return {}
+
+    async def _consume(self, strategy_name, strategy, queue):
+        """Processing task: take everything queued so far and process it as one batch"""
+        while self.running:
+            items = await queue.get_batch(Config.TICK_CONFLATION_MAX_BATCH)
             try:
-                async with websockets.connect(params['uri']) as websocket:
-                    auth_message = strategy.format_auth_message()
-                    await websocket.send(json.dumps(auth_message))
-                    logger.info(f"Successfully connected to {strategy_name}")
-
-                    while self.running:
-                        try:
-                            message = await websocket.recv()
-                            processed_data = await strategy.process_message(message)
-                            if processed_data and self.broadcast_callback:
-                                self.broadcast_callback(f'{strategy_name}_update', processed_data)
-                        except websockets.exceptions.ConnectionClosed:
-                            logger.warning(f"Connection closed for {strategy_name}, attempting to reconnect...")
-                            break
-                        except Exception as e:
-                            logger.error(f"Error processing message for {strategy_name}: {e}")
-                            continue
+                await self._process_batch(strategy_name, strategy, items)
+            except Exception as e:
+                logger.error(f"Error processing messages for {strategy_name}: {e}")
 
+    async def _process_batch(self, strategy_name, strategy, items):
+        """Conflate the ticks in items to the latest per key and apply them as one batch"""
+        conflator = self.conflators[strategy_name]
+        for message, tick, received_at in items:
+            # Time spent between websocket.recv() returning and processing starting
+            metrics.observe('receive', time.perf_counter() - received_at)
+            try:
+                if tick is _UNPARSED:
+                    tick = self._parse_tick(strategy_name, strategy, message) if Config.TICK_CONFLATION else None
+                if tick is None:
+                    # Not a tick (auth, errors, heartbeats...), or conflation is off: process it on its own
+                    processed_data = await strategy.process_message(message)
+                    if processed_data and self.broadcast_callback:
+                        self.broadcast_callback(f'{strategy_name}_update', processed_data)
+                elif tick:
+                    conflator.add(tick)
             except Exception as e:
-                logger.error(f"WebSocket connection error for {strategy_name}: {e}")
-                if self.running:
-                    logger.info(f"Retrying connection for {strategy_name} in 5 seconds...")
-                    await asyncio.sleep(5)  # Wait before retrying
+                logger.error(f"Error processing message for {strategy_name}: {e}")
+
+        ticks = conflator.drain()
+        if not ticks:
+            return
+        logger.debug(f"{strategy_name}: applying {len(ticks)} ticks from {len(items)} messages "
+                     f"({conflator.ticks_merged} merged so far)")
+        # The update, display, CSV and emit cycle runs on the apply thread so the reader keeps reading
+        processed_data = await asyncio.get_running_loop().run_in_executor(self.executor, strategy.apply_ticks, ticks)
+        if processed_data and self.broadcast_callback:
+            self.broadcast_callback(f'{strategy_name}_update', processed_data)
+
+    async def process_messages(self, strategy_name, messages):
+        """Process messages received outside connect_with_strategy (e.g. replayed frames) as one batch"""
+        received_at = time.perf_counter()
+        await self._process_batch(strategy_name, self.strategies[strategy_name],
+                                  [(message, _UNPARSED, received_at) for message in messages])
+
+    def get_conflation_stats(self):
+        """Per strategy counters of received, merged and applied ticks"""
+        return {name: conflator.get_stats() for name, conflator in self.conflators.items()}
+
+    def get_queue_stats(self):
+        """Per strategy ingest queue depth and drop/conflate/block counters"""
+        return {name: queue.get_stats() for name, queue in self.queues.items()}
+
+    def _metric_families(self):
+        """Ingest queue and conflation counters for the /api/metrics endpoint"""
+        queues = self.get_queue_stats()
+        conflation = self.get_conflation_stats()
+        return [
+            ('arbitrage_ingest_queue_depth', 'gauge', 'Messages waiting in the ingest queue.',
+             [({'strategy': name}, stats['depth']) for name, stats in queues.items()]),
+            ('arbitrage_ingest_dropped_total', 'counter', 'Messages dropped by the drop_oldest policy.',
+             [({'strategy': name}, stats['dropped']) for name, stats in queues.items()]),
+            ('arbitrage_ingest_conflated_total', 'counter', 'Queued messages replaced by the conflate policy.',
+             [({'strategy': name}, stats['conflated']) for name, stats in queues.items()]),
+            ('arbitrage_ticks_merged_total', 'counter', 'Ticks merged away by batch conflation.',
+             [({'strategy': name}, stats['ticks_merged']) for name, stats in conflation.items()]),
+            ('arbitrage_ticks_applied_total', 'counter', 'Ticks applied to the price book.',
+             [({'strategy': name}, stats['ticks_applied']) for name, stats in conflation.items()]),
+        ]
 
     def run_websocket_loop(self):
         """Run the websocket event loop in a separate thread"""
@@ -80,6 +186,11 @@ class WebSocketClient:
 
         self.running = True
         self.broadcast_callback = broadcast_fn
+        if self._metric_families not in metrics.collectors:
+            metrics.register_collector(self._metric_families)
+        if Config.RECORD_FRAMES_PATH and self.recorder is None:
+            self.recorder = FrameRecorder(Config.RECORD_FRAMES_PATH)
+            logger.info(f"Recording raw frames to {Config.RECORD_FRAMES_PATH}")
         
         # Start websocket loop in a separate thread
         self.thread = threading.Thread(target=self.run_websocket_loop)
@@ -97,6 +208,9 @@ class WebSocketClient:
         
         if self.thread and self.thread.is_alive():
             self.thread.join(timeout=5)  # Wait up to 5 seconds for clean shutdown
+
+        if self.recorder:
+            self.recorder.flush()
         
         logger.info("WebSocket client stopped")
 
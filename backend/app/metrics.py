@@ -0,0 +1,186 @@
+# backend/app/metrics.py
+'''
+Low-overhead hot-path instrumentation rendered in the Prometheus text format on /api/metrics.
+Every pipeline stage between an exchange's time_exchange and the client_data emit records its duration
+into a fixed-bucket histogram (a bisect and two additions per observation, no locks, no allocation):
+    receive     time a message waited between websocket.recv() and processing
+    decode      JSON decode of a raw message
+    parse       processor parse into a Tick
+    update      PriceBook / arbitrage engine writes (update_price / update_prices)
+    arbitrage   DataCollector arbitrage computation
+    fees        fee calculation
+    cycles      multi-leg cycle search (CycleArbitrageEngine)
+    csv         CSVTracker write
+    emit        Socket.IO client_data emit
+plus per-strategy message counters and an exchange-to-server lag histogram.
+'''
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+from app.config.settings import Config
+
+STAGES = ('receive', 'decode', 'parse', 'update', 'arbitrage', 'fees', 'cycles', 'csv', 'emit')
+
+# 1us .. ~8s doubling buckets for stage durations, 1ms .. ~65s for exchange lag
+LATENCY_BUCKETS = [1e-6 * 2 ** i for i in range(24)]
+LAG_BUCKETS = [1e-3 * 2 ** i for i in range(17)]
+
+
+class Histogram:
+    """Fixed upper-bound buckets; observations above the last bound land in +Inf"""
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds: List[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (None without observations)"""
+        if not self.count:
+            return None
+        target = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.bounds + [float('inf')], self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return float('inf')
+
+
+class _StageTimer:
+    __slots__ = ('registry', 'stage', 'start')
+
+    def __init__(self, registry: 'MetricsRegistry', stage: str):
+        self.registry = registry
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    """Stage latency histograms, per-strategy message counters and exchange lag"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.started = time.time()
+        self.stages: Dict[str, Histogram] = {stage: Histogram(LATENCY_BUCKETS) for stage in STAGES}
+        self.lag: Dict[str, Histogram] = {}
+        self.messages: Dict[str, int] = {}
+        self.collectors = []  # callables returning extra (name, type, help, [(labels, value)]) families
+
+    def observe(self, stage: str, seconds: float):
+        if self.enabled:
+            self.stages[stage].observe(seconds)
+
+    def time(self, stage: str):
+        """Context manager recording the duration of the block into stage"""
+        return _StageTimer(self, stage) if self.enabled else _NULL_TIMER
+
+    def count_message(self, strategy: str):
+        if self.enabled:
+            self.messages[strategy] = self.messages.get(strategy, 0) + 1
+
+    def observe_lag(self, strategy: str, exchange_epoch: float):
+        """Record server receive time minus the exchange timestamp (epoch seconds)"""
+        if not self.enabled or exchange_epoch != exchange_epoch:  # NaN: unparseable timestamp
+            return
+        histogram = self.lag.get(strategy)
+        if histogram is None:
+            histogram = self.lag[strategy] = Histogram(LAG_BUCKETS)
+        histogram.observe(time.time() - exchange_epoch)
+
+    def register_collector(self, collector):
+        self.collectors.append(collector)
+
+    def summary(self) -> Dict:
+        """p50/p99 bucket bounds per stage, for logs and JSON consumers"""
+        return {
+            stage: {'count': h.count, 'p50': h.quantile(0.5), 'p99': h.quantile(0.99)}
+            for stage, h in self.stages.items()
+        }
+
+    @staticmethod
+    def _format_labels(labels: Dict[str, str]) -> str:
+        if not labels:
+            return ''
+        return '{' + ','.join(f'{key}="{value}"' for key, value in labels.items()) + '}'
+
+    def _render_histogram(self, lines: List[str], name: str, labels: Dict[str, str], histogram: Histogram):
+        cumulative = 0
+        for bound, count in zip(histogram.bounds, histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{self._format_labels({**labels, "le": f"{bound:.6g}"})} {cumulative}')
+        lines.append(f'{name}_bucket{self._format_labels({**labels, "le": "+Inf"})} {histogram.count}')
+        lines.append(f'{name}_sum{self._format_labels(labels)} {histogram.sum:.9g}')
+        lines.append(f'{name}_count{self._format_labels(labels)} {histogram.count}')
+
+    def render_prometheus(self) -> str:
+        lines = [
+            '# HELP arbitrage_stage_latency_seconds Duration of each hot-path stage.',
+            '# TYPE arbitrage_stage_latency_seconds histogram',
+        ]
+        for stage, histogram in self.stages.items():
+            self._render_histogram(lines, 'arbitrage_stage_latency_seconds', {'stage': stage}, histogram)
+
+        lines += [
+            '# HELP arbitrage_exchange_lag_seconds Server receive time minus exchange timestamp.',
+            '# TYPE arbitrage_exchange_lag_seconds histogram',
+        ]
+        for strategy, histogram in self.lag.items():
+            self._render_histogram(lines, 'arbitrage_exchange_lag_seconds', {'strategy': strategy}, histogram)
+
+        lines += [
+            '# HELP arbitrage_messages_total Raw messages received per strategy.',
+            '# TYPE arbitrage_messages_total counter',
+        ]
+        for strategy, count in self.messages.items():
+            lines.append(f'arbitrage_messages_total{self._format_labels({"strategy": strategy})} {count}')
+
+        lines += [
+            '# HELP arbitrage_uptime_seconds Seconds since the metrics registry was created.',
+            '# TYPE arbitrage_uptime_seconds gauge',
+            f'arbitrage_uptime_seconds {time.time() - self.started:.3f}',
+        ]
+
+        for collector in self.collectors:
+            try:
+                families = collector()
+            except Exception:
+                continue
+            for name, metric_type, help_text, samples in families:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {metric_type}')
+                for labels, value in samples:
+                    lines.append(f'{name}{self._format_labels(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+# Global instance
+metrics = MetricsRegistry(enabled=Config.METRICS_ENABLED)
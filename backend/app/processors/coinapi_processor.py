@@ -1,33 +1,16 @@
 # backend/app/processors/coinapi_processor.py
 import logging
 from .base_processor import DataProcessor  # Import the DataProcessor base class
+from .symbol_table import SymbolTable
+from app.types.tick import Tick, BookTick
+from app.external.utilities.order_book import BOOK_DATA_TYPES
 
 class CoinAPIProcessor(DataProcessor):  # Inherit from DataProcessor
-    def __init__(self, price_tracker):
+    def __init__(self, price_tracker, symbol_table: SymbolTable = None):
         self.logger = logging.getLogger(__name__)
         self.price_tracker = price_tracker  # Store the instance of PriceTracker
-
-    def parse_crypto(self, symbol: str) -> str:
-        supported_cryptos = ['BTC', 'ETH']
-        for crypto in supported_cryptos:
-            if crypto in symbol:
-                return crypto
-        return None
-
-    def parse_exchange(self, symbol: str) -> str:
-        exchange = symbol.split('_')[0]
-        return 'BINANCE' if 'BINANCE' in exchange else exchange
-
-    def parse_fiat(self, symbol: str) -> str:
-        # print(f"Symbol: {symbol}")
-        if symbol.endswith('_USD') or symbol.endswith('_USDT'):
-            return 'USD'
-        elif symbol.endswith('_EUR'):
-            return 'EUR'
-        elif symbol.endswith('_GBP'):
-            return 'GBP'
-        print(f"Unsupported fiat currency for symbol: {symbol}")
-        return None
+        # symbol_id -> (crypto, exchange, fiat, PriceBook ids), learns unknown symbols on first sight
+        self.symbol_table = symbol_table if symbol_table is not None else SymbolTable()
 
     def parse_price(self, data: dict) -> float:
         return data.get('price')
@@ -35,7 +18,7 @@ class CoinAPIProcessor(DataProcessor):  # Inherit from DataProcessor
     def parse_timestamp(self, data: dict) -> str:
         return data.get('time_exchange')
 
-    def parse_message(self, data: dict) -> dict:
+    def parse_message(self, data: dict) -> Tick:
         if not data or 'price' not in data:
             return None
 
@@ -43,13 +26,30 @@ class CoinAPIProcessor(DataProcessor):  # Inherit from DataProcessor
         if not symbol:
             return None
 
-        return {
-            'crypto': self.parse_crypto(symbol),
-            'exchange': self.parse_exchange(symbol),
-            'fiat': self.parse_fiat(symbol),
-            'price': self.parse_price(data),
-            'timestamp': self.parse_timestamp(data)
-        }
+        # Unsupported symbols are logged once, when the symbol table first sees them
+        entry = self.symbol_table.lookup(symbol)
+        if entry is None:
+            return None
+
+        return Tick(entry.crypto, entry.exchange, entry.fiat, data['price'], data.get('time_exchange'),
+                    entry.key, entry.ids)
+
+    def parse_book(self, data: dict) -> BookTick:
+        """book (snapshot or update), book5/book20/book50 (top-N snapshot) or quote (best bid/ask) message"""
+        entry = self.symbol_table.lookup(data.get('symbol_id') or '')
+        if entry is None:
+            return None
+
+        if data.get('type') == 'quote':
+            bids = [(data['bid_price'], data['bid_size'])] if data.get('bid_price') else []
+            asks = [(data['ask_price'], data['ask_size'])] if data.get('ask_price') else []
+            snapshot = True
+        else:
+            bids = [(level['price'], level['size']) for level in data.get('bids') or ()]
+            asks = [(level['price'], level['size']) for level in data.get('asks') or ()]
+            # Only the full 'book' stream sends incremental updates after its first snapshot
+            snapshot = data.get('type') != 'book' or bool(data.get('is_snapshot'))
+        return BookTick(entry.crypto, entry.exchange, entry.fiat, bids, asks, data.get('time_exchange'), snapshot)
 
     def process_message(self, data: dict) -> dict:
         try:
@@ -57,16 +57,22 @@ class CoinAPIProcessor(DataProcessor):  # Inherit from DataProcessor
                 self.logger.error(f"CoinAPI error: {data}")
                 return {'error': data}
 
-            parsed_data = self.parse_message(data)
-            if not parsed_data or not parsed_data['crypto'] or not parsed_data['fiat']:
+            if data.get('type') in BOOK_DATA_TYPES:
+                tick = self.parse_book(data)
+                if tick:
+                    self.price_tracker.update_books([tick])
+                return None
+
+            tick = self.parse_message(data)
+            if not tick:
                 return None
 
             self.price_tracker.update_price(
-            crypto=parsed_data['crypto'],
-            exchange=parsed_data['exchange'],
-            price=parsed_data['price'],
-            timestamp=parsed_data['timestamp'],
-            fiat=parsed_data['fiat']
+            crypto=tick.crypto,
+            exchange=tick.exchange,
+            price=tick.price,
+            timestamp=tick.timestamp,
+            fiat=tick.fiat
         )
 
             return {'prices': self.price_tracker.get_latest_prices()}
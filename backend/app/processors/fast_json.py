@@ -0,0 +1,16 @@
+# backend/app/processors/fast_json.py
+# Message decoding with orjson when it is installed, the standard library otherwise
+import json
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def loads(message):
+    """Decode a JSON websocket message (str or bytes)"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(message)
+    return json.loads(message)
@@ -0,0 +1,65 @@
+# backend/app/processors/symbol_table.py
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+
+# CoinAPI quotes Binance in USDT; it is tracked as USD like before
+FIAT_SUFFIXES = {'USD': 'USD', 'USDT': 'USD', 'EUR': 'EUR', 'GBP': 'GBP'}
+SUPPORTED_CRYPTOS = ('BTC', 'ETH')
+
+logger = logging.getLogger(__name__)
+
+
+class SymbolEntry:
+    """Parsed form of one CoinAPI symbol_id, shared by every tick of that symbol"""
+    __slots__ = ('crypto', 'exchange', 'fiat', 'key', 'ids')
+
+    def __init__(self, crypto: str, exchange: str, fiat: str, ids: Optional[Tuple[int, int, int]] = None):
+        self.crypto = crypto
+        self.exchange = exchange
+        self.fiat = fiat
+        self.key = (crypto, exchange, fiat)
+        self.ids = ids
+
+
+class SymbolTable:
+    """Precomputed symbol_id -> (crypto, exchange, fiat) and PriceBook ids.
+
+    Built from the subscription list, so the hot path is a single dict lookup instead of
+    substring scans and splits per message. Symbols outside the list are parsed once with
+    the same rules and cached; unsupported symbols are cached as None.
+    """
+
+    def __init__(self, symbols: Iterable[str] = (), price_book=None):
+        self.price_book = price_book
+        self._entries: Dict[str, Optional[SymbolEntry]] = {}
+        for symbol in symbols:
+            self.lookup(symbol)
+
+    @staticmethod
+    def parse(symbol: str) -> Optional[Tuple[str, str, str]]:
+        """Split e.g. 'BINANCE_SPOT_BTC_USDT' into ('BTC', 'BINANCE', 'USD'), None if unsupported"""
+        parts = symbol.split('_')
+        crypto = next((c for c in SUPPORTED_CRYPTOS if c in symbol), None)
+        fiat = FIAT_SUFFIXES.get(parts[-1])
+        if crypto is None or fiat is None:
+            return None
+        exchange = 'BINANCE' if 'BINANCE' in parts[0] else parts[0]
+        return crypto, exchange, fiat
+
+    def lookup(self, symbol: str) -> Optional[SymbolEntry]:
+        try:
+            return self._entries[symbol]
+        except KeyError:
+            pass
+        parsed = self.parse(symbol)
+        entry = None
+        if parsed is not None:
+            ids = self.price_book.intern(*parsed) if self.price_book is not None else None
+            entry = SymbolEntry(*parsed, ids=ids)
+        else:
+            logger.debug(f"Unsupported symbol: {symbol}")
+        self._entries[symbol] = entry
+        return entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
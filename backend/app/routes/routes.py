@@ -1,27 +1,44 @@
 # backend/app/routes/routes.py
-from flask import Blueprint, jsonify
+from flask import Blueprint, Response, jsonify, request
 from app.price_tracker_instance import price_tracker
 from datetime import datetime
 from flask_socketio import emit
 from app.socketio_instance import socketio
+from app.metrics import metrics
 
 main_bp = Blueprint('main', __name__)
 
 @main_bp.route('/api/latest-prices', methods=['GET'])
 def get_latest_prices():
-    latest_data = price_tracker.get_latest_prices()  # Fetch latest prices
-    response = {
-        "status": "success",
-        "crypto_prices": latest_data['crypto'],
-        "exchange_rates": latest_data['exchange_rates'],
-        "timestamp": datetime.now().isoformat()
-    }
-    return jsonify(response)
+    # Serialized once per book version; the version is the ETag, so unchanged books cost a 304
+    etag, body = price_tracker.get_latest_prices_json()
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+@main_bp.route('/api/cycle-arbitrage', methods=['GET'])
+def get_cycle_arbitrage():
+    # Multi-leg arbitrage cycles, searched once per book version
+    return jsonify({**price_tracker.get_cycles(), 'timestamp': datetime.now().isoformat()})
+
+@main_bp.route('/api/order-book/<crypto>/<exchange>/<fiat>', methods=['GET'])
+def get_order_book(crypto, exchange, fiat):
+    # L2 depth of one venue, best levels first, ?depth=N to truncate
+    book = price_tracker.get_order_book(crypto, exchange, fiat, request.args.get('depth', type=int))
+    if book is None:
+        return jsonify({'status': 'error', 'message': f'No order book for {crypto}/{exchange}/{fiat}'}), 404
+    return jsonify({'status': 'success', **book, 'timestamp': datetime.now().isoformat()})
 
 @main_bp.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({'status': 'healthy'})
 
+@main_bp.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    # Prometheus text exposition format
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
 
 # WebSocket event to send data to the client
 @main_bp.route('/socketio/connect')
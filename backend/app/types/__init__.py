@@ -1,3 +1,4 @@
 from .price_data_types import PriceData, ExchangeData, CryptoData, PriceDataType
+from .tick import Tick, RateTick, BookTick
 
-__all__ = ['PriceData', 'ExchangeData', 'CryptoData', 'PriceDataType']
\ No newline at end of file
+__all__ = ['PriceData', 'ExchangeData', 'CryptoData', 'PriceDataType', 'Tick', 'RateTick', 'BookTick']
\ No newline at end of file
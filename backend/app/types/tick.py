@@ -0,0 +1,69 @@
+import itertools
+from typing import Hashable, List, Optional, Tuple
+
+# Incremental book updates must all be applied, so each gets a key no other tick shares
+_book_update_ids = itertools.count()
+
+
+class Tick:
+    """A single trade price, as passed from the CoinAPI processor to the PriceTracker.
+
+    __slots__ keeps one tick to a handful of pointers (no per-instance dict). The name
+    fields point at the strings held by the SymbolTable, so parsing allocates nothing else.
+    ids are the PriceBook (crypto_id, exchange_id, fiat_id) when known, letting the
+    tracker write the price without any name lookups.
+    """
+    __slots__ = ('crypto', 'exchange', 'fiat', 'price', 'timestamp', 'key', 'ids')
+
+    def __init__(self, crypto: str, exchange: str, fiat: str, price: float, timestamp: str,
+                 key: Optional[Hashable] = None, ids: Optional[Tuple[int, int, int]] = None):
+        self.crypto = crypto
+        self.exchange = exchange
+        self.fiat = fiat
+        self.price = price
+        self.timestamp = timestamp
+        self.key = key if key is not None else (crypto, exchange, fiat)
+        self.ids = ids
+
+    def __repr__(self) -> str:
+        return f"Tick({self.crypto}, {self.exchange}, {self.fiat}, {self.price}, {self.timestamp})"
+
+
+class RateTick:
+    """A single forex rate against USD (e.g. pair 'EUR'), conflated per ('FX', pair)"""
+    __slots__ = ('pair', 'rate', 'timestamp', 'key')
+
+    def __init__(self, pair: str, rate: float, timestamp=None):
+        self.pair = pair
+        self.rate = rate
+        self.timestamp = timestamp
+        self.key = ('FX', pair)
+
+    def __repr__(self) -> str:
+        return f"RateTick({self.pair}, {self.rate}, {self.timestamp})"
+
+
+class BookTick:
+    """An L2 book message for one venue: a snapshot that replaces its book, or an update of some levels.
+
+    bids and asks are (price, size) lists, size 0 removes a level. Snapshots (and quotes, a one level
+    snapshot) are conflated per ('BOOK', crypto, exchange, fiat) since the latest replaces the rest;
+    updates get a key of their own so none is merged away and they keep their arrival order.
+    """
+    __slots__ = ('crypto', 'exchange', 'fiat', 'bids', 'asks', 'timestamp', 'snapshot', 'key')
+
+    def __init__(self, crypto: str, exchange: str, fiat: str, bids: List[Tuple[float, float]],
+                 asks: List[Tuple[float, float]], timestamp: str, snapshot: bool):
+        self.crypto = crypto
+        self.exchange = exchange
+        self.fiat = fiat
+        self.bids = bids
+        self.asks = asks
+        self.timestamp = timestamp
+        self.snapshot = snapshot
+        self.key = ('BOOK', crypto, exchange, fiat) if snapshot else ('BOOK', next(_book_update_ids))
+
+    def __repr__(self) -> str:
+        kind = 'snapshot' if self.snapshot else 'update'
+        return (f"BookTick({self.crypto}, {self.exchange}, {self.fiat}, {kind}, "
+                f"{len(self.bids)} bids, {len(self.asks)} asks, {self.timestamp})")
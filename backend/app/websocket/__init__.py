@@ -8,4 +8,13 @@ def init_websocket(socketio):
     ws_manager = WebSocketManager(socketio)
     
     from . import events
-    events.init_events(socketio)
\ No newline at end of file
+    events.init_events(socketio)
+
+def init_subscriptions(socketio):
+    """Subscription handlers only, for servers that handle connect and disconnect themselves (run.py)"""
+    global ws_manager
+    ws_manager = WebSocketManager(socketio)
+
+    from . import events
+    events.init_subscription_events(socketio)
+    return ws_manager
\ No newline at end of file
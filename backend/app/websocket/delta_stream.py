@@ -0,0 +1,92 @@
+'''
+This module turns the client_data payloads of one room into a versioned delta stream.
+Every opportunity is identified by its trade, crypto:buy_exchange:buy_currency>sell_exchange:sell_currency,
+and each update is diffed against the previous one into added, changed and removed opportunities under a
+sequence number that grows by one per delta. Nothing is sent when nothing changed. A client that sees a gap
+in the sequence (or just connected) asks for a snapshot, the full current state at the current sequence.
+    arbitrage_delta      {'stream', 'seq', 'status', 'message', 'added', 'changed', 'removed', 'timestamp'}
+    arbitrage_snapshot   {'streams': {stream: {'seq', 'status', 'message', 'opportunities'}}, 'timestamp'}
+    arbitrage_heartbeat  {'stream', 'seq', 'timestamp'}, sent when nothing changed for a while so clients
+                         can tell a stable book from a dead connection
+'''
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+def opportunity_id(opportunity: Dict) -> str:
+    return (f"{opportunity['crypto']}:{opportunity['lowest_price_exchange']}:{opportunity['buy_currency']}>"
+            f"{opportunity['highest_price_exchange']}:{opportunity['sell_currency']}")
+
+
+class DeltaStream:
+    """Latest opportunities of one stream (room) and the sequence number of the last delta"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.seq = 0
+        self.status = 'waiting'
+        self.message = 'Waiting for valid exchange rates...'
+        self.opportunities: Dict[str, Dict] = {}  # id -> opportunity, in the order last received
+        self.last_sent = 0.0  # monotonic time of the last delta or heartbeat
+
+    def update(self, data: Dict, timestamp: str = None) -> Optional[Dict]:
+        """Apply a client_data payload, returning the delta to send or None when nothing changed"""
+        status = data.get('status')
+        message = data.get('message')
+        opportunities = {}
+        for opportunity in data.get('opportunities') or []:
+            opportunity = {**opportunity, 'id': opportunity_id(opportunity)}
+            opportunities[opportunity['id']] = opportunity
+
+        previous = self.opportunities
+        added: List[Dict] = []
+        changed: List[Dict] = []
+        for key, opportunity in opportunities.items():
+            before = previous.get(key)
+            if before is None:
+                added.append(opportunity)
+            elif before != opportunity:
+                changed.append(opportunity)
+        removed = [key for key in previous if key not in opportunities]
+
+        if not added and not changed and not removed and status == self.status and message == self.message:
+            return None
+
+        self.seq += 1
+        self.last_sent = time.monotonic()
+        self.status = status
+        self.message = message
+        self.opportunities = opportunities
+        return {
+            'type': 'arbitrage_delta',
+            'stream': self.name,
+            'seq': self.seq,
+            'status': status,
+            'message': message,
+            'added': added,
+            'changed': changed,
+            'removed': removed,
+            'timestamp': timestamp or datetime.now().isoformat()
+        }
+
+    def heartbeat(self, interval: float, timestamp: str = None) -> Optional[Dict]:
+        """A heartbeat at the current sequence if nothing was sent for interval seconds, else None"""
+        now = time.monotonic()
+        if now - self.last_sent < interval:
+            return None
+        self.last_sent = now
+        return {
+            'type': 'arbitrage_heartbeat',
+            'stream': self.name,
+            'seq': self.seq,
+            'timestamp': timestamp or datetime.now().isoformat()
+        }
+
+    def state(self) -> Dict:
+        return {
+            'seq': self.seq,
+            'status': self.status,
+            'message': self.message,
+            'opportunities': list(self.opportunities.values())
+        }
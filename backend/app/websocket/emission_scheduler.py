@@ -0,0 +1,154 @@
+'''
+This module rate limits pushes to the frontend per channel with latest-wins coalescing.
+A channel publishes at most `rate` times per second. Publishing inside the cool-down does not send anything:
+the publish callable replaces any pending one for the channel and runs once when the cool-down ends, so a
+burst of ticks becomes a single emit carrying the latest state (and the state is only computed then).
+Priority publishes - a new best opportunity, say - skip the cool-down and also settle anything pending.
+Channels without a rate (or rate 0) publish immediately.
+'''
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from app.config.settings import Config
+
+logger = logging.getLogger(__name__)
+
+
+def parse_rates(text: str) -> Dict[str, float]:
+    """'client_data=5,hello=0.2' -> {'client_data': 5.0, 'hello': 0.2}"""
+    rates = {}
+    for item in (text or '').split(','):
+        if not item.strip():
+            continue
+        channel, _, rate = item.partition('=')
+        rates[channel.strip()] = float(rate)
+    return rates
+
+
+class EmissionScheduler:
+    """Per-channel max-rate publishing with latest-wins deferral on a background thread"""
+
+    def __init__(self, rates: Dict[str, float] = None, default_rate: float = 0.0):
+        self.rates = dict(rates or {})
+        self.default_rate = default_rate
+        self._pending: Dict[str, Callable] = {}
+        self._due: Dict[str, float] = {}  # channel -> monotonic time the pending publish may run
+        self._last: Dict[str, float] = {}  # channel -> monotonic time of the last publish
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._cond = threading.Condition()
+        self._run_lock = threading.RLock()  # one publish at a time, immediate or deferred
+        self._thread = None
+        self._stopped = False
+
+    @classmethod
+    def from_config(cls):
+        return cls(parse_rates(Config.EMIT_RATES), Config.EMIT_DEFAULT_RATE)
+
+    def set_rate(self, channel: str, rate: Optional[float]):
+        with self._cond:
+            self.rates[channel] = rate or 0.0
+
+    def _interval(self, channel: str) -> float:
+        rate = self.rates.get(channel, self.default_rate)
+        return 1.0 / rate if rate else 0.0
+
+    def _channel_stats(self, channel: str) -> Dict[str, int]:
+        stats = self._stats.get(channel)
+        if stats is None:
+            stats = self._stats[channel] = {'published': 0, 'immediate': 0, 'priority': 0, 'deferred': 0, 'coalesced': 0}
+        return stats
+
+    def publish(self, channel: str, fn: Callable, priority: bool = False) -> bool:
+        """
+        Run fn now if the channel is out of its cool-down (or priority is set), otherwise keep it as the
+        channel's pending publish, replacing an older one. Returns True when fn ran immediately.
+        """
+        with self._cond:
+            stats = self._channel_stats(channel)
+            now = time.monotonic()
+            interval = self._interval(channel)
+            next_allowed = self._last.get(channel, float('-inf')) + interval
+            if priority or now >= next_allowed:
+                # Anything pending is superseded by this publish
+                self._pending.pop(channel, None)
+                self._due.pop(channel, None)
+                self._last[channel] = now
+                stats['priority' if priority and now < next_allowed else 'immediate'] += 1
+            else:
+                if channel in self._pending:
+                    stats['coalesced'] += 1
+                else:
+                    stats['deferred'] += 1
+                self._pending[channel] = fn
+                self._due[channel] = next_allowed
+                self._ensure_thread()
+                self._cond.notify()
+                return False
+        self._run(channel, fn)
+        return True
+
+    def _run(self, channel: str, fn: Callable):
+        with self._run_lock:
+            try:
+                fn()
+                self._channel_stats(channel)['published'] += 1
+            except Exception as e:
+                logger.error(f"Error publishing {channel}: {e}")
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped = False
+            self._thread = threading.Thread(target=self._loop, name='emission-scheduler', daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    now = time.monotonic()
+                    ready = [channel for channel, due in self._due.items() if due <= now]
+                    if ready:
+                        break
+                    timeout = min(self._due.values()) - now if self._due else None
+                    self._cond.wait(timeout)
+                if self._stopped:
+                    return
+                batch = []
+                for channel in ready:
+                    batch.append((channel, self._pending.pop(channel)))
+                    del self._due[channel]
+                    self._last[channel] = now
+            for channel, fn in batch:
+                self._run(channel, fn)
+
+    def flush(self):
+        """Run every pending publish now"""
+        with self._cond:
+            batch = list(self._pending.items())
+            self._pending.clear()
+            self._due.clear()
+            now = time.monotonic()
+            for channel, _ in batch:
+                self._last[channel] = now
+        for channel, fn in batch:
+            self._run(channel, fn)
+
+    def stop(self, flush: bool = True):
+        if flush:
+            self.flush()
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def get_stats(self) -> Dict[str, Dict]:
+        with self._cond:
+            return {
+                channel: {**stats, 'rate': self.rates.get(channel, self.default_rate),
+                          'pending': channel in self._pending}
+                for channel, stats in self._stats.items()
+            }
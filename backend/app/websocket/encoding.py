@@ -0,0 +1,133 @@
+'''
+This module implements the compact binary encoding a client can opt into when it connects, with
+io(url, {auth: {encoding: 'msgpack'}}) or ?encoding=msgpack. Such clients receive the data events (client_data,
+price_update, <strategy>_update, opportunity_lifecycle, hello) as one MessagePack binary argument in which
+    keys are replaced by the short ids of FIELD_IDS (keys not listed, e.g. crypto or stream names, are kept)
+    the ISO-8601 strings of TIMESTAMP_FIELDS become integer epoch milliseconds
+The table to expand them is sent once, as JSON, in an 'encoding' event right after connect. Control events
+(connection_status, errors, acks, latency_probe...) stay JSON. Without the msgpack package installed every
+client gets JSON, and the 'encoding' event says so.
+'''
+import math
+from typing import Dict
+
+from app.external.utilities.price_book import to_epoch
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+JSON = 'json'
+MSGPACK = 'msgpack'
+ENCODINGS = (JSON, MSGPACK)
+
+# Members of this room get MSGPACK, everyone else JSON
+MSGPACK_ROOM = f"encoding:{MSGPACK}"
+
+FIELD_IDS = {
+    # envelopes
+    'type': 't',
+    'timestamp': 'ts',
+    'data': 'd',
+    'status': 's',
+    'message': 'm',
+    # client_data opportunities
+    'opportunities': 'o',
+    'id': 'i',
+    'crypto': 'c',
+    'lowest_price': 'lp',
+    'lowest_price_exchange': 'lx',
+    'highest_price': 'hp',
+    'highest_price_exchange': 'hx',
+    'buy_currency': 'bc',
+    'sell_currency': 'sc',
+    'spread_percentage': 'sp',
+    'total_fees': 'tf',
+    'arbitrage_after_fees': 'af',
+    'profit_percentage': 'pp',
+    # executable arbitrage
+    'size': 'z',
+    'buy_vwap': 'bv',
+    'sell_vwap': 'sv',
+    'buy_levels': 'bl',
+    'sell_levels': 'sl',
+    # delta stream
+    'streams': 'ss',
+    'stream': 'st',
+    'seq': 'q',
+    'added': 'a',
+    'changed': 'ch',
+    'removed': 'r',
+    # prices and rates
+    'all_prices': 'ap',
+    'prices': 'ps',
+    'price': 'p',
+    'exchange_rates': 'er',
+    'rates': 'rs',
+    'rate': 'rt',
+    'name': 'n',
+    'ask': 'k',
+    'time': 'tm',
+    'last_update': 'lu',
+    # opportunity lifecycle
+    'events': 'ev',
+    'event': 'e',
+    'opened_at': 'oa',
+    'closed_at': 'ca',
+    'peak_at': 'pa',
+    'net_profit': 'np',
+    'peak_net_profit': 'pn',
+    'duration_seconds': 'du',
+}
+TIMESTAMP_FIELDS = frozenset({'timestamp', 'time', 'last_update', 'opened_at', 'closed_at', 'peak_at'})
+
+
+def negotiate(requested) -> str:
+    """The encoding to use for a client that asked for `requested` (JSON unless MSGPACK is possible)"""
+    requested = (requested or JSON).lower()
+    if requested == MSGPACK and MSGPACK_AVAILABLE:
+        return MSGPACK
+    return JSON
+
+
+def requested_encoding(auth, args) -> str:
+    """The encoding a connecting client asked for, in its auth payload or the connect query string"""
+    if isinstance(auth, dict) and auth.get('encoding'):
+        return auth['encoding']
+    return args.get('encoding') if args is not None else None
+
+
+def announcement(encoding: str) -> Dict:
+    """The 'encoding' event: the negotiated encoding and, for MSGPACK, the table to expand payloads with"""
+    message = {'encoding': encoding}
+    if encoding == MSGPACK:
+        message['fields'] = {short: field for field, short in FIELD_IDS.items()}
+        message['timestamps'] = sorted(FIELD_IDS[field] for field in TIMESTAMP_FIELDS)
+    return message
+
+
+def _epoch_ms(value):
+    if isinstance(value, str):
+        epoch = to_epoch(value)
+        if not math.isnan(epoch):
+            return int(round(epoch * 1000))
+    return value
+
+
+def compact(value):
+    """Short field ids and epoch-millisecond timestamps throughout a JSON-like payload"""
+    if isinstance(value, dict):
+        return {
+            FIELD_IDS.get(key, key): _epoch_ms(item) if key in TIMESTAMP_FIELDS else compact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [compact(item) for item in value]
+    return value
+
+
+def encode(data) -> bytes:
+    """MSGPACK encoding of one payload"""
+    return msgpack.packb(compact(data), use_bin_type=True)
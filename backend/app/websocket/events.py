@@ -3,15 +3,16 @@ from flask import request
 from . import ws_manager
 import logging
 from datetime import datetime
+from app.external.utilities.opportunity_lifecycle import message as lifecycle_message
 
 logger = logging.getLogger(__name__)
 
 def init_events(socketio):
     @socketio.on('connect')
-    def handle_connect():
+    def handle_connect(auth=None):
         """Handle new client connection"""
         try:
-            if ws_manager.handle_connect():
+            if ws_manager.handle_connect(auth):
                 emit('connection_status', {'status': 'connected', 'client_id': request.sid})
             else:
                 return False
@@ -24,6 +25,11 @@ def init_events(socketio):
         """Handle client disconnection"""
         ws_manager.handle_disconnect()
 
+    init_subscription_events(socketio)
+
+
+def init_subscription_events(socketio):
+    """Register the subscription, resync and status handlers (connect/disconnect are left to the caller)"""
     @socketio.on('subscribe_exchange')
     def handle_exchange_subscribe(data):
         """Handle subscription to exchange data"""
@@ -51,7 +57,7 @@ def init_events(socketio):
         """Handle subscription to specific data feeds"""
         try:
             feeds = data.get('feeds', [])
-            valid_feeds = {'price', 'volume', 'orderbook', 'trades'}
+            valid_feeds = {'price', 'volume', 'orderbook', 'trades', 'arbitrage', 'lifecycle', 'cycles'}
             
             if not feeds or not all(f in valid_feeds for f in feeds):
                 emit('error', {'message': 'Invalid feed types specified'})
@@ -62,22 +68,77 @@ def init_events(socketio):
                     'status': 'success',
                     'feeds': feeds
                 })
+                if 'lifecycle' in feeds:
+                    # Opportunities opened before the subscription, later events come from the feed room
+                    from app.price_tracker_instance import price_tracker
+                    if price_tracker.lifecycle is not None:
+                        ws_manager.rooms.send('opportunity_lifecycle',
+                                              lifecycle_message(price_tracker.lifecycle.get_open(), snapshot=True),
+                                              to=request.sid)
             else:
                 emit('error', {'message': 'Feed subscription failed'})
         except Exception as e:
             logger.error(f"Feed subscription error: {str(e)}")
             emit('error', {'message': 'Internal server error'})
 
+    @socketio.on('subscribe_crypto')
+    def handle_crypto_subscribe(data):
+        """Handle subscription to the arbitrage data of specific cryptos"""
+        try:
+            cryptos = data.get('cryptos', [])
+            # Only cryptos the price book tracks, so clients cannot create rooms and streams for any name
+            from app.price_tracker_instance import price_tracker
+            known = set(price_tracker.price_book.cryptos)
+
+            if not cryptos or not all(isinstance(c, str) and c.upper() in known for c in cryptos):
+                emit('error', {'message': 'Invalid cryptos specified'})
+                return
+
+            if ws_manager.add_crypto_subscription(request.sid, cryptos):
+                emit('crypto_subscribed', {
+                    'status': 'success',
+                    'cryptos': [c.upper() for c in cryptos]
+                })
+            else:
+                emit('error', {'message': 'Crypto subscription failed'})
+        except Exception as e:
+            logger.error(f"Crypto subscription error: {str(e)}")
+            emit('error', {'message': 'Internal server error'})
+
+    @socketio.on('unsubscribe')
+    def handle_unsubscribe(data):
+        """Handle removal of source, feed and crypto subscriptions"""
+        try:
+            if ws_manager.remove_subscriptions(request.sid,
+                                               sources=data.get('sources', []),
+                                               feeds=data.get('feeds', []),
+                                               cryptos=data.get('cryptos', [])):
+                emit('unsubscribed', {'status': 'success'})
+            else:
+                emit('error', {'message': 'Unsubscribe failed'})
+        except Exception as e:
+            logger.error(f"Unsubscribe error: {str(e)}")
+            emit('error', {'message': 'Internal server error'})
+
+    @socketio.on('resync')
+    def handle_resync(data=None):
+        """Handle a client that missed a client_data delta: send the full state again"""
+        try:
+            ws_manager.rooms.send_snapshot(request.sid)
+        except Exception as e:
+            logger.error(f"Resync error: {str(e)}")
+            emit('error', {'message': 'Resync failed'})
+
     @socketio.on('get_latest_prices')
     def handle_get_prices():
         """Handle request for latest price data"""
         try:
             from app.price_tracker_instance import price_tracker
             prices = price_tracker.get_latest_prices()
-            emit('price_update', {
+            ws_manager.rooms.send('price_update', {
                 'all_prices': prices,
                 'timestamp': datetime.now().isoformat()
-            })
+            }, to=request.sid)
         except Exception as e:
             logger.error(f"Error getting prices: {str(e)}")
             emit('error', {'message': 'Failed to get latest prices'})
@@ -92,10 +153,16 @@ def init_events(socketio):
                     'status': 'active',
                     'subscriptions': list(client_info['subscriptions']),
                     'feeds': list(client_info['feeds']),
-                    'connected_at': client_info['connected_at']
+                    'cryptos': list(client_info['cryptos']),
+                    'encoding': client_info['encoding'],
+                    'connected_at': client_info['connected_at'],
+                    'delivery': ws_manager.get_delivery_stats(request.sid)
                 })
             else:
                 emit('error', {'message': 'Client not found'})
         except Exception as e:
             logger.error(f"Error getting client status: {str(e)}")
-            emit('error', {'message': 'Failed to get client status'})
\ No newline at end of file
+            emit('error', {'message': 'Failed to get client status'})
+
+    # Source and feed rooms can be joined from now on
+    ws_manager.rooms.subscriptions = True
\ No newline at end of file
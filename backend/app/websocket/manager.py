@@ -4,6 +4,10 @@ import threading
 import logging
 from app.external.websocket_client import WebSocketClient, start_external_websockets, stop_external_websockets
 from app.price_tracker_instance import price_tracker
+from app.websocket.rooms import DEFAULT_ROOMS, source_room, feed_room, crypto_room
+from app.websocket.slow_consumers import SlowConsumerMonitor
+from app.websocket.encoding import requested_encoding
+from app.config.settings import Config
 
 class WebSocketManager:
     def __init__(self, socketio):
@@ -12,17 +16,13 @@ class WebSocketManager:
         self.external_client = WebSocketClient()  # External WebSocket client
         self.external_ws_thread = None
         self.logger = logging.getLogger(__name__)
+        self.rooms = price_tracker.rooms  # Subscription rooms shared with the PriceTracker's client_data emits
+        self.slow_consumers = SlowConsumerMonitor(socketio, self.rooms)  # Downgrades or drops lagging clients
 
-    def handle_connect(self):
+    def handle_connect(self, auth=None):
         """Handle new frontend client connection"""
         try:
-            client_id = request.sid
-            self.clients[client_id] = {
-                'subscriptions': set(),
-                'feeds': set(),
-                'connected_at': threading.current_thread().name
-            }
-            self.logger.info(f"Client connected: {client_id}")
+            self.add_client(request.sid, auth, request.args)
             self._ensure_external_connections()
             return True
         except Exception as e:
@@ -32,20 +32,41 @@ class WebSocketManager:
     def handle_disconnect(self):
         """Handle frontend client disconnection"""
         try:
-            client_id = request.sid
-            if client_id in self.clients:
-                del self.clients[client_id]
-                self.logger.info(f"Client disconnected: {client_id}")
-                if not self.clients:
-                    self._stop_external_connections()
+            if self.remove_client(request.sid) and not self.clients:
+                self._stop_external_connections()
         except Exception as e:
             self.logger.error(f"Disconnection error: {str(e)}")
 
+    def add_client(self, client_id, auth=None, args=None):
+        """Track a connected client: negotiate its encoding, join the default rooms and send its snapshot"""
+        self.clients[client_id] = {
+            'subscriptions': set(),
+            'feeds': set(),
+            'cryptos': set(),
+            'encoding': self.rooms.set_encoding(client_id, requested_encoding(auth, args)),
+            'connected_at': threading.current_thread().name
+        }
+        self.rooms.join(client_id, DEFAULT_ROOMS)
+        self.rooms.send_snapshot(client_id)
+        self.logger.info(f"Client connected: {client_id}")
+        if Config.SLOW_CLIENT_MONITOR:
+            self.slow_consumers.start()
+
+    def remove_client(self, client_id):
+        """Forget a disconnected client, False if it was not tracked"""
+        if client_id not in self.clients:
+            return False
+        del self.clients[client_id]
+        self.rooms.forget(client_id)
+        self.logger.info(f"Client disconnected: {client_id}")
+        return True
+
     def add_subscription(self, client_id, sources):
         """Add data source subscriptions for a client"""
         try:
             if client_id in self.clients:
                 self.clients[client_id]['subscriptions'].update(sources)
+                self.rooms.join(client_id, [source_room(source) for source in sources])
                 self._ensure_external_connections()
                 return True
             return False
@@ -58,12 +79,51 @@ class WebSocketManager:
         try:
             if client_id in self.clients:
                 self.clients[client_id]['feeds'].update(feeds)
+                self.rooms.join(client_id, [feed_room(feed) for feed in feeds])
                 return True
             return False
         except Exception as e:
             self.logger.error(f"Feed subscription error: {str(e)}")
             return False
 
+    def add_crypto_subscription(self, client_id, cryptos):
+        """Narrow a client's client_data to the given cryptos"""
+        try:
+            if client_id in self.clients:
+                cryptos = {crypto.upper() for crypto in cryptos}
+                self.clients[client_id]['cryptos'].update(cryptos)
+                self.rooms.join(client_id, [crypto_room(crypto) for crypto in cryptos])
+                # Filtered per crypto from now on, so stop receiving the full payload
+                self.rooms.leave(client_id, DEFAULT_ROOMS)
+                self.rooms.send_snapshot(client_id)
+                return True
+            return False
+        except Exception as e:
+            self.logger.error(f"Crypto subscription error: {str(e)}")
+            return False
+
+    def remove_subscriptions(self, client_id, sources=(), feeds=(), cryptos=()):
+        """Leave source, feed and crypto rooms; without any crypto left the client gets the full client_data again"""
+        try:
+            client = self.clients.get(client_id)
+            if client is None:
+                return False
+            cryptos = {crypto.upper() for crypto in cryptos}
+            client['subscriptions'].difference_update(sources)
+            client['feeds'].difference_update(feeds)
+            client['cryptos'].difference_update(cryptos)
+            self.rooms.leave(client_id, [source_room(source) for source in sources] +
+                             [feed_room(feed) for feed in feeds] +
+                             [crypto_room(crypto) for crypto in cryptos])
+            if not client['cryptos']:
+                self.rooms.join(client_id, DEFAULT_ROOMS)
+            if cryptos:
+                self.rooms.send_snapshot(client_id)
+            return True
+        except Exception as e:
+            self.logger.error(f"Unsubscribe error: {str(e)}")
+            return False
+
     def _ensure_external_connections(self):
         """Ensure external WebSocket connections are active"""
         if not self.external_ws_thread or not self.external_ws_thread.is_alive():
@@ -85,9 +145,9 @@ class WebSocketManager:
     def broadcast_update(self, event, data):
         """Broadcast updates to relevant subscribed clients"""
         try:
-            # Broadcast to all clients for now - you can implement filtering based on subscriptions
-            self.socketio.emit(event, data)
-            self.logger.debug(f"Broadcasted {event} to clients")
+            # Only the source and feed rooms of the event's strategy receive it
+            if self.rooms.broadcast(event, data):
+                self.logger.debug(f"Broadcasted {event} to subscribed clients")
         except Exception as e:
             self.logger.error(f"Broadcasting error: {str(e)}")
 
@@ -95,6 +155,10 @@ class WebSocketManager:
         """Get information about a specific client"""
         return self.clients.get(client_id)
 
+    def get_delivery_stats(self, client_id):
+        """Send queue depth, latency and live/snapshot_only mode of a client, None before its first check"""
+        return self.slow_consumers.get_client_stats(client_id)
+
     def get_active_clients(self):
         """Get list of all active clients"""
         return list(self.clients.keys())
\ No newline at end of file
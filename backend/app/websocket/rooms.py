@@ -0,0 +1,268 @@
+'''
+This module routes Socket.IO updates to the rooms of the clients that subscribed to them, instead of
+emitting every update to every connected client.
+Rooms are keyed by what a client subscribed to:
+    source:<coinapi|xchange>     raw <strategy>_update events of one upstream source (subscribe_exchange)
+    feed:<price|...|arbitrage>   one kind of data (subscribe_feed); every client joins feed:arbitrage on
+                                 connect so dashboards that never subscribe keep receiving client_data
+    feed:lifecycle               opportunity_lifecycle events (open/update/close), subscribe_feed only
+    feed:cycles                  cycle_arbitrage updates (multi-leg cycles), subscribe_feed only
+    crypto:<BTC|ETH|...>         client_data narrowed to that crypto's opportunities (subscribe_crypto);
+                                 subscribing to a crypto leaves feed:arbitrage so nothing arrives twice
+One emit to a list of rooms is encoded once by python-socketio and sent to the union of their members,
+and rooms without members are skipped before any serialization happens.
+With CLIENT_DATA_DELTAS each client_data room is a DeltaStream: members get sequenced deltas and a snapshot
+of all their streams on connect, on subscription changes and when they ask for a resync.
+Clients the SlowConsumerMonitor takes off live updates have their rooms parked: they are not members, but
+their snapshots still cover them, and unparking rejoins them. Crypto room streams that nobody is in or
+parked from any more are dropped, so the number of streams stays bounded by what clients subscribe to.
+Every data emit goes through send(), which encodes the payload once per encoding in use by its recipients
+(JSON, or MessagePack for the members of encoding:msgpack, see app.websocket.encoding).
+'''
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Set
+
+from app.config.settings import Config
+from app.websocket.delta_stream import DeltaStream
+from app.websocket import encoding
+
+logger = logging.getLogger(__name__)
+
+# Strategy name (WebSocketClient) -> source name used by subscribe_exchange
+STRATEGY_SOURCES = {'coinapi': 'coinapi', 'xchangeapi': 'xchange'}
+# Strategy name -> feed its updates belong to
+STRATEGY_FEEDS = {'coinapi': 'price', 'xchangeapi': 'price'}
+ARBITRAGE_FEED = 'arbitrage'
+LIFECYCLE_FEED = 'lifecycle'
+CYCLES_FEED = 'cycles'
+
+
+def source_room(source: str) -> str:
+    return f"source:{source}"
+
+
+def feed_room(feed: str) -> str:
+    return f"feed:{feed}"
+
+
+def crypto_room(crypto: str) -> str:
+    return f"crypto:{crypto.upper()}"
+
+
+DEFAULT_ROOMS = [feed_room(ARBITRAGE_FEED)]
+
+
+class RoomBroadcaster:
+    """Emits updates to subscription rooms, one serialization per update"""
+
+    def __init__(self, socketio, namespace: str = '/', deltas: bool = None):
+        self.socketio = socketio
+        self.namespace = namespace
+        self.deltas = Config.CLIENT_DATA_DELTAS if deltas is None else deltas
+        self.emitted = 0
+        self.skipped = 0  # updates nobody was subscribed to
+        self.binary_emitted = 0  # emits that also went out MessagePack encoded
+        # Set once the subscribe_* handlers are registered; until then nobody can join a source or feed room
+        self.subscriptions = False
+
+        # client_data room -> DeltaStream, and the latest unfiltered client_data to rebuild stale streams from
+        self.streams: Dict[str, DeltaStream] = {}
+        self.latest_data = None
+        self._lock = threading.Lock()  # deltas and snapshots of a stream must not interleave
+        self.parked: Dict[str, Set[str]] = {}  # sid -> rooms it was taken out of while lagging
+
+    def _rooms(self) -> Dict:
+        server = getattr(self.socketio, 'server', None)
+        if server is None:
+            return {}
+        return server.manager.rooms.get(self.namespace, {})
+
+    def listening_rooms(self, rooms: Iterable[str]) -> List[str]:
+        """The rooms that currently have at least one member"""
+        active = self._rooms()
+        return [room for room in rooms if active.get(room)]
+
+    def join(self, sid: str, rooms: Iterable[str]):
+        for room in rooms:
+            self.socketio.server.enter_room(sid, room, namespace=self.namespace)
+
+    def leave(self, sid: str, rooms: Iterable[str]):
+        parked = self.parked.get(sid)
+        for room in rooms:
+            self.socketio.server.leave_room(sid, room, namespace=self.namespace)
+            if parked:
+                parked.discard(room)
+
+    def park(self, sid: str, rooms: Iterable[str]):
+        """Take sid out of rooms, remembering them for its snapshots and unpark"""
+        rooms = set(rooms)
+        for room in rooms:
+            self.socketio.server.leave_room(sid, room, namespace=self.namespace)
+        self.parked.setdefault(sid, set()).update(rooms)
+
+    def unpark(self, sid: str) -> Set[str]:
+        """Rejoin the rooms sid was parked from"""
+        rooms = self.parked.pop(sid, set())
+        self.join(sid, rooms)
+        return rooms
+
+    def forget(self, sid: str):
+        """Drop the parked rooms of a disconnected sid, its streams go on the next client_data emit"""
+        self.parked.pop(sid, None)
+
+    def set_encoding(self, sid: str, requested: str = None) -> str:
+        """Negotiate sid's payload encoding and tell it the result (sent before any data event)"""
+        negotiated = encoding.negotiate(requested)
+        if negotiated == encoding.MSGPACK:
+            self.join(sid, [encoding.MSGPACK_ROOM])
+        if requested or negotiated != encoding.JSON:
+            self.socketio.emit('encoding', encoding.announcement(negotiated), to=sid, namespace=self.namespace)
+        return negotiated
+
+    def send(self, event: str, data, to=None):
+        """
+        Emit data to a sid, a room, a list of them or (to=None) everyone, serialized once per encoding: one
+        JSON emit that skips the MessagePack clients and one emit of the packed payload to those clients.
+        """
+        binary_members = self._rooms().get(encoding.MSGPACK_ROOM)
+        if not binary_members:
+            self.socketio.emit(event, data, to=to, namespace=self.namespace)
+            return
+        recipients = [sid for sid, _ in self.socketio.server.manager.get_participants(self.namespace, to)]
+        binary = [sid for sid in recipients if sid in binary_members]
+        if len(binary) < len(recipients):
+            self.socketio.emit(event, data, to=to, skip_sid=binary, namespace=self.namespace)
+        if binary:
+            # Every sid is a room of its own, so this is still one encode for all of them
+            self.socketio.emit(event, encoding.encode(data), to=binary, namespace=self.namespace)
+            self.binary_emitted += 1
+
+    def emit(self, event: str, data, rooms: Iterable[str]) -> bool:
+        """Emit once to the members of rooms, skipping the work entirely when nobody listens"""
+        rooms = self.listening_rooms(rooms)
+        if not rooms:
+            self.skipped += 1
+            return False
+        self.send(event, data, to=rooms)
+        self.emitted += 1
+        return True
+
+    def rooms_for_event(self, event: str) -> List[str]:
+        """Rooms of a WebSocketClient '<strategy>_update' event"""
+        strategy = event[:-len('_update')] if event.endswith('_update') else event
+        rooms = []
+        if strategy in STRATEGY_SOURCES:
+            rooms.append(source_room(STRATEGY_SOURCES[strategy]))
+        if strategy in STRATEGY_FEEDS:
+            rooms.append(feed_room(STRATEGY_FEEDS[strategy]))
+        return rooms
+
+    def broadcast(self, event: str, data) -> bool:
+        """
+        Route a strategy update to its source and feed rooms. Events without rooms, and every event while the
+        server has no subscribe handlers registered, go to everyone.
+        """
+        rooms = self.rooms_for_event(event)
+        if not rooms or not self.subscriptions:
+            self.send(event, data)
+            self.emitted += 1
+            return True
+        return self.emit(event, data, rooms)
+
+    def _crypto_rooms(self) -> List[str]:
+        # Copied, the room table is changed by connect/disconnect handlers on other threads
+        return [room for room, members in list(self._rooms().items())
+                if isinstance(room, str) and room.startswith('crypto:') and members]
+
+    @staticmethod
+    def _narrow(data: Dict, room: str) -> Dict:
+        """client_data of one client_data room: everything for feed:arbitrage, one crypto for crypto rooms"""
+        if room in DEFAULT_ROOMS or not data.get('opportunities'):
+            return data
+        crypto = room[len('crypto:'):]
+        opportunities = [opp for opp in data['opportunities'] if opp['crypto'].upper() == crypto]
+        if opportunities:
+            return {**data, 'opportunities': opportunities}
+        return {
+            **data,
+            'status': 'no_arbitrage',
+            'message': 'No arbitrage opportunities found',
+            'opportunities': []
+        }
+
+    def emit_client_data(self, frontend_data: Dict):
+        """
+        Send client_data to feed:arbitrage whole and to every crypto room with members narrowed to that
+        crypto's opportunities; as deltas of each room's stream when CLIENT_DATA_DELTAS is on.
+        """
+        data = frontend_data.get('data') or {}
+        rooms = self.listening_rooms(DEFAULT_ROOMS) + self._crypto_rooms()
+        if not self.deltas:
+            for room in rooms:
+                narrowed = self._narrow(data, room)
+                self.emit('client_data', frontend_data if narrowed is data else {**frontend_data, 'data': narrowed}, [room])
+            return
+
+        with self._lock:
+            self.latest_data = data
+            self._prune_streams(rooms)
+            for room in rooms:
+                stream = self._stream(room)
+                delta = stream.update(self._narrow(data, room), frontend_data.get('timestamp'))
+                if delta is None:
+                    delta = stream.heartbeat(Config.CLIENT_DATA_HEARTBEAT, frontend_data.get('timestamp'))
+                if delta is not None:
+                    self.emit('client_data', delta, [room])
+
+    def _prune_streams(self, listening: List[str]):
+        """Drop the streams of crypto rooms without members or parked sids; a later member starts a new one"""
+        keep = set(listening).union(DEFAULT_ROOMS, *list(self.parked.values()))
+        for room in [room for room in self.streams if room not in keep]:
+            del self.streams[room]
+
+    def _stream(self, room: str) -> DeltaStream:
+        stream = self.streams.get(room)
+        if stream is None:
+            stream = self.streams[room] = DeltaStream(room)
+        return stream
+
+    def client_data_rooms(self, sid: str) -> List[str]:
+        """The feed:arbitrage and crypto rooms sid is a member of or parked from"""
+        server = getattr(self.socketio, 'server', None)
+        if server is None:
+            return []
+        rooms = list(server.manager.get_rooms(sid, self.namespace)) + sorted(self.parked.get(sid, ()))
+        return [room for room in rooms
+                if isinstance(room, str) and (room in DEFAULT_ROOMS or room.startswith('crypto:'))]
+
+    def send_snapshot(self, sid: str):
+        """Send sid the full state of all its client_data streams (connect, subscription change, resync)"""
+        if not self.deltas:
+            return
+        with self._lock:
+            streams = {}
+            for room in self.client_data_rooms(sid):
+                stream = self._stream(room)
+                if self.latest_data is not None:
+                    # Streams of rooms that had no members were not kept up to date; catch up without emitting
+                    # (anyone already in the room has seen every delta, so this is a no-op for them)
+                    stream.update(self._narrow(self.latest_data, room))
+                streams[room] = stream.state()
+            self.send('client_data', {
+                'type': 'arbitrage_snapshot',
+                'streams': streams,
+                'timestamp': datetime.now().isoformat()
+            }, to=sid)
+
+    def get_stats(self) -> Dict:
+        return {
+            'emitted': self.emitted,
+            'skipped': self.skipped,
+            'binary_emitted': self.binary_emitted,
+            'parked': len(self.parked),
+            'streams': len(self.streams),
+            'rooms': {room: len(members) for room, members in list(self._rooms().items())
+                      if isinstance(room, str) and ':' in room}
+        }
@@ -0,0 +1,200 @@
+'''
+This module keeps slow Socket.IO clients from growing server memory and delaying everyone else.
+Every SLOW_CLIENT_CHECK_INTERVAL seconds each connected client is measured:
+    queue depth   packets waiting in its Engine.IO send queue (long-polling clients drain it per poll)
+    latency       round trip of an acknowledged 'latency_probe' event, or the age of an unanswered one once the
+                  client has acknowledged a probe before (clients that never ack, e.g. older frontends or plain
+                  python-socketio scripts, are judged on their queue depth only)
+and moved between three states:
+    live           member of its subscription rooms, receives every delta
+    snapshot_only  past the soft limits: its subscription rooms are parked (RoomBroadcaster.park) and it is
+                   sent one snapshot of its streams every SLOW_CLIENT_SNAPSHOT_INTERVAL seconds, only once
+                   its queue has drained (nothing at all with CLIENT_DATA_DELTAS off, until it recovers)
+    disconnected   past the hard limits: the connection is closed, which frees its queue
+A snapshot_only client whose queue and latency are back under half the soft limits rejoins its rooms and
+gets a fresh snapshot, since it missed deltas in between. Clients are told about mode changes with a
+'client_mode' event.
+'''
+import logging
+import time
+from typing import Dict, Optional, Set
+
+from app.config.settings import Config
+from app.websocket.encoding import MSGPACK_ROOM
+from app.websocket.rooms import RoomBroadcaster
+
+logger = logging.getLogger(__name__)
+
+LIVE = 'live'
+SNAPSHOT_ONLY = 'snapshot_only'
+
+
+class _ClientHealth:
+    __slots__ = ('mode', 'queue_depth', 'max_queue_depth', 'rtt', 'probe_sent_at', 'last_snapshot', 'downgrades')
+
+    def __init__(self):
+        self.mode = LIVE
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.rtt: Optional[float] = None
+        self.probe_sent_at: Optional[float] = None
+        self.last_snapshot = 0.0
+        self.downgrades = 0
+
+    def latency(self, now: float) -> float:
+        if self.rtt is None:
+            # Never acknowledged a probe: no evidence the client answers them at all
+            return 0.0
+        outstanding = now - self.probe_sent_at if self.probe_sent_at is not None else 0.0
+        return max(self.rtt, outstanding)
+
+
+class SlowConsumerMonitor:
+    """Measures per-client send queue depth and latency and downgrades or drops lagging clients"""
+
+    def __init__(self, socketio, rooms: RoomBroadcaster, namespace: str = '/'):
+        self.socketio = socketio
+        self.rooms = rooms
+        self.namespace = namespace
+        self.check_interval = Config.SLOW_CLIENT_CHECK_INTERVAL
+        self.queue_soft = Config.SLOW_CLIENT_QUEUE_SOFT
+        self.queue_hard = Config.SLOW_CLIENT_QUEUE_HARD
+        self.latency_soft = Config.SLOW_CLIENT_LATENCY_SOFT
+        self.latency_hard = Config.SLOW_CLIENT_LATENCY_HARD
+        self.snapshot_interval = Config.SLOW_CLIENT_SNAPSHOT_INTERVAL
+        self.clients: Dict[str, _ClientHealth] = {}
+        self.disconnected = 0
+        self._task = None
+        self.running = False
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._task = self.socketio.start_background_task(self._run)
+
+    def stop(self):
+        self.running = False
+
+    def _run(self):
+        while self.running:
+            self.socketio.sleep(self.check_interval)
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Slow consumer check failed: {e}")
+
+    def _connected_sids(self):
+        server = self.socketio.server
+        namespace_rooms = server.manager.rooms.get(self.namespace, {})
+        # Every client is in the room named after its sid
+        return [sid for sid in list(namespace_rooms.get(None, {}))]
+
+    def _queue_depth(self, sid: str) -> int:
+        server = self.socketio.server
+        try:
+            eio_sid = server.manager.eio_sid_from_sid(sid, self.namespace)
+            socket = server.eio.sockets.get(eio_sid)
+        except Exception:
+            return 0
+        return socket.queue.qsize() if socket is not None else 0
+
+    def _send_probe(self, sid: str, health: _ClientHealth):
+        sent_at = time.monotonic()
+        health.probe_sent_at = sent_at
+
+        def acknowledged(*args):
+            # Ignore late answers to a probe that was superseded
+            if health.probe_sent_at == sent_at:
+                health.rtt = time.monotonic() - sent_at
+                health.probe_sent_at = None
+
+        self.socketio.emit('latency_probe', {'sent_at': sent_at}, to=sid, namespace=self.namespace,
+                           callback=acknowledged)
+
+    def check(self):
+        """One measurement and state transition pass over the connected clients"""
+        if getattr(self.socketio, 'server', None) is None:
+            return
+        now = time.monotonic()
+        sids = set(self._connected_sids())
+        for sid in list(self.clients):
+            if sid not in sids:
+                del self.clients[sid]
+                self.rooms.parked.pop(sid, None)
+
+        for sid in sids:
+            health = self.clients.get(sid)
+            if health is None:
+                health = self.clients[sid] = _ClientHealth()
+            depth = health.queue_depth = self._queue_depth(sid)
+            health.max_queue_depth = max(health.max_queue_depth, depth)
+            latency = health.latency(now)
+
+            if depth > self.queue_hard or latency > self.latency_hard:
+                logger.warning(f"Disconnecting slow client {sid}: queue {depth}, latency {latency:.1f}s")
+                self.disconnected += 1
+                del self.clients[sid]
+                self.rooms.parked.pop(sid, None)
+                self.socketio.server.disconnect(sid, namespace=self.namespace)
+                continue
+
+            if health.mode == LIVE and (depth > self.queue_soft or latency > self.latency_soft):
+                self._downgrade(sid, health, depth, latency)
+            elif health.mode == SNAPSHOT_ONLY:
+                if depth <= self.queue_soft / 2 and latency <= self.latency_soft / 2:
+                    self._restore(sid, health)
+                else:
+                    self._snapshot_only_tick(sid, health, depth, now)
+
+            if health.probe_sent_at is None:
+                self._send_probe(sid, health)
+
+    def _subscription_rooms(self, sid: str) -> Set[str]:
+        server = self.socketio.server
+        return {room for room in server.manager.get_rooms(sid, self.namespace)
+                if isinstance(room, str) and ':' in room and room != MSGPACK_ROOM}
+
+    def _downgrade(self, sid: str, health: _ClientHealth, depth: int, latency: float):
+        logger.info(f"Client {sid} is lagging (queue {depth}, latency {latency:.1f}s), snapshot-only updates")
+        health.mode = SNAPSHOT_ONLY
+        health.downgrades += 1
+        self.rooms.park(sid, self._subscription_rooms(sid))
+        self.socketio.emit('client_mode', {'mode': SNAPSHOT_ONLY}, to=sid, namespace=self.namespace)
+
+    def _snapshot_only_tick(self, sid: str, health: _ClientHealth, depth: int, now: float):
+        # Subscriptions made while downgraded are parked as well
+        joined = self._subscription_rooms(sid)
+        if joined:
+            self.rooms.park(sid, joined)
+        if depth == 0 and now - health.last_snapshot >= self.snapshot_interval:
+            health.last_snapshot = now
+            self.rooms.send_snapshot(sid)
+
+    def _restore(self, sid: str, health: _ClientHealth):
+        logger.info(f"Client {sid} caught up, back to live updates")
+        health.mode = LIVE
+        self.rooms.unpark(sid)
+        self.socketio.emit('client_mode', {'mode': LIVE}, to=sid, namespace=self.namespace)
+        self.rooms.send_snapshot(sid)
+
+    def get_client_stats(self, sid: str) -> Optional[Dict]:
+        health = self.clients.get(sid)
+        if health is None:
+            return None
+        return {
+            'mode': health.mode,
+            'queue_depth': health.queue_depth,
+            'max_queue_depth': health.max_queue_depth,
+            'latency': health.latency(time.monotonic()),
+            'rtt': health.rtt,
+            'downgrades': health.downgrades
+        }
+
+    def get_stats(self) -> Dict:
+        modes = [health.mode for health in self.clients.values()]
+        return {
+            'clients': len(modes),
+            'snapshot_only': modes.count(SNAPSHOT_ONLY),
+            'disconnected': self.disconnected
+        }
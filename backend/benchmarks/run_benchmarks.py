@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Time the arbitrage, fee, persistence and processor hot paths on synthetic price books.
+
+Every benchmark runs at each requested scale (cryptos x exchanges x fiats, see synthetic.SCALES) and the
+per-call timings are written as JSON, so two runs - e.g. before and after a change - can be compared.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--scale small --scale medium] [--filter csv] [--repeat 5]
+                                        [--output results.json] [--compare baseline.json] [--threshold 0.2]
+
+    --scale       small (2x4x3), medium (20x12x6), large (200x50x20) or a custom CxExF shape like 50x20x10
+    --filter      only run benchmarks whose name contains this text (repeatable)
+    --compare     print the change of each median against a previous results file, exit 1 on regressions
+                  slower than --threshold (default 20%)
+"""
+
+import sys
+import os
+import argparse
+import contextlib
+import io
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import timeit
+from datetime import datetime
+
+import numpy as np
+
+# Add the backend directory to the sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.synthetic import (SCALES, make_price_book, make_coinapi_messages, make_xchange_messages)
+from app.external.utilities.exchange_spread import ExchangeSpread
+from app.external.utilities.exchange_arbitrage import ExchangeArbitrage
+from app.external.utilities.cross_exchange_fiat_arbitrage import CrossExchangeFiatArbitrage
+from app.external.utilities.multi_strategy import MultiStrategyEvaluator
+from app.external.utilities.cycle_arbitrage import CycleArbitrageEngine
+from app.external.utilities.fee_calc import FeeCalculator
+from app.external.utilities.client_data_collector import DataCollector
+from app.external.utilities.order_book import OrderBooks
+from app.external.utilities.csv_tracker import CSVTracker
+from app.processors.coinapi_processor import CoinAPIProcessor
+from app.processors.xchange_processor import XChangeProcessor
+from app.processors import fast_json
+
+MESSAGE_COUNT = 10000
+
+
+def _quiet(fn):
+    """The arbitrage and CSV code prints progress; keep it out of the timings and the output"""
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return fn()
+    return run
+
+
+def bench_exchange_spread(book, rates, workdir):
+    return lambda: ExchangeSpread().update_spreads(book)
+
+
+def bench_exchange_arbitrage(book, rates, workdir):
+    return lambda: ExchangeArbitrage(book, rates).find_lowest_and_highest_price()
+
+
+def bench_cross_exchange_arbitrage(book, rates, workdir):
+    return lambda: CrossExchangeFiatArbitrage(book, rates).find_lowest_and_highest_price()
+
+
+def bench_multi_strategy(book, rates, workdir):
+    # All three families above in one pass
+    return lambda: MultiStrategyEvaluator(book, rates).evaluate()
+
+
+def bench_cycle_arbitrage_cold(book, rates, workdir):
+    # A fresh engine per call: graph build plus a cold search
+    return lambda: CycleArbitrageEngine(book, rates).update()
+
+
+def bench_cycle_arbitrage_tick(book, rates, workdir):
+    # One price write then an incremental search, as on every PriceTracker batch
+    engine = CycleArbitrageEngine(book, rates)
+    engine.update()
+    rng = np.random.default_rng(0)
+    crypto, exchange, fiat = book.cryptos[0], book.exchanges[0], book.fiats[0]
+    base = book.get_price(crypto, exchange, fiat) or 100.0
+
+    def run():
+        book.update(crypto, exchange, fiat, base * (1 + rng.normal(0, 1e-4)), '2025-01-01T00:00:00')
+        engine.update()
+    return run
+
+
+def _order_books(book, levels=20):
+    """A snapshot of levels levels per side, one basis point apart, around every price of the book"""
+    books = OrderBooks(max_levels=levels)
+    prices = book.price_array()
+    for (crypto_id, exchange_id, fiat_id), price in np.ndenumerate(prices):
+        if np.isnan(price):
+            continue
+        step = price * 0.0001
+        books.apply(book.cryptos[crypto_id], book.exchanges[exchange_id], book.fiats[fiat_id],
+                    [(price - step * (i + 1), 0.5 + i * 0.1) for i in range(levels)],
+                    [(price + step * (i + 1), 0.5 + i * 0.1) for i in range(levels)], snapshot=True)
+    return books
+
+
+def bench_order_book_update(book, rates, workdir):
+    # One incremental level change per call, inserts and removals at random depths
+    books = _order_books(book)
+    rng = np.random.default_rng(0)
+    crypto, exchange, fiat = book.cryptos[0], book.exchanges[0], book.fiats[0]
+    base = book.get_price(crypto, exchange, fiat) or 100.0
+
+    def run():
+        price = round(base * (1 + rng.integers(1, 30) * 0.0001), 2)
+        books.apply(crypto, exchange, fiat, [], [(price, float(rng.integers(0, 3)))])
+    return run
+
+
+def bench_fee_calculator(book, rates, workdir):
+    # The scalar calculator only knows the exchanges, cryptos and fiats of the fee schedule
+    known = {name.lower() for name in FeeCalculator.FEE_STRUCTURES}
+    exchanges = [exchange for exchange in book.exchanges if exchange.lower() in known]
+    cryptos = [crypto for crypto in book.cryptos if crypto in ('BTC', 'ETH')]
+    fiats = [fiat for fiat in book.fiats if fiat in ('USD', 'EUR', 'GBP')]
+    trades = [(buy, sell, crypto, fiat) for buy in exchanges for sell in exchanges if buy != sell
+              for crypto in cryptos for fiat in fiats]
+
+    def run():
+        for buy, sell, crypto, fiat in trades:
+            FeeCalculator(buy, sell, crypto, 1, 60000.0, 60100.0, fiat, rates).calculate_fees()
+    return run, len(trades)
+
+
+def bench_fee_calculator_batch(book, rates, workdir):
+    # One row per (buy exchange, sell exchange, crypto, fiat) like the matrix, unknown names price as NaN
+    size = min(len(book.exchanges) ** 2 * len(book.cryptos) * len(book.fiats), 100000)
+    rng = np.random.default_rng(0)
+    exchange_buy = rng.choice(book.exchanges, size).tolist()
+    exchange_sell = rng.choice(book.exchanges, size).tolist()
+    crypto = rng.choice(book.cryptos, size).tolist()
+    fiat = rng.choice(book.fiats, size).tolist()
+    price = rng.uniform(100.0, 70000.0, size)
+
+    def run():
+        FeeCalculator.calculate_fees_batch(exchange_buy, exchange_sell, crypto, 1, price, price * 1.001,
+                                           fiat, rates)
+    return run, size
+
+
+def bench_data_collector_extremes(book, rates, workdir):
+    collector = DataCollector(book, rates, mode='extremes')
+    return collector.get_arbitrage_data
+
+
+def bench_data_collector_matrix(book, rates, workdir):
+    collector = DataCollector(book, rates, mode='matrix', top_k=10)
+    return collector.get_arbitrage_data
+
+
+def bench_data_collector_executable(book, rates, workdir):
+    collector = DataCollector(book, rates, mode='executable', order_books=_order_books(book))
+    return collector.get_arbitrage_data
+
+
+def _csv_tracker(workdir):
+    tracker = CSVTracker()  # synchronous writes, so the timing includes the file append
+    tracker._csv_path = lambda name: os.path.join(workdir, f'{name}.csv')
+    return tracker
+
+
+def bench_csv_spread_strategy(book, rates, workdir):
+    tracker = _csv_tracker(workdir)
+    return lambda: tracker.write_spread_strategy(book)
+
+
+def bench_csv_fiat_arbitrage(book, rates, workdir):
+    tracker = _csv_tracker(workdir)
+    return lambda: tracker.write_fiat_arbitrage(book, rates)
+
+
+def bench_csv_cross_exchange_arbitrage(book, rates, workdir):
+    tracker = _csv_tracker(workdir)
+    return lambda: tracker.write_cross_exchange_fiat_arbitrage(book, rates)
+
+
+def bench_coinapi_processor(book, rates, workdir):
+    shape = (len(book.cryptos), len(book.exchanges), len(book.fiats))
+    messages = [fast_json.loads(message) for message in make_coinapi_messages(MESSAGE_COUNT, *shape)]
+    processor = CoinAPIProcessor(None)
+
+    def run():
+        for data in messages:
+            processor.parse_message(data)
+    return run, len(messages)
+
+
+def bench_xchange_processor(book, rates, workdir):
+    init, messages = make_xchange_messages(MESSAGE_COUNT, [f"{fiat}USD" for fiat in book.fiats if fiat != 'USD'])
+    processor = XChangeProcessor()
+    processor.process_message(init)
+
+    def run():
+        for message in messages:
+            processor.process_message(message)
+    return run, len(messages)
+
+
+# name -> setup(book, rates, workdir) returning a callable, or (callable, items per call)
+BENCHMARKS = {
+    'exchange_spread.update_spreads': bench_exchange_spread,
+    'exchange_arbitrage.find_lowest_and_highest_price': bench_exchange_arbitrage,
+    'cross_exchange_fiat_arbitrage.find_lowest_and_highest_price': bench_cross_exchange_arbitrage,
+    'multi_strategy.evaluate': bench_multi_strategy,
+    'cycle_arbitrage.update[cold]': bench_cycle_arbitrage_cold,
+    'cycle_arbitrage.update[tick]': bench_cycle_arbitrage_tick,
+    'order_book.apply[update]': bench_order_book_update,
+    'fee_calc.calculate_fees': bench_fee_calculator,
+    'fee_calc.calculate_fees_batch': bench_fee_calculator_batch,
+    'data_collector.get_arbitrage_data[extremes]': bench_data_collector_extremes,
+    'data_collector.get_arbitrage_data[matrix]': bench_data_collector_matrix,
+    'data_collector.get_arbitrage_data[executable]': bench_data_collector_executable,
+    'csv_tracker.write_spread_strategy': bench_csv_spread_strategy,
+    'csv_tracker.write_fiat_arbitrage': bench_csv_fiat_arbitrage,
+    'csv_tracker.write_cross_exchange_fiat_arbitrage': bench_csv_cross_exchange_arbitrage,
+    'coinapi_processor.parse_message': bench_coinapi_processor,
+    'xchange_processor.process_message': bench_xchange_processor,
+}
+
+
+def parse_scale(text):
+    if text in SCALES:
+        return text, SCALES[text]
+    try:
+        shape = tuple(int(part) for part in text.lower().split('x'))
+    except ValueError:
+        shape = ()
+    if len(shape) != 3 or min(shape) < 1:
+        raise argparse.ArgumentTypeError(f"Scale must be one of {', '.join(SCALES)} or CxExF, got {text}")
+    return text, shape
+
+
+def time_benchmark(fn, repeat, min_time):
+    """Per-call seconds of repeat rounds, each looping fn enough times to take at least min_time"""
+    timer = timeit.Timer(fn)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / elapsed * 1.1)) if elapsed > 0 else number * 10
+    return [elapsed / number for elapsed in timer.repeat(repeat, number)], number
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(scales, filters, repeat, min_time):
+    results = []
+    workdir = tempfile.mkdtemp(prefix='arbitrage-bench-')
+    try:
+        for scale, shape in scales:
+            book, rates = make_price_book(*shape)
+            print(f"\n{scale} {shape[0]} cryptos x {shape[1]} exchanges x {shape[2]} fiats")
+            for name, setup in BENCHMARKS.items():
+                if filters and not any(text in name for text in filters):
+                    continue
+                try:
+                    fn = setup(book, rates, workdir)
+                    fn, items = fn if isinstance(fn, tuple) else (fn, 1)
+                    timings, number = time_benchmark(_quiet(fn), repeat, min_time)
+                except Exception as e:
+                    print(f"  {name:<62} failed: {e}")
+                    results.append({'benchmark': name, 'scale': scale, 'shape': list(shape), 'error': str(e)})
+                    continue
+                median = statistics.median(timings)
+                results.append({
+                    'benchmark': name,
+                    'scale': scale,
+                    'shape': list(shape),
+                    'items_per_call': items,
+                    'loops': number,
+                    'repeat': repeat,
+                    'min_s': min(timings),
+                    'median_s': median,
+                    'mean_s': statistics.fmean(timings),
+                    'stdev_s': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+                    'per_item_s': median / items
+                })
+                print(f"  {name:<62} {median * 1e3:>10.3f} ms/call  {median / items * 1e6:>10.3f} us/item")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def compare(results, baseline_path, threshold):
+    """Print median changes against a baseline results file, return the number of regressions"""
+    with open(baseline_path) as file:
+        baseline = {(r['benchmark'], r['scale']): r for r in json.load(file)['results'] if 'median_s' in r}
+    regressions = 0
+    print(f"\nCompared with {baseline_path}")
+    for result in results:
+        before = baseline.get((result['benchmark'], result['scale']))
+        if before is None or 'median_s' not in result:
+            continue
+        change = result['median_s'] / before['median_s'] - 1.0
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        print(f"  {result['scale']:<8} {result['benchmark']:<62} {change * 100:>+8.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the arbitrage, fee, CSV and processor hot paths.")
+    parser.add_argument('--scale', action='append', type=parse_scale,
+                        help="Scale name or CxExF shape (repeatable, default: small and medium).")
+    parser.add_argument('--filter', action='append', help="Only run benchmarks containing this text.")
+    parser.add_argument('--repeat', type=int, default=5, help="Timing rounds per benchmark (default: 5).")
+    parser.add_argument('--min-time', type=float, default=0.2, help="Minimum seconds per round (default: 0.2).")
+    parser.add_argument('--output', help="Results file (default: benchmarks/results/bench_<time>.json).")
+    parser.add_argument('--compare', help="Previous results file to compare the medians against.")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Slowdown counted as a regression by --compare (default: 0.2 = 20%%).")
+    args = parser.parse_args()
+
+    if args.compare and not os.path.exists(args.compare):
+        print(f"Error: Baseline '{args.compare}' does not exist.")
+        sys.exit(1)
+
+    scales = args.scale or [parse_scale('small'), parse_scale('medium')]
+    results = run(scales, args.filter, args.repeat, args.min_time)
+
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results',
+                                         f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as file:
+        json.dump({
+            'meta': {
+                'timestamp': datetime.now().isoformat(),
+                'commit': git_commit(),
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'platform': platform.platform(),
+                'processor': platform.processor()
+            },
+            'results': results
+        }, file, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
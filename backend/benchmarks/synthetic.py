@@ -0,0 +1,113 @@
+'''
+This module generates synthetic workloads for the benchmark suite: fully populated price books at a given
+(cryptos x exchanges x fiats) scale with matching exchange rates, and raw CoinAPI / xChangeAPI messages.
+The real exchange, crypto and fiat names come first so the fee schedule and the CSV columns apply to them,
+the rest are synthetic (C003, EXCH005, F004...). Everything is seeded, so two runs see the same data.
+'''
+import sys
+import os
+import json
+import random
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+# Add the backend directory to the sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.external.utilities.price_book import PriceBook
+
+KNOWN_CRYPTOS = ['BTC', 'ETH']
+KNOWN_EXCHANGES = ['COINBASE', 'BINANCE', 'KRAKEN', 'BITSTAMP']
+KNOWN_FIATS = ['USD', 'EUR', 'GBP']
+KNOWN_RATES = {'USD': 1.0, 'EUR': 1.08, 'GBP': 1.27}  # USD per unit
+
+# name -> (cryptos, exchanges, fiats)
+SCALES = {
+    'small': (2, 4, 3),
+    'medium': (20, 12, 6),
+    'large': (200, 50, 20),
+}
+
+
+def _names(known: List[str], count: int, prefix: str, width: int) -> List[str]:
+    return known[:count] + [f"{prefix}{i + 1:0{width}d}" for i in range(len(known), count)]
+
+
+def scale_names(n_cryptos: int, n_exchanges: int, n_fiats: int) -> Tuple[List[str], List[str], List[str]]:
+    return (_names(KNOWN_CRYPTOS, n_cryptos, 'C', 3),
+            _names(KNOWN_EXCHANGES, n_exchanges, 'EXCH', 3),
+            _names(KNOWN_FIATS, n_fiats, 'F', 3))
+
+
+def make_exchange_rates(fiats: List[str], seed: int = 0) -> Dict[str, Dict]:
+    """{fiat: {'rate': USD per unit, 'timestamp': ...}} in the PriceTracker.exchange_rates format"""
+    rng = random.Random(seed)
+    timestamp = datetime.now(timezone.utc).isoformat()
+    return {
+        fiat: {'rate': KNOWN_RATES.get(fiat, round(rng.uniform(0.5, 1.5), 4)), 'timestamp': timestamp}
+        for fiat in fiats
+    }
+
+
+def make_price_book(n_cryptos: int, n_exchanges: int, n_fiats: int, seed: int = 0,
+                    spread: float = 0.002) -> Tuple[PriceBook, Dict[str, Dict]]:
+    """
+    A price book with a price for every (crypto, exchange, fiat), plus the exchange rates to read it with.
+    Prices are a base USD price per crypto with up to +-spread noise per exchange, converted to each fiat.
+    """
+    rng = random.Random(seed)
+    cryptos, exchanges, fiats = scale_names(n_cryptos, n_exchanges, n_fiats)
+    exchange_rates = make_exchange_rates(fiats, seed)
+    timestamp = datetime.now(timezone.utc).isoformat()
+
+    book = PriceBook(len(cryptos), len(exchanges), len(fiats))
+    for crypto in cryptos:
+        base = {'BTC': 60000.0, 'ETH': 3000.0}.get(crypto, rng.uniform(1.0, 500.0))
+        for exchange in exchanges:
+            usd_price = base * (1.0 + rng.uniform(-spread, spread))
+            for fiat in fiats:
+                book.update(crypto, exchange, fiat, round(usd_price / exchange_rates[fiat]['rate'], 2), timestamp)
+    return book, exchange_rates
+
+
+def make_coinapi_messages(count: int, n_cryptos: int = 2, n_exchanges: int = 4, n_fiats: int = 3,
+                          seed: int = 0) -> List[str]:
+    """Raw CoinAPI trade messages over the symbols of the given scale"""
+    rng = random.Random(seed)
+    cryptos, exchanges, fiats = scale_names(n_cryptos, n_exchanges, n_fiats)
+    symbols = [f"{exchange}_SPOT_{crypto}_{fiat}" for exchange in exchanges for crypto in cryptos for fiat in fiats]
+    now = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f0Z')
+    return [json.dumps({
+        'type': 'trade',
+        'symbol_id': rng.choice(symbols),
+        'sequence': i,
+        'time_exchange': now,
+        'time_coinapi': now,
+        'uuid': f"00000000-0000-0000-0000-{i:012d}",
+        'price': round(rng.uniform(100.0, 70000.0), 2),
+        'size': round(rng.uniform(0.0001, 0.5), 6),
+        'taker_side': rng.choice(['BUY', 'SELL'])
+    }) for i in range(count)]
+
+
+def make_xchange_messages(count: int, pairs: List[str] = None, seed: int = 0) -> Tuple[str, List[str]]:
+    """The xChangeAPI '0' init message and count '1' rate messages for pairs (default EURUSD, GBPUSD)"""
+    rng = random.Random(seed)
+    pairs = pairs or ['EURUSD', 'GBPUSD']
+    init = '0' + json.dumps({
+        'start_time': datetime.now(timezone.utc).timestamp(),
+        'mapping': {str(index): pair for index, pair in enumerate(pairs)},
+        'order': ['name', 'ask', 'bid', 'time'],
+        'time_mult': 1000
+    })
+    messages = []
+    for i in range(count):
+        ask = rng.uniform(1.0, 1.4)
+        messages.append(f"1{rng.randrange(len(pairs))}|{ask:.5f}|{ask * 0.9999:.5f}|{i * 10}")
+    return init, messages
+
+
+if __name__ == "__main__":
+    for name, shape in SCALES.items():
+        book, rates = make_price_book(*shape)
+        print(f"{name}: {shape} -> {book.shape()} price book, {len(rates)} exchange rates")
@@ -7,6 +7,7 @@ from flask_cors import CORS
 import logging
 from datetime import datetime
 from app.external.websocket_client import start_external_websockets, stop_external_websockets
+from app.websocket import init_subscriptions
 
 # Configure logging with more detail
 logging.basicConfig(
@@ -25,6 +26,9 @@ socketio.init_app(app)
 
 # Initialize PriceTracker after socketio is fully set up
 from app.price_tracker_instance import price_tracker
+# subscribe_exchange/feed/crypto, unsubscribe, resync and get_client_status from app.websocket.events;
+# connect and disconnect stay below, external connections are started by __main__
+ws_manager = init_subscriptions(socketio)
 
 @app.route('/')
 def index():
@@ -32,13 +36,14 @@ def index():
 
 def broadcast_update(event, data):
     try:
-        socketio.emit(event, data)
+        # Only clients subscribed to the event's source or feed receive it
+        price_tracker.rooms.broadcast(event, data)
         logger.debug(f"Broadcasted event {event} with data: {data}")
     except Exception as e:
         logger.error(f"Error broadcasting event {event}: {str(e)}")
 
 @socketio.on("connect")
-def handle_connect():
+def handle_connect(auth=None):
     try:
         client_id = request.sid
         transport = request.environ.get('wsgi.url_scheme', 'unknown')
@@ -53,6 +58,8 @@ def handle_connect():
             "server_time": datetime.now().isoformat(),
             "transport": transport
         })
+        # Every client receives the full client_data until it subscribes to specific cryptos
+        ws_manager.add_client(client_id, auth, request.args)
         logger.info(f"Client successfully connected - ID: {client_id}")
         
         # Send a hello message when client connects
@@ -64,6 +71,7 @@ def handle_connect():
 def handle_disconnect():
     try:
         client_id = request.sid
+        ws_manager.remove_client(client_id)
         logger.info(f"Client disconnected - ID: {client_id}")
     except Exception as e:
         logger.error(f"Error handling disconnect: {str(e)}")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Run the local synthetic exchange feed (CoinAPI trades and books, xChangeAPI rates) for load testing.
+
+Usage:
+    python scripts/mock_feed_server.py [--rate 10000] [--exchanges 4] [--cryptos BTC,ETH] [--fiats USD,EUR,GBP]
+
+Then start the backend against it:
+    FEED_MODE=mock python run.py
+    FEED_MODE=mock COINAPI_BOOK_DATA_TYPE=book ARBITRAGE_MODE=executable python run.py   # with L2 books
+
+Only BTC and ETH with USD/USDT, EUR and GBP quotes are parsed by the CoinAPI processor, so scale the
+load with --rate and --exchanges (synthetic exchanges are named EXCH5, EXCH6, ...).
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import logging
+
+# Add the backend directory to the sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.external.mock_feed import MockFeedServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local synthetic CoinAPI / xChangeAPI feed server.")
+    parser.add_argument('--host', default='localhost', help="Host to bind (default: localhost).")
+    parser.add_argument('--port', type=int, default=8765, help="Port to bind (default: 8765).")
+    parser.add_argument('--rate', type=float, default=1000.0, help="CoinAPI trade messages per second (default: 1000).")
+    parser.add_argument('--fx-rate', type=float, default=2.0, help="xChangeAPI rate messages per second (default: 2).")
+    parser.add_argument('--exchanges', type=int, default=4, help="Number of exchanges (default: 4).")
+    parser.add_argument('--cryptos', default='BTC,ETH', help="Comma separated cryptos (default: BTC,ETH).")
+    parser.add_argument('--fiats', default='USD,EUR,GBP', help="Comma separated fiats (default: USD,EUR,GBP).")
+    parser.add_argument('--volatility', type=float, default=0.0005, help="Per-tick log return std dev (default: 0.0005).")
+    parser.add_argument('--seed', type=int, default=None, help="Random seed for a reproducible feed.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    server = MockFeedServer(
+        host=args.host,
+        port=args.port,
+        rate=args.rate,
+        cryptos=args.cryptos.split(','),
+        exchanges=args.exchanges,
+        fiats=args.fiats.split(','),
+        fx_rate=args.fx_rate,
+        volatility=args.volatility,
+        seed=args.seed
+    )
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Replay a raw frame log recorded with RECORD_FRAMES_PATH through the live strategies.
+
+Frames go through the same path as in production, so the PriceTracker, arbitrage, CSV and emit path
+sees the recorded workload without API keys or network: with TICK_CONFLATION on (the default) they are
+batched, conflated and applied through WebSocketClient like live messages, otherwise (or with --per-frame)
+every frame goes through WebSocketStrategy.process_message on its own.
+
+Usage:
+    python scripts/replay_frames.py <frame_log> [--speed N | --max-speed] [--strategy coinapi] [--per-frame]
+
+    --speed 1      real time (default), --speed 10 replays ten times faster
+    --max-speed    no pauses between frames, e.g. for profiling:
+                   python -m cProfile -s cumtime scripts/replay_frames.py day.frames --max-speed
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import time
+
+# Add the backend directory to the sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config.settings import Config
+from app.price_tracker_instance import price_tracker
+from app.external.websocket_client import ws_client
+from app.external.frame_log import replay_frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a raw exchange frame log through the strategies.")
+    parser.add_argument('frame_log', help="Path to the frame log.")
+    parser.add_argument('--speed', type=float, default=1.0, help="Replay speed multiplier (default: 1).")
+    parser.add_argument('--max-speed', action='store_true', help="Replay without pauses between frames.")
+    parser.add_argument('--strategy', action='append', choices=['coinapi', 'xchangeapi'],
+                        help="Only replay frames of this strategy (repeatable, default: all).")
+    parser.add_argument('--per-frame', action='store_true',
+                        help="Process every frame on its own instead of in conflated batches.")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.frame_log):
+        print(f"Error: Frame log '{args.frame_log}' does not exist.")
+        sys.exit(1)
+
+    strategies = ws_client.strategies
+    if args.strategy:
+        strategies = {name: strategy for name, strategy in strategies.items() if name in args.strategy}
+    client = ws_client if Config.TICK_CONFLATION and not args.per_frame else None
+
+    speed = None if args.max_speed else args.speed
+    start = time.perf_counter()
+    stats = asyncio.run(replay_frames(args.frame_log, strategies, speed, client=client,
+                                      max_batch=Config.TICK_CONFLATION_MAX_BATCH))
+    elapsed = time.perf_counter() - start
+
+    mode = f"in {stats['batches']} conflated batches" if client else "one at a time"
+    print(f"Replayed {stats['frames']} frames {mode} in {elapsed:.2f}s "
+          f"({stats['frames'] / elapsed if elapsed else 0:.0f} frames/s), "
+          f"skipped {stats['skipped']}, errors {stats['errors']}")
+    price_tracker.csv_tracker.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+from app.external.utilities.arbitrage_matrix import ArbitrageMatrix
+from app.external.utilities.client_data_collector import DataCollector
+from app.external.utilities.fee_calc import FeeCalculator
+from app.external.utilities.price_book import PriceBook
+
+TIMESTAMP = '2023-10-01T00:00:00Z'
+RATES = {'USD': {'rate': 1.0}, 'EUR': {'rate': 1.1}, 'GBP': {'rate': 1.3}}
+EXCHANGES = ['COINBASE', 'BINANCE', 'KRAKEN', 'BITSTAMP']
+
+
+def _random_book(seed, noise=0.01):
+    rnd = random.Random(seed)
+    book = PriceBook()
+    for crypto, base in (('BTC', 50000.0), ('ETH', 3000.0)):
+        for exchange in EXCHANGES:
+            for fiat, rate in RATES.items():
+                if rnd.random() < 0.8:
+                    book.update(crypto, exchange, fiat, base / rate['rate'] * (1 + rnd.gauss(0, noise)), TIMESTAMP)
+    return book
+
+
+def _every_pair(book):
+    """Net profit of every buy/sell venue pair with the scalar FeeCalculator"""
+    pairs = []
+    for crypto, exchanges in book.to_dict().items():
+        venues = [(exchange, fiat, data['price'] * RATES[fiat]['rate'])
+                  for exchange, fiats in exchanges.items() for fiat, data in fiats.items()]
+        for buy in venues:
+            for sell in venues:
+                if buy is sell:
+                    continue
+                fees = FeeCalculator(buy[0], sell[0], crypto, 1, buy[2], sell[2], sell[1], RATES).calculate_fees()
+                pairs.append((crypto, buy[:2], sell[:2], fees['arbitrage_after_fees'], fees['total_fees']))
+    return sorted(pairs, key=lambda pair: pair[3], reverse=True)
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_top_k_matches_the_scalar_fee_calculator(seed):
+    book = _random_book(seed)
+    expected = _every_pair(book)[:10]
+    opportunities = ArbitrageMatrix(book, RATES).find_top_opportunities(top_k=10)
+    assert [opp['arbitrage_after_fees'] for opp in opportunities] == pytest.approx([pair[3] for pair in expected])
+    for opp, (crypto, buy, sell, profit, fees) in zip(opportunities, expected):
+        assert (opp['crypto'], opp['lowest_price_exchange'][1:], opp['highest_price_exchange'][1:]) == (crypto, buy, sell)
+        assert opp['total_fees'] == pytest.approx(fees)
+
+
+def test_min_net_profit_drops_losing_pairs():
+    book = _random_book(4, noise=0.0005)
+    matrix = ArbitrageMatrix(book, RATES)
+    assert any(opp['arbitrage_after_fees'] < 0 for opp in matrix.find_top_opportunities(top_k=1000))
+    profitable = matrix.find_top_opportunities(top_k=1000, min_net_profit=0.0)
+    assert all(opp['arbitrage_after_fees'] >= 0 for opp in profitable)
+    assert len(profitable) == sum(pair[3] >= 0 for pair in _every_pair(book))
+
+
+def test_matrix_mode_never_reports_losing_pairs():
+    book = PriceBook()
+    book.update('BTC', 'COINBASE', 'USD', 50000.0, TIMESTAMP)
+    book.update('BTC', 'KRAKEN', 'USD', 50010.0, TIMESTAMP)
+    collector = DataCollector(book, RATES, mode='matrix', top_k=10)
+    assert collector.get_arbitrage_data()['status'] == 'no_arbitrage'
+
+    book.update('BTC', 'KRAKEN', 'USD', 51000.0, TIMESTAMP)
+    data = collector.get_arbitrage_data()
+    assert data['status'] == 'success'
+    assert [(opp['lowest_price_exchange'], opp['highest_price_exchange']) for opp in data['opportunities']] == [
+        ('coinbase', 'kraken')]
+    assert data['opportunities'][0]['spread_percentage'] > 0
@@ -0,0 +1,91 @@
+import csv
+import os
+import subprocess
+import sys
+import textwrap
+
+from app.external.utilities.async_csv_writer import AsyncCSVWriter
+
+FIELDNAMES = ['crypto', 'price']
+
+
+def _read(path):
+    with open(path, newline='') as file:
+        return list(csv.DictReader(file))
+
+
+def test_rows_are_on_disk_after_flush(tmp_path):
+    writer = AsyncCSVWriter(batch_size=1000, flush_interval=60.0)
+    path = str(tmp_path / 'prices.csv')
+    assert writer.submit(path, FIELDNAMES, [{'crypto': 'BTC', 'price': 1}])
+    assert writer.submit(path, FIELDNAMES, [{'crypto': 'ETH', 'price': 2}])
+    assert writer.flush(timeout=5)
+    assert _read(path) == [{'crypto': 'BTC', 'price': '1'}, {'crypto': 'ETH', 'price': '2'}]
+
+    # Appending to an existing file does not repeat the header
+    writer.close()
+    writer = AsyncCSVWriter()
+    writer.submit(path, FIELDNAMES, [{'crypto': 'SOL', 'price': 3}])
+    writer.close()
+    assert [row['crypto'] for row in _read(path)] == ['BTC', 'ETH', 'SOL']
+
+
+def test_max_size_only_caps_its_own_target(tmp_path):
+    writer = AsyncCSVWriter()
+    capped, uncapped = str(tmp_path / 'capped.csv'), str(tmp_path / 'uncapped.csv')
+    # The 14 byte header plus one 7 byte row reaches the 20 byte cap
+    for _ in range(3):
+        writer.submit(capped, FIELDNAMES, [{'crypto': 'BTC', 'price': 1}], max_size=20)
+        writer.submit(uncapped, FIELDNAMES, [{'crypto': 'BTC', 'price': 1}])
+        writer.flush(timeout=5)
+    writer.close()
+
+    assert len(_read(capped)) == 1
+    assert len(_read(uncapped)) == 3
+    assert writer.get_stats()['rows_dropped'] == 2
+
+
+def test_batches_are_only_counted_when_rows_were_written(tmp_path):
+    writer = AsyncCSVWriter()
+    writer.submit(str(tmp_path / 'prices.csv'), FIELDNAMES, [{'crypto': 'BTC', 'price': 1}])
+    writer.flush(timeout=5)
+    writer.flush(timeout=5)
+    writer.close()
+    stats = writer.get_stats()
+    assert (stats['rows_written'], stats['batches_flushed']) == (1, 1)
+
+
+def test_full_queue_drops_rows(tmp_path):
+    writer = AsyncCSVWriter(max_queue_size=0)
+    assert not writer.submit(str(tmp_path / 'prices.csv'), FIELDNAMES, [{'crypto': 'BTC', 'price': 1}] * 2)
+    assert writer.get_stats()['rows_dropped'] == 2
+    writer.close()
+
+
+def test_writer_runs_on_an_os_thread_under_gevent(tmp_path):
+    # monkey.patch_all() cannot be undone, so run it in a fresh interpreter
+    script = textwrap.dedent('''
+        from gevent import monkey
+        monkey.patch_all()
+        import sys
+        from app.external.utilities.async_csv_writer import AsyncCSVWriter
+
+        get_ident = monkey.get_original('_thread', 'get_ident')
+        idents = []
+
+        class RecordingWriter(AsyncCSVWriter):
+            def _flush_pending(self):
+                idents.append(get_ident())
+                super()._flush_pending()
+
+        writer = RecordingWriter()
+        writer.submit(sys.argv[1], ['crypto'], [{'crypto': 'BTC'}])
+        assert writer.flush(timeout=5)
+        writer.close()
+        assert idents and get_ident() not in idents, idents
+    ''')
+    backend = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    result = subprocess.run([sys.executable, '-c', script, str(tmp_path / 'prices.csv')], cwd=backend,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert _read(str(tmp_path / 'prices.csv')) == [{'crypto': 'BTC'}]
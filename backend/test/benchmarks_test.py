@@ -0,0 +1,55 @@
+import argparse
+import json
+
+import pytest
+
+from benchmarks.run_benchmarks import BENCHMARKS, compare, parse_scale
+from benchmarks.synthetic import make_coinapi_messages, make_price_book, make_xchange_messages
+
+
+def test_price_book_is_fully_populated():
+    book, rates = make_price_book(3, 5, 4, seed=1)
+    assert book.shape() == (3, 5, 4)
+    assert book.cryptos[:2] == ['BTC', 'ETH'] and book.exchanges[4] == 'EXCH005' and book.fiats[3] == 'F004'
+    assert set(rates) == set(book.fiats)
+    assert not (book.price_array() != book.price_array()).any()
+    # Seeded: two runs see the same prices
+    assert (make_price_book(3, 5, 4, seed=1)[0].price_array() == book.price_array()).all()
+
+
+def test_messages():
+    assert len(make_coinapi_messages(10)) == 10
+    assert json.loads(make_coinapi_messages(1)[0])['type'] == 'trade'
+    init, messages = make_xchange_messages(5)
+    assert init.startswith('0') and len(messages) == 5 and all(m.startswith('1') for m in messages)
+
+
+@pytest.mark.parametrize('name', list(BENCHMARKS))
+def test_every_benchmark_runs_at_small_scale(name, tmp_path, capsys):
+    book, rates = make_price_book(2, 4, 3)
+    fn = BENCHMARKS[name](book, rates, str(tmp_path))
+    fn, items = fn if isinstance(fn, tuple) else (fn, 1)
+    fn()
+    assert items >= 1
+
+
+def test_parse_scale():
+    assert parse_scale('small') == ('small', (2, 4, 3))
+    assert parse_scale('10x20x3') == ('10x20x3', (10, 20, 3))
+    for text in ('tiny', '10x20', '0x1x1'):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_scale(text)
+
+
+def test_compare_counts_regressions(tmp_path, capsys):
+    baseline = tmp_path / 'baseline.json'
+    baseline.write_text(json.dumps({'results': [
+        {'benchmark': 'a', 'scale': 'small', 'median_s': 1.0},
+        {'benchmark': 'b', 'scale': 'small', 'median_s': 1.0},
+        {'benchmark': 'c', 'scale': 'small', 'error': 'failed'},
+    ]}))
+    results = [{'benchmark': 'a', 'scale': 'small', 'median_s': 1.5},
+               {'benchmark': 'b', 'scale': 'small', 'median_s': 1.1},
+               {'benchmark': 'c', 'scale': 'small', 'median_s': 9.0}]
+    assert compare(results, str(baseline), threshold=0.2) == 1
+    assert 'REGRESSION' in capsys.readouterr().out
@@ -0,0 +1,5 @@
+import sys
+import os
+
+# Add the backend directory to the sys.path so the tests import the app package from any working directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -0,0 +1,93 @@
+import math
+import random
+
+import pytest
+
+from app.external.utilities.cycle_arbitrage import BUY, SELL, CycleArbitrageEngine
+from app.external.utilities.price_book import PriceBook
+
+TIMESTAMP = '2023-10-01T00:00:00Z'
+
+
+def _rates(eur=1.1, gbp=1.3):
+    return {'USD': {'rate': 1.0}, 'EUR': {'rate': eur}, 'GBP': {'rate': gbp}}
+
+
+def _consistent_book(rates, exchanges=('KRAKEN', 'BINANCE', 'BITSTAMP')):
+    book = PriceBook()
+    for exchange in exchanges:
+        for fiat, rate in rates.items():
+            book.update('BTC', exchange, fiat, 50000.0 / rate['rate'], TIMESTAMP)
+            book.update('ETH', exchange, fiat, 3000.0 / rate['rate'], TIMESTAMP)
+    return book
+
+
+def _assert_well_formed(cycle):
+    legs = cycle['legs']
+    for leg, following in zip(legs, legs[1:] + legs[:1]):
+        assert (leg['to'], leg['to_exchange']) == (following['from'], following['from_exchange'])
+    assert math.prod(leg['rate'] for leg in legs) == pytest.approx(cycle['return'])
+    assert cycle['profit'] == pytest.approx(cycle['return'] - 1)
+
+
+def test_consistent_prices_have_no_cycles():
+    rates = _rates()
+    assert CycleArbitrageEngine(_consistent_book(rates), rates).update() == []
+
+
+def test_mispriced_fiat_market_is_a_profitable_cycle():
+    rates = _rates()
+    book = _consistent_book(rates)
+    # BTC is 20% cheaper in EUR on Kraken: USD -> EUR -> BTC -> USD returns more than the taker fees
+    book.update('BTC', 'KRAKEN', 'EUR', 50000.0 / 1.1 * 0.8, TIMESTAMP)
+    engine = CycleArbitrageEngine(book, rates)
+
+    cycles = engine.find_cycles()
+    assert cycles
+    best = cycles[0]
+    _assert_well_formed(best)
+    assert best['profit'] > 0.1
+    assert best['cryptos'] == ['BTC'] and 'KRAKEN' in best['exchanges']
+    buy = next(leg for leg in best['legs'] if leg['type'] == BUY)
+    assert (buy['from'], buy['from_exchange'], buy['to']) == ('EUR', 'KRAKEN', 'BTC')
+    assert any(leg['type'] == SELL for leg in best['legs'])
+    assert [cycle['profit'] for cycle in cycles] == sorted((cycle['profit'] for cycle in cycles), reverse=True)
+
+    # The search is incremental: repricing the market back removes the cycles
+    book.update('BTC', 'KRAKEN', 'EUR', 50000.0 / 1.1, TIMESTAMP)
+    assert engine.update() == []
+
+
+def test_min_profit_and_max_cycles():
+    rates = _rates()
+    book = _consistent_book(rates)
+    book.update('BTC', 'KRAKEN', 'EUR', 50000.0 / 1.1 * 0.8, TIMESTAMP)
+    book.update('ETH', 'BINANCE', 'GBP', 3000.0 / 1.3 * 0.9, TIMESTAMP)
+    assert len(CycleArbitrageEngine(book, rates, max_cycles=1).update()) == 1
+    assert all(cycle['profit'] > 0.15 for cycle in CycleArbitrageEngine(book, rates, min_profit=0.15).update())
+
+
+def test_incremental_search_agrees_with_a_cold_search():
+    rnd = random.Random(7)
+    rates = _rates()
+    book = _consistent_book(rates)
+    engine = CycleArbitrageEngine(book, rates)
+    found = 0
+    for step in range(200):
+        for _ in range(rnd.randint(1, 3)):
+            crypto, base = rnd.choice([('BTC', 50000.0), ('ETH', 3000.0)])
+            fiat = rnd.choice(list(rates))
+            noise = 0.004 if step % 40 < 5 else 0.001
+            book.update(crypto, rnd.choice(['KRAKEN', 'BINANCE', 'BITSTAMP']), fiat,
+                        base / rates[fiat]['rate'] * (1 + rnd.gauss(0, noise)), TIMESTAMP)
+        if step % 50 == 49:
+            rates['EUR']['rate'] = 1.1 * (1 + rnd.gauss(0, 0.002))
+        incremental = engine.update()
+        cold = CycleArbitrageEngine(book, rates).update()
+        assert bool(incremental) == bool(cold)
+        for cycle in incremental:
+            _assert_well_formed(cycle)
+            assert cycle['profit'] > 0
+        found += bool(cold)
+    assert found
+    assert engine.get_stats()['updates'] == 200
@@ -0,0 +1,158 @@
+import pytest
+from flask import Flask, request
+from flask_socketio import SocketIO
+
+from app.websocket.delta_stream import DeltaStream, opportunity_id
+from app.websocket.rooms import DEFAULT_ROOMS, RoomBroadcaster, crypto_room
+from payloads import opportunity, payload
+
+
+def test_deltas_are_sequenced_and_skip_unchanged_updates():
+    stream = DeltaStream('feed:arbitrage')
+    first = stream.update(payload(opportunity()))
+    assert first['seq'] == 1
+    assert [opp['id'] for opp in first['added']] == ['BTC:coinbase:USD>kraken:EUR']
+    assert first['changed'] == [] and first['removed'] == []
+
+    assert stream.update(payload(opportunity())) is None
+    assert stream.seq == 1
+
+    second = stream.update(payload(opportunity(profit=120.0), opportunity(crypto='ETH')))
+    assert second['seq'] == 2
+    assert [opp['arbitrage_after_fees'] for opp in second['changed']] == [120.0]
+    assert [opp['crypto'] for opp in second['added']] == ['ETH']
+
+    third = stream.update(payload())
+    assert third['seq'] == 3
+    assert third['status'] == 'no_arbitrage'
+    assert sorted(third['removed']) == ['BTC:coinbase:USD>kraken:EUR', 'ETH:coinbase:USD>kraken:EUR']
+
+
+def test_state_replays_the_deltas():
+    stream = DeltaStream('feed:arbitrage')
+    replica = {}
+    for data in (payload(opportunity(), opportunity(crypto='ETH')),
+                 payload(opportunity(profit=90.0), opportunity(crypto='SOL')),
+                 payload(opportunity(crypto='SOL', profit=5.0))):
+        delta = stream.update(data)
+        for opp in delta['added'] + delta['changed']:
+            replica[opp['id']] = opp
+        for key in delta['removed']:
+            del replica[key]
+    state = stream.state()
+    assert state['seq'] == 3
+    assert {opp['id']: opp for opp in state['opportunities']} == replica
+
+
+def test_heartbeat_only_after_interval():
+    stream = DeltaStream('feed:arbitrage')
+    stream.update(payload(opportunity()))
+    assert stream.heartbeat(60.0) is None
+    heartbeat = stream.heartbeat(0.0)
+    assert heartbeat['type'] == 'arbitrage_heartbeat' and heartbeat['seq'] == 1
+
+
+@pytest.fixture
+def server():
+    app = Flask(__name__)
+    socketio = SocketIO(app, async_mode='threading')
+    rooms = RoomBroadcaster(socketio, deltas=True)
+
+    @socketio.on('connect')
+    def connect(auth=None):
+        rooms.join(request.sid, DEFAULT_ROOMS)
+        rooms.send_snapshot(request.sid)
+
+    @socketio.on('resync')
+    def resync(data=None):
+        rooms.send_snapshot(request.sid)
+
+    @socketio.on('join')
+    def join(data):
+        rooms.join(request.sid, [crypto_room(crypto) for crypto in data['cryptos']])
+
+    @socketio.on('leave')
+    def leave(data):
+        rooms.leave(request.sid, [crypto_room(crypto) for crypto in data['cryptos']])
+
+    @socketio.on('park')
+    def park(data=None):
+        rooms.park(request.sid, [crypto_room('ETH')])
+
+    return app, socketio, rooms
+
+
+def _client_data(client):
+    return [message['args'][0] for message in client.get_received() if message['name'] == 'client_data']
+
+
+def test_snapshot_on_connect_deltas_then_resync(server):
+    app, socketio, rooms = server
+    rooms.emit_client_data({'data': payload(opportunity()), 'timestamp': 't0'})  # nobody listening yet
+
+    client = socketio.test_client(app)
+    [snapshot] = _client_data(client)
+    assert snapshot['type'] == 'arbitrage_snapshot'
+    # The stream of a room without members catches up on the snapshot
+    assert snapshot['streams']['feed:arbitrage']['seq'] == 1
+    assert [opp['id'] for opp in snapshot['streams']['feed:arbitrage']['opportunities']] == [
+        opportunity_id(opportunity())]
+
+    rooms.emit_client_data({'data': payload(opportunity(profit=150.0)), 'timestamp': 't1'})
+    rooms.emit_client_data({'data': payload(opportunity(profit=150.0)), 'timestamp': 't2'})
+    [delta] = _client_data(client)
+    assert delta['type'] == 'arbitrage_delta' and delta['seq'] == 2
+    assert delta['changed'][0]['arbitrage_after_fees'] == 150.0
+
+    client.emit('resync')
+    [resync] = _client_data(client)
+    assert resync['type'] == 'arbitrage_snapshot'
+    assert resync['streams']['feed:arbitrage']['seq'] == 2
+    assert resync['streams']['feed:arbitrage']['opportunities'][0]['arbitrage_after_fees'] == 150.0
+
+
+def test_crypto_room_stream_is_dropped_once_nobody_listens(server):
+    app, socketio, rooms = server
+    client = socketio.test_client(app)
+    client.emit('join', {'cryptos': ['ETH']})
+    rooms.emit_client_data({'data': payload(opportunity(crypto='ETH')), 'timestamp': 't0'})
+    assert crypto_room('ETH') in rooms.streams
+
+    client.emit('leave', {'cryptos': ['ETH']})
+    rooms.emit_client_data({'data': payload(opportunity(crypto='ETH', profit=50.0)), 'timestamp': 't1'})
+    assert crypto_room('ETH') not in rooms.streams
+    assert 'feed:arbitrage' in rooms.streams
+    assert rooms.get_stats()['streams'] == len(rooms.streams)
+
+
+def test_parked_crypto_room_keeps_its_stream_until_forgotten(server):
+    app, socketio, rooms = server
+    client = socketio.test_client(app)
+    client.emit('join', {'cryptos': ['ETH']})
+    rooms.emit_client_data({'data': payload(opportunity(crypto='ETH')), 'timestamp': 't0'})
+    client.emit('park')
+    [sid] = rooms.parked
+
+    rooms.emit_client_data({'data': payload(opportunity(crypto='ETH', profit=50.0)), 'timestamp': 't1'})
+    assert crypto_room('ETH') in rooms.streams
+
+    rooms.forget(sid)
+    rooms.emit_client_data({'data': payload(opportunity(crypto='ETH', profit=60.0)), 'timestamp': 't2'})
+    assert crypto_room('ETH') not in rooms.streams
+
+
+def test_subscribe_crypto_rejects_untracked_cryptos():
+    from app.websocket import init_subscriptions
+    app = Flask(__name__)
+    socketio = SocketIO(app, async_mode='threading')
+    init_subscriptions(socketio)
+    client = socketio.test_client(app)
+
+    for cryptos in (['DOGE'], ['BTC', 'NOT-A-COIN'], [], [None]):
+        client.emit('subscribe_crypto', {'cryptos': cryptos})
+        [error] = [message['args'][0] for message in client.get_received() if message['name'] == 'error']
+        assert error == {'message': 'Invalid cryptos specified'}
+
+    client.emit('subscribe_crypto', {'cryptos': ['btc']})
+    assert not any(message['args'][0] == {'message': 'Invalid cryptos specified'}
+                   for message in client.get_received() if message['name'] == 'error')
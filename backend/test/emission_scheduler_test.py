@@ -0,0 +1,75 @@
+import threading
+import time
+
+from app.websocket.emission_scheduler import EmissionScheduler, parse_rates
+
+
+def test_parse_rates():
+    assert parse_rates('client_data=5, hello=0.2') == {'client_data': 5.0, 'hello': 0.2}
+    assert parse_rates('') == {} and parse_rates(None) == {}
+
+
+def test_channels_without_a_rate_publish_immediately():
+    scheduler = EmissionScheduler()
+    calls = []
+    assert all(scheduler.publish('hello', lambda i=i: calls.append(i)) for i in range(3))
+    assert calls == [0, 1, 2]
+    assert scheduler.get_stats()['hello']['immediate'] == 3
+
+
+def test_burst_is_coalesced_into_the_latest_publish():
+    scheduler = EmissionScheduler({'client_data': 20})  # 50ms cool-down
+    calls = []
+    published = threading.Event()
+
+    def publish(i):
+        calls.append(i)
+        if i == 4:
+            published.set()
+
+    assert scheduler.publish('client_data', lambda: publish(0))
+    for i in range(1, 5):
+        assert not scheduler.publish('client_data', lambda i=i: publish(i))
+    assert published.wait(2)
+    assert calls == [0, 4]
+
+    stats = scheduler.get_stats()['client_data']
+    assert stats['deferred'] == 1 and stats['coalesced'] == 3
+    assert stats['published'] == 2 and not stats['pending']
+    scheduler.stop()
+
+
+def test_priority_skips_the_cool_down_and_supersedes_pending():
+    scheduler = EmissionScheduler({'client_data': 0.01})  # 100s cool-down
+    calls = []
+    scheduler.publish('client_data', lambda: calls.append('first'))
+    assert not scheduler.publish('client_data', lambda: calls.append('deferred'))
+    assert scheduler.publish('client_data', lambda: calls.append('best'), priority=True)
+    assert calls == ['first', 'best']
+
+    stats = scheduler.get_stats()['client_data']
+    assert stats['priority'] == 1 and not stats['pending']
+    scheduler.stop()
+    assert calls == ['first', 'best']
+
+
+def test_stop_flushes_pending_publishes():
+    scheduler = EmissionScheduler(default_rate=0.01)
+    calls = []
+    scheduler.publish('cycle_arbitrage', lambda: calls.append(1))
+    scheduler.publish('cycle_arbitrage', lambda: calls.append(2))
+    start = time.monotonic()
+    scheduler.stop()
+    assert calls == [1, 2]
+    assert time.monotonic() - start < 1
+
+
+def test_errors_are_logged_not_raised():
+    scheduler = EmissionScheduler()
+
+    def fail():
+        raise RuntimeError('socket closed')
+
+    assert scheduler.publish('hello', fail)
+    stats = scheduler.get_stats()['hello']
+    assert stats['immediate'] == 1 and stats['published'] == 0
@@ -0,0 +1,75 @@
+import msgpack
+import pytest
+from flask import Flask, request
+from flask_socketio import SocketIO
+
+from app.websocket import encoding
+from app.websocket.rooms import DEFAULT_ROOMS, RoomBroadcaster
+from payloads import opportunity, payload
+
+
+def test_negotiate_falls_back_to_json():
+    assert encoding.negotiate(None) == encoding.JSON
+    assert encoding.negotiate('MsgPack') == encoding.MSGPACK
+    assert encoding.negotiate('cbor') == encoding.JSON
+    assert encoding.requested_encoding({'encoding': 'msgpack'}, {}) == 'msgpack'
+    assert encoding.requested_encoding(None, {'encoding': 'json'}) == 'json'
+    assert encoding.requested_encoding(None, None) is None
+
+
+def test_encode_round_trips_through_the_announced_table():
+    data = {'data': payload(opportunity()), 'timestamp': '2025-05-08T12:00:00+00:00'}
+    packed = msgpack.unpackb(encoding.encode(data), raw=False)
+    assert packed['ts'] == 1746705600000
+    assert packed['d']['o'][0]['c'] == 'BTC' and packed['d']['o'][0]['af'] == 100.0
+
+    table = encoding.announcement(encoding.MSGPACK)
+    assert table['fields']['af'] == 'arbitrage_after_fees'
+    assert 'ts' in table['timestamps']
+
+    def expand(value):
+        if isinstance(value, dict):
+            return {table['fields'].get(key, key): expand(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [expand(item) for item in value]
+        return value
+
+    assert expand(packed)['data'] == data['data']
+
+
+def test_unparseable_timestamps_are_kept():
+    assert encoding.compact({'timestamp': 'not a time'}) == {'ts': 'not a time'}
+
+
+@pytest.fixture
+def server():
+    app = Flask(__name__)
+    socketio = SocketIO(app, async_mode='threading')
+    rooms = RoomBroadcaster(socketio, deltas=False)
+
+    @socketio.on('connect')
+    def connect(auth=None):
+        rooms.set_encoding(request.sid, encoding.requested_encoding(auth, request.args))
+        rooms.join(request.sid, DEFAULT_ROOMS)
+
+    return app, socketio, rooms
+
+
+def _received(client, event):
+    return [message['args'][0] for message in client.get_received() if message['name'] == event]
+
+
+def test_each_client_gets_its_negotiated_encoding(server):
+    app, socketio, rooms = server
+    plain = socketio.test_client(app)
+    binary = socketio.test_client(app, auth={'encoding': 'msgpack'})
+    assert _received(plain, 'encoding') == []
+    [announced] = _received(binary, 'encoding')
+    assert announced['encoding'] == encoding.MSGPACK
+
+    rooms.emit_client_data({'data': payload(opportunity()), 'timestamp': 't0'})
+    [as_json] = _received(plain, 'client_data')
+    assert as_json['data']['opportunities'][0]['crypto'] == 'BTC'
+    [as_msgpack] = _received(binary, 'client_data')
+    assert msgpack.unpackb(as_msgpack, raw=False)['d']['o'][0]['c'] == 'BTC'
+    assert rooms.get_stats()['binary_emitted'] == 1
@@ -0,0 +1,145 @@
+import random
+
+import pytest
+
+from app.external.utilities.executable_arbitrage import ExecutableArbitrage, walk
+from app.external.utilities.order_book import OrderBook, OrderBooks
+
+RATES = {'USD': {'rate': 1.0}, 'EUR': {'rate': 1.1}, 'GBP': {'rate': 1.3}}
+
+
+def _fill(levels, quantity):
+    """Notional of taking quantity from levels (best first), None if they are too thin"""
+    notional, left = 0.0, quantity
+    for price, size in levels:
+        taken = min(size, left)
+        notional += taken * price
+        left -= taken
+        if left <= 1e-12:
+            return notional
+    return None if left > 1e-9 else notional
+
+
+def _walk(asks, bids, buy_factor, sell_factor, max_cost=0.0):
+    return walk([p for p, _ in asks], [s for _, s in asks], [p for p, _ in bids], [s for _, s in bids],
+                buy_factor, sell_factor, max_cost)
+
+
+def test_book_side_replace_and_incremental_updates():
+    book = OrderBook(max_levels=3)
+    book.apply_snapshot(bids=[(99.0, 1.0), (100.0, 2.0), (98.0, 0.0), (100.0, 3.0)],
+                        asks=[(103.0, 1.0), (101.0, 1.0), (102.0, 1.0), (104.0, 1.0)])
+    # Last of repeated prices wins, size 0 is dropped, capped at max_levels keeping the best
+    assert book.bids.levels() == [(100.0, 3.0), (99.0, 1.0)]
+    assert book.asks.levels() == [(101.0, 1.0), (102.0, 1.0), (103.0, 1.0)]
+
+    assert book.apply_update(bids=[(99.5, 1.0), (99.0, 0.0)], asks=[(100.5, 2.0), (102.0, 5.0)])
+    assert book.bids.levels() == [(100.0, 3.0), (99.5, 1.0)]
+    assert book.asks.levels() == [(100.5, 2.0), (101.0, 1.0), (102.0, 5.0)]
+    assert book.is_ready
+
+    assert book.depth() == ([100.0, 99.5], [3.0, 1.0], [100.5, 101.0, 102.0], [2.0, 1.0, 5.0], 4.0, 8.0)
+
+
+def test_crossed_books_and_updates_before_a_snapshot():
+    books = OrderBooks()
+    assert not books.apply('BTC', 'KRAKEN', 'USD', bids=[(100.0, 1.0)], asks=[])
+    assert books.get_stats()['messages'] == {'snapshot': 0, 'update': 0, 'ignored': 1}
+
+    assert books.apply('BTC', 'KRAKEN', 'USD', bids=[(100.0, 1.0)], asks=[(101.0, 1.0)], snapshot=True)
+    assert books.apply('BTC', 'KRAKEN', 'USD', bids=[(101.0, 1.0)], asks=[])
+    assert books.get('BTC', 'KRAKEN', 'USD')['crossed']
+    assert books.depth() == {}
+
+    assert books.apply('BTC', 'KRAKEN', 'USD', bids=[], asks=[(101.0, 0.0), (102.0, 1.0)])
+    assert list(books.depth()) == [('BTC', 'KRAKEN', 'USD')]
+    assert books.version == 3
+
+
+def test_walk_stops_at_the_last_profitable_unit():
+    asks = [(100.0, 1.0), (101.0, 1.0), (103.0, 5.0)]
+    bids = [(104.0, 0.5), (102.0, 2.0), (99.0, 5.0)]
+    size, buy_notional, sell_notional, ask_levels, bid_levels = _walk(asks, bids, 1.0, 1.0)
+    # 0.5 @100 vs 104, 0.5 @100 vs 102, 1 @101 vs 102, then 103 > 102
+    assert size == 2.0
+    assert buy_notional == pytest.approx(100.0 + 101.0)
+    assert sell_notional == pytest.approx(0.5 * 104.0 + 1.5 * 102.0)
+    assert (ask_levels, bid_levels) == (2, 2)
+
+    assert _walk(asks, bids, 1.05, 1.0)[0] == 0.0
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_walk_is_profit_maximizing(seed):
+    rnd = random.Random(seed)
+    for _ in range(100):
+        asks = sorted((100 + rnd.random() * 2, rnd.random() * 2) for _ in range(rnd.randint(1, 8)))
+        bids = sorted(((100.5 + rnd.random() * 2, rnd.random() * 2) for _ in range(rnd.randint(1, 8))), reverse=True)
+        buy_factor, sell_factor = 1.001, 0.999
+
+        size, buy_notional, sell_notional, _, _ = _walk(asks, bids, buy_factor, sell_factor)
+        profit = sell_notional * sell_factor - buy_notional * buy_factor
+        assert buy_notional == pytest.approx(_fill(asks, size))
+        assert sell_notional == pytest.approx(_fill(bids, size))
+
+        # The optimum is at a level boundary of one of the sides
+        boundaries, total = {0.0}, 0.0
+        for levels in (asks, bids):
+            total = 0.0
+            for _, level_size in levels:
+                total += level_size
+                boundaries.add(total)
+        candidates = []
+        for quantity in boundaries:
+            cost, proceeds = _fill(asks, quantity), _fill(bids, quantity)
+            if cost is not None and proceeds is not None:
+                candidates.append(proceeds * sell_factor - cost * buy_factor)
+        assert profit >= max(candidates) - 1e-9
+
+        capped = _walk(asks, bids, buy_factor, sell_factor, max_cost=50.0)
+        assert capped[1] * buy_factor <= 50.0 + 1e-7
+        assert capped[0] <= size + 1e-12
+
+
+def test_executable_opportunity_uses_vwaps_and_fees():
+    books = OrderBooks()
+    books.apply('BTC', 'COINBASE', 'USD', bids=[(49990.0, 1.0)],
+                asks=[(50000.0, 0.5), (50050.0, 1.0), (50200.0, 3.0)], snapshot=True)
+    books.apply('BTC', 'KRAKEN', 'EUR', bids=[(46000.0, 0.3), (45950.0, 0.8), (45700.0, 2.0)],
+                asks=[(46010.0, 1.0)], snapshot=True)
+    engine = ExecutableArbitrage(books, RATES)
+
+    [opportunity] = engine.find_top_opportunities(top_k=5)
+    assert opportunity['lowest_price_exchange'] == ('BTC', 'COINBASE', 'USD')
+    assert opportunity['highest_price_exchange'] == ('BTC', 'KRAKEN', 'EUR')
+    size = opportunity['size']
+    assert opportunity['buy_vwap'] == pytest.approx(_fill([(50000.0, 0.5), (50050.0, 1.0), (50200.0, 3.0)], size) / size)
+    assert opportunity['sell_vwap'] == pytest.approx(
+        _fill([(46000.0, 0.3), (45950.0, 0.8), (45700.0, 2.0)], size) / size)
+    assert opportunity['highest_price'] == pytest.approx(opportunity['sell_vwap'] * 1.1)
+    gross = (opportunity['highest_price'] - opportunity['lowest_price']) * size
+    assert opportunity['arbitrage_after_fees'] == pytest.approx(gross - opportunity['total_fees'])
+    assert opportunity['total_fees'] > 0
+
+    capped = ExecutableArbitrage(books, RATES, max_notional_usd=10000.0).find_top_opportunities()
+    assert capped[0]['size'] * capped[0]['buy_vwap'] <= 10000.0 + 1e-6
+    assert capped[0]['size'] < size
+
+
+def test_top_k_pruning_keeps_the_best_pairs():
+    rnd = random.Random(3)
+    books = OrderBooks()
+    for crypto, base in (('BTC', 50000.0), ('ETH', 3000.0)):
+        for exchange in ('COINBASE', 'BINANCE', 'KRAKEN', 'BITSTAMP'):
+            for fiat, rate in RATES.items():
+                mid = base / rate['rate'] * (1 + rnd.gauss(0, 0.01))
+                books.apply(crypto, exchange, fiat,
+                            bids=[(mid * (1 - 0.0005 * level), rnd.random()) for level in range(1, 11)],
+                            asks=[(mid * (1 + 0.0005 * level), rnd.random()) for level in range(1, 11)],
+                            snapshot=True)
+    engine = ExecutableArbitrage(books, RATES)
+    every_pair = engine.find_top_opportunities(top_k=10000)
+    assert len(every_pair) > 5
+    profits = [opp['arbitrage_after_fees'] for opp in every_pair]
+    assert profits == sorted(profits, reverse=True)
+    assert [opp['arbitrage_after_fees'] for opp in engine.find_top_opportunities(top_k=5)] == profits[:5]
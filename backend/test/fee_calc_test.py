@@ -0,0 +1,59 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from app.external.utilities.exchange_fee_structure_data import fee_structures
+from app.external.utilities.fee_calc import FeeCalculator, FeeSchedule
+
+RATES = {'USD': {'rate': 1.0}, 'EUR': {'rate': 1.1}, 'GBP': 1.3}
+EXCHANGES = ['coinbase', 'binance', 'bitstamp', 'kraken']
+KEYS = ['trading_fee_buy', 'payment_fee', 'trading_fee_sell', 'withdrawal_fee', 'total_fees',
+        'price_arbitrage', 'arbitrage_after_fees']
+
+
+def test_batch_matches_scalar_calculator():
+    # Fiat withdrawals plus withdrawing the crypto itself
+    combos = [(buy, sell, crypto, currency)
+              for buy, sell, crypto in itertools.product(EXCHANGES, EXCHANGES, ['BTC', 'ETH'])
+              for currency in ('USD', 'EUR', 'GBP', crypto)]
+    buy, sell, crypto, currency = (list(column) for column in zip(*combos))
+    amount = np.linspace(0.5, 2.0, len(combos))
+    price_buy = np.linspace(30000.0, 31000.0, len(combos))
+    price_sell = price_buy * 1.01
+
+    batch = FeeCalculator.calculate_fees_batch(buy, sell, crypto, amount, price_buy, price_sell, currency, RATES)
+    for index, combo in enumerate(combos):
+        fees = FeeCalculator(combo[0], combo[1], combo[2], amount[index], price_buy[index], price_sell[index],
+                             combo[3], RATES).calculate_fees()
+        for key in KEYS:
+            assert batch[key][index] == pytest.approx(fees[key]), (combo, key)
+
+
+def test_batch_broadcasts_scalars():
+    batch = FeeCalculator.calculate_fees_batch('coinbase', ['kraken', 'binance'], 'BTC', 1,
+                                               50000.0, [50500.0, 50600.0], 'USD', RATES)
+    assert batch['total_fees'].shape == (2,)
+    assert batch['price_arbitrage'].tolist() == [500.0, 600.0]
+
+
+def test_unknown_names_and_rates_are_nan():
+    batch = FeeCalculator.calculate_fees_batch(['nowhere', 'coinbase', 'coinbase'], ['kraken', 'nowhere', 'kraken'],
+                                               'BTC', 1, 50000.0, 50500.0, ['USD', 'USD', 'JPY'], RATES)
+    assert np.isnan(batch['total_fees']).tolist() == [True, True, True]
+    assert not np.isnan(batch['trading_fee_sell'][2])
+
+
+def test_schedule_lookups():
+    schedule = FeeSchedule()
+    assert schedule.exchange_index(['KRAKEN', 'coinbase', 'nowhere']).tolist() == [
+        schedule.exchanges.index('kraken'), schedule.exchanges.index('coinbase'), -1]
+    assert schedule.fiat_index(np.array([['usd', 'JPY']], dtype=object)).tolist() == [[schedule.fiat_ids['USD'], -1]]
+
+    kraken = schedule.exchange_ids['kraken']
+    assert schedule.trading_fees[kraken].tolist() == [fee_structures['kraken']['trading_fee_buy'],
+                                                      fee_structures['kraken']['trading_fee_sell']]
+    # First listed fiat withdrawal method, e.g. ACH rather than wire for Coinbase USD
+    assert schedule.fiat_withdrawal[schedule.exchange_ids['coinbase'], schedule.fiat_ids['USD']] == 0.0
+    assert schedule.crypto_withdrawal[schedule.exchange_ids['binance'], schedule.crypto_ids['BTC']] == 0.0005
+    assert np.isnan(schedule.trading_fees[-1]).all()
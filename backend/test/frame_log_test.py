@@ -0,0 +1,92 @@
+import asyncio
+
+from app.config.settings import Config
+from app.external.frame_log import FrameRecorder, read_frames, replay_frames
+from app.external.strategies.base_strategy import ConflatingStrategy
+from app.external.tick_conflator import TickConflator
+from app.types.tick import RateTick
+
+
+class _RateStrategy(ConflatingStrategy):
+    """'EUR=1.1' frames are rate ticks, anything else goes through process_message"""
+
+    def __init__(self):
+        self.processed = []
+        self.applied = []
+
+    def get_connection_params(self):
+        return {'uri': 'wss://example'}
+
+    def format_auth_message(self):
+        return {}
+
+    async def process_message(self, message):
+        self.processed.append(message)
+        return {'message': message}
+
+    def parse_tick(self, message):
+        if '=' not in message:
+            return None
+        pair, rate = message.split('=')
+        return RateTick(pair, float(rate))
+
+    def apply_ticks(self, ticks):
+        self.applied.append([(tick.pair, tick.rate) for tick in ticks])
+
+    def get_supported_pairs(self):
+        return []
+
+    def get_name(self):
+        return 'rates'
+
+
+def _record(path, frames):
+    recorder = FrameRecorder(str(path))
+    for strategy, message in frames:
+        recorder.record(strategy, message)
+    recorder.close()
+
+
+def test_frames_round_trip_across_sessions(tmp_path):
+    path = tmp_path / 'day.frames'
+    _record(path, [('coinapi', '{"price": 1}'), ('xchangeapi', b'\x00\x01')])
+    _record(path, [('xchangeapi', 'EUR=1.1')])
+    frames = list(read_frames(str(path)))
+    assert [(frame.strategy, frame.message, frame.session) for frame in frames] == [
+        ('coinapi', '{"price": 1}', 0), ('xchangeapi', b'\x00\x01', 0), ('xchangeapi', 'EUR=1.1', 1)]
+
+    # A record cut off by a crash is ignored
+    with open(path, 'ab') as file:
+        file.write(b'\x00\x01')
+    assert len(list(read_frames(str(path)))) == 3
+
+
+def test_per_frame_replay(tmp_path):
+    path = tmp_path / 'day.frames'
+    _record(path, [('rates', 'EUR=1.1'), ('other', 'x'), ('rates', 'EUR=1.2')])
+    strategy = _RateStrategy()
+    results = []
+    stats = asyncio.run(replay_frames(str(path), {'rates': strategy}, speed=None,
+                                      on_result=lambda name, data: results.append(data)))
+    assert strategy.processed == ['EUR=1.1', 'EUR=1.2']
+    assert (stats['frames'], stats['skipped'], stats['batches']) == (2, 1, 0)
+    assert len(results) == 2
+
+
+def test_client_replay_conflates_through_the_batch_path(tmp_path, monkeypatch):
+    from app.external.websocket_client import WebSocketClient
+
+    monkeypatch.setattr(Config, 'TICK_CONFLATION', True)
+    path = tmp_path / 'day.frames'
+    _record(path, [('rates', 'hello'), ('rates', 'EUR=1.1'), ('rates', 'GBP=1.3'), ('rates', 'EUR=1.2'),
+                   ('other', 'x'), ('rates', 'EUR=1.3')])
+    strategy = _RateStrategy()
+    client = WebSocketClient()
+    client.strategies = {'rates': strategy}
+    client.conflators = {'rates': TickConflator()}
+
+    stats = asyncio.run(replay_frames(str(path), client.strategies, speed=None, client=client, max_batch=3))
+    assert strategy.processed == ['hello']
+    assert strategy.applied == [[('EUR', 1.1), ('GBP', 1.3)], [('EUR', 1.3)]]
+    assert (stats['frames'], stats['skipped'], stats['batches']) == (5, 1, 2)
+    assert client.get_conflation_stats()['rates']['ticks_merged'] == 1
@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from app.external.utilities.cross_exchange_fiat_arbitrage import CrossExchangeFiatArbitrage
+from app.external.utilities.incremental_arbitrage import IncrementalArbitrageEngine
+
+TIMESTAMP = '2023-10-01T00:00:00Z'
+CRYPTOS = {'BTC': 50000.0, 'ETH': 3000.0, 'SOL': 150.0}
+EXCHANGES = ['COINBASE', 'BINANCE', 'KRAKEN', 'BITSTAMP']
+FIATS = {'USD': 1.0, 'EUR': 1.1, 'GBP': 1.3}
+
+
+def _assert_matches_rescan(engine, price_data, rates):
+    expected = CrossExchangeFiatArbitrage(price_data, rates).find_lowest_and_highest_price()
+    actual = engine.find_lowest_and_highest_price()
+    assert ([(opp['crypto'], opp['lowest_price_exchange'], opp['highest_price_exchange']) for opp in actual] ==
+            [(opp['crypto'], opp['lowest_price_exchange'], opp['highest_price_exchange']) for opp in expected])
+    for got, want in zip(actual, expected):
+        for key in ('lowest_price', 'highest_price', 'spread'):
+            assert got[key] == pytest.approx(want[key])
+
+
+def test_matches_full_rescan_through_ticks_and_fx_updates():
+    rnd = random.Random(7)
+    rates = {fiat: {'rate': rate, 'timestamp': TIMESTAMP} for fiat, rate in FIATS.items()}
+    price_data = {}
+    engine = IncrementalArbitrageEngine(rates)
+
+    for step in range(2000):
+        crypto = rnd.choice(list(CRYPTOS))
+        exchange = rnd.choice(EXCHANGES)
+        fiat = rnd.choice(list(FIATS))
+        price = CRYPTOS[crypto] / FIATS[fiat] * (1 + rnd.gauss(0, 0.005))
+        price_data.setdefault(crypto, {}).setdefault(exchange, {})[fiat] = {'price': price, 'timestamp': TIMESTAMP}
+        engine.update_price(crypto, exchange, fiat, price)
+        if step % 100 == 99:
+            fiat = rnd.choice(['EUR', 'GBP'])
+            rates[fiat] = {'rate': FIATS[fiat] * (1 + rnd.gauss(0, 0.01)), 'timestamp': TIMESTAMP}
+            engine.update_exchange_rate(fiat, rates[fiat])
+        if step % 25 == 0:
+            _assert_matches_rescan(engine, price_data, rates)
+
+    _assert_matches_rescan(engine, price_data, rates)
+
+
+def test_fx_update_reranks_venues():
+    engine = IncrementalArbitrageEngine({'EUR': 1.1, 'GBP': 1.3})
+    engine.update_price('BTC', 'COINBASE', 'USD', 50000.0)
+    engine.update_price('BTC', 'BINANCE', 'EUR', 45500.0)
+    engine.update_price('BTC', 'KRAKEN', 'GBP', 38000.0)
+    assert engine.get_opportunity('BTC')['lowest_price_exchange'] == ('BTC', 'KRAKEN', 'GBP')
+
+    engine.update_exchange_rate('GBP', 1.4)
+    opportunity = engine.get_opportunity('BTC')
+    assert opportunity['lowest_price_exchange'] == ('BTC', 'COINBASE', 'USD')
+    assert opportunity['highest_price_exchange'] == ('BTC', 'KRAKEN', 'GBP')
+    assert opportunity['highest_price'] == pytest.approx(38000.0 * 1.4)
+
+
+def test_invalid_rate_excludes_fiat_and_single_venue_has_no_spread():
+    engine = IncrementalArbitrageEngine({'EUR': 1.1})
+    engine.update_price('BTC', 'COINBASE', 'USD', 50000.0)
+    assert engine.find_lowest_and_highest_price() == []
+
+    engine.update_price('BTC', 'BINANCE', 'EUR', 46000.0)
+    assert engine.get_opportunity('BTC')['highest_price_exchange'] == ('BTC', 'BINANCE', 'EUR')
+
+    engine.update_exchange_rate('EUR', {'rate': None})
+    assert engine.get_opportunity('BTC') is None
+
+
+def test_replaced_price_drops_stale_extreme():
+    engine = IncrementalArbitrageEngine()
+    engine.update_price('BTC', 'COINBASE', 'USD', 50000.0)
+    engine.update_price('BTC', 'KRAKEN', 'USD', 51000.0)
+    engine.update_price('BTC', 'KRAKEN', 'USD', 49000.0)
+    opportunity = engine.get_opportunity('BTC')
+    assert opportunity['lowest_price_exchange'] == ('BTC', 'KRAKEN', 'USD')
+    assert opportunity['highest_price_exchange'] == ('BTC', 'COINBASE', 'USD')
+
+    engine.remove_price('BTC', 'COINBASE', 'USD')
+    assert engine.get_opportunity('BTC') is None
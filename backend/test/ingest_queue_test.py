@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from app.external.ingest_queue import IngestQueue
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        IngestQueue(policy='drop_newest')
+
+
+def test_batches_keep_arrival_order():
+    async def scenario():
+        queue = IngestQueue(maxsize=10)
+        for item in range(5):
+            await queue.put(item)
+        return await queue.get_batch(3), await queue.get_batch(10)
+
+    assert _run(scenario()) == ([0, 1, 2], [3, 4])
+
+
+def test_drop_oldest_makes_room():
+    async def scenario():
+        queue = IngestQueue(maxsize=2, policy='drop_oldest')
+        for item in range(4):
+            await queue.put(item)
+        return queue, await queue.get_batch(10)
+
+    queue, batch = _run(scenario())
+    assert batch == [2, 3]
+    assert (queue.dropped, queue.blocked) == (2, 0)
+
+
+def test_conflate_replaces_queued_item_in_place():
+    async def scenario():
+        queue = IngestQueue(maxsize=10, policy='conflate')
+        await queue.put('btc-1', key='BTC')
+        await queue.put('eth-1', key='ETH')
+        await queue.put('auth')
+        await queue.put('auth')
+        await queue.put('btc-2', key='BTC')
+        first = await queue.get_batch(10)
+        # Once consumed a key starts a new entry
+        await queue.put('btc-3', key='BTC')
+        return queue, first, await queue.get_batch(10)
+
+    queue, first, second = _run(scenario())
+    assert first == ['btc-2', 'eth-1', 'auth', 'auth']
+    assert second == ['btc-3']
+    assert queue.conflated == 1
+
+
+def test_block_waits_for_the_consumer():
+    async def scenario():
+        queue = IngestQueue(maxsize=2, policy='block')
+        await queue.put(0)
+        await queue.put(1)
+        producer = asyncio.ensure_future(queue.put(2))
+        await asyncio.sleep(0)
+        assert not producer.done()
+        batch = await queue.get_batch(1)
+        await asyncio.wait_for(producer, 1)
+        return queue, batch + await queue.get_batch(10)
+
+    queue, items = _run(scenario())
+    assert items == [0, 1, 2]
+    stats = queue.get_stats()
+    assert (stats['blocked'], stats['dropped'], stats['max_depth'], stats['enqueued']) == (1, 0, 2, 3)
@@ -0,0 +1,62 @@
+import math
+import time
+
+from app.metrics import Histogram, MetricsRegistry
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = Histogram([1.0, 2.0, 4.0])
+    assert histogram.quantile(0.5) is None
+    for value in (0.5, 1.0, 1.5, 3.0, 10.0):
+        histogram.observe(value)
+    # Bounds are inclusive upper limits, values past the last bound go to +Inf
+    assert histogram.counts == [2, 1, 1, 1]
+    assert (histogram.count, histogram.sum) == (5, 16.0)
+    assert histogram.quantile(0.4) == 1.0
+    assert histogram.quantile(0.6) == 2.0
+    assert histogram.quantile(1.0) == math.inf
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry(enabled=False)
+    registry.observe('emit', 0.1)
+    with registry.time('csv'):
+        pass
+    registry.count_message('coinapi')
+    registry.observe_lag('coinapi', time.time())
+    assert registry.summary()['emit']['count'] == 0
+    assert registry.summary()['csv']['count'] == 0
+    assert (registry.messages, registry.lag) == ({}, {})
+
+
+def test_stage_timer_and_lag():
+    registry = MetricsRegistry()
+    with registry.time('parse'):
+        pass
+    registry.observe_lag('coinapi', time.time() - 0.5)
+    registry.observe_lag('coinapi', float('nan'))
+    assert registry.summary()['parse']['count'] == 1
+    assert registry.lag['coinapi'].count == 1
+    assert 0.5 <= registry.lag['coinapi'].sum < 5.0
+
+
+def test_render_prometheus():
+    registry = MetricsRegistry()
+    registry.observe('emit', 3e-6)
+    registry.count_message('coinapi')
+    registry.count_message('coinapi')
+    registry.register_collector(lambda: [('arbitrage_ingest_queue_depth', 'gauge', 'Depth.',
+                                          [({'strategy': 'coinapi'}, 7)])])
+    registry.register_collector(lambda: 1 / 0)
+    text = registry.render_prometheus()
+    lines = text.splitlines()
+
+    assert 'arbitrage_stage_latency_seconds_bucket{stage="emit",le="2e-06"} 0' in lines
+    assert 'arbitrage_stage_latency_seconds_bucket{stage="emit",le="4e-06"} 1' in lines
+    assert 'arbitrage_stage_latency_seconds_bucket{stage="emit",le="+Inf"} 1' in lines
+    assert 'arbitrage_stage_latency_seconds_count{stage="emit"} 1' in lines
+    assert 'arbitrage_stage_latency_seconds_count{stage="csv"} 0' in lines
+    assert 'arbitrage_messages_total{strategy="coinapi"} 2' in lines
+    assert '# TYPE arbitrage_ingest_queue_depth gauge' in lines
+    assert 'arbitrage_ingest_queue_depth{strategy="coinapi"} 7' in lines
+    assert text.endswith('\n')
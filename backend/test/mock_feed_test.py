@@ -0,0 +1,58 @@
+import asyncio
+import json
+
+import websockets
+
+from app.external.mock_feed import MockFeedServer
+from app.processors.coinapi_processor import CoinAPIProcessor
+from app.processors.symbol_table import SymbolTable
+
+
+def test_every_symbol_is_supported_by_the_coinapi_processor():
+    feed = MockFeedServer(exchanges=5, seed=1)
+    assert len(feed.symbols) == 5 * 2 * 3
+    processor = CoinAPIProcessor(price_tracker=None, symbol_table=SymbolTable())
+    ticks = [processor.parse_message(json.loads(feed.trade_message())) for _ in range(200)]
+    assert all(ticks)
+    assert {tick.exchange for tick in ticks} == {'COINBASE', 'BINANCE', 'KRAKEN', 'BITSTAMP', 'EXCH5'}
+
+
+def test_book_stream_removes_levels_that_moved_away():
+    feed = MockFeedServer(seed=2, volatility=0.01)
+    symbol, sent = feed.symbols[0], {}
+    snapshot = json.loads(feed.book_message('book', sent, symbol))
+    assert snapshot['is_snapshot'] and len(snapshot['bids']) == len(snapshot['asks']) == 10
+
+    feed.prices[symbol] *= 1.01
+    update = json.loads(feed.book_message('book', sent, symbol))
+    assert not update['is_snapshot']
+    removed = {level['price'] for level in update['bids'] if level['size'] == 0}
+    assert removed == {level['price'] for level in snapshot['bids']} - {
+        level['price'] for level in update['bids'] if level['size']}
+
+    quote = json.loads(feed.book_message('quote', sent, symbol))
+    assert quote['bid_price'] < quote['ask_price']
+    assert len(json.loads(feed.book_message('book5', sent, symbol))['asks']) == 5
+
+
+def test_server_speaks_both_protocols():
+    async def scenario():
+        feed = MockFeedServer(port=0, rate=200.0, fx_rate=50.0, seed=3)
+        await feed.start()
+        port = feed._server.sockets[0].getsockname()[1]
+        try:
+            async with websockets.connect(f"ws://localhost:{port}/coinapi") as websocket:
+                await websocket.send(json.dumps({'type': 'hello', 'subscribe_data_type': ['trade']}))
+                trade = json.loads(await asyncio.wait_for(websocket.recv(), 5))
+            async with websockets.connect(f"ws://localhost:{port}/xchangeapi") as websocket:
+                await websocket.send(json.dumps({'pairs': ['EURUSD']}))
+                init = await asyncio.wait_for(websocket.recv(), 5)
+                rate = await asyncio.wait_for(websocket.recv(), 5)
+        finally:
+            await feed.stop()
+        return trade, init, rate
+
+    trade, init, rate = asyncio.run(scenario())
+    assert trade['type'] == 'trade' and trade['symbol_id'] in MockFeedServer(seed=3).symbols
+    assert init[0] == '0' and json.loads(init[1:])['mapping'] == {'0': 'EURUSD'}
+    assert rate.startswith('10|') and len(rate.split('|')) == 4
@@ -0,0 +1,70 @@
+import random
+
+import pytest
+
+from app.external.utilities.cross_exchange_fiat_arbitrage import CrossExchangeFiatArbitrage
+from app.external.utilities.exchange_arbitrage import ExchangeArbitrage
+from app.external.utilities.exchange_spread import ExchangeSpread
+from app.external.utilities.multi_strategy import MultiStrategyEvaluator
+from app.external.utilities.price_book import PriceBook
+
+TIMESTAMP = '2023-10-01T00:00:00+00:00'
+RATES = {'USD': {'rate': 1.0}, 'EUR': {'rate': 1.1}, 'GBP': {'rate': 1.3}}
+
+
+def _book(seed=7):
+    rnd = random.Random(seed)
+    book = PriceBook()
+    for _ in range(300):
+        fiat = rnd.choice(list(RATES))
+        book.update(rnd.choice(['BTC', 'ETH', 'SOL']), rnd.choice(['BINANCE', 'COINBASE', 'KRAKEN']), fiat,
+                    100.0 / RATES[fiat]['rate'] * (1 + rnd.gauss(0, 0.01)), TIMESTAMP)
+    return book
+
+
+def test_families_match_the_per_strategy_classes():
+    book = _book()
+    price_data = book.to_dict()
+    results = MultiStrategyEvaluator(book, RATES).evaluate()
+
+    spread = ExchangeSpread()
+    spread.update_spreads(price_data)
+    assert results['spread_highest'] == spread.get_highest_prices()
+    assert results['spread_lowest'] == spread.get_lowest_prices()
+
+    for crypto, exchanges in price_data.items():
+        for exchange, fiats in exchanges.items():
+            expected = ExchangeArbitrage({crypto: {exchange: fiats}}, RATES).find_lowest_and_highest_price()
+            actual = results['same_exchange'].get((crypto, exchange))
+            if expected is None or expected['highest_price'] <= expected['lowest_price']:
+                assert actual is None
+            else:
+                assert actual == pytest.approx(expected)
+
+    expected = CrossExchangeFiatArbitrage(price_data, RATES).find_lowest_and_highest_price()
+    assert [opp['crypto'] for opp in results['cross_exchange']] == [opp['crypto'] for opp in expected]
+    for actual, opportunity in zip(results['cross_exchange'], expected):
+        assert actual == pytest.approx(opportunity)
+
+
+def test_requested_families_only():
+    book = _book()
+    spread_only = MultiStrategyEvaluator(book.to_dict(), RATES).evaluate(families=('spread',))
+    assert spread_only['spread_highest'] and not spread_only['same_exchange'] and not spread_only['cross_exchange']
+
+    same_exchange = MultiStrategyEvaluator(book, RATES).evaluate(families=('same_exchange',))
+    assert same_exchange['same_exchange'] and not same_exchange['spread_highest']
+    assert same_exchange['cross_exchange'] == []
+
+
+def test_empty_book_and_missing_rates():
+    assert MultiStrategyEvaluator(PriceBook(), RATES).evaluate() == {
+        'spread_highest': {}, 'spread_lowest': {}, 'same_exchange': {}, 'cross_exchange': []}
+
+    book = PriceBook()
+    book.update('BTC', 'COINBASE', 'USD', 50000.0, TIMESTAMP)
+    book.update('BTC', 'COINBASE', 'EUR', 40000.0, TIMESTAMP)
+    # Without an EUR rate only the USD price counts, so there is no same-exchange spread
+    results = MultiStrategyEvaluator(book, {}).evaluate()
+    assert results['same_exchange'] == {}
+    assert results['spread_lowest']['BTC']['EUR']['price'] == 40000.0
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+from flask import Flask
+from flask_socketio import SocketIO
+
+from app.external.price_tracker import PriceTracker
+from app.external.utilities.opportunity_lifecycle import OpportunityLifecycle, message
+from app.websocket.emission_scheduler import EmissionScheduler
+from payloads import opportunity, payload
+
+START = datetime(2025, 5, 8, 12, 0, 0)
+
+
+def _at(seconds):
+    return START + timedelta(seconds=seconds)
+
+
+def test_open_update_close():
+    lifecycle = OpportunityLifecycle(min_profit=0.0, update_threshold=0.1)
+
+    [opened] = lifecycle.update(payload(opportunity(profit=100.0)), _at(0))
+    assert opened['event'] == 'open'
+    assert opened['id'] == 'BTC:coinbase:USD>kraken:EUR'
+    assert opened['closed_at'] is None
+
+    # Within 10% of the last reported profit: no event, but the peak is tracked
+    assert lifecycle.update(payload(opportunity(profit=105.0)), _at(1)) == []
+    [updated] = lifecycle.update(payload(opportunity(profit=120.0)), _at(2))
+    assert updated['event'] == 'update'
+    assert updated['net_profit'] == 120.0 and updated['observations'] == 3
+
+    [closed] = lifecycle.update(payload(), _at(5))
+    assert closed['event'] == 'close'
+    assert closed['duration_seconds'] == 5.0
+    assert closed['peak_net_profit'] == 120.0 and closed['peak_at'] == _at(2).isoformat()
+    assert closed['closed_at'] == _at(5).isoformat()
+
+    assert lifecycle.get_stats() == {'open': 0, 'events': {'open': 1, 'update': 1, 'close': 1},
+                                     'mean_duration_seconds': 5.0}
+
+
+def test_min_profit_opens_and_closes():
+    lifecycle = OpportunityLifecycle(min_profit=50.0)
+    assert lifecycle.update(payload(opportunity(profit=40.0)), _at(0)) == []
+    assert [event['event'] for event in lifecycle.update(payload(opportunity(profit=60.0)), _at(1))] == ['open']
+    assert [event['event'] for event in lifecycle.update(payload(opportunity(profit=50.0)), _at(2))] == ['close']
+
+
+def test_trades_are_tracked_separately_and_errors_keep_them_open():
+    lifecycle = OpportunityLifecycle()
+    events = lifecycle.update(payload(opportunity(profit=100.0), opportunity(crypto='ETH', profit=80.0)), _at(0))
+    assert sorted(event['crypto'] for event in events) == ['BTC', 'ETH']
+
+    assert lifecycle.update({'status': 'error', 'message': 'boom'}, _at(1)) == []
+    assert lifecycle.get_stats()['open'] == 2
+
+    [closed] = lifecycle.update(payload(opportunity(profit=100.0)), _at(2))
+    assert closed['crypto'] == 'ETH' and closed['event'] == 'close'
+
+    snapshot = message(lifecycle.get_open(), snapshot=True)
+    assert snapshot['type'] == 'lifecycle_snapshot'
+    assert [event['crypto'] for event in snapshot['events']] == ['BTC']
+
+
+def test_price_tracker_feeds_every_triggered_update_not_just_emits():
+    tracker = PriceTracker(SocketIO(Flask(__name__), async_mode='threading'))
+    tracker.exchange_rates['EUR']['rate'] = 1.1
+    tracker.exchange_rates['GBP']['rate'] = 1.3
+    # Emits that are not a new best opportunity wait out a long cool-down
+    tracker.emission_scheduler = EmissionScheduler({'client_data': 0.001})
+    events = []
+    tracker.csv_tracker.write_lifecycle_events = events.extend
+
+    timestamp = START.isoformat()
+    tracker.update_price('BTC', 'COINBASE', 50000.0, timestamp, 'USD')
+    tracker.update_price('BTC', 'KRAKEN', 52000.0, timestamp, 'USD')
+    tracker.update_price('BTC', 'KRAKEN', 50000.0, timestamp, 'USD')
+    assert [(event['event'], event['id']) for event in events] == [
+        ('open', 'BTC:coinbase:USD>kraken:USD'), ('close', 'BTC:coinbase:USD>kraken:USD')]
+    assert events[1]['peak_net_profit'] > 0
+    # The first update and the new best opportunity went out, the close is still waiting for its emit
+    stats = tracker.emission_scheduler.get_stats()['client_data']
+    assert stats['published'] == 2 and stats['pending']
+    tracker.emission_scheduler.stop(flush=False)
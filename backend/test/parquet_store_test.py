@@ -0,0 +1,78 @@
+import os
+import time
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from app.external.utilities.parquet_store import ParquetArbitrageStore, read_arbitrage_history
+
+
+def _record(crypto='BTC', profit=10.0, timestamp=None):
+    return {
+        'crypto': crypto, 'timestamp': timestamp or datetime(2025, 5, 8, 12, 0, 0),
+        'buy_exchange': 'COINBASE', 'buy_currency': 'USD', 'sell_exchange': 'KRAKEN', 'sell_currency': 'EUR',
+        'COINBASE_USD': 50000.0, 'KRAKEN_EUR': 46000.0, 'EUR_RATE_USD': 1.1,
+        'lowest_price': 50000.0, 'highest_price': 50600.0, 'arbitrage_percentage': 1.2,
+        'total_fees': 82.06, 'arbitrage_after_fees': profit, 'strategy': 'Cross-Exchange Cross-Fiat'
+    }
+
+
+def _part_files(store):
+    return sorted(os.path.relpath(os.path.join(root, name), store.base_dir)
+                  for root, _, names in os.walk(store.base_dir) for name in names)
+
+
+def test_rows_are_readable_after_flush(tmp_path):
+    store = ParquetArbitrageStore(base_dir=str(tmp_path), row_group_size=1000)
+    store.append(_record('BTC', 1.0))
+    store.append(_record('ETH', 2.0))
+    assert store.flush(timeout=5)
+
+    df = read_arbitrage_history(store.base_dir, columns=['crypto', 'arbitrage_after_fees'])
+    assert sorted(zip(df['crypto'], df['arbitrage_after_fees'])) == [('BTC', 1.0), ('ETH', 2.0)]
+    assert _part_files(store) == ['date=2025-05-08/crypto=BTC/part-00000.parquet',
+                                  'date=2025-05-08/crypto=ETH/part-00000.parquet']
+
+    # Each flush finalizes its own part file next to the earlier ones
+    store.append(_record('BTC', 3.0))
+    assert store.flush(timeout=5)
+    df = read_arbitrage_history(store.base_dir, cryptos=['BTC'])
+    assert sorted(df['arbitrage_after_fees']) == [1.0, 3.0]
+    assert df['buy_exchange'].tolist() == ['COINBASE', 'COINBASE']
+    store.close()
+    assert store.get_stats()['files_closed'] == 3
+
+
+def test_every_roll_closes_the_open_files(tmp_path):
+    store = ParquetArbitrageStore(base_dir=str(tmp_path), row_group_size=1000, flush_interval=0.0)
+    for profit in (1.0, 2.0, 3.0):
+        store.append(_record(profit=profit))
+
+    deadline = time.monotonic() + 5
+    while store.get_stats()['files_closed'] < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # Readable without flush() or close(), one part file per roll
+    assert sorted(read_arbitrage_history(store.base_dir)['arbitrage_after_fees']) == [1.0, 2.0, 3.0]
+    assert len(_part_files(store)) == 3
+    store.close()
+
+
+def test_files_rotate_after_max_rows(tmp_path):
+    store = ParquetArbitrageStore(base_dir=str(tmp_path), row_group_size=2, max_rows_per_file=4)
+    for profit in range(10):
+        store.append(_record(profit=float(profit)))
+    store.close()
+    assert len(_part_files(store)) == 3
+    assert sorted(read_arbitrage_history(store.base_dir)['arbitrage_after_fees']) == [float(p) for p in range(10)]
+
+
+def test_partition_filters(tmp_path):
+    store = ParquetArbitrageStore(base_dir=str(tmp_path))
+    store.append(_record('BTC', 1.0, datetime(2025, 5, 7)))
+    store.append(_record('BTC', 2.0, datetime(2025, 5, 8)))
+    store.append(_record('ETH', 3.0, datetime(2025, 5, 8)))
+    store.close()
+    df = read_arbitrage_history(store.base_dir, cryptos=['BTC'], start_date='2025-05-08')
+    assert df['arbitrage_after_fees'].tolist() == [2.0]
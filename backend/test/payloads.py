@@ -0,0 +1,22 @@
+'''Shared client_data payload factories for the delta stream, room and lifecycle tests'''
+
+
+def opportunity(crypto='BTC', buy='coinbase', sell='kraken', profit=100.0):
+    """One opportunity as DataCollector puts it in client_data"""
+    return {
+        'crypto': crypto,
+        'lowest_price_exchange': buy,
+        'buy_currency': 'USD',
+        'highest_price_exchange': sell,
+        'sell_currency': 'EUR',
+        'arbitrage_after_fees': profit,
+        'profit_percentage': profit / 100,
+        'spread_percentage': profit / 90
+    }
+
+
+def payload(*opportunities):
+    """client_data 'data' with the given opportunities, no_arbitrage without any"""
+    if not opportunities:
+        return {'status': 'no_arbitrage', 'message': 'No arbitrage opportunities found', 'opportunities': []}
+    return {'status': 'success', 'opportunities': list(opportunities)}
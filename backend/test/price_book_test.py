@@ -0,0 +1,84 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from app.external.utilities.cross_exchange_fiat_arbitrage import CrossExchangeFiatArbitrage
+from app.external.utilities.price_book import PriceBook, to_epoch
+
+TIMESTAMP = '2023-10-01T00:00:00+00:00'
+
+
+def test_dict_view_round_trips():
+    price_data = {
+        'BTC': {'COINBASE': {'USD': {'price': 50000.0, 'timestamp': TIMESTAMP},
+                             'EUR': {'price': 45500.0, 'timestamp': TIMESTAMP}}},
+        'ETH': {'KRAKEN': {'GBP': {'price': 2300.0, 'timestamp': TIMESTAMP}}},
+    }
+    book = PriceBook.from_dict(price_data)
+    assert book.to_dict() == price_data
+    assert dict(book) == price_data
+    assert book['ETH'] == price_data['ETH']
+    assert list(book) == ['BTC', 'ETH']
+
+    book.register_crypto('SOL')
+    assert book['SOL'] == {}
+    assert len(book) == 3
+
+
+def test_updates_grow_the_arrays_and_bump_the_version():
+    book = PriceBook(crypto_capacity=1, exchange_capacity=1, fiat_capacity=1)
+    for index in range(20):
+        book.update(f"C{index}", f"X{index % 7}", ['USD', 'EUR', 'GBP'][index % 3], float(index + 1), index)
+    assert book.shape() == (20, 7, 3)
+    assert book.version == 20
+    for index in range(20):
+        assert book.get_price(f"C{index}", f"X{index % 7}", ['USD', 'EUR', 'GBP'][index % 3]) == index + 1
+    assert book.get_price('C0', 'X1', 'USD') is None
+    assert book.get_price('DOGE', 'X0', 'USD') is None
+
+    ids = book.intern('C3', 'X3', 'USD')
+    book.update_ids(*ids, 99.0, TIMESTAMP)
+    assert book.get_price_ids(*ids) == 99.0
+    assert book.raw_timestamp(*ids) == TIMESTAMP
+    assert book.timestamps[ids] == to_epoch(TIMESTAMP)
+
+
+def test_to_epoch():
+    assert to_epoch(1700000000) == 1700000000.0
+    assert to_epoch('1700000000.5') == 1700000000.5
+    assert to_epoch(TIMESTAMP) == 1696118400.0
+    assert math.isnan(to_epoch('not a time'))
+
+
+def test_usd_conversion_skips_missing_rates():
+    book = PriceBook()
+    book.update('BTC', 'COINBASE', 'USD', 50000.0, TIMESTAMP)
+    book.update('BTC', 'BINANCE', 'EUR', 45500.0, TIMESTAMP)
+    book.update('BTC', 'KRAKEN', 'GBP', 38000.0, TIMESTAMP)
+    rates = book.fiat_rates({'EUR': {'rate': 1.1}, 'GBP': None})
+    assert rates[:2].tolist() == [1.0, 1.1] and np.isnan(rates[2])
+    usd = book.usd_prices({'EUR': 1.1, 'GBP': 1.3})
+    assert usd[0, book.exchange_ids['BINANCE'], book.fiat_ids['EUR']] == pytest.approx(50050.0)
+
+
+def test_vectorized_extremes_match_the_dict_scan():
+    rnd = random.Random(5)
+    rates = {'USD': {'rate': 1.0}, 'EUR': {'rate': 1.1}, 'GBP': {'rate': 1.3}}
+    book = PriceBook()
+    for _ in range(300):
+        fiat = rnd.choice(list(rates))
+        book.update(rnd.choice(['BTC', 'ETH', 'SOL']), rnd.choice(['A', 'B', 'C', 'D']), fiat,
+                    100.0 / rates[fiat]['rate'] * (1 + rnd.gauss(0, 0.01)), TIMESTAMP)
+
+    expected = CrossExchangeFiatArbitrage(book.to_dict(), rates).find_lowest_and_highest_price()
+    assert CrossExchangeFiatArbitrage(book, rates).find_lowest_and_highest_price() == expected
+
+    crypto_ids, lowest, highest = book.usd_extremes(rates)
+    for opportunity in expected:
+        row = crypto_ids.tolist().index(book.crypto_ids[opportunity['crypto']])
+        assert lowest[0][row] == pytest.approx(opportunity['lowest_price'])
+        assert book.exchanges[lowest[1][row]] == opportunity['lowest_price_exchange'][1]
+        assert highest[0][row] == pytest.approx(opportunity['highest_price'])
+        assert book.fiats[highest[2][row]] == opportunity['highest_price_exchange'][2]
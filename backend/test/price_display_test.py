@@ -0,0 +1,62 @@
+import io
+import time
+
+import pytest
+
+from app.external.price_display import PriceDisplay
+from app.external.utilities.price_book import PriceBook
+
+TIMESTAMP = '2023-10-01T12:00:00'
+
+
+def _book():
+    book = PriceBook()
+    book.update('BTC', 'COINBASE', 'USD', 50000.0, TIMESTAMP)
+    book.update('BTC', 'KRAKEN', 'EUR', 46000.0, TIMESTAMP)
+    return book
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        PriceDisplay('verbose')
+
+
+def test_per_tick_prints_every_update(capsys):
+    display = PriceDisplay('per_tick')
+    display.update(_book(), {'EURUSD': {'rate': 1.1, 'timestamp': TIMESTAMP}})
+    display.update(_book(), {})
+    out = capsys.readouterr().out
+    assert out.count('=== LATEST CRYPTOCURRENCY PRICES ===') == 2
+    assert 'USD: 50000.00 (12:00:00)' in out and 'EURUSD: 1.1000 (12:00:00)' in out
+    assert display.message_count == 2
+
+
+def test_quiet_only_counts(capsys):
+    display = PriceDisplay('quiet')
+    for _ in range(3):
+        display.update(_book(), {})
+    assert display.message_count == 3
+    assert display._thread is None
+    assert capsys.readouterr().out == ''
+
+
+def test_dashboard_renders_a_snapshot_off_the_hot_path():
+    stream = io.StringIO()
+    display = PriceDisplay('dashboard', refresh_interval=0.01, stream=stream)
+    book = _book()
+    for _ in range(5):
+        display.update(book, {'EURUSD': {'rate': None}})
+    try:
+        deadline = time.monotonic() + 5
+        while 'Updates: 5' not in stream.getvalue() and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        display.stop()
+
+    text = stream.getvalue()
+    assert 'Updates: 5' in text
+    # One row per exchange, '-' where the exchange has no quote in that fiat
+    last = text[text.rindex('=== LATEST CRYPTOCURRENCY PRICES ==='):]
+    assert [line.split() for line in last.splitlines() if line.startswith('  ')] == [
+        ['COINBASE', '-', '50000.00'], ['KRAKEN', '46000.00', '-']]
+    assert 'EURUSD: N/A' in text
@@ -0,0 +1,89 @@
+import pytest
+from flask import Flask, request
+from flask_socketio import SocketIO
+
+from app.websocket.rooms import DEFAULT_ROOMS, RoomBroadcaster, crypto_room, feed_room, source_room
+from payloads import opportunity, payload
+
+
+@pytest.fixture
+def server():
+    app = Flask(__name__)
+    socketio = SocketIO(app, async_mode='threading')
+    rooms = RoomBroadcaster(socketio, deltas=False)
+
+    @socketio.on('connect')
+    def connect(auth=None):
+        rooms.join(request.sid, DEFAULT_ROOMS)
+
+    @socketio.on('join')
+    def join(data):
+        rooms.leave(request.sid, data.get('leave', []))
+        rooms.join(request.sid, data['rooms'])
+
+    return app, socketio, rooms
+
+
+def _received(client, event):
+    return [message['args'][0] for message in client.get_received() if message['name'] == event]
+
+
+def test_updates_go_to_everyone_until_subscriptions_are_registered(server):
+    app, socketio, rooms = server
+    client = socketio.test_client(app)
+    rooms.broadcast('coinapi_update', {'prices': {}})
+    assert _received(client, 'coinapi_update') == [{'prices': {}}]
+
+    rooms.subscriptions = True
+    rooms.broadcast('coinapi_update', {'prices': {}})
+    assert _received(client, 'coinapi_update') == []
+    assert rooms.get_stats()['skipped'] == 1
+
+    client.emit('join', {'rooms': [source_room('coinapi')]})
+    rooms.broadcast('coinapi_update', {'prices': {}})
+    rooms.broadcast('xchangeapi_update', {'rates': []})
+    assert _received(client, 'coinapi_update') == [{'prices': {}}]
+    assert _received(client, 'xchangeapi_update') == []
+
+    # Events without rooms still reach everyone
+    rooms.broadcast('status', {'ok': True})
+    assert _received(client, 'status') == [{'ok': True}]
+
+
+def test_rooms_for_event():
+    rooms = RoomBroadcaster(socketio=None, deltas=False)
+    assert rooms.rooms_for_event('coinapi_update') == [source_room('coinapi'), feed_room('price')]
+    assert rooms.rooms_for_event('xchangeapi_update') == [source_room('xchange'), feed_room('price')]
+    assert rooms.rooms_for_event('other_update') == []
+
+
+def test_client_data_is_narrowed_per_crypto_room(server):
+    app, socketio, rooms = server
+    everything = socketio.test_client(app)
+    eth = socketio.test_client(app)
+    eth.emit('join', {'rooms': [crypto_room('eth')], 'leave': DEFAULT_ROOMS})
+
+    data = payload(opportunity('BTC'), opportunity('ETH'))
+    rooms.emit_client_data({'data': data, 'timestamp': 't0'})
+    assert [opp['crypto'] for opp in _received(everything, 'client_data')[0]['data']['opportunities']] == ['BTC', 'ETH']
+    assert [opp['crypto'] for opp in _received(eth, 'client_data')[0]['data']['opportunities']] == ['ETH']
+
+    rooms.emit_client_data({'data': payload(opportunity('BTC')), 'timestamp': 't1'})
+    [narrowed] = _received(eth, 'client_data')
+    assert narrowed['data']['status'] == 'no_arbitrage' and narrowed['data']['opportunities'] == []
+
+
+def test_parked_clients_miss_updates_until_unparked(server):
+    app, socketio, rooms = server
+    client = socketio.test_client(app)
+    sid = next(iter(rooms._rooms()[DEFAULT_ROOMS[0]]))
+    rooms.park(sid, DEFAULT_ROOMS)
+    assert rooms.client_data_rooms(sid) == DEFAULT_ROOMS
+
+    rooms.emit_client_data({'data': payload(opportunity('BTC'))})
+    assert _received(client, 'client_data') == []
+
+    assert rooms.unpark(sid) == set(DEFAULT_ROOMS)
+    rooms.emit_client_data({'data': payload(opportunity('BTC'))})
+    assert len(_received(client, 'client_data')) == 1
+    assert rooms.get_stats()['parked'] == 0
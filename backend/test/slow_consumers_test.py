@@ -0,0 +1,112 @@
+import pytest
+from flask import Flask, request
+from flask_socketio import SocketIO
+
+from app.websocket.rooms import DEFAULT_ROOMS, RoomBroadcaster, crypto_room
+from app.websocket.slow_consumers import LIVE, SNAPSHOT_ONLY, SlowConsumerMonitor
+from payloads import opportunity, payload
+
+
+@pytest.fixture
+def server():
+    app = Flask(__name__)
+    socketio = SocketIO(app, async_mode='threading')
+    rooms = RoomBroadcaster(socketio, deltas=True)
+
+    @socketio.on('connect')
+    def connect(auth=None):
+        rooms.join(request.sid, DEFAULT_ROOMS + [crypto_room('ETH')])
+
+    monitor = SlowConsumerMonitor(socketio, rooms)
+    monitor.queue_soft, monitor.queue_hard = 10, 100
+    monitor.latency_soft, monitor.latency_hard = 5.0, 30.0
+    monitor.snapshot_interval = 0.0
+    # Queue depths are set by the tests instead of read from Engine.IO sockets
+    depths = {}
+    monitor._queue_depth = lambda sid: depths.get(sid, 0)
+    return app, socketio, rooms, monitor, depths
+
+
+def _received(client, event):
+    return [message['args'][0] for message in client.get_received() if message['name'] == event]
+
+
+def _sid(rooms):
+    return next(iter(rooms._rooms()[DEFAULT_ROOMS[0]]))
+
+
+def test_lagging_client_is_parked_and_restored(server):
+    app, socketio, rooms, monitor, depths = server
+    client = socketio.test_client(app)
+    sid = _sid(rooms)
+
+    monitor.check()
+    assert monitor.get_client_stats(sid)['mode'] == LIVE
+
+    depths[sid] = 50
+    monitor.check()
+    assert monitor.get_client_stats(sid)['mode'] == SNAPSHOT_ONLY
+    assert rooms.parked[sid] == set(DEFAULT_ROOMS + [crypto_room('ETH')])
+    assert _received(client, 'client_mode') == [{'mode': SNAPSHOT_ONLY}]
+
+    rooms.emit_client_data({'data': payload(opportunity()), 'timestamp': 't0'})
+    assert _received(client, 'client_data') == []
+
+    # Still lagging: no snapshots until the queue has drained
+    depths[sid] = 8
+    monitor.check()
+    assert _received(client, 'client_data') == []
+
+    depths[sid] = 0
+    monitor.check()
+    assert monitor.get_client_stats(sid)['mode'] == LIVE
+    assert sid not in rooms.parked
+    received = client.get_received()
+    assert [message['args'][0] for message in received if message['name'] == 'client_mode'] == [{'mode': LIVE}]
+    [snapshot] = [message['args'][0] for message in received if message['name'] == 'client_data']
+    assert snapshot['type'] == 'arbitrage_snapshot'
+    assert monitor.get_client_stats(sid)['downgrades'] == 1
+
+
+def test_snapshot_only_client_gets_periodic_snapshots_once_drained(server):
+    app, socketio, rooms, monitor, depths = server
+    client = socketio.test_client(app)
+    sid = _sid(rooms)
+    depths[sid] = 50
+    monitor.check()
+    client.get_received()
+
+    depths[sid] = 0
+    monitor.clients[sid].rtt = 3.0  # drained, but latency is not under half the soft limit yet
+    monitor.check()
+    assert monitor.get_client_stats(sid)['mode'] == SNAPSHOT_ONLY
+    [snapshot] = _received(client, 'client_data')
+    assert snapshot['type'] == 'arbitrage_snapshot'
+
+
+def test_client_past_the_hard_limit_is_disconnected(server):
+    app, socketio, rooms, monitor, depths = server
+    client = socketio.test_client(app)
+    sid = _sid(rooms)
+    depths[sid] = 500
+
+    monitor.check()
+    assert not client.is_connected()
+    assert monitor.get_client_stats(sid) is None
+    assert monitor.get_stats() == {'clients': 0, 'snapshot_only': 0, 'disconnected': 1}
+
+
+def test_latency_counts_only_for_clients_that_acknowledge_probes(server):
+    app, socketio, rooms, monitor, depths = server
+    socketio.test_client(app)
+    sid = _sid(rooms)
+    monitor.check()
+    health = monitor.clients[sid]
+    assert health.probe_sent_at is not None and health.rtt is None
+    assert health.latency(health.probe_sent_at + 60) == 0.0
+
+    health.rtt = 0.1
+    assert health.latency(health.probe_sent_at + 6) == pytest.approx(6)
+    health.probe_sent_at -= 6
+    monitor.check()
+    assert monitor.get_client_stats(sid)['mode'] == SNAPSHOT_ONLY
@@ -0,0 +1,51 @@
+from app.external.utilities.snapshot_cache import SnapshotCache
+
+
+class _Book:
+    def __init__(self):
+        self.version = (0, 0)
+
+
+def test_values_are_computed_once_per_version():
+    book = _Book()
+    cache = SnapshotCache(lambda: book.version)
+    calls = []
+
+    def compute():
+        calls.append(book.version)
+        return len(calls)
+
+    assert cache.get('opportunities', compute) == 1
+    assert cache.get('opportunities', compute) == 1
+    assert cache.get('client_data', lambda: 'payload') == 'payload'
+
+    book.version = (1, 0)
+    assert cache.get('opportunities', compute) == 2
+    assert calls == [(0, 0), (1, 0)]
+    assert cache.get_stats() == {'version': (1, 0), 'cached': 1, 'hits': 1, 'misses': 3}
+
+
+def test_value_computed_across_a_version_change_is_not_cached():
+    book = _Book()
+    cache = SnapshotCache(lambda: book.version)
+
+    def compute():
+        # A price write lands while the value is being computed
+        book.version = (1, 0)
+        return 'stale'
+
+    assert cache.get('opportunities', compute) == 'stale'
+    assert cache.get('opportunities', lambda: 'fresh') == 'fresh'
+
+
+def test_etag_follows_the_version_and_the_process():
+    book = _Book()
+    cache = SnapshotCache(lambda: book.version)
+    etag = cache.etag()
+    assert etag == f"{cache.epoch}-0-0"
+    assert cache.etag() == etag
+
+    book.version = (0, 1)
+    assert cache.etag() != etag
+    assert SnapshotCache(lambda: book.version).etag() != cache.etag()
+    assert SnapshotCache(lambda: 7).etag().endswith('-7')
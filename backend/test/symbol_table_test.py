@@ -0,0 +1,43 @@
+import logging
+
+from app.external.utilities.price_book import PriceBook
+from app.processors.coinapi_processor import CoinAPIProcessor
+from app.processors.symbol_table import SymbolTable
+
+
+def test_parse():
+    assert SymbolTable.parse('BINANCE_SPOT_BTC_USDT') == ('BTC', 'BINANCE', 'USD')
+    assert SymbolTable.parse('BINANCEUS_SPOT_ETH_USD') == ('ETH', 'BINANCE', 'USD')
+    assert SymbolTable.parse('KRAKEN_SPOT_ETH_GBP') == ('ETH', 'KRAKEN', 'GBP')
+    assert SymbolTable.parse('KRAKEN_SPOT_SOL_USD') is None
+    assert SymbolTable.parse('KRAKEN_SPOT_BTC_JPY') is None
+
+
+def test_lookup_interns_into_the_price_book_once():
+    book = PriceBook()
+    table = SymbolTable(['COINBASE_SPOT_BTC_USD', 'KRAKEN_SPOT_BTC_EUR'], price_book=book)
+    entry = table.lookup('KRAKEN_SPOT_BTC_EUR')
+    assert entry is table.lookup('KRAKEN_SPOT_BTC_EUR')
+    assert (entry.key, entry.ids) == (('BTC', 'KRAKEN', 'EUR'), book.intern('BTC', 'KRAKEN', 'EUR'))
+    assert book.exchanges == ['COINBASE', 'KRAKEN']
+    assert len(table) == 2
+
+
+def test_unsupported_symbols_are_cached_and_logged_once(caplog):
+    table = SymbolTable()
+    with caplog.at_level(logging.DEBUG, logger='app.processors.symbol_table'):
+        for _ in range(3):
+            assert table.lookup('KRAKEN_SPOT_SOL_USD') is None
+    assert [record.getMessage() for record in caplog.records] == ['Unsupported symbol: KRAKEN_SPOT_SOL_USD']
+    assert len(table) == 1
+
+
+def test_processor_ticks_carry_the_symbol_entry(capsys):
+    book = PriceBook()
+    processor = CoinAPIProcessor(price_tracker=None, symbol_table=SymbolTable(price_book=book))
+    tick = processor.parse_message({'symbol_id': 'BITSTAMP_SPOT_ETH_EUR', 'price': 3000.0,
+                                    'time_exchange': '2023-10-01T00:00:00Z'})
+    assert (tick.key, tick.ids, tick.price) == (('ETH', 'BITSTAMP', 'EUR'), (0, 0, 0), 3000.0)
+    assert processor.parse_message({'symbol_id': 'KRAKEN_SPOT_SOL_USD', 'price': 1.0}) is None
+    assert processor.parse_message({'symbol_id': 'KRAKEN_SPOT_BTC_USD'}) is None
+    assert capsys.readouterr().out == ''
@@ -0,0 +1,72 @@
+import pytest
+
+from app.external.strategies.base_strategy import ConflatingStrategy, WebSocketStrategy
+from app.external.tick_conflator import TickConflator
+from app.types.tick import BookTick, RateTick, Tick
+
+
+def _tick(crypto, exchange, price):
+    return Tick(crypto, exchange, 'USD', price, '2023-10-01T00:00:00Z')
+
+
+def test_latest_tick_per_key_wins_in_latest_arrival_order():
+    conflator = TickConflator()
+    for tick in (_tick('BTC', 'COINBASE', 1.0), _tick('ETH', 'COINBASE', 2.0), _tick('BTC', 'COINBASE', 3.0),
+                 RateTick('EUR', 1.1), RateTick('EUR', 1.2)):
+        conflator.add(tick)
+    assert len(conflator) == 3
+
+    batch = conflator.drain()
+    assert [(tick.key, getattr(tick, 'price', None) or tick.rate) for tick in batch] == [
+        (('ETH', 'COINBASE', 'USD'), 2.0), (('BTC', 'COINBASE', 'USD'), 3.0), (('FX', 'EUR'), 1.2)]
+    assert conflator.drain() == []
+
+
+def test_book_updates_are_never_merged():
+    conflator = TickConflator()
+    for snapshot in (True, True, False, False):
+        conflator.add(BookTick('BTC', 'COINBASE', 'USD', [(1.0, 1.0)], [(2.0, 1.0)], '', snapshot))
+    assert [tick.snapshot for tick in conflator.drain()] == [True, False, False]
+
+
+def test_stats():
+    conflator = TickConflator()
+    assert conflator.get_stats()['avg_batch_size'] is None
+    for price in (1.0, 2.0, 3.0):
+        conflator.add(_tick('BTC', 'COINBASE', price))
+    conflator.drain()
+    conflator.add(_tick('ETH', 'COINBASE', 1.0))
+    conflator.drain()
+    assert conflator.get_stats() == {
+        'ticks_received': 4, 'ticks_merged': 2, 'ticks_applied': 2, 'batches': 2,
+        'max_batch_size': 1, 'avg_batch_size': 1.0, 'merge_ratio': 0.5}
+
+
+class _Plain(WebSocketStrategy):
+    def get_connection_params(self):
+        return {'uri': 'wss://example'}
+
+    def format_auth_message(self):
+        return {}
+
+    async def process_message(self, message):
+        return None
+
+    def get_supported_pairs(self):
+        return []
+
+    def get_name(self):
+        return 'plain'
+
+
+def test_conflation_is_opt_in():
+    # Plain strategies never produce ticks, so every message goes through process_message
+    assert _Plain().parse_tick('{"price": 1}') is None
+    assert not hasattr(_Plain(), 'apply_ticks')
+
+    class HalfConflating(_Plain, ConflatingStrategy):
+        def parse_tick(self, message):
+            return None
+
+    with pytest.raises(TypeError, match='apply_ticks'):
+        HalfConflating()
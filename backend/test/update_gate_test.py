@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+from app.external.utilities.incremental_arbitrage import IncrementalArbitrageEngine
+from app.external.utilities.update_gate import UpdateGate, parse_epsilons
+
+RATES = {'USD': {'rate': 1.0}, 'EUR': {'rate': 1.1}, 'GBP': {'rate': 1.3}}
+
+
+def _reasons(gate):
+    return {reason: count for reason, count in gate.get_stats()['reasons'].items() if count}
+
+
+def test_decisions():
+    gate = UpdateGate(RATES)
+    engine = IncrementalArbitrageEngine(RATES)
+
+    def tick(exchange, fiat, price, previous):
+        triggered = gate.check('BTC', exchange, fiat, price, previous)
+        engine.update_price('BTC', exchange, fiat, price)
+        if triggered:
+            gate.commit('BTC', engine.get_opportunity('BTC'))
+        return triggered
+
+    assert tick('COINBASE', 'USD', 50000.0, None)
+    assert tick('KRAKEN', 'USD', 51000.0, None)
+    assert tick('BINANCE', 'USD', 50500.0, None)
+    assert not tick('BINANCE', 'USD', 50500.0, 50500.0)
+    assert not tick('BINANCE', 'USD', 50700.0, 50500.0)
+    # Beyond the highest venue, and a move of an extreme venue itself
+    assert tick('BINANCE', 'USD', 51200.0, 50700.0)
+    assert tick('BINANCE', 'USD', 51100.0, 51200.0)
+    assert _reasons(gate) == {'trigger:new_venue': 3, 'trigger:extremes': 2,
+                              'skip:duplicate': 1, 'skip:inside_extremes': 1}
+
+
+def test_epsilons():
+    assert parse_epsilons('btc=0.00005, ETH/EUR=0.0001') == {'BTC': 0.00005, 'ETH/EUR': 0.0001}
+    gate = UpdateGate(RATES, epsilon=0.001, epsilons={'ETH/EUR': 0.01}, extremes_check=False)
+    assert gate.epsilon_for('ETH', 'EUR') == 0.01
+    assert gate.epsilon_for('ETH', 'USD') == 0.001
+    assert gate.check('BTC', 'COINBASE', 'USD', 100.0, None)
+    assert not gate.check('BTC', 'COINBASE', 'USD', 100.05, 100.0)
+    # Measured from the price that last passed, so small moves add up
+    assert gate.check('BTC', 'COINBASE', 'USD', 100.11, 100.05)
+
+
+def test_reset_extremes_triggers_next_tick():
+    gate = UpdateGate(RATES)
+    gate.commit('BTC', {'lowest_price': 100.0, 'lowest_price_exchange': ('BTC', 'A', 'USD'),
+                        'highest_price': 110.0, 'highest_price_exchange': ('BTC', 'B', 'USD')})
+    assert not gate.check('BTC', 'C', 'USD', 105.0, 104.0)
+    gate.reset_extremes()
+    assert gate.check('BTC', 'C', 'USD', 106.0, 105.0)
+
+
+def test_disabled_gate_passes_everything():
+    gate = UpdateGate(RATES, enabled=False)
+    assert gate.check('BTC', 'A', 'USD', 100.0, 100.0)
+    assert gate.get_stats()['ticks'] == 0
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_lossless_skipped_ticks_never_move_the_opportunity(seed):
+    rnd = random.Random(seed)
+    rates = {fiat: dict(rate) for fiat, rate in RATES.items()}
+    gate = UpdateGate(rates)
+    engine = IncrementalArbitrageEngine(rates)
+    prices = {}
+    committed = {}
+    for step in range(3000):
+        crypto = rnd.choice(['BTC', 'ETH'])
+        venue = (crypto, rnd.choice('ABCDE'), rnd.choice(list(rates)))
+        base = {'BTC': 100.0, 'ETH': 10.0}[crypto] / RATES[venue[2]]['rate']
+        previous = prices.get(venue)
+        price = previous if previous is not None and rnd.random() < 0.3 else round(base * (1 + rnd.gauss(0, 0.002)), 4)
+        prices[venue] = price
+        triggered = gate.check(*venue, price, previous)
+        engine.update_price(*venue, price)
+        if triggered:
+            committed[crypto] = engine.get_opportunity(crypto)
+            gate.commit(crypto, committed[crypto])
+        else:
+            assert engine.get_opportunity(crypto) == committed.get(crypto)
+        if step == 1500:
+            rates['EUR']['rate'] = 1.2
+            engine.update_exchange_rate('EUR', rates['EUR'])
+            gate.reset_extremes()
+            committed = {crypto: engine.get_opportunity(crypto) for crypto in committed}
+    assert gate.get_stats()['skipped'] > 0
@@ -10,6 +10,7 @@ export interface ArbitrageOpportunityData {
     total_fees: number;
     arbitrage_after_fees: number;
     profit_percentage: number;
+    id?: string;  // crypto:buy_exchange:buy_currency>sell_exchange:sell_currency, set by the delta stream
 }
 
 export interface ArbitrageData {
@@ -18,4 +19,30 @@ export interface ArbitrageData {
     opportunities: ArbitrageOpportunityData[];
 }
 
+// Full state of one client_data stream (feed:arbitrage or crypto:<CRYPTO>)
+export interface ArbitrageStreamState {
+    seq: number;
+    status: ArbitrageData['status'];
+    message?: string | null;
+    opportunities: ArbitrageOpportunityData[];
+}
+
+export interface ArbitrageSnapshot {
+    type: 'arbitrage_snapshot';
+    streams: Record<string, ArbitrageStreamState>;
+    timestamp: string;
+}
+
+export interface ArbitrageDelta {
+    type: 'arbitrage_delta';
+    stream: string;
+    seq: number;
+    status: ArbitrageData['status'];
+    message?: string | null;
+    added: ArbitrageOpportunityData[];
+    changed: ArbitrageOpportunityData[];
+    removed: string[];
+    timestamp: string;
+}
+
 export type { ArbitrageData, ArbitrageOpportunityData };
\ No newline at end of file
@@ -1,8 +1,17 @@
-import { useEffect, useState, useCallback } from 'react';
+import { useEffect, useState, useCallback, useRef } from 'react';
 import { io, Socket } from 'socket.io-client';
-import { ArbitrageData, ArbitrageOpportunityData } from '../app/types/arbitrage';
+import { decode as decodeMsgpack } from '@msgpack/msgpack';
+import {
+    ArbitrageData,
+    ArbitrageOpportunityData,
+    ArbitrageDelta,
+    ArbitrageSnapshot,
+    ArbitrageStreamState
+} from '../app/types/arbitrage';
 
 const BACKEND_URL = process.env.NEXT_PUBLIC_BACKEND_URL || 'http://localhost:5001';
+// 'msgpack' asks the server for compact binary payloads (short field ids, epoch-ms timestamps)
+const SOCKET_ENCODING = process.env.NEXT_PUBLIC_SOCKET_ENCODING || 'json';
 
 interface HelloMessage {
     message: string;
@@ -14,6 +23,56 @@ interface ConnectionStatus {
     lastError: string | null;
 }
 
+interface StreamState {
+    seq: number;
+    status: ArbitrageData['status'];
+    message?: string | null;
+    opportunities: Map<string, ArbitrageOpportunityData>;
+}
+
+const toStreamState = (state: ArbitrageStreamState): StreamState => ({
+    seq: state.seq,
+    status: state.status,
+    message: state.message,
+    opportunities: new Map(state.opportunities.map((opp) => [opp.id as string, opp]))
+});
+
+interface EncodingTable {
+    fields: Record<string, string>;
+    timestamps: string[];
+}
+
+// Expand a MessagePack payload back into the JSON shape: long field names, ISO timestamps
+const expandPayload = (value: any, table: EncodingTable): any => {
+    if (Array.isArray(value)) {
+        return value.map((item) => expandPayload(item, table));
+    }
+    if (value === null || typeof value !== 'object') {
+        return value;
+    }
+    const expanded: Record<string, any> = {};
+    Object.entries(value).forEach(([key, item]) => {
+        expanded[table.fields[key] ?? key] = table.timestamps.includes(key) && typeof item === 'number'
+            ? new Date(item).toISOString()
+            : expandPayload(item, table);
+    });
+    return expanded;
+};
+
+// Merge the client's streams (feed:arbitrage, or one per subscribed crypto) into one ArbitrageData
+const mergeStreams = (streams: Map<string, StreamState>): ArbitrageData => {
+    const states = Array.from(streams.values());
+    const opportunities = states
+        .flatMap((state) => Array.from(state.opportunities.values()))
+        .sort((a, b) => b.arbitrage_after_fees - a.arbitrage_after_fees);
+    const first = states[0];
+    return {
+        status: opportunities.length ? 'success' : (first?.status ?? 'waiting'),
+        message: opportunities.length ? undefined : (first?.message ?? undefined),
+        opportunities
+    };
+};
+
 const useWebSocket = () => {
     // State
     const [socket, setSocket] = useState<Socket | null>(null);
@@ -24,6 +83,10 @@ const useWebSocket = () => {
         lastError: null 
     });
     const [lastUpdate, setLastUpdate] = useState<Date | null>(null);
+    // Delta stream state per stream name, applied outside React state so deltas never see a stale copy
+    const streamsRef = useRef<Map<string, StreamState>>(new Map());
+    const awaitingResyncRef = useRef(false);
+    const encodingRef = useRef<EncodingTable | null>(null);
 
     // Initialize socket connection
     useEffect(() => {
@@ -36,7 +99,23 @@ const useWebSocket = () => {
             reconnectionAttempts: Infinity,
             reconnectionDelay: 1000,
             reconnectionDelayMax: 5000,
-            timeout: 20000
+            timeout: 20000,
+            auth: { encoding: SOCKET_ENCODING }
+        });
+
+        // Data events arrive MessagePack encoded once the server agreed to it, JSON otherwise
+        const decode = (data: any) => {
+            if (encodingRef.current && (data instanceof ArrayBuffer || ArrayBuffer.isView(data))) {
+                return expandPayload(decodeMsgpack(data as ArrayBuffer), encodingRef.current);
+            }
+            return data;
+        };
+
+        newSocket.on('encoding', (data: { encoding: string; fields?: Record<string, string>; timestamps?: string[] }) => {
+            console.log('[WebSocket] Payload encoding:', data.encoding);
+            encodingRef.current = data.encoding === 'msgpack' && data.fields
+                ? { fields: data.fields, timestamps: data.timestamps ?? [] }
+                : null;
         });
 
         // Connection handlers
@@ -53,6 +132,8 @@ const useWebSocket = () => {
             setConnectionStatus({ isConnected: false, lastError: null });
             setHelloMessage(null);
             setArbitrageData(null);
+            // The server sends a fresh snapshot on reconnect
+            streamsRef.current = new Map();
         });
 
         newSocket.on('connect_error', (error) => {
@@ -64,16 +145,63 @@ const useWebSocket = () => {
         });
 
         // Message handlers
-        newSocket.on('hello', (data: HelloMessage) => {
+        newSocket.on('hello', (payload: any) => {
+            const data = decode(payload) as HelloMessage;
             console.log('[WebSocket] Hello message received:', data);
             setHelloMessage(data);
             setLastUpdate(new Date());
         });
 
-        newSocket.on('client_data', (data: { type: string; data: ArbitrageData; timestamp: string }) => {
-            console.log('[WebSocket] Raw client data received:', JSON.stringify(data, null, 2));
-            
-            if (data.type === 'arbitrage_update') {
+        // The server measures our latency with acknowledged probes and drops us to snapshot-only updates
+        // (client_mode 'snapshot_only') while we lag behind
+        newSocket.on('latency_probe', (_data: unknown, ack?: () => void) => {
+            ack?.();
+        });
+
+        newSocket.on('client_mode', (data: { mode: string }) => {
+            console.log('[WebSocket] Delivery mode:', data.mode);
+        });
+
+        newSocket.on('client_data', (payload: any) => {
+            const data = decode(payload);
+            if (data.type === 'arbitrage_snapshot') {
+                const snapshot = data as ArbitrageSnapshot;
+                streamsRef.current = new Map(
+                    Object.entries(snapshot.streams).map(([name, state]) => [name, toStreamState(state)])
+                );
+                awaitingResyncRef.current = false;
+                setArbitrageData(mergeStreams(streamsRef.current));
+                setLastUpdate(new Date(snapshot.timestamp));
+            } else if (data.type === 'arbitrage_delta') {
+                const delta = data as ArbitrageDelta;
+                const stream = streamsRef.current.get(delta.stream);
+                if (!stream || delta.seq !== stream.seq + 1) {
+                    // Missed a delta (or never got this stream's snapshot): ask for the full state once
+                    if (!awaitingResyncRef.current) {
+                        console.log('[WebSocket] Sequence gap on', delta.stream, '- requesting resync');
+                        awaitingResyncRef.current = true;
+                        newSocket.emit('resync');
+                    }
+                    return;
+                }
+                delta.removed.forEach((id) => stream.opportunities.delete(id));
+                [...delta.added, ...delta.changed].forEach((opp) => stream.opportunities.set(opp.id as string, opp));
+                stream.seq = delta.seq;
+                stream.status = delta.status;
+                stream.message = delta.message;
+                setArbitrageData(mergeStreams(streamsRef.current));
+                setLastUpdate(new Date(delta.timestamp));
+            } else if (data.type === 'arbitrage_heartbeat') {
+                // Nothing changed; a heartbeat ahead of our sequence means we missed a delta
+                const stream = streamsRef.current.get(data.stream);
+                if ((!stream || data.seq !== stream.seq) && !awaitingResyncRef.current) {
+                    awaitingResyncRef.current = true;
+                    newSocket.emit('resync');
+                }
+                setLastUpdate(new Date(data.timestamp));
+            } else if (data.type === 'arbitrage_update') {
+                // Full payloads, when the server runs with CLIENT_DATA_DELTAS=false
+                console.log('[WebSocket] Raw client data received:', JSON.stringify(data, null, 2));
                 console.log('[WebSocket] Processing arbitrage update...');
                 setArbitrageData(data.data);
                 setLastUpdate(new Date(data.timestamp));
@@ -1,30 +1,55 @@
+import os
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 
-def plot_prices_in_usd(file_path):
-    """Plot prices in USD across exchanges over time."""
+EXCHANGES = ['BINANCE', 'COINBASE', 'KRAKEN']
+
+
+def load_usd_prices(file_path, crypto='BTC'):
+    """
+    Load USD prices per exchange as a DataFrame with a 'datetime' column and one column per exchange.
+    file_path is either a crypto_fiat_arbitrage_1 CSV file or a Parquet dataset directory written by
+    ParquetArbitrageStore, of which only the USD price columns of the crypto's partitions are read.
+    """
+    if os.path.isdir(file_path):
+        columns = ['timestamp'] + [f"{exchange}_USD" for exchange in EXCHANGES]
+        df = pd.read_parquet(file_path, columns=columns, filters=[('crypto', '=', crypto)])
+        df = df.rename(columns={f"{exchange}_USD": exchange for exchange in EXCHANGES})
+        df['datetime'] = df['timestamp']
+        return df.sort_values('datetime')
+
     # Load the CSV file
     df = pd.read_csv(file_path)
 
-    # Filter rows for trading_pair == BTC/USD
-    df = df[df['trading_pair'] == 'BTC/USD']
+    # Filter rows for the crypto's USD trading pair
+    df = df[df['trading_pair'] == f"{crypto}/USD"]
 
     # Convert timestamp to datetime
     df['datetime'] = pd.to_datetime(df['timestamp'])
 
     # Filter columns for USD prices
-    usd_columns = ['BINANCE_price', 'COINBASE_price', 'KRAKEN_price']
+    usd_columns = [f"{exchange}_price" for exchange in EXCHANGES]
 
     # Check if required columns exist
     for col in usd_columns:
         if col not in df.columns:
             raise ValueError(f"Missing required column: {col}")
 
+    # "N/A" marks exchanges without a price
+    for col in usd_columns:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df.rename(columns={f"{exchange}_price": exchange for exchange in EXCHANGES})
+
+
+def plot_prices_in_usd(file_path, crypto='BTC'):
+    """Plot prices in USD across exchanges over time."""
+    df = load_usd_prices(file_path, crypto)
+
     # Plot the data
     plt.figure(figsize=(12, 6))
-    for col in usd_columns:
-        plt.plot(df['datetime'], df[col], label=col.split('_')[0])
+    for exchange in EXCHANGES:
+        plt.plot(df['datetime'], df[exchange], label=exchange)
 
     # Format the plot
     plt.title('Cryptocurrency Prices in USD Across Exchanges')
@@ -46,7 +71,8 @@ if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser(description="Plot USD prices across exchanges.")
-    parser.add_argument('file_path', help="Path to the CSV file containing price data.")
+    parser.add_argument('file_path', help="Path to the CSV file or Parquet dataset directory containing price data.")
+    parser.add_argument('--crypto', default='BTC', help="Cryptocurrency to plot (default: BTC).")
     args = parser.parse_args()
 
-    plot_prices_in_usd(args.file_path)
+    plot_prices_in_usd(args.file_path, args.crypto)